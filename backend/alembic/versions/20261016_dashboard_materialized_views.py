@@ -0,0 +1,72 @@
+"""Materialized views de dashboard por UF e por provider (REFRESH CONCURRENTLY).
+
+Revision ID: dashboard_mvs_20261016
+Revises: inv_risk_review_20260418
+Create Date: 2026-10-16
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "dashboard_mvs_20261016"
+down_revision = "inv_risk_review_20260418"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    # Cada view tem um índice único: exigido por REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute(
+        sa.text(
+            """
+            CREATE MATERIALIZED VIEW IF NOT EXISTS mv_dashboard_properties_by_state AS
+            SELECT i.user_id, p.state, COUNT(*)::bigint AS cnt
+            FROM properties p
+            JOIN investigations i ON i.id = p.investigation_id
+            WHERE p.state IS NOT NULL
+            GROUP BY i.user_id, p.state
+            """
+        )
+    )
+    op.execute(
+        sa.text(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS ix_mv_dashboard_props_state_uq
+            ON mv_dashboard_properties_by_state (user_id, state)
+            """
+        )
+    )
+    op.execute(
+        sa.text(
+            """
+            CREATE MATERIALIZED VIEW IF NOT EXISTS mv_dashboard_legal_queries_by_provider AS
+            SELECT i.user_id, q.provider,
+                   COUNT(*)::bigint AS queries,
+                   COALESCE(SUM(q.result_count), 0)::bigint AS total
+            FROM legal_queries q
+            JOIN investigations i ON i.id = q.investigation_id
+            GROUP BY i.user_id, q.provider
+            """
+        )
+    )
+    op.execute(
+        sa.text(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS ix_mv_dashboard_legal_provider_uq
+            ON mv_dashboard_legal_queries_by_provider (user_id, provider)
+            """
+        )
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    op.execute(sa.text("DROP MATERIALIZED VIEW IF EXISTS mv_dashboard_legal_queries_by_provider"))
+    op.execute(sa.text("DROP MATERIALIZED VIEW IF EXISTS mv_dashboard_properties_by_state"))
@@ -0,0 +1,43 @@
+"""Outbox de entregas de webhook (dispatcher em background com retry).
+
+Revision ID: webhook_outbox_20261016
+Revises: dashboard_mvs_20261016
+Create Date: 2026-10-16
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "webhook_outbox_20261016"
+down_revision = "dashboard_mvs_20261016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "webhook_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("webhook_id", sa.Integer(), nullable=False),
+        sa.Column("event", sa.String(length=100), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_webhook_outbox_id", "webhook_outbox", ["id"])
+    op.create_index("ix_webhook_outbox_webhook_id", "webhook_outbox", ["webhook_id"])
+    # Claim do dispatcher: pendentes por next_attempt_at
+    op.create_index(
+        "ix_webhook_outbox_status_next", "webhook_outbox", ["status", "next_attempt_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_webhook_outbox_status_next", table_name="webhook_outbox")
+    op.drop_index("ix_webhook_outbox_webhook_id", table_name="webhook_outbox")
+    op.drop_index("ix_webhook_outbox_id", table_name="webhook_outbox")
+    op.drop_table("webhook_outbox")
@@ -18,13 +18,14 @@ Data: 2026-02-05
 Versão: 1.0.0
 """
 
+import asyncio
 import logging
 from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
-from sqlalchemy import and_, case, desc, extract, func
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, desc, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 logger = logging.getLogger(__name__)
 
@@ -43,13 +44,41 @@ def _sql_count_int(value: Any) -> int:
         return 0
 
 
+def _between(column, start_date: datetime, end_date: datetime):
+    return and_(column >= start_date, column <= end_date)
+
+
+def _count_where(condition):
+    """COUNT condicional: várias contagens numa única consulta."""
+    return func.count(case((condition, 1)))
+
+
 class AdminDashboard:
-    """Dashboard Administrativo com métricas completas do sistema"""
+    """
+    Dashboard Administrativo com métricas completas do sistema
 
-    def __init__(self, db: Session):
+    Todas as consultas usam AsyncSession (não bloqueiam o event loop). Com
+    session_factory, get_complete_dashboard corre as métricas independentes em
+    paralelo, cada uma na sua própria sessão/ligação.
+    """
+
+    def __init__(self, db: AsyncSession, session_factory: Optional[async_sessionmaker] = None):
         self.db = db
+        self.session_factory = session_factory
         self.logger = logging.getLogger(__name__)
 
+    async def _scalar(self, stmt) -> int:
+        return _sql_count_int((await self.db.execute(stmt)).scalar())
+
+    def _is_postgresql(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    def _duration_seconds(self, start, end):
+        """Expressão SQL da duração (segundos) entre duas colunas datetime."""
+        if self._is_postgresql():
+            return func.extract("epoch", end - start)
+        return (func.julianday(end) - func.julianday(start)) * 86400.0
+
     async def get_platform_metrics(
         self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None
     ) -> Dict[str, Any]:
@@ -72,77 +101,60 @@ class AdminDashboard:
             from app.domain.investigation import Investigation, InvestigationStatus
             from app.domain.user import User
 
-            # Total de usuários
-            total_users = _sql_count_int(self.db.query(func.count(User.id)).scalar())
-
-            # Usuários ativos no período
-            active_users = _sql_count_int(
-                self.db.query(func.count(User.id.distinct()))
-                .filter(and_(User.last_login >= start_date, User.last_login <= end_date))
-                .scalar()
-            )
-
-            # Novos usuários no período
-            new_users = _sql_count_int(
-                self.db.query(func.count(User.id))
-                .filter(and_(User.created_at >= start_date, User.created_at <= end_date))
-                .scalar()
-            )
-
-            # Total de investigações
-            total_investigations = _sql_count_int(
-                self.db.query(func.count(Investigation.id)).scalar()
-            )
-
-            # Investigações criadas no período
-            investigations_period = _sql_count_int(
-                self.db.query(func.count(Investigation.id))
-                .filter(
-                    and_(
-                        Investigation.created_at >= start_date, Investigation.created_at <= end_date
-                    )
-                )
-                .scalar()
-            )
-
-            # Investigações concluídas no período
-            completed_investigations = _sql_count_int(
-                self.db.query(func.count(Investigation.id))
-                .filter(
-                    and_(
-                        Investigation.completed_at >= start_date,
-                        Investigation.completed_at <= end_date,
-                        Investigation.status == InvestigationStatus.COMPLETED,
-                    )
-                )
-                .scalar()
-            )
-
-            # Investigações ativas
-            active_investigations = _sql_count_int(
-                self.db.query(func.count(Investigation.id))
-                .filter(
-                    Investigation.status.in_(
-                        [InvestigationStatus.IN_PROGRESS, InvestigationStatus.PENDING]
+            previous_start = start_date - (end_date - start_date)
+
+            # Usuários: total, ativos, novos e novos no período anterior (uma consulta)
+            users_row = (
+                await self.db.execute(
+                    select(
+                        func.count(User.id),
+                        _count_where(_between(User.last_login, start_date, end_date)),
+                        _count_where(_between(User.created_at, start_date, end_date)),
+                        _count_where(
+                            and_(User.created_at >= previous_start, User.created_at < start_date)
+                        ),
                     )
                 )
-                .scalar()
+            ).one()
+            total_users, active_users, new_users, previous_period_users = (
+                _sql_count_int(v) for v in users_row
             )
-
-            # Taxa de crescimento de usuários
-            previous_period_users = (
-                _sql_count_int(
-                    self.db.query(func.count(User.id))
-                    .filter(
-                        and_(
-                            User.created_at >= start_date - (end_date - start_date),
-                            User.created_at < start_date,
-                        )
+            previous_period_users = previous_period_users or 1
+
+            # Investigações: total, no período, concluídas, ativas e período anterior
+            inv_row = (
+                await self.db.execute(
+                    select(
+                        func.count(Investigation.id),
+                        _count_where(_between(Investigation.created_at, start_date, end_date)),
+                        _count_where(
+                            and_(
+                                _between(Investigation.completed_at, start_date, end_date),
+                                Investigation.status == InvestigationStatus.COMPLETED,
+                            )
+                        ),
+                        _count_where(
+                            Investigation.status.in_(
+                                [InvestigationStatus.IN_PROGRESS, InvestigationStatus.PENDING]
+                            )
+                        ),
+                        _count_where(
+                            and_(
+                                Investigation.created_at >= previous_start,
+                                Investigation.created_at < start_date,
+                            )
+                        ),
                     )
-                    .scalar()
                 )
-                or 1
-            )
+            ).one()
+            (
+                total_investigations,
+                investigations_period,
+                completed_investigations,
+                active_investigations,
+                previous_period_investigations,
+            ) = (_sql_count_int(v) for v in inv_row)
+            previous_period_investigations = previous_period_investigations or 1
 
             user_growth_rate = (
                 ((new_users - previous_period_users) / previous_period_users * 100)
@@ -150,21 +162,6 @@ class AdminDashboard:
                 else 0
             )
 
-            # Taxa de crescimento de investigações
-            previous_period_investigations = (
-                _sql_count_int(
-                    self.db.query(func.count(Investigation.id))
-                    .filter(
-                        and_(
-                            Investigation.created_at >= start_date - (end_date - start_date),
-                            Investigation.created_at < start_date,
-                        )
-                    )
-                    .scalar()
-                )
-                or 1
-            )
-
             investigation_growth_rate = (
                 (
                     (investigations_period - previous_period_investigations)
@@ -239,6 +236,10 @@ class AdminDashboard:
             # Define o campo de agrupamento
             if group_by == "day":
                 group_field = func.date(Investigation.created_at)
+            elif group_by in ("week", "month") and not self._is_postgresql():
+                # SQLite: sem date_trunc (semana começa à segunda, como no PostgreSQL)
+                modifiers = ("-6 days", "weekday 1") if group_by == "week" else ("start of month",)
+                group_field = func.date(Investigation.created_at, *modifiers)
             elif group_by == "week":
                 group_field = func.date_trunc("week", Investigation.created_at)
             elif group_by == "month":
@@ -250,7 +251,7 @@ class AdminDashboard:
 
             # Query principal
             query = (
-                self.db.query(
+                select(
                     group_field.label("period"),
                     func.count(Investigation.id).label("total"),
                     func.count(
@@ -266,16 +267,12 @@ class AdminDashboard:
                         "cancelled"
                     ),
                 )
-                .filter(
-                    and_(
-                        Investigation.created_at >= start_date, Investigation.created_at <= end_date
-                    )
-                )
+                .where(_between(Investigation.created_at, start_date, end_date))
                 .group_by("period")
                 .order_by("period")
             )
 
-            results = query.all()
+            results = (await self.db.execute(query)).all()
 
             # Formata os resultados
             data = []
@@ -341,22 +338,29 @@ class AdminDashboard:
             end_date = datetime.utcnow()
 
         try:
-            from app.domain.investigation import Investigation
+            from app.domain.investigation import Investigation, InvestigationStatus
 
-            # Query base para investigações concluídas
-            base_query = self.db.query(Investigation).filter(
-                and_(
-                    Investigation.status == "completed",
-                    Investigation.completed_at.isnot(None),
-                    Investigation.completed_at >= start_date,
-                    Investigation.completed_at <= end_date,
-                )
+            duration = self._duration_seconds(Investigation.created_at, Investigation.completed_at)
+            completed_filter = and_(
+                Investigation.status == InvestigationStatus.COMPLETED,
+                Investigation.completed_at.isnot(None),
+                _between(Investigation.completed_at, start_date, end_date),
             )
 
-            # Calcula tempo médio geral
-            investigations = base_query.all()
+            # Contagem, média, mínimo e máximo calculados na BD
+            total, avg_seconds, min_seconds, max_seconds = (
+                await self.db.execute(
+                    select(
+                        func.count(Investigation.id),
+                        func.avg(duration),
+                        func.min(duration),
+                        func.max(duration),
+                    ).where(completed_filter)
+                )
+            ).one()
+            total = _sql_count_int(total)
 
-            if not investigations:
+            if not total:
                 return {
                     "period": {
                         "start_date": start_date.isoformat(),
@@ -366,61 +370,72 @@ class AdminDashboard:
                     "average_time": {"days": 0, "hours": 0, "minutes": 0},
                 }
 
-            # Calcula tempos
-            completion_times = []
-            for inv in investigations:
-                if inv.created_at and inv.completed_at:
-                    delta = inv.completed_at - inv.created_at
-                    completion_times.append(delta.total_seconds())
+            # Mediana: o elemento central pela ordem da duração (só uma linha transferida)
+            median_seconds = (
+                await self.db.execute(
+                    select(duration)
+                    .where(completed_filter)
+                    .order_by(duration)
+                    .offset(total // 2)
+                    .limit(1)
+                )
+            ).scalar()
 
-            avg_seconds = sum(completion_times) / len(completion_times) if completion_times else 0
+            # Segundos inteiros (julianday no SQLite tem erro de arredondamento)
+            avg_seconds = round(float(avg_seconds or 0))
             avg_days = int(avg_seconds // 86400)
             avg_hours = int((avg_seconds % 86400) // 3600)
             avg_minutes = int((avg_seconds % 3600) // 60)
 
             result = {
                 "period": {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()},
-                "total_completed": len(investigations),
+                "total_completed": total,
                 "average_time": {
                     "days": avg_days,
                     "hours": avg_hours,
                     "minutes": avg_minutes,
                     "total_seconds": int(avg_seconds),
                 },
-                "median_time_seconds": (
-                    int(sorted(completion_times)[len(completion_times) // 2])
-                    if completion_times
-                    else 0
-                ),
-                "min_time_seconds": int(min(completion_times)) if completion_times else 0,
-                "max_time_seconds": int(max(completion_times)) if completion_times else 0,
+                "median_time_seconds": round(float(median_seconds or 0)),
+                "min_time_seconds": round(float(min_seconds or 0)),
+                "max_time_seconds": round(float(max_seconds or 0)),
             }
 
-            # Agrupamento opcional
+            # Agrupamento opcional (GROUP BY na BD)
             if group_by:
-                grouped_data = defaultdict(list)
-
-                for inv in investigations:
-                    if inv.created_at and inv.completed_at:
-                        delta = (inv.completed_at - inv.created_at).total_seconds()
-
-                        if group_by == "category":
-                            key = inv.category or "uncategorized"
-                        elif group_by == "priority":
-                            key = inv.priority or "medium"
-                        elif group_by == "user":
-                            key = f"user_{inv.user_id}"
-                        else:
-                            key = "all"
-
-                        grouped_data[key].append(delta)
+                if group_by == "priority":
+                    key_column = Investigation.priority
+                elif group_by == "user":
+                    key_column = Investigation.user_id
+                elif group_by == "category":
+                    # Investigation não tem categoria: tudo cai em "uncategorized"
+                    key_column = literal("uncategorized")
+                else:
+                    key_column = literal("all")
+
+                rows = (
+                    await self.db.execute(
+                        select(
+                            key_column.label("key"),
+                            func.count(Investigation.id).label("count"),
+                            func.avg(duration).label("average"),
+                        )
+                        .where(completed_filter)
+                        .group_by(key_column)
+                    )
+                ).all()
 
-                # Calcula médias por grupo
                 grouped_averages = {}
-                for key, times in grouped_data.items():
-                    avg_sec = sum(times) / len(times) if times else 0
+                for row in rows:
+                    if group_by == "user":
+                        key = f"user_{row.key}"
+                    elif group_by == "priority":
+                        key = row.key or "medium"
+                    else:
+                        key = row.key
+                    avg_sec = round(float(row.average or 0))
                     grouped_averages[key] = {
-                        "count": len(times),
+                        "count": _sql_count_int(row.count),
                         "average_days": int(avg_sec // 86400),
                         "average_hours": int((avg_sec % 86400) // 3600),
                         "average_seconds": int(avg_sec),
@@ -454,75 +469,22 @@ class AdminDashboard:
             end_date = datetime.utcnow()
 
         try:
-            from app.domain.investigation import Investigation
-
-            # Investigações criadas no período
-            created = (
-                self.db.query(func.count(Investigation.id))
-                .filter(
-                    and_(
-                        Investigation.created_at >= start_date, Investigation.created_at <= end_date
-                    )
-                )
-                .scalar()
-                or 0
-            )
-
-            # Investigações concluídas (que foram criadas no período)
-            completed = (
-                self.db.query(func.count(Investigation.id))
-                .filter(
-                    and_(
-                        Investigation.created_at >= start_date,
-                        Investigation.created_at <= end_date,
-                        Investigation.status == "completed",
-                    )
-                )
-                .scalar()
-                or 0
-            )
-
-            # Investigações em progresso
-            in_progress = (
-                self.db.query(func.count(Investigation.id))
-                .filter(
-                    and_(
-                        Investigation.created_at >= start_date,
-                        Investigation.created_at <= end_date,
-                        Investigation.status == "in_progress",
-                    )
-                )
-                .scalar()
-                or 0
-            )
-
-            # Investigações pendentes
-            pending = (
-                self.db.query(func.count(Investigation.id))
-                .filter(
-                    and_(
-                        Investigation.created_at >= start_date,
-                        Investigation.created_at <= end_date,
-                        Investigation.status == "pending",
-                    )
-                )
-                .scalar()
-                or 0
-            )
+            from app.domain.investigation import Investigation, InvestigationStatus
 
-            # Investigações canceladas
-            cancelled = (
-                self.db.query(func.count(Investigation.id))
-                .filter(
-                    and_(
-                        Investigation.created_at >= start_date,
-                        Investigation.created_at <= end_date,
-                        Investigation.status == "cancelled",
-                    )
+            # Criadas no período e respetiva distribuição por status (uma consulta).
+            # FAILED conta como "cancelled", tal como em get_investigations_by_period.
+            row = (
+                await self.db.execute(
+                    select(
+                        func.count(Investigation.id),
+                        _count_where(Investigation.status == InvestigationStatus.COMPLETED),
+                        _count_where(Investigation.status == InvestigationStatus.IN_PROGRESS),
+                        _count_where(Investigation.status == InvestigationStatus.PENDING),
+                        _count_where(Investigation.status == InvestigationStatus.FAILED),
+                    ).where(_between(Investigation.created_at, start_date, end_date))
                 )
-                .scalar()
-                or 0
-            )
+            ).one()
+            created, completed, in_progress, pending, cancelled = (_sql_count_int(v) for v in row)
 
             # Taxas de conversão
             completion_rate = (completed / created * 100) if created > 0 else 0
@@ -590,26 +552,25 @@ class AdminDashboard:
             from app.domain.investigation import Investigation
             from app.domain.user import User
 
+            in_period = _between(Investigation.created_at, start_date, end_date)
+
             # Query para usuários com mais investigações criadas
             user_investigations = (
-                self.db.query(
-                    User.id,
-                    User.full_name,
-                    User.email,
-                    func.count(Investigation.id).label("investigations_created"),
-                    func.max(User.last_login).label("last_activity"),
-                )
-                .join(Investigation, Investigation.user_id == User.id)
-                .filter(
-                    and_(
-                        Investigation.created_at >= start_date, Investigation.created_at <= end_date
+                await self.db.execute(
+                    select(
+                        User.id,
+                        User.full_name,
+                        User.email,
+                        func.count(Investigation.id).label("investigations_created"),
+                        func.max(User.last_login).label("last_activity"),
                     )
+                    .join(Investigation, Investigation.user_id == User.id)
+                    .where(in_period)
+                    .group_by(User.id, User.full_name, User.email)
+                    .order_by(desc("investigations_created"))
+                    .limit(limit)
                 )
-                .group_by(User.id, User.full_name, User.email)
-                .order_by(desc("investigations_created"))
-                .limit(limit)
-                .all()
-            )
+            ).all()
 
             # Formata resultado
             users = []
@@ -627,15 +588,8 @@ class AdminDashboard:
                 )
 
             # Total de investigações no período
-            total_investigations = (
-                self.db.query(func.count(Investigation.id))
-                .filter(
-                    and_(
-                        Investigation.created_at >= start_date, Investigation.created_at <= end_date
-                    )
-                )
-                .scalar()
-                or 0
+            total_investigations = await self._scalar(
+                select(func.count(Investigation.id)).where(in_period)
             )
 
             return {
@@ -939,15 +893,30 @@ class AdminDashboard:
             Dict com dashboard completo
         """
         try:
-            platform_metrics = await self.get_platform_metrics(start_date, end_date)
-            investigations_by_period = await self.get_investigations_by_period(
-                start_date, end_date, "day"
-            )
-            avg_completion_time = await self.get_average_completion_time(start_date, end_date)
-            conversion_rate = await self.get_conversion_rate(start_date, end_date)
-            active_users = await self.get_most_active_users(start_date, end_date)
-            scrapers = await self.get_most_used_scrapers(start_date, end_date)
-            data_sources = await self.get_most_consulted_data_sources(start_date, end_date)
+            metrics = [
+                ("get_platform_metrics", (start_date, end_date)),
+                ("get_investigations_by_period", (start_date, end_date, "day")),
+                ("get_average_completion_time", (start_date, end_date)),
+                ("get_conversion_rate", (start_date, end_date)),
+                ("get_most_active_users", (start_date, end_date)),
+                ("get_most_used_scrapers", (start_date, end_date)),
+                ("get_most_consulted_data_sources", (start_date, end_date)),
+            ]
+            if self.session_factory is None:
+                results = [await getattr(self, name)(*args) for name, args in metrics]
+            else:
+                results = await asyncio.gather(
+                    *(self._run_in_own_session(name, *args) for name, args in metrics)
+                )
+            (
+                platform_metrics,
+                investigations_by_period,
+                avg_completion_time,
+                conversion_rate,
+                active_users,
+                scrapers,
+                data_sources,
+            ) = results
 
             return {
                 "dashboard_version": "1.0.0",
@@ -969,9 +938,14 @@ class AdminDashboard:
             self.logger.error(f"Erro ao gerar dashboard completo: {str(e)}")
             raise
 
+    async def _run_in_own_session(self, method: str, *args) -> Dict[str, Any]:
+        """Corre uma métrica numa sessão própria (AsyncSession não aceita consultas concorrentes)."""
+        async with self.session_factory() as session:
+            return await getattr(AdminDashboard(session), method)(*args)
+
 
 # Funções auxiliares para integração rápida
-async def get_dashboard_summary(db: Session) -> Dict[str, Any]:
+async def get_dashboard_summary(db: AsyncSession) -> Dict[str, Any]:
     """
     Retorna um resumo rápido do dashboard (últimos 30 dias)
 
@@ -985,7 +959,7 @@ async def get_dashboard_summary(db: Session) -> Dict[str, Any]:
     return await dashboard.get_complete_dashboard()
 
 
-async def export_dashboard_to_json(db: Session, filepath: str) -> bool:
+async def export_dashboard_to_json(db: AsyncSession, filepath: str) -> bool:
     """
     Exporta o dashboard completo para um arquivo JSON
 
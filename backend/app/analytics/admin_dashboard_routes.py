@@ -23,21 +23,27 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.analytics.admin_dashboard import AdminDashboard
 from app.api.v1.deps import get_current_user, require_admin
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal, get_db
 from app.domain.user import User
 
 router = APIRouter(prefix="/admin/dashboard", tags=["Admin Dashboard"])
 
 
+def _dashboard(db: AsyncSession) -> AdminDashboard:
+    """Dashboard com métricas em paralelo (uma sessão por métrica), excepto em SQLite."""
+    concurrent = db.get_bind().dialect.name != "sqlite"
+    return AdminDashboard(db, session_factory=AsyncSessionLocal if concurrent else None)
+
+
 @router.get("/metrics")
 async def get_platform_metrics(
     start_date: Optional[datetime] = Query(None, description="Data inicial (ISO format)"),
     end_date: Optional[datetime] = Query(None, description="Data final (ISO format)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
@@ -51,7 +57,7 @@ async def get_platform_metrics(
     - Taxas de crescimento
     """
     try:
-        dashboard = AdminDashboard(db)
+        dashboard = _dashboard(db)
         return await dashboard.get_platform_metrics(start_date, end_date)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar métricas: {str(e)}")
@@ -62,7 +68,7 @@ async def get_investigations_by_period(
     start_date: Optional[datetime] = Query(None, description="Data inicial"),
     end_date: Optional[datetime] = Query(None, description="Data final"),
     group_by: str = Query("day", regex="^(day|week|month|year)$", description="Agrupamento"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
@@ -74,7 +80,7 @@ async def get_investigations_by_period(
     **Requer:** Permissões de administrador
     """
     try:
-        dashboard = AdminDashboard(db)
+        dashboard = _dashboard(db)
         return await dashboard.get_investigations_by_period(start_date, end_date, group_by)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar investigações: {str(e)}")
@@ -87,7 +93,7 @@ async def get_average_completion_time(
     group_by: Optional[str] = Query(
         None, regex="^(category|priority|user)$", description="Agrupamento opcional"
     ),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
@@ -99,7 +105,7 @@ async def get_average_completion_time(
     **Requer:** Permissões de administrador
     """
     try:
-        dashboard = AdminDashboard(db)
+        dashboard = _dashboard(db)
         return await dashboard.get_average_completion_time(start_date, end_date, group_by)
     except Exception as e:
         raise HTTPException(
@@ -111,7 +117,7 @@ async def get_average_completion_time(
 async def get_conversion_rate(
     start_date: Optional[datetime] = Query(None, description="Data inicial"),
     end_date: Optional[datetime] = Query(None, description="Data final"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
@@ -125,7 +131,7 @@ async def get_conversion_rate(
     **Requer:** Permissões de administrador
     """
     try:
-        dashboard = AdminDashboard(db)
+        dashboard = _dashboard(db)
         return await dashboard.get_conversion_rate(start_date, end_date)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao calcular conversão: {str(e)}")
@@ -136,7 +142,7 @@ async def get_most_active_users(
     start_date: Optional[datetime] = Query(None, description="Data inicial"),
     end_date: Optional[datetime] = Query(None, description="Data final"),
     limit: int = Query(10, ge=1, le=100, description="Número de usuários"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
@@ -148,7 +154,7 @@ async def get_most_active_users(
     **Requer:** Permissões de administrador
     """
     try:
-        dashboard = AdminDashboard(db)
+        dashboard = _dashboard(db)
         return await dashboard.get_most_active_users(start_date, end_date, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar usuários ativos: {str(e)}")
@@ -159,7 +165,7 @@ async def get_most_used_scrapers(
     start_date: Optional[datetime] = Query(None, description="Data inicial"),
     end_date: Optional[datetime] = Query(None, description="Data final"),
     limit: int = Query(10, ge=1, le=50, description="Número de scrapers"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
@@ -171,7 +177,7 @@ async def get_most_used_scrapers(
     **Requer:** Permissões de administrador
     """
     try:
-        dashboard = AdminDashboard(db)
+        dashboard = _dashboard(db)
         return await dashboard.get_most_used_scrapers(start_date, end_date, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar scrapers: {str(e)}")
@@ -182,7 +188,7 @@ async def get_most_consulted_data_sources(
     start_date: Optional[datetime] = Query(None, description="Data inicial"),
     end_date: Optional[datetime] = Query(None, description="Data final"),
     limit: int = Query(10, ge=1, le=50, description="Número de fontes"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
@@ -194,7 +200,7 @@ async def get_most_consulted_data_sources(
     **Requer:** Permissões de administrador
     """
     try:
-        dashboard = AdminDashboard(db)
+        dashboard = _dashboard(db)
         return await dashboard.get_most_consulted_data_sources(start_date, end_date, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar fontes: {str(e)}")
@@ -204,7 +210,7 @@ async def get_most_consulted_data_sources(
 async def get_complete_dashboard(
     start_date: Optional[datetime] = Query(None, description="Data inicial"),
     end_date: Optional[datetime] = Query(None, description="Data final"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
@@ -224,7 +230,7 @@ async def get_complete_dashboard(
     **Nota:** Este endpoint pode demorar alguns segundos para executar
     """
     try:
-        dashboard = AdminDashboard(db)
+        dashboard = _dashboard(db)
         return await dashboard.get_complete_dashboard(start_date, end_date)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao gerar dashboard: {str(e)}")
@@ -235,7 +241,7 @@ async def export_dashboard(
     format: str = Query("json", regex="^(json|csv)$", description="Formato de exportação"),
     start_date: Optional[datetime] = Query(None, description="Data inicial"),
     end_date: Optional[datetime] = Query(None, description="Data final"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
@@ -252,7 +258,7 @@ async def export_dashboard(
     from fastapi.responses import StreamingResponse
 
     try:
-        dashboard = AdminDashboard(db)
+        dashboard = _dashboard(db)
         data = await dashboard.get_complete_dashboard(start_date, end_date)
 
         if format == "json":
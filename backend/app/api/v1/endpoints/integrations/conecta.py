@@ -39,6 +39,7 @@ from app.services.bcb_api import BCBService
 from app.services.bnmp_cnj import BNMPService
 from app.services.brasil_api import BrasilAPIService
 from app.services.caixa_fgts import CaixaFGTSService
+from app.services.conecta_bulk import build_bulk_job, stream_bulk_lookup
 from app.services.conecta_cadin import ConectaCadinService
 from app.services.conecta_cnd import ConectaCNDService
 from app.services.conecta_cnpj import ConectaCNPJService
@@ -121,6 +122,14 @@ class ConectaCpfCnpjRequest(BaseModel):
     investigation_id: Optional[int] = None
 
 
+class ConectaBulkRequest(BaseModel):
+    providers: List[str]
+    documents: List[str] = []
+    codigos_imovel: List[str] = []
+    cpf_usuario: Optional[str] = None
+    investigation_id: Optional[int] = None
+
+
 class SigefGeoParcelasRequest(BaseModel):
     model_config = ConfigDict(extra="allow")
     investigation_id: Optional[int] = None
@@ -1077,3 +1086,57 @@ async def conecta_sicar_imovel(
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/conecta/bulk", summary="Consultas Conecta em lote (NDJSON ou SSE)")
+async def conecta_bulk_lookup(
+    request: ConectaBulkRequest,
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Consulta vários CPF/CNPJ e códigos de imóvel em vários providers Conecta
+
+    As consultas correm em paralelo com rate limit por provider; cada resultado é
+    enviado assim que termina (uma linha NDJSON ou um evento SSE ``result``) e o
+    último é o resumo (``summary``). Com investigation_id, as consultas
+    bem-sucedidas ficam registadas como LegalQuery.
+
+    Providers: cnpj_basica, cnpj_qsa, cnpj_empresa, sncr_cpf_cnpj, sncr_imovel,
+    sicar_cpf_cnpj, cadin_info_cpf, cadin_info_cnpj.
+    """
+    try:
+        job = build_bulk_job(
+            request.providers,
+            request.documents,
+            request.codigos_imovel,
+            cpf_usuario=request.cpf_usuario,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    await audit_logger.log_action(
+        db=db,
+        user_id=current_user.id,
+        action="consulta_conecta_lote",
+        resource_type="conecta_bulk",
+        resource_id=str(request.investigation_id) if request.investigation_id else "ad-hoc",
+        details={
+            "providers": request.providers,
+            "queries": len(job.items),
+            "rejected": len(job.rejected),
+        },
+        success=True,
+    )
+
+    return StreamingResponse(
+        stream_bulk_lookup(
+            job,
+            fmt=format,
+            cpf_usuario=request.cpf_usuario,
+            investigation_id=request.investigation_id,
+        ),
+        media_type="application/x-ndjson" if format == "ndjson" else "text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -25,14 +25,15 @@ from app.schemas.investigation import (
 from app.schemas.property import CompanyResponse, LeaseContractResponse, PropertyResponse
 from app.services import investigation_guest_link as guest_link_service
 from app.services.dashboard_statistics import get_dashboard_statistics_cached
-from app.services.excel_export import ExcelExportService
+from app.services.excel_export import ExcelExportService, investigation_summary_fields
 from app.services.investigation import InvestigationService
 from app.services.investigation_access import (
     require_investigation_for_user,
     require_investigation_owner_or_superuser,
 )
 from app.services.investigation_enrich_demo import maybe_seed_demo_properties_and_companies
-from app.services.pdf_export import PDFExportService
+from app.services.pdf_export import investigation_pdf_payloads, investigation_pdf_version
+from app.services.pdf_render import render_investigation_pdf
 from app.services.trust_export import build_trust_bundle_zip
 
 router = APIRouter()
@@ -574,30 +575,24 @@ async def export_investigation_excel(
     - Propriedades: Properties found
     - Empresas: Companies found
     - Consultas Legais: Legal queries executed
-    """
-    legal_query_repo = LegalQueryRepository(db)
 
+    Rows are read from a server-side cursor into a write-only workbook, so large
+    investigations are exported without loading every row in memory.
+    """
     investigation = await require_investigation_owner_or_superuser(
         db,
         investigation_id,
         current_user.id,
         is_superuser=current_user.is_superuser,
-        with_relations=True,
-    )
-
-    legal_queries = await legal_query_repo.list_by_investigation(investigation_id)
-
-    # Generate Excel file
-    excel_file = ExcelExportService.generate_investigation_excel(
-        investigation, investigation.properties, investigation.companies, legal_queries
     )
+    summary = investigation_summary_fields(investigation)
 
     # Prepare filename
     filename = f"investigacao_{investigation.id}_{investigation.target_name.replace(' ', '_')}_{investigation.created_at.strftime('%Y%m%d')}.xlsx"
 
     # Return as streaming response
     return StreamingResponse(
-        excel_file,
+        ExcelExportService.stream_investigation_excel(summary),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={
             "Content-Disposition": f"attachment; filename={filename}",
@@ -610,38 +605,38 @@ async def export_investigation_csv(
     investigation_id: int,
     current_user: CurrentUser,
     db: DatabaseSession,
+    section: str = Query(
+        "summary",
+        pattern="^(summary|properties|companies|legal_queries)$",
+        description="summary (uma linha com totais) ou as linhas de uma secção",
+    ),
 ) -> StreamingResponse:
     """
-    Export investigation summary data to CSV file
+    Export investigation data to CSV file
 
-    Generates a CSV file with main investigation data including:
+    With section=summary (default) the CSV has the main investigation data:
     - Investigation details (name, CPF/CNPJ, status)
     - Summary counts (properties, companies, legal queries)
     - Dates (created, updated)
-    """
-    legal_query_repo = LegalQueryRepository(db)
 
+    The other sections stream every property, company or legal query row
+    straight from a server-side cursor.
+    """
     investigation = await require_investigation_owner_or_superuser(
         db,
         investigation_id,
         current_user.id,
         is_superuser=current_user.is_superuser,
-        with_relations=True,
-    )
-
-    legal_queries = await legal_query_repo.list_by_investigation(investigation_id)
-
-    # Generate CSV file
-    csv_file = ExcelExportService.generate_investigation_csv(
-        investigation, investigation.properties, investigation.companies, legal_queries
     )
+    summary = investigation_summary_fields(investigation)
 
     # Prepare filename
-    filename = f"investigacao_{investigation.id}_{investigation.target_name.replace(' ', '_')}_{investigation.created_at.strftime('%Y%m%d')}.csv"
+    suffix = "" if section == "summary" else f"_{section}"
+    filename = f"investigacao_{investigation.id}_{investigation.target_name.replace(' ', '_')}_{investigation.created_at.strftime('%Y%m%d')}{suffix}.csv"
 
     # Return as streaming response
     return StreamingResponse(
-        csv_file,
+        ExcelExportService.stream_investigation_csv(summary, section),
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename={filename}",
@@ -654,7 +649,7 @@ async def export_investigation_pdf(
     investigation_id: int,
     current_user: CurrentUser,
     db: DatabaseSession,
-) -> StreamingResponse:
+) -> Response:
     """
     Export investigation to professional PDF report
 
@@ -668,74 +663,22 @@ async def export_investigation_pdf(
     - Legal queries performed
     - Visual charts and analysis
     """
-    legal_query_repo = LegalQueryRepository(db)
-
     investigation = await require_investigation_owner_or_superuser(
         db,
         investigation_id,
         current_user.id,
         is_superuser=current_user.is_superuser,
-        with_relations=True,
     )
 
-    # Get related data (already loaded from get_with_relations)
-    properties = investigation.properties or []
-    companies = investigation.companies or []
-
-    # Get legal queries for this investigation
-    legal_queries = await legal_query_repo.list_by_investigation(investigation_id)
-
-    # Convert to dictionaries for PDF generation
-    investigation_dict = {
-        "id": investigation.id,
-        "target_name": investigation.target_name,
-        "target_cpf_cnpj": investigation.target_cpf_cnpj,
-        "target_description": investigation.target_description,
-        "status": investigation.status,
-        "created_at": investigation.created_at.isoformat() if investigation.created_at else None,
-        "updated_at": investigation.updated_at.isoformat() if investigation.updated_at else None,
-        "properties_found": len(properties),
-        "companies_found": len(companies),
-        "lease_contracts_found": investigation.lease_contracts_found or 0,
-    }
-
-    properties_list = [
-        {
-            "name": p.property_name or "N/A",
-            "area_ha": p.area_hectares or 0,
-            "location": f"{p.city or ''}, {p.state or ''}".strip(", "),
-            "source": p.data_source,
-            "registration_code": p.car_number or p.ccir_number or p.matricula or "N/A",
-        }
-        for p in properties
-    ]
-
-    companies_list = [
-        {
-            "name": c.trade_name or c.corporate_name or "N/A",
-            "cnpj": c.cnpj,
-            "registration_status": c.status or "N/A",
-            "activity": c.main_activity or "N/A",
-            "address": c.address or "N/A",
-        }
-        for c in companies
-    ]
-
-    legal_queries_list = [
-        {
-            "id": q.id,
-            "provider": q.provider,
-            "query_type": q.query_type,
-            "result_count": q.result_count,
-            "created_at": q.created_at.isoformat() if q.created_at else None,
-        }
-        for q in legal_queries
-    ]
+    async def load_payloads():
+        # Only on a cache miss: relations and legal queries feed the renderer
+        full = await InvestigationRepository(db).get_with_relations(investigation_id)
+        legal_queries = await LegalQueryRepository(db).list_by_investigation(investigation_id)
+        return investigation_pdf_payloads(full, legal_queries)
 
-    # Generate PDF
-    pdf_service = PDFExportService()
-    pdf_buffer = pdf_service.generate_investigation_pdf(
-        investigation_dict, properties_list, companies_list, legal_queries_list
+    # Rendered in the PDF process pool, reused while the investigation data is unchanged
+    pdf_bytes = await render_investigation_pdf(
+        investigation_id, await investigation_pdf_version(db, investigation_id), load_payloads
     )
 
     # Prepare filename
@@ -762,9 +705,8 @@ async def export_investigation_pdf(
         endpoint=f"/investigations/{investigation_id}/export/pdf",
     )
 
-    # Return as streaming response
-    return StreamingResponse(
-        pdf_buffer,
+    return Response(
+        content=pdf_bytes,
         media_type="application/pdf",
         headers={
             "Content-Disposition": f"attachment; filename={filename}",
@@ -14,6 +14,7 @@ from app.api.v1.deps import get_current_user
 from app.core.audit import AuditLogger
 from app.core.database import get_db
 from app.domain.user import User
+from app.services.ocr import result_store as ocr_result_store
 from app.services.ocr_service import OCRService
 
 logger = logging.getLogger(__name__)
@@ -91,8 +92,8 @@ async def process_document_ocr(
             f"({file_size / 1024:.1f}KB) para usuário {current_user.email}"
         )
 
-        # Processar documento
-        result = await OCRService.process_document(file.file, file.filename)
+        # Processar documento (UploadFile: leitura assíncrona)
+        result = await OCRService.process_document(file, file.filename)
 
         # Log de auditoria
         await audit_logger.log(
@@ -202,7 +203,8 @@ async def ocr_health_check(current_user: User = Depends(get_current_user)):
     """
     Verifica se o serviço de OCR está disponível
 
-    Retorna informações sobre dependências instaladas.
+    Retorna informações sobre dependências instaladas e as métricas do cache de
+    resultados OCR (hits, misses, hit_rate, evictions, ocupação).
     """
     try:
         # Verificar dependências
@@ -257,6 +259,7 @@ async def ocr_health_check(current_user: User = Depends(get_current_user)):
         return {
             "status": status_msg,
             "dependencies": dependencies,
+            "result_cache": ocr_result_store.get_stats(),
             "message": "OCR service is ready" if all_ok else "Some dependencies missing",
         }
 
@@ -9,7 +9,7 @@ from __future__ import annotations
 from typing import Any, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.audit import AuditAction, audit_logger
@@ -23,7 +23,8 @@ from app.services.investigation_guest_link import (
     guest_link_is_valid,
     record_guest_access,
 )
-from app.services.pdf_export import PDFExportService
+from app.services.pdf_export import investigation_pdf_payloads, investigation_pdf_version
+from app.services.pdf_render import render_investigation_pdf
 
 router = APIRouter()
 
@@ -122,82 +123,40 @@ async def guest_export_pdf(
         )
 
     repo = InvestigationRepository(db)
-    investigation = await repo.get_with_relations(link.investigation_id)
+    investigation = await repo.get(link.investigation_id)
     if not investigation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Investigação não encontrada"
         )
 
-    lrepo = LegalQueryRepository(db)
-    legal_queries = await lrepo.list_by_investigation(investigation.id)
-
-    properties = investigation.properties or []
-    companies = investigation.companies or []
-    inv_dict = {
-        "id": investigation.id,
-        "target_name": investigation.target_name,
-        "target_cpf_cnpj": investigation.target_cpf_cnpj,
-        "target_description": investigation.target_description,
-        "status": investigation.status,
-        "created_at": investigation.created_at.isoformat() if investigation.created_at else None,
-        "updated_at": investigation.updated_at.isoformat() if investigation.updated_at else None,
-        "properties_found": len(properties),
-        "companies_found": len(companies),
-        "lease_contracts_found": investigation.lease_contracts_found or 0,
-    }
-
-    properties_list = [
-        {
-            "name": p.property_name or "N/A",
-            "area_ha": p.area_hectares or 0,
-            "location": f"{p.city or ''}, {p.state or ''}".strip(", "),
-            "source": p.data_source,
-            "registration_code": p.car_number or p.ccir_number or p.matricula or "N/A",
-        }
-        for p in properties
-    ]
-    companies_list = [
-        {
-            "name": c.trade_name or c.corporate_name or "N/A",
-            "cnpj": c.cnpj,
-            "registration_status": c.status or "N/A",
-            "activity": c.main_activity or "N/A",
-            "address": c.address or "N/A",
-        }
-        for c in companies
-    ]
-    legal_queries_list = [
-        {
-            "id": q.id,
-            "provider": q.provider,
-            "query_type": q.query_type,
-            "result_count": q.result_count,
-            "created_at": q.created_at.isoformat() if q.created_at else None,
-        }
-        for q in legal_queries
-    ]
+    async def load_payloads():
+        # Só sem PDF em cache: relações e consultas legais alimentam a renderização
+        full = await repo.get_with_relations(investigation.id)
+        legal_queries = await LegalQueryRepository(db).list_by_investigation(investigation.id)
+        inv_dict, properties_list, companies_list, legal_queries_list = investigation_pdf_payloads(
+            full, legal_queries
+        )
 
-    if settings.ENCRYPTION_KEY and investigation.target_cpf_cnpj:
-        try:
-            from app.core.encryption import data_encryption
+        if settings.ENCRYPTION_KEY and full.target_cpf_cnpj:
+            try:
+                from app.core.encryption import data_encryption
 
-            inv_dict["target_cpf_cnpj"] = data_encryption.decrypt(investigation.target_cpf_cnpj)
-        except Exception:
-            inv_dict["target_cpf_cnpj"] = investigation.target_cpf_cnpj
-    else:
-        inv_dict["target_cpf_cnpj"] = investigation.target_cpf_cnpj
+                inv_dict["target_cpf_cnpj"] = data_encryption.decrypt(full.target_cpf_cnpj)
+            except Exception:
+                inv_dict["target_cpf_cnpj"] = full.target_cpf_cnpj
+        else:
+            inv_dict["target_cpf_cnpj"] = full.target_cpf_cnpj
+        return inv_dict, properties_list, companies_list, legal_queries_list
 
-    pdf_service = PDFExportService()
     wm = [
         "AgroADB — leitura convidado",
         f"Investigação #{investigation.id}",
         "Confidencial — traço de auditoria",
     ]
-    pdf_buffer = pdf_service.generate_investigation_pdf(
-        inv_dict,
-        properties_list,
-        companies_list,
-        legal_queries_list,
+    pdf_bytes = await render_investigation_pdf(
+        investigation.id,
+        await investigation_pdf_version(db, investigation.id),
+        load_payloads,
         watermark_lines=wm,
     )
 
@@ -220,8 +179,8 @@ async def guest_export_pdf(
         investigation.created_at.strftime("%Y%m%d") if investigation.created_at else "sem_data"
     )
     filename = f"relatorio_guest_{investigation.id}_{target_name}_{created_date}.pdf"
-    return StreamingResponse(
-        pdf_buffer,
+    return Response(
+        content=pdf_bytes,
         media_type="application/pdf",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
@@ -9,6 +9,7 @@ from fastapi.responses import JSONResponse
 
 from app.api.v1.deps import get_current_user
 from app.core.queue import ScraperType, TaskPriority, queue_manager
+from app.core.redis_pool import check_redis_health
 from app.core.websocket import connection_manager
 from app.domain.user import User
 from app.workers.scraper_workers import (
@@ -432,6 +433,7 @@ async def health_check():
             "redis": "connected",
             "websocket_connections": connection_manager.get_connection_count(),
             "total_queued_tasks": sum(s["total"] for s in stats.values()),
+            "redis_pools": await check_redis_health(),
         }
     except Exception as e:
         return JSONResponse(status_code=503, content={"status": "unhealthy", "error": str(e)})
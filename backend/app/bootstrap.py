@@ -8,15 +8,21 @@ from dataclasses import dataclass
 
 from sqlalchemy.ext.asyncio import AsyncEngine
 
+from app.core.cache import cache_service
 from app.core.circuit_breaker import CircuitBreakerRegistry
 from app.core.config import settings
 from app.core.database import Base
+from app.core.http_client import close_http_clients
 from app.core.indexes import create_optimized_indexes
 from app.core.queue import queue_manager
 from app.core.queue_prometheus import (
     prometheus_gauge_refresh_loop,
     refresh_queue_and_registry_gauges,
 )
+from app.core.redis_pool import close_redis_pools
+from app.services.email_dispatcher import close_email_dispatcher
+from app.services.ocr.executor import close_ocr_pool
+from app.services.pdf_render import close_pdf_render_pool
 from app.workers.scraper_workers import orchestrator
 
 logger = logging.getLogger(__name__)
@@ -106,6 +112,12 @@ async def shutdown_application(engine: AsyncEngine, state: StartupState) -> None
     if state.queue_connected:
         await queue_manager.disconnect()
 
+    await cache_service.disconnect()
+    await close_email_dispatcher()
+    close_pdf_render_pool()
+    close_ocr_pool()
+    await close_http_clients()
+    await close_redis_pools()
     await engine.dispose()
 
 
@@ -1,19 +1,121 @@
 """
 Sistema de Cache Redis - Otimização de Performance
 Implementa cache para queries frequentes e reduz carga no banco
+
+Dois níveis: L1 em memória por processo (LRU com TTL curto, limitado em entradas e
+bytes) à frente do Redis (L2). Escritas e remoções publicam a invalidação em
+``cache:invalidate`` para que os outros processos descartem as suas cópias L1.
 """
 
+import asyncio
+import fnmatch
 import hashlib
 import json
 import logging
+import math
+import random
+import time
+import uuid
+import weakref
+from collections import OrderedDict
 from datetime import timedelta
 from functools import wraps
-from typing import Any, Callable, Optional
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 
 import redis.asyncio as redis
 
+from app.core.config import settings
+from app.core.redis_pool import get_redis
+
 logger = logging.getLogger(__name__)
 
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Conjuntos de chaves por tag (ex: cache:tag:investigation:42) e tamanho dos lotes de UNLINK
+TAG_PREFIX = "cache:tag:"
+UNLINK_BATCH_SIZE = 500
+
+# Famílias de chaves com dono: cache:<família>:<id>[:...] fica sempre na tag <família>:<id>
+OWNER_KEY_FAMILIES = ("investigation", "user")
+
+# Valores gravados pelos decorators: {"__cached__": 1, "value", "expires_at", "delta"}
+_ENVELOPE_MARKER = "__cached__"
+
+# Liberta o lock apenas se ainda for nosso (pode ter expirado e sido tomado por outro)
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Cálculos em curso por event loop (single-flight); asyncio.Future não atravessa loops
+_loop_inflight: (
+    "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]"
+) = weakref.WeakKeyDictionary()
+
+
+def _inflight() -> Dict[str, asyncio.Future]:
+    loop = asyncio.get_running_loop()
+    inflight = _loop_inflight.get(loop)
+    if inflight is None:
+        inflight = {}
+        _loop_inflight[loop] = inflight
+    return inflight
+
+
+class _LocalCache:
+    """
+    LRU em memória com TTL por entrada
+
+    O CacheService guarda o JSON serializado e decodifica a cada leitura: quem lê
+    pode mutar o valor devolvido sem afectar os outros leitores.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.bytes_used = 0
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, _size, value = entry
+        if expires_at <= time.monotonic():
+            self.discard(key)
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: str, value: Any, size: int, ttl: float):
+        if ttl <= 0 or size > self.max_bytes:
+            self.discard(key)
+            return
+        self.discard(key)
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self.bytes_used += size
+        while len(self._entries) > self.max_entries or self.bytes_used > self.max_bytes:
+            _key, (_expires, old_size, _value) = self._entries.popitem(last=False)
+            self.bytes_used -= old_size
+
+    def discard(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes_used -= entry[1]
+
+    def discard_pattern(self, pattern: str):
+        for key in [k for k in self._entries if fnmatch.fnmatchcase(k, pattern)]:
+            self.discard(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes_used = 0
+
 
 class CacheService:
     """
@@ -22,11 +124,22 @@ class CacheService:
     Implementa estratégias de cache para otimização de performance
     """
 
-    def __init__(self, redis_url: str = "redis://localhost:6379/1"):
+    def __init__(self, redis_url: Optional[str] = None, l1_enabled: Optional[bool] = None):
+        # None = pool partilhado "cache" sobre REDIS_URL (DB REDIS_CACHE_DB)
         self.redis_url = redis_url
         self.redis_client: Optional[redis.Redis] = None
         self.default_ttl = 300  # 5 minutos
 
+        # L1 em memória (activo apenas enquanto a subscrição de invalidações está viva)
+        self.l1_enabled = settings.CACHE_L1_ENABLED if l1_enabled is None else l1_enabled
+        self.l1_ttl = settings.CACHE_L1_TTL_SECONDS
+        self._l1 = _LocalCache(settings.CACHE_L1_MAX_ENTRIES, settings.CACHE_L1_MAX_BYTES)
+        self._l1_active = False
+        self._instance_id = uuid.uuid4().hex
+        self._pubsub = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._tier_stats = {"l1": {"hits": 0, "misses": 0}, "l2": {"hits": 0, "misses": 0}}
+
         # TTLs específicos por tipo de dado
         self.ttls = {
             "user": 600,  # 10 minutos
@@ -38,20 +151,88 @@ class CacheService:
         }
 
     async def connect(self):
-        """Conecta ao Redis"""
+        """Obtém o cliente do pool Redis partilhado"""
         if not self.redis_client:
-            self.redis_client = await redis.from_url(
-                self.redis_url, encoding="utf-8", decode_responses=True
-            )
+            self.redis_client = get_redis("cache", self.redis_url)
             logger.info("✅ Cache Redis conectado")
+            if self.l1_enabled:
+                await self._start_invalidation_listener()
 
     async def disconnect(self):
-        """Desconecta do Redis"""
+        """Liberta o cliente (o pool é fechado no shutdown)"""
+        await self._stop_invalidation_listener()
         if self.redis_client:
             await self.redis_client.aclose()
             self.redis_client = None
             logger.info("🔌 Cache Redis desconectado")
 
+    # L1 e invalidação entre processos
+
+    async def _start_invalidation_listener(self):
+        """Subscreve o canal de invalidações; sem subscrição o L1 fica desligado"""
+        try:
+            self._pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            await self._pubsub.subscribe(INVALIDATION_CHANNEL)
+            self._listener_task = asyncio.create_task(self._listen_invalidations())
+            self._l1_active = True
+        except Exception as e:
+            logger.warning(f"⚠️ Cache L1 desativado (sem subscrição de invalidações): {e}")
+            self._l1_active = False
+
+    async def _stop_invalidation_listener(self):
+        self._l1_active = False
+        self._l1.clear()
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener_task = None
+        if self._pubsub:
+            try:
+                await self._pubsub.aclose()
+            except Exception:
+                pass
+            self._pubsub = None
+
+    async def _listen_invalidations(self):
+        """Aplica ao L1 as invalidações publicadas por outros processos"""
+        try:
+            async for message in self._pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    payload = json.loads(message["data"])
+                except (TypeError, ValueError):
+                    continue
+                if payload.get("origin") == self._instance_id:
+                    continue
+                for key in payload.get("keys", []):
+                    self._l1.discard(key)
+                for pattern in payload.get("patterns", []):
+                    self._l1.discard_pattern(pattern)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Sem canal não há coerência entre processos: desligar o L1
+            logger.warning(f"⚠️ Cache L1 desativado (subscrição interrompida): {e}")
+            self._l1_active = False
+            self._l1.clear()
+
+    def _invalidate_l1(self, pipe, keys: Iterable[str] = (), patterns: Iterable[str] = ()):
+        """Descarta do L1 local e acrescenta ao pipeline a publicação da invalidação"""
+        keys, patterns = list(keys), list(patterns)
+        for key in keys:
+            self._l1.discard(key)
+        for pattern in patterns:
+            self._l1.discard_pattern(pattern)
+        if self._l1_active:
+            pipe.publish(
+                INVALIDATION_CHANNEL,
+                json.dumps({"origin": self._instance_id, "keys": keys, "patterns": patterns}),
+            )
+
     def _generate_key(self, prefix: str, *args, **kwargs) -> str:
         """
         Gera chave única para cache
@@ -83,12 +264,31 @@ class CacheService:
             if not self.redis_client:
                 await self.connect()
 
-            value = await self.redis_client.get(key)
+            if self._l1_active:
+                found, local_value = self._l1.get(key)
+                if found:
+                    self._tier_stats["l1"]["hits"] += 1
+                    return json.loads(local_value)
+                self._tier_stats["l1"]["misses"] += 1
+
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.get(key)
+                pipe.pttl(key)
+                value, pttl = await pipe.execute()
+            else:
+                value, pttl = await self.redis_client.get(key), -1
 
             if value:
+                self._tier_stats["l2"]["hits"] += 1
                 logger.debug(f"🎯 Cache HIT: {key}")
-                return json.loads(value)
-
+                decoded = json.loads(value)
+                if self._l1_active:
+                    # Nunca sobreviver ao TTL do Redis
+                    ttl = self.l1_ttl if pttl is None or pttl < 0 else min(self.l1_ttl, pttl / 1000)
+                    self._l1.set(key, value, len(value), ttl)
+                return decoded
+
+            self._tier_stats["l2"]["misses"] += 1
             logger.debug(f"❌ Cache MISS: {key}")
             return None
 
@@ -96,7 +296,9 @@ class CacheService:
             logger.error(f"❌ Erro ao recuperar do cache: {e}")
             return None
 
-    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+    async def set(
+        self, key: str, value: Any, ttl: Optional[int] = None, tags: Iterable[str] = ()
+    ) -> bool:
         """
         Armazena valor no cache
 
@@ -104,6 +306,7 @@ class CacheService:
             key: Chave do cache
             value: Valor a armazenar
             ttl: Time to live em segundos
+            tags: Tags de invalidação (ex: "investigation:42", "user:7")
 
         Returns:
             True se armazenado com sucesso
@@ -114,8 +317,18 @@ class CacheService:
 
             ttl = ttl or self.default_ttl
             serialized = json.dumps(value, default=str)
-
-            await self.redis_client.setex(key, ttl, serialized)
+            tags = set(tags).union(self._owner_tags(key))
+
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(key, ttl, serialized)
+            for tag in sorted(tags):
+                # O conjunto da tag vive pelo menos tanto quanto o membro mais longo
+                tag_key = self._tag_key(tag)
+                pipe.sadd(tag_key, key)
+                pipe.expire(tag_key, ttl, nx=True)
+                pipe.expire(tag_key, ttl, gt=True)
+            self._invalidate_l1(pipe, keys=[key])
+            await pipe.execute()
             logger.debug(f"💾 Cache SET: {key} (TTL: {ttl}s)")
             return True
 
@@ -137,7 +350,10 @@ class CacheService:
             if not self.redis_client:
                 await self.connect()
 
-            await self.redis_client.delete(key)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.delete(key)
+            self._invalidate_l1(pipe, keys=[key])
+            await pipe.execute()
             logger.debug(f"🗑️ Cache DELETE: {key}")
             return True
 
@@ -163,7 +379,11 @@ class CacheService:
         try:
             if not self.redis_client:
                 await self.connect()
-            return int(await self.redis_client.incrby(key, amount))
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.incrby(key, amount)
+            self._invalidate_l1(pipe, keys=[key])
+            results = await pipe.execute()
+            return int(results[0])
         except Exception as e:
             logger.error(f"❌ Erro ao incrementar chave {key}: {e}")
             return 0
@@ -184,31 +404,290 @@ class CacheService:
         raw = await self.redis_client.lrange(key, start, end)
         return list(raw) if raw else []
 
-    def cached(self, ttl: Optional[int] = None):
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        *,
+        stale_ttl: int = 0,
+        lock: bool = False,
+        lock_timeout: float = 10.0,
+        beta: float = 1.0,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """
+        Lê do cache ou calcula, com proteção contra stampede
+
+        - Single-flight: no mesmo processo, pedidos concorrentes para a mesma chave
+          esperam por um único cálculo
+        - ``lock=True``: lock Redis (SET NX PX) para coordenar entre processos; quem
+          não obtém o lock espera que o valor apareça (até ``lock_timeout``)
+        - ``stale_ttl``: após expirar, o valor continua a ser servido durante
+          ``stale_ttl`` segundos enquanto um único chamador o recalcula
+        - ``beta``: expiração antecipada probabilística (XFetch); um chamador pode
+          recalcular pouco antes do fim do TTL, tanto mais cedo quanto mais lento
+          for o cálculo. ``0`` desliga
+
+        Args:
+            key: Chave do cache
+            compute: Corrotina sem argumentos que produz o valor
+            ttl: TTL do valor fresco em segundos
+            tags: Tags de invalidação (ver ``invalidate_tags``)
+
+        Returns:
+            Valor em cache ou recém-calculado (None não é cacheado)
+        """
+        ttl = ttl or self.default_ttl
+        tags = list(tags)
+        entry = await self.get(key)
+
+        def store():
+            return self._compute_and_store(key, compute, ttl, stale_ttl, tags)
+
+        if entry is not None:
+            if not (isinstance(entry, dict) and entry.get(_ENVELOPE_MARKER)):
+                return entry  # valor gravado fora dos decorators
+
+            value = entry.get("value")
+            remaining = entry.get("expires_at", 0) - time.time()
+            delta = entry.get("delta", 0)
+            if remaining > 0:
+                early = beta > 0 and delta * beta * -math.log(1.0 - random.random()) >= remaining
+                if not early or key in _inflight():
+                    return value
+                logger.debug(f"⏳ Cache EARLY REFRESH: {key}")
+                return await self._refresh_or_stale(key, store, lock, value)
+            if stale_ttl > 0:
+                if key in _inflight():
+                    return value
+                logger.debug(f"♻️ Cache STALE: {key}")
+                return await self._refresh_or_stale(key, store, lock, value)
+
+        while True:
+            inflight = _inflight().get(key)
+            if inflight is None:
+                return await self._refresh(key, store, lock, lock_timeout, None)
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise  # este chamador foi cancelado
+                # Líder cancelado: um dos que esperavam assume o cálculo
+
+    async def _refresh_or_stale(
+        self,
+        key: str,
+        store: Callable[[], Awaitable[Any]],
+        lock: bool,
+        stale_value: Any,
+    ) -> Any:
+        """Recalcula um valor ainda servível; se o cálculo falhar, serve o anterior"""
+        try:
+            return await self._refresh(key, store, lock, None, stale_value)
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao recalcular {key}, servindo valor anterior: {e}")
+            return stale_value
+
+    async def _refresh(
+        self,
+        key: str,
+        store: Callable[[], Awaitable[Any]],
+        lock: bool,
+        lock_timeout: Optional[float],
+        stale_value: Any,
+    ) -> Any:
+        """
+        Calcula e grava o valor como único responsável no processo (e no cluster, com lock)
+
+        Com ``stale_value`` (refresh de um valor ainda servível) quem não obtém o
+        lock devolve-o de imediato; sem ele espera até ``lock_timeout``.
+        """
+        inflight = _inflight()
+        future = asyncio.get_running_loop().create_future()
+        inflight[key] = future
+        lock_key, token = f"lock:{key}", uuid.uuid4().hex
+        locked = False
+        try:
+            if lock:
+                locked = await self._acquire_lock(lock_key, token, lock_timeout or 10.0)
+                if not locked:
+                    if stale_value is not None:
+                        result = stale_value
+                    else:
+                        result = await self._wait_for_value(key, lock_timeout or 10.0)
+                        if result is None:
+                            result = await store()
+                    future.set_result(result)
+                    return result
+
+            result = await store()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # evitar "exception was never retrieved" sem outros à espera
+            raise
+        except BaseException:
+            # Cancelamento do pedido do líder, não falha do cálculo: quem espera recalcula
+            future.cancel()
+            raise
+        finally:
+            inflight.pop(key, None)
+            if locked:
+                await self._release_lock(lock_key, token)
+
+    async def _compute_and_store(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        started = time.perf_counter()
+        result = await compute()
+        delta = time.perf_counter() - started
+        if result is not None:
+            envelope = {
+                _ENVELOPE_MARKER: 1,
+                "value": result,
+                "expires_at": time.time() + ttl,
+                "delta": round(delta, 4),
+            }
+            await self.set(key, envelope, ttl=ttl + max(0, stale_ttl), tags=tags)
+        return result
+
+    async def _acquire_lock(self, lock_key: str, token: str, timeout: float) -> bool:
+        try:
+            if not self.redis_client:
+                await self.connect()
+            return bool(
+                await self.redis_client.set(lock_key, token, nx=True, px=int(timeout * 1000))
+            )
+        except Exception as e:
+            logger.error(f"❌ Erro ao obter lock do cache: {e}")
+            return True  # sem Redis, cada processo calcula por si
+
+    async def _release_lock(self, lock_key: str, token: str):
+        try:
+            await self.redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            logger.error(f"❌ Erro ao libertar lock do cache: {e}")
+
+    async def _wait_for_value(self, key: str, timeout: float) -> Any:
+        """Espera que o detentor do lock grave o valor"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            entry = await self.get(key)
+            if entry is not None:
+                if isinstance(entry, dict) and entry.get(_ENVELOPE_MARKER):
+                    return entry.get("value")
+                return entry
+        return None
+
+    def cached(
+        self,
+        ttl: Optional[int] = None,
+        *,
+        stale_ttl: int = 0,
+        lock: bool = False,
+        beta: float = 1.0,
+        tags: Optional[Callable[..., Iterable[str]]] = None,
+    ):
         """
         Decorator de instância: cacheia resultado de função async usando este serviço.
+
+        Ver ``get_or_compute`` para ``stale_ttl``, ``lock`` e ``beta``; ``tags`` recebe
+        os mesmos argumentos da função e devolve as tags de invalidação da entrada.
         """
 
         def decorator(func: Callable):
             @wraps(func)
             async def wrapper(*args, **kwargs):
                 cache_key = self._generate_key(func.__name__, *args, **kwargs)
-                cached_value = await self.get(cache_key)
-                if cached_value is not None:
-                    return cached_value
-                result = await func(*args, **kwargs)
-                if result is not None:
-                    await self.set(cache_key, result, ttl=ttl or self.default_ttl)
-                return result
+                return await self.get_or_compute(
+                    cache_key,
+                    lambda: func(*args, **kwargs),
+                    ttl=ttl or self.default_ttl,
+                    stale_ttl=stale_ttl,
+                    lock=lock,
+                    beta=beta,
+                    tags=tags(*args, **kwargs) if tags else (),
+                )
 
             return wrapper
 
         return decorator
 
+    @staticmethod
+    def _owner_tags(key: str) -> List[str]:
+        """Tag implícita das chaves de investigação/usuário (ex: cache:user:7 -> user:7)"""
+        parts = key.split(":", 3)
+        if len(parts) >= 3 and parts[0] == "cache" and parts[1] in OWNER_KEY_FAMILIES:
+            return [f"{parts[1]}:{parts[2]}"]
+        return []
+
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"{TAG_PREFIX}{tag}"
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """
+        Remove todas as entradas registadas nas tags
+
+        Custo proporcional às chaves afetadas: os conjuntos das tags são lidos e
+        apagados atomicamente e os membros removidos com UNLINK em lotes.
+
+        Args:
+            tags: Tags a invalidar (ex: "investigation:42")
+
+        Returns:
+            Número de chaves removidas
+        """
+        if not tags:
+            return 0
+        try:
+            if not self.redis_client:
+                await self.connect()
+
+            pipe = self.redis_client.pipeline(transaction=True)
+            for tag in tags:
+                pipe.smembers(self._tag_key(tag))
+            for tag in tags:
+                pipe.delete(self._tag_key(tag))
+            results = await pipe.execute()
+
+            keys = sorted(set().union(*results[: len(tags)]))
+            deleted = await self._unlink_keys(keys)
+            logger.info(f"🗑️ Cache INVALIDATE TAGS: {', '.join(tags)} ({deleted} chaves)")
+            return deleted
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao invalidar tags do cache: {e}")
+            return 0
+
+    async def _unlink_keys(self, keys: List[str]) -> int:
+        """UNLINK em lotes num único pipeline, com invalidação do L1"""
+        if not keys:
+            return 0
+        pipe = self.redis_client.pipeline(transaction=False)
+        for start in range(0, len(keys), UNLINK_BATCH_SIZE):
+            pipe.unlink(*keys[start : start + UNLINK_BATCH_SIZE])
+        batches = -(-len(keys) // UNLINK_BATCH_SIZE)
+        self._invalidate_l1(pipe, keys=keys)
+        results = await pipe.execute()
+        return sum(int(n) for n in results[:batches])
+
     async def delete_pattern(self, pattern: str) -> int:
         """
         Remove todas as chaves que correspondem ao padrão
 
+        Percorre o keyspace (SCAN): usar apenas para chaves sem tags; para
+        entradas de investigação/usuário preferir ``invalidate_tags``. As chaves
+        são removidas em lotes à medida que o SCAN avança.
+
         Args:
             pattern: Padrão para buscar chaves (ex: "cache:user:*")
 
@@ -219,16 +698,23 @@ class CacheService:
             if not self.redis_client:
                 await self.connect()
 
-            keys = []
-            async for key in self.redis_client.scan_iter(match=pattern):
-                keys.append(key)
-
-            if keys:
-                deleted = await self.redis_client.delete(*keys)
+            deleted = 0
+            batch: List[str] = []
+            async for key in self.redis_client.scan_iter(match=pattern, count=UNLINK_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= UNLINK_BATCH_SIZE:
+                    deleted += await self.redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += await self.redis_client.unlink(*batch)
+
+            pipe = self.redis_client.pipeline(transaction=False)
+            self._invalidate_l1(pipe, patterns=[pattern])
+            await pipe.execute()
+
+            if deleted:
                 logger.info(f"🗑️ Cache DELETE PATTERN: {pattern} ({deleted} chaves)")
-                return deleted
-
-            return 0
+            return deleted
 
         except Exception as e:
             logger.error(f"❌ Erro ao remover padrão do cache: {e}")
@@ -255,12 +741,32 @@ class CacheService:
                 ),
                 "keys_count": await self.redis_client.dbsize(),
                 "memory_used": info.get("used_memory_human", "N/A"),
+                "tiers": self.get_tier_stats(),
             }
 
         except Exception as e:
             logger.error(f"❌ Erro ao obter estatísticas: {e}")
             return {}
 
+    def get_tier_stats(self) -> dict:
+        """Acertos/falhas deste processo por nível (L1 memória, L2 Redis)"""
+        tiers = {}
+        for tier, counts in self._tier_stats.items():
+            tiers[tier] = {
+                **counts,
+                "hit_rate": self._calculate_hit_rate(counts["hits"], counts["misses"]),
+            }
+        tiers["l1"].update(
+            {
+                "enabled": self._l1_active,
+                "entries": len(self._l1),
+                "bytes": self._l1.bytes_used,
+                "max_entries": self._l1.max_entries,
+                "max_bytes": self._l1.max_bytes,
+            }
+        )
+        return tiers
+
     @staticmethod
     def _calculate_hit_rate(hits: int, misses: int) -> float:
         """Calcula taxa de acerto do cache"""
@@ -279,12 +785,13 @@ class CacheService:
     async def set_investigation(self, investigation_id: str, data: dict) -> bool:
         """Armazena investigação no cache"""
         key = f"cache:investigation:{investigation_id}"
-        return await self.set(key, data, ttl=self.ttls["investigation"])
+        return await self.set(
+            key, data, ttl=self.ttls["investigation"], tags=[f"investigation:{investigation_id}"]
+        )
 
     async def invalidate_investigation(self, investigation_id: str):
-        """Invalida cache de investigação"""
-        await self.delete_pattern(f"cache:investigation:{investigation_id}*")
-        await self.delete_pattern(f"cache:search:*{investigation_id}*")
+        """Invalida cache de investigação (e tudo o que foi gravado com a sua tag)"""
+        await self.invalidate_tags(f"investigation:{investigation_id}")
 
     async def get_user(self, user_id: int) -> Optional[dict]:
         """Recupera usuário do cache"""
@@ -294,11 +801,11 @@ class CacheService:
     async def set_user(self, user_id: int, data: dict) -> bool:
         """Armazena usuário no cache"""
         key = f"cache:user:{user_id}"
-        return await self.set(key, data, ttl=self.ttls["user"])
+        return await self.set(key, data, ttl=self.ttls["user"], tags=[f"user:{user_id}"])
 
     async def invalidate_user(self, user_id: int):
-        """Invalida cache de usuário"""
-        await self.delete_pattern(f"cache:user:{user_id}*")
+        """Invalida cache de usuário (e tudo o que foi gravado com a sua tag)"""
+        await self.invalidate_tags(f"user:{user_id}")
 
     async def get_statistics(self, stat_type: str, **filters) -> Optional[dict]:
         """Recupera estatísticas do cache"""
@@ -306,9 +813,10 @@ class CacheService:
         return await self.get(key)
 
     async def set_statistics(self, stat_type: str, data: dict, **filters) -> bool:
-        """Armazena estatísticas no cache"""
+        """Armazena estatísticas no cache (com tag do usuário quando filtradas por user_id)"""
         key = self._generate_key(f"statistics:{stat_type}", **filters)
-        return await self.set(key, data, ttl=self.ttls["statistics"])
+        tags = [f"user:{filters['user_id']}"] if filters.get("user_id") is not None else []
+        return await self.set(key, data, ttl=self.ttls["statistics"], tags=tags)
 
 
 # Instância global
@@ -316,19 +824,39 @@ cache_service = CacheService()
 
 
 # Decorator para cache automático
-def cached(prefix: str, ttl: Optional[int] = None, key_func: Optional[Callable] = None):
+def cached(
+    prefix: str,
+    ttl: Optional[int] = None,
+    key_func: Optional[Callable] = None,
+    *,
+    stale_ttl: int = 0,
+    lock: bool = False,
+    beta: float = 1.0,
+    tags: Optional[Callable[..., Iterable[str]]] = None,
+):
     """
     Decorator para cachear resultado de funções
 
+    Pedidos concorrentes para a mesma chave partilham um único cálculo (single-flight).
+
     Args:
         prefix: Prefixo da chave de cache
         ttl: Time to live em segundos
         key_func: Função customizada para gerar chave
+        stale_ttl: Segundos em que o valor expirado ainda é servido enquanto é recalculado
+        lock: Coordenar o recálculo entre processos com lock Redis
+        beta: Expiração antecipada probabilística (0 desliga)
+        tags: Função com os argumentos da decorada que devolve as tags de invalidação
 
     Usage:
         @cached(prefix="user_profile", ttl=600)
         async def get_user_profile(user_id: int):
             return await db.query(...)
+
+        @cached(prefix="dashboard", ttl=120, stale_ttl=60, lock=True,
+                tags=lambda user_id: [f"user:{user_id}"])
+        async def get_dashboard(user_id: int):
+            ...
     """
 
     def decorator(func):
@@ -340,19 +868,15 @@ def cached(prefix: str, ttl: Optional[int] = None, key_func: Optional[Callable]
             else:
                 cache_key = cache_service._generate_key(prefix, *args, **kwargs)
 
-            # Tentar recuperar do cache
-            cached_value = await cache_service.get(cache_key)
-            if cached_value is not None:
-                return cached_value
-
-            # Executar função
-            result = await func(*args, **kwargs)
-
-            # Armazenar no cache
-            if result is not None:
-                await cache_service.set(cache_key, result, ttl=ttl)
-
-            return result
+            return await cache_service.get_or_compute(
+                cache_key,
+                lambda: func(*args, **kwargs),
+                ttl=ttl,
+                stale_ttl=stale_ttl,
+                lock=lock,
+                beta=beta,
+                tags=tags(*args, **kwargs) if tags else (),
+            )
 
         return wrapper
 
@@ -2,7 +2,7 @@
 Application Configuration
 """
 
-from typing import List
+from typing import Dict, List, Optional
 
 from pydantic import PostgresDsn, RedisDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -41,6 +41,12 @@ class Settings(BaseSettings):
     CONNECT_QUEUE_ON_STARTUP: bool = True
     DASHBOARD_STATS_CACHE_ENABLED: bool = True
     DASHBOARD_STATS_CACHE_TTL_SECONDS: int = 120
+    # Agregações lidas das MVs mv_dashboard_* (PostgreSQL); só faz sentido com as MVs
+    # refrescadas regularmente (ENABLE_HEAVY_INVESTIGATION_QUEUE agenda o refresh)
+    DASHBOARD_STATS_USE_MATERIALIZED_VIEW: bool = False
+    # Refresh das MVs: pedidos dentro da janela juntam-se num único REFRESH CONCURRENTLY
+    MV_REFRESH_DEBOUNCE_SECONDS: float = 30.0
+    MV_REFRESH_LOCK_TIMEOUT_SECONDS: float = 300.0
 
     # Faturação (Stripe / Pagar.me) — opcional
     STRIPE_SECRET_KEY: str = ""
@@ -51,11 +57,37 @@ class Settings(BaseSettings):
     # Webhooks de integração (HMAC genérico)
     INTEGRATION_WEBHOOK_SECRET: str = ""
 
+    # Webhooks de saída (outbox + dispatcher): lote, concorrência global e por endpoint
+    WEBHOOK_DISPATCH_BATCH_SIZE: int = 100
+    WEBHOOK_DISPATCH_CONCURRENCY: int = 20
+    WEBHOOK_ENDPOINT_CONCURRENCY: int = 2
+    # Retry exponencial: base * 2^(tentativas-1), limitado ao máximo; depois "failed"
+    # (o webhook é desabilitado ao fim de WEBHOOK_MAX_ATTEMPTS falhas consecutivas)
+    WEBHOOK_MAX_ATTEMPTS: int = 6
+    WEBHOOK_RETRY_BASE_SECONDS: float = 30.0
+    WEBHOOK_RETRY_MAX_SECONDS: float = 3600.0
+    # Margem (s) da reserva das linhas reclamadas, além do pior caso do lote (sem duplicados)
+    WEBHOOK_DISPATCH_LEASE_SECONDS: float = 120.0
+
     # Database
     DATABASE_URL: str
 
     # Redis
     REDIS_URL: str
+    # Pool Redis partilhado (app/core/redis_pool.py): limite por finalidade e espera por ligação
+    REDIS_POOL_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    # DB lógico por finalidade; None = DB do REDIS_URL (mudar o DB do cache deixa as
+    # chaves antigas no DB anterior: o cache arranca frio)
+    REDIS_CACHE_DB: Optional[int] = None
+    REDIS_RATE_LIMIT_DB: Optional[int] = None
+    # Cache L1 em memória por processo à frente do Redis (CacheService)
+    CACHE_L1_ENABLED: bool = True
+    CACHE_L1_TTL_SECONDS: float = 30.0
+    CACHE_L1_MAX_ENTRIES: int = 2048
+    CACHE_L1_MAX_BYTES: int = 16 * 1024 * 1024
 
     # Security
     SECRET_KEY: str
@@ -81,11 +113,35 @@ class Settings(BaseSettings):
 
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
+    # Cache por processo dos RPM personalizados por API key (RateLimiter)
+    RATE_LIMIT_OVERRIDE_CACHE_TTL_SECONDS: float = 30.0
+    RATE_LIMIT_OVERRIDE_CACHE_MAX_ENTRIES: int = 10000
 
     # Scraping
     SCRAPING_TIMEOUT: int = 30
     SCRAPING_MAX_RETRIES: int = 3
     SCRAPING_DELAY: float = 1.0
+    # Fan-out de scrapers na task Celery start_investigation (teto por processo worker)
+    SCRAPER_FANOUT_MAX_CONCURRENCY: int = 4
+
+    # Fila Redis de scrapers: bloqueio máximo do BZPOPMIN antes de o worker rever o estado
+    QUEUE_DEQUEUE_BLOCK_TIMEOUT: float = 5.0
+    # Backend da fila: "sorted_set" (ZADD/BZPOPMIN) ou "streams" (consumer groups, at-least-once)
+    QUEUE_BACKEND: str = "sorted_set"
+    # Streams: entradas por XAUTOCLAIM e inactividade mínima (s) antes de as recuperar
+    QUEUE_STREAM_BATCH_SIZE: int = 10
+    QUEUE_STREAM_CLAIM_IDLE_SECONDS: int = 240
+    # Slots concorrentes por tipo de scraper no WorkerOrchestrator (JSON no .env, ex.: {"cartorios": 4})
+    SCRAPER_WORKER_SLOTS_DEFAULT: int = 2
+    SCRAPER_WORKER_SLOTS: Dict[str, int] = {"cartorios": 4, "diario_oficial": 3}
+    # Limite do portal upstream (pedidos/minuto) — restringe os slots úteis; ausente = sem limite
+    SCRAPER_UPSTREAM_RPM: Dict[str, int] = {"receita": 3}
+
+    # Pool HTTP partilhado (scrapers + clientes de APIs) — limites por host
+    HTTP_POOL_MAX_CONNECTIONS: int = 20
+    HTTP_POOL_MAX_KEEPALIVE: int = 10
+    HTTP_POOL_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CLIENT_HTTP2: bool = True  # efectivo apenas com o pacote h2 instalado
 
     # External APIs (opcional - adicionar conforme necessário)
     INCRA_API_KEY: str = ""
@@ -210,6 +266,19 @@ class Settings(BaseSettings):
     CONECTA_CADIN_COMPLETA_CNPJ_PATH: str = "/registro/consultaCompleta/{cnpj}/cnpj"
     CONECTA_CADIN_VERSAO_PATH: str = "/registro/versaoApi"
 
+    # Conecta gov.br - tokens OAuth2 partilhados (memória + Redis entre workers)
+    CONECTA_TOKEN_SHARED_CACHE: bool = True
+    CONECTA_TOKEN_REFRESH_MARGIN_SECONDS: int = 120
+    CONECTA_TOKEN_EXPIRY_MARGIN_SECONDS: int = 30
+    CONECTA_TOKEN_LOCK_TIMEOUT_SECONDS: float = 15.0
+    # Consultas Conecta em lote (POST /integrations/conecta/bulk)
+    CONECTA_BULK_MAX_ITEMS: int = 1000  # pares documento × provider por job
+    CONECTA_BULK_MAX_CONCURRENCY: int = 16
+    CONECTA_BULK_INSERT_BATCH_SIZE: int = 100
+    # Pedidos/segundo ao upstream por provider (bucket partilhado no Redis; JSON no .env)
+    CONECTA_BULK_RATE_PER_SECOND_DEFAULT: int = 5
+    CONECTA_BULK_RATE_PER_SECOND: Dict[str, int] = {"conecta_cnpj": 10}
+
     # Portal gov.br - API de Serviços
     PORTAL_SERVICOS_API_URL: str = "https://www.servicos.gov.br/api/v1"
     PORTAL_SERVICOS_AUTH_TOKEN: str = ""
@@ -236,6 +305,38 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = ""
     SMTP_FROM: str = "noreply@agroadb.com"
     SMTP_FROM_NAME: str = "AgroADB Platform"
+    # Pool de ligações SMTP autenticadas e envio em lote (app/services/email_dispatcher.py)
+    SMTP_POOL_SIZE: int = 4
+    SMTP_POOL_MAX_IDLE_SECONDS: float = 60.0
+    SMTP_TIMEOUT: float = 30.0
+    SMTP_BATCH_MAX_MESSAGES: int = 50
+    SMTP_BATCH_LINGER_SECONDS: float = 0.05
+
+    # Exportação CSV/XLSX em streaming: linhas por lote do cursor e bytes em memória
+    # antes de o XLSX passar para ficheiro temporário
+    EXPORT_STREAM_BATCH_SIZE: int = 1000
+    EXPORT_SPOOL_MAX_BYTES: int = 8 * 1024 * 1024
+
+    # Relatórios PDF (app/services/pdf_render.py): processos de renderização
+    # (0 = thread na própria API) e cache em disco por hash do conteúdo
+    PDF_RENDER_WORKERS: int = 2
+    PDF_CACHE_DIR: Optional[str] = None
+    PDF_CACHE_TTL_SECONDS: int = 24 * 3600
+
+    # OCR (app/services/ocr/executor.py): pool de processos (0 = nº de CPUs), páginas
+    # por documento e em paralelo por job (0 = OCR_WORKERS), tempo limite do job,
+    # memória por worker (MB, 0 = sem limite) e páginas até reciclar o worker
+    OCR_WORKERS: int = 0
+    OCR_DPI: int = 300
+    OCR_MAX_PAGES: int = 500
+    OCR_JOB_MAX_PARALLEL_PAGES: int = 0
+    OCR_JOB_TIMEOUT_SECONDS: float = 600.0
+    OCR_WORKER_MAX_MEMORY_MB: int = 1536
+    OCR_WORKER_MAX_TASKS: int = 200
+    # Cache de resultados OCR por SHA-256 do ficheiro (app/services/ocr/result_store.py)
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_DIR: Optional[str] = None
+    OCR_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
 
     # Frontend URL (para links em emails)
     FRONTEND_URL: str = "http://localhost:5173"
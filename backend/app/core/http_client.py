@@ -0,0 +1,179 @@
+"""
+Pool de clientes HTTP partilhado (scrapers e clientes de APIs em app/services).
+
+Um ``httpx.AsyncClient`` por host (scheme + host + porta) e por event loop, com
+keep-alive e HTTP/2 quando o pacote ``h2`` está instalado. Evita repetir o
+handshake TCP/TLS a cada pedido aos portais governamentais.
+
+Métricas Prometheus (com PROMETHEUS_ENABLED):
+
+- ``agroadb_http_pool_requests_total{host,connection}`` — ``new`` ou ``reused``
+- ``agroadb_http_pool_in_flight_requests{host}``
+- ``agroadb_http_pool_saturation_ratio{host}`` — pedidos em curso / HTTP_POOL_MAX_CONNECTIONS
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import weakref
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Dict, Tuple
+
+import httpx
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    HTTP2_AVAILABLE = False
+
+HTTP_POOL_REQUESTS = Counter(
+    "agroadb_http_pool_requests_total",
+    "Pedidos HTTP de saída por host e tipo de ligação (nova ou reutilizada)",
+    ["host", "connection"],
+)
+HTTP_POOL_IN_FLIGHT = Gauge(
+    "agroadb_http_pool_in_flight_requests",
+    "Pedidos HTTP de saída em curso por host",
+    ["host"],
+)
+HTTP_POOL_SATURATION = Gauge(
+    "agroadb_http_pool_saturation_ratio",
+    "Pedidos em curso / limite de ligações do pool do host",
+    ["host"],
+)
+
+PoolKey = Tuple[str, str, int, bool]
+
+# Clientes httpx ficam presos ao loop onde abriram ligações (asyncio.run por task Celery)
+_loop_clients: (
+    "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[PoolKey, httpx.AsyncClient]]"
+) = weakref.WeakKeyDictionary()
+_pool_stats: Dict[str, Dict[str, int]] = {}
+
+
+class _InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """Transporte com contagem de pedidos em curso e de reutilização de ligações"""
+
+    def __init__(self, host: str, max_connections: int, **kwargs):
+        super().__init__(**kwargs)
+        self._host = host
+        self._max_connections = max(1, max_connections)
+        self._in_flight = 0
+        self._seen_streams: "weakref.WeakSet" = weakref.WeakSet()
+
+    def _set_in_flight(self, delta: int) -> None:
+        self._in_flight += delta
+        if settings.PROMETHEUS_ENABLED:
+            HTTP_POOL_IN_FLIGHT.labels(host=self._host).set(self._in_flight)
+            HTTP_POOL_SATURATION.labels(host=self._host).set(
+                self._in_flight / self._max_connections
+            )
+
+    def _record_connection(self, response: httpx.Response) -> None:
+        stream = response.extensions.get("network_stream")
+        if stream is None:
+            return
+        try:
+            reused = stream in self._seen_streams
+            self._seen_streams.add(stream)
+        except TypeError:
+            return
+        kind = "reused" if reused else "new"
+        stats = _pool_stats.setdefault(self._host, {"new": 0, "reused": 0})
+        stats[kind] += 1
+        if settings.PROMETHEUS_ENABLED:
+            HTTP_POOL_REQUESTS.labels(host=self._host, connection=kind).inc()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._set_in_flight(1)
+        try:
+            response = await super().handle_async_request(request)
+        finally:
+            self._set_in_flight(-1)
+        self._record_connection(response)
+        return response
+
+
+def _pool_key(url: str, verify: bool) -> PoolKey:
+    parsed = httpx.URL(url)
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    return parsed.scheme, parsed.host, port, verify
+
+
+def _build_client(host: str, verify: bool) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.HTTP_POOL_KEEPALIVE_EXPIRY,
+    )
+    http2 = settings.HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE
+    transport = _InstrumentedTransport(
+        host,
+        settings.HTTP_POOL_MAX_CONNECTIONS,
+        verify=verify,
+        http2=http2,
+        limits=limits,
+    )
+    # Cliente partilhado entre pedidos não relacionados: nunca guardar cookies
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=settings.SCRAPING_TIMEOUT,
+        verify=verify,
+        cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+    )
+
+
+def get_http_client(url: str, verify: bool = True) -> httpx.AsyncClient:
+    """
+    Retorna o cliente partilhado para o host de ``url``
+
+    O cliente não deve ser fechado pelo chamador nem usado em ``async with``.
+    Timeouts, headers e ``follow_redirects`` passam-se por pedido.
+
+    Args:
+        url: URL absoluta (apenas scheme/host/porta são usados)
+        verify: Verificação TLS (clientes distintos para verify=False)
+
+    Returns:
+        httpx.AsyncClient do pool do host
+    """
+    loop = asyncio.get_running_loop()
+    clients = _loop_clients.get(loop)
+    if clients is None:
+        clients = {}
+        _loop_clients[loop] = clients
+
+    key = _pool_key(url, verify)
+    client = clients.get(key)
+    if client is None or client.is_closed:
+        client = _build_client(key[1], verify)
+        clients[key] = client
+        logger.debug("Pool HTTP criado para %s://%s:%s", key[0], key[1], key[2])
+    return client
+
+
+async def close_http_clients() -> None:
+    """Fecha os clientes do loop corrente (shutdown da API / fim da task Celery)"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    clients = _loop_clients.pop(loop, {})
+    for client in clients.values():
+        try:
+            await client.aclose()
+        except Exception as exc:  # pragma: no cover - defensivo
+            logger.debug("Erro ao fechar cliente HTTP: %s", exc)
+
+
+def get_http_pool_stats() -> Dict[str, Dict[str, int]]:
+    """Contagem de ligações novas/reutilizadas por host (processo corrente)"""
+    return {host: dict(stats) for host, stats in _pool_stats.items()}
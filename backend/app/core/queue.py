@@ -8,11 +8,12 @@ import logging
 from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import redis.asyncio as redis
 
 from app.core.config import settings
+from app.core.redis_pool import get_redis
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +50,51 @@ class ScraperType(Enum):
     SIGEF_SICAR = "sigef_sicar"
 
 
+# Timeouts por tipo de scraper (segundos) — partilhados por workers e fan-out Celery
+SCRAPER_TIMEOUTS: Dict[ScraperType, int] = {
+    ScraperType.CAR: 120,
+    ScraperType.INCRA: 120,
+    ScraperType.RECEITA: 60,
+    ScraperType.DIARIO_OFICIAL: 180,
+    ScraperType.CARTORIOS: 150,
+    ScraperType.SIGEF_SICAR: 180,
+}
+
+# KEYS: progresso da investigação; ARGV: investigation_id, updated_at, TTL (s), pares task_id/status
+# Leitura, alteração e escrita no servidor: escritores concorrentes não perdem atualizações
+_PROGRESS_SCRIPT = """
+local raw = redis.call('GET', KEYS[1])
+local progress
+if raw then
+    progress = cjson.decode(raw)
+else
+    progress = {investigation_id = ARGV[1], total_tasks = 0, completed_tasks = 0,
+                failed_tasks = 0, running_tasks = 0, tasks = {}}
+end
+for i = 4, #ARGV, 2 do
+    local task_id, status = ARGV[i], ARGV[i + 1]
+    local old_status = progress.tasks[task_id]
+    if old_status == nil then
+        progress.total_tasks = progress.total_tasks + 1
+    end
+    progress.tasks[task_id] = status
+    if old_status == 'running' then
+        progress.running_tasks = progress.running_tasks - 1
+    end
+    if status == 'completed' then
+        progress.completed_tasks = progress.completed_tasks + 1
+    elseif status == 'failed' then
+        progress.failed_tasks = progress.failed_tasks + 1
+    elseif status == 'running' then
+        progress.running_tasks = progress.running_tasks + 1
+    end
+end
+progress.updated_at = ARGV[2]
+redis.call('SETEX', KEYS[1], ARGV[3], cjson.encode(progress))
+return 1
+"""
+
+
 @dataclass
 class Task:
     """Modelo de tarefa na fila"""
@@ -108,7 +154,8 @@ class QueueManager:
     - Circuit breaker para scrapers lentos
     """
 
-    def __init__(self, redis_url: str = "redis://localhost:6379"):
+    def __init__(self, redis_url: Optional[str] = None):
+        # None = pool partilhado "queue" sobre REDIS_URL
         self.redis_url = redis_url
         self.redis_client: Optional[redis.Redis] = None
 
@@ -131,15 +178,13 @@ class QueueManager:
         self.CIRCUIT_BREAKER_TIMEOUT = 300  # 5 minutos
 
     async def connect(self):
-        """Conecta ao Redis"""
+        """Obtém o cliente do pool Redis partilhado"""
         if not self.redis_client:
-            self.redis_client = await redis.from_url(
-                self.redis_url, encoding="utf-8", decode_responses=True
-            )
+            self.redis_client = get_redis("queue", self.redis_url)
             logger.info("✅ Conectado ao Redis")
 
     async def disconnect(self):
-        """Desconecta do Redis"""
+        """Liberta o cliente (o pool é fechado no shutdown)"""
         if self.redis_client:
             await self.redis_client.aclose()
             self.redis_client = None
@@ -161,6 +206,39 @@ class QueueManager:
         """Gera chave do circuit breaker"""
         return f"{self.CIRCUIT_BREAKER_PREFIX}{scraper_type.value}"
 
+    async def _push_to_queue(self, task: Task):
+        """Coloca a task na fila do seu tipo/prioridade (sorted set)"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        self._queue_push(pipe, task)
+        await pipe.execute()
+
+    def _queue_push(self, pipe, task: Task):
+        """Acrescenta a um pipeline os comandos que colocam a task na fila"""
+        queue_key = self._get_queue_key(task.type, task.priority)
+        score = task.priority.value * 1000000 + task.created_at.timestamp()
+        pipe.zadd(queue_key, {task.id: score})
+
+    async def _prepare_push(self, tasks: List[Task]):
+        """Preparação antes de enfileirar em lote (sem efeito no sorted set)"""
+
+    async def _remove_from_queue(self, task: Task):
+        """Remove a task de todas as filas de prioridade do seu tipo"""
+        for priority in TaskPriority:
+            queue_key = self._get_queue_key(task.type, priority)
+            await self.redis_client.zrem(queue_key, task.id)
+
+    async def queue_length(self, scraper_type: ScraperType, priority: TaskPriority) -> int:
+        """Número de tasks à espera numa fila"""
+        return await self.redis_client.zcard(self._get_queue_key(scraper_type, priority))
+
+    async def reclaim_stale_tasks(self) -> int:
+        """
+        Recupera tasks de consumidores mortos
+
+        Sem efeito no backend sorted set (não há lista de pendentes); ver StreamQueueManager.
+        """
+        return 0
+
     async def enqueue(self, task: Task) -> bool:
         """
         Adiciona task na fila com prioridade
@@ -186,10 +264,7 @@ class QueueManager:
             )
 
             # Adicionar à fila com score baseado em prioridade e timestamp
-            queue_key = self._get_queue_key(task.type, task.priority)
-            score = task.priority.value * 1000000 + task.created_at.timestamp()
-
-            await self.redis_client.zadd(queue_key, {task.id: score})
+            await self._push_to_queue(task)
 
             # Atualizar progresso da investigação
             await self._update_investigation_progress(
@@ -205,6 +280,73 @@ class QueueManager:
             logger.error(f"❌ Erro ao enfileirar task {task.id}: {e}")
             return False
 
+    async def enqueue_many(self, tasks: List[Task]) -> List[str]:
+        """
+        Enfileira várias tasks de uma vez
+
+        Uma leitura em pipeline dos circuit breakers e uma escrita MULTI/EXEC com
+        todas as tasks, filas e progresso — o progresso de cada investigação é
+        atualizado uma única vez, no servidor, independentemente do número de tasks.
+
+        Args:
+            tasks: Tasks a enfileirar
+
+        Returns:
+            IDs das tasks enfileiradas (tipos com circuit breaker aberto ficam de fora)
+        """
+        if not tasks:
+            return []
+
+        try:
+            scraper_types = list(dict.fromkeys(task.type for task in tasks))
+
+            pipe = self.redis_client.pipeline(transaction=False)
+            for scraper_type in scraper_types:
+                pipe.exists(f"{self._get_circuit_breaker_key(scraper_type)}:open")
+            results = await pipe.execute()
+
+            open_circuits = {
+                scraper_type for scraper_type, is_open in zip(scraper_types, results) if is_open
+            }
+            for scraper_type in open_circuits:
+                logger.warning(
+                    f"⚡ Circuit breaker ABERTO para {scraper_type.value} - task não enfileirada"
+                )
+
+            accepted = [task for task in tasks if task.type not in open_circuits]
+            if not accepted:
+                return []
+
+            task_ids_by_investigation: Dict[str, List[str]] = {}
+            for task in accepted:
+                task_ids_by_investigation.setdefault(task.investigation_id, []).append(task.id)
+
+            await self._prepare_push(accepted)
+
+            pipe = self.redis_client.pipeline(transaction=True)
+            for task in accepted:
+                pipe.setex(
+                    self._get_task_key(task.id), timedelta(days=7), json.dumps(task.to_dict())
+                )
+                self._queue_push(pipe, task)
+            for investigation_id, task_ids in task_ids_by_investigation.items():
+                self._progress_update(
+                    pipe,
+                    investigation_id,
+                    [(task_id, TaskStatus.PENDING) for task_id in task_ids],
+                )
+            await pipe.execute()
+
+            logger.info(
+                f"✅ {len(accepted)} tasks enfileiradas em lote "
+                f"({len(task_ids_by_investigation)} investigação(ões))"
+            )
+            return [task.id for task in accepted]
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao enfileirar lote de {len(tasks)} tasks: {e}")
+            return []
+
     async def dequeue(self, scraper_type: ScraperType) -> Optional[Task]:
         """
         Remove e retorna próxima task da fila (por prioridade)
@@ -229,31 +371,92 @@ class QueueManager:
                 result = await self.redis_client.zpopmin(queue_key, count=1)
 
                 if result:
-                    task_id = result[0][0]
-                    task_data = await self.redis_client.get(self._get_task_key(task_id))
+                    task = await self._claim_task(result[0][0])
+                    if task:
+                        return task
 
-                    if task_data:
-                        task = Task.from_dict(json.loads(task_data))
-                        task.status = TaskStatus.RUNNING
-                        task.started_at = datetime.utcnow()
+            return None
 
-                        # Atualizar task
-                        await self._save_task(task)
+        except Exception as e:
+            logger.error(f"❌ Erro ao desenfileirar task de {scraper_type.value}: {e}")
+            return None
 
-                        # Atualizar progresso
-                        await self._update_investigation_progress(
-                            task.investigation_id, task.id, TaskStatus.RUNNING
-                        )
+    async def dequeue_blocking(
+        self, scraper_type: ScraperType, timeout: float = 5.0
+    ) -> Optional[Task]:
+        """
+        Aguarda (sem polling) a próxima task da fila, respeitando a prioridade
 
-                        logger.info(f"🎯 Task {task.id} iniciada: {task.type.value}")
-                        return task
+        Usa BZPOPMIN sobre as cinco filas de prioridade, pela ordem CRITICAL -> BACKGROUND:
+        o Redis devolve o elemento da primeira fila não vazia e acorda o worker assim que
+        uma task é enfileirada.
 
-            return None
+        Args:
+            scraper_type: Tipo de scraper
+            timeout: Segundos máximos de bloqueio (permite ao worker verificar paragem)
+
+        Returns:
+            Task ou None (timeout, circuito aberto ou erro)
+        """
+        try:
+            # Circuito aberto: esperar sem consultar as filas
+            if await self._is_circuit_open(scraper_type):
+                logger.warning(f"⚡ Circuit breaker ABERTO para {scraper_type.value}")
+                await asyncio.sleep(timeout)
+                return None
+
+            queue_keys = [self._get_queue_key(scraper_type, p) for p in TaskPriority]
+            result = await self.redis_client.bzpopmin(queue_keys, timeout=timeout)
+            if not result:
+                return None
+
+            _queue_key, task_id, _score = result
+            return await self._claim_task(task_id)
 
         except Exception as e:
             logger.error(f"❌ Erro ao desenfileirar task de {scraper_type.value}: {e}")
+            # Evitar loop apertado com Redis indisponível
+            await asyncio.sleep(1)
+            return None
+
+    async def _claim_task(self, task_id: str) -> Optional[Task]:
+        """Marca como RUNNING uma task já retirada da fila"""
+        task_data = await self.redis_client.get(self._get_task_key(task_id))
+        if not task_data:
             return None
 
+        task = Task.from_dict(json.loads(task_data))
+        task.status = TaskStatus.RUNNING
+        task.started_at = datetime.utcnow()
+
+        # Atualizar task
+        await self._save_task(task)
+
+        # Atualizar progresso
+        await self._update_investigation_progress(
+            task.investigation_id, task.id, TaskStatus.RUNNING
+        )
+
+        logger.info(f"🎯 Task {task.id} iniciada: {task.type.value}")
+        return task
+
+    async def release_task(self, task: Task):
+        """
+        Devolve à fila uma task retirada mas não executada (ex: worker a parar)
+
+        Ignora o circuit breaker: a task já tinha sido aceite na fila.
+        """
+        task.status = TaskStatus.PENDING
+        task.started_at = None
+
+        await self._save_task(task)
+        await self._push_to_queue(task)
+        await self._update_investigation_progress(
+            task.investigation_id, task.id, TaskStatus.PENDING
+        )
+
+        logger.info(f"↩️ Task {task.id} devolvida à fila: {task.type.value}")
+
     async def complete_task(self, task_id: str, result: Dict[str, Any]) -> bool:
         """
         Marca task como completa
@@ -410,45 +613,27 @@ class QueueManager:
         self, investigation_id: str, task_id: str, status: TaskStatus
     ):
         """Atualiza progresso da investigação"""
-        progress_key = self._get_progress_key(investigation_id)
-
-        # Buscar progresso atual
-        progress_data = await self.redis_client.get(progress_key)
-        if progress_data:
-            progress = json.loads(progress_data)
-        else:
-            progress = {
-                "investigation_id": investigation_id,
-                "total_tasks": 0,
-                "completed_tasks": 0,
-                "failed_tasks": 0,
-                "running_tasks": 0,
-                "tasks": {},
-                "updated_at": None,
-            }
-
-        # Atualizar contadores
-        if task_id not in progress["tasks"]:
-            progress["total_tasks"] += 1
+        await self._progress_update(self.redis_client, investigation_id, [(task_id, status)])
 
-        old_status = progress["tasks"].get(task_id)
-        progress["tasks"][task_id] = status.value
-
-        # Atualizar contadores específicos
-        if old_status == TaskStatus.RUNNING.value:
-            progress["running_tasks"] -= 1
-
-        if status == TaskStatus.COMPLETED:
-            progress["completed_tasks"] += 1
-        elif status == TaskStatus.FAILED:
-            progress["failed_tasks"] += 1
-        elif status == TaskStatus.RUNNING:
-            progress["running_tasks"] += 1
-
-        progress["updated_at"] = datetime.utcnow().isoformat()
+    def _progress_update(
+        self, client, investigation_id: str, updates: List[Tuple[str, TaskStatus]]
+    ):
+        """
+        Aplica mudanças de estado ao progresso da investigação num único script
 
-        # Salvar progresso
-        await self.redis_client.setex(progress_key, timedelta(days=30), json.dumps(progress))
+        Args:
+            client: Cliente Redis (devolve awaitable) ou pipeline (acrescenta o comando)
+            investigation_id: ID da investigação
+            updates: Pares (task_id, novo status)
+        """
+        args = [
+            investigation_id,
+            datetime.utcnow().isoformat(),
+            int(timedelta(days=30).total_seconds()),
+        ]
+        for task_id, status in updates:
+            args.extend((task_id, status.value))
+        return client.eval(_PROGRESS_SCRIPT, 1, self._get_progress_key(investigation_id), *args)
 
     async def get_investigation_progress(self, investigation_id: str) -> Optional[dict]:
         """Recupera progresso de uma investigação"""
@@ -525,8 +710,7 @@ class QueueManager:
             type_stats = {"total": 0, "by_priority": {}}
 
             for priority in TaskPriority:
-                queue_key = self._get_queue_key(stype, priority)
-                count = await self.redis_client.zcard(queue_key)
+                count = await self.queue_length(stype, priority)
 
                 type_stats["by_priority"][priority.name] = count
                 type_stats["total"] += count
@@ -551,9 +735,7 @@ class QueueManager:
             await self._save_task(task)
 
             # Remover de todas as filas
-            for priority in TaskPriority:
-                queue_key = self._get_queue_key(task.type, priority)
-                await self.redis_client.zrem(queue_key, task_id)
+            await self._remove_from_queue(task)
 
             logger.info(f"🚫 Task {task_id} cancelada")
             return True
@@ -563,5 +745,14 @@ class QueueManager:
             return False
 
 
-# Instância global do gerenciador de filas (URL alinhada ao ambiente)
-queue_manager = QueueManager(str(settings.REDIS_URL))
+def _create_queue_manager() -> QueueManager:
+    """Instancia o backend configurado em QUEUE_BACKEND"""
+    if settings.QUEUE_BACKEND == "streams":
+        from app.core.queue_streams import StreamQueueManager
+
+        return StreamQueueManager()
+    return QueueManager()
+
+
+# Instância global do gerenciador de filas (pool "queue" e backend alinhados ao ambiente)
+queue_manager = _create_queue_manager()
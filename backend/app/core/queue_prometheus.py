@@ -35,6 +35,21 @@ SCRAPER_CIRCUIT_OPENED_TOTAL = Counter(
     "Transições para circuito aberto (filas Redis)",
     ["scraper_type"],
 )
+SCRAPER_WORKER_SLOTS = Gauge(
+    "agroadb_scraper_worker_slots",
+    "Slots de execução activos (após circuito/rate limit) por tipo de scraper",
+    ["scraper_type"],
+)
+SCRAPER_WORKER_SLOTS_CONFIGURED = Gauge(
+    "agroadb_scraper_worker_slots_configured",
+    "Slots configurados (SCRAPER_WORKER_SLOTS) por tipo de scraper",
+    ["scraper_type"],
+)
+SCRAPER_WORKER_BUSY = Gauge(
+    "agroadb_scraper_worker_busy_slots",
+    "Slots a executar uma task neste momento por tipo de scraper",
+    ["scraper_type"],
+)
 EXTERNAL_CIRCUIT_OPEN = Gauge(
     "agroadb_external_circuit_breaker_open",
     "1 se o circuit breaker in-memory (HTTP/serviços externos) estiver OPEN",
@@ -56,8 +71,17 @@ def scraper_circuit_closed(scraper_type: str) -> None:
     SCRAPER_CIRCUIT_OPEN.labels(scraper_type=scraper_type).set(0)
 
 
+def scraper_worker_utilisation(scraper_type: str, busy: int, active: int, configured: int) -> None:
+    """Chamar quando o pool de slots de um ScraperWorker muda (início/fim de task, novo limite)."""
+    if not settings.PROMETHEUS_ENABLED:
+        return
+    SCRAPER_WORKER_BUSY.labels(scraper_type=scraper_type).set(busy)
+    SCRAPER_WORKER_SLOTS.labels(scraper_type=scraper_type).set(active)
+    SCRAPER_WORKER_SLOTS_CONFIGURED.labels(scraper_type=scraper_type).set(configured)
+
+
 async def refresh_queue_and_registry_gauges(queue_manager: QueueManager) -> None:
-    """Actualiza gauges de filas, circuitos Redis e circuitos externos."""
+    """Actualiza gauges de filas, circuitos Redis, staleness das MVs, pools Redis e circuitos externos."""
     if not settings.PROMETHEUS_ENABLED:
         return
     try:
@@ -67,14 +91,22 @@ async def refresh_queue_and_registry_gauges(queue_manager: QueueManager) -> None
         if queue_manager.redis_client:
             for st in ScraperType:
                 for pr in TaskPriority:
-                    qkey = queue_manager._get_queue_key(st, pr)
-                    n = await queue_manager.redis_client.zcard(qkey)
+                    n = await queue_manager.queue_length(st, pr)
                     QUEUE_TASKS.labels(scraper_type=st.value, priority=pr.name).set(float(n))
                 circ = await queue_manager.get_circuit_status(st)
                 SCRAPER_CIRCUIT_OPEN.labels(scraper_type=st.value).set(
                     1.0 if circ["is_open"] else 0.0
                 )
 
+        if queue_manager.redis_client:
+            from app.services.materialized_views import refresh_staleness_gauges
+
+            await refresh_staleness_gauges(queue_manager.redis_client)
+
+        from app.core.redis_pool import get_redis_pool_stats
+
+        get_redis_pool_stats()
+
         for row in CircuitBreakerRegistry.get_all_status():
             name = str(row.get("name", "unknown"))
             is_open = 1.0 if row.get("state") == "open" else 0.0
@@ -0,0 +1,359 @@
+"""
+Backend de filas com Redis Streams - Consumer groups e entrega at-least-once
+
+Alternativa ao backend sorted set (QUEUE_BACKEND=streams). Mantém a mesma API
+(enqueue / dequeue / complete_task / fail_task / cancel_task) e a semântica de
+TaskPriority, com:
+
+- Um stream por tipo de scraper e prioridade, lido por um consumer group
+- Confirmação (XACK) apenas quando a task termina: um worker que morra a meio
+  deixa a entrada pendente, e outro worker recupera-a (XAUTOCLAIM)
+- Uma entrada por leitura, pela ordem de prioridade: nada fica retido num buffer
+  local, e uma task CRITICAL enfileirada depois passa à frente das restantes
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from typing import List, Optional, Tuple
+
+from redis.exceptions import ResponseError
+
+from app.core.config import settings
+from app.core.queue import (
+    SCRAPER_TIMEOUTS,
+    QueueManager,
+    ScraperType,
+    Task,
+    TaskPriority,
+    TaskStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+StreamEntry = Tuple[str, str, Optional[str]]  # (stream, entry_id, task_id)
+
+# KEYS: stream, hash de entradas; ARGV: task_id
+_XADD_SCRIPT = """
+local entry_id = redis.call('XADD', KEYS[1], '*', 'task_id', ARGV[1])
+redis.call('HSET', KEYS[2], ARGV[1], KEYS[1] .. '|' .. entry_id)
+return entry_id
+"""
+
+# KEYS: streams por prioridade (CRITICAL primeiro); ARGV: grupo, consumidor
+# Entrega no máximo uma entrada: a mais antiga do stream mais prioritário com entradas novas
+_READ_FIRST_SCRIPT = """
+for _, stream in ipairs(KEYS) do
+    local result = redis.call('XREADGROUP', 'GROUP', ARGV[1], ARGV[2], 'COUNT', 1, 'STREAMS', stream, '>')
+    if result and result[1] then
+        local entry = result[1][2][1]
+        return {stream, entry[1], entry[2]}
+    end
+end
+return false
+"""
+
+# KEYS: stream, hash de entradas; ARGV: grupo, entry_id, task_id
+# O registo da task só é removido se ainda apontar para esta entrada
+_ACK_ENTRY_SCRIPT = """
+redis.call('XACK', KEYS[1], ARGV[1], ARGV[2])
+redis.call('XDEL', KEYS[1], ARGV[2])
+if ARGV[3] ~= '' and redis.call('HGET', KEYS[2], ARGV[3]) == KEYS[1] .. '|' .. ARGV[2] then
+    redis.call('HDEL', KEYS[2], ARGV[3])
+end
+return 1
+"""
+
+
+class StreamQueueManager(QueueManager):
+    """
+    Gerenciador de Filas com Redis Streams
+
+    Features:
+    - Consumer group partilhado por todos os workers
+    - Entradas pendentes até complete_task/fail_task/cancel_task (XACK + XDEL)
+    - Recuperação de entradas de consumidores mortos (reclaim_stale_tasks)
+    - Uma entrada entregue por dequeue, sempre a mais prioritária
+    """
+
+    def __init__(self, redis_url: Optional[str] = None):
+        super().__init__(redis_url)
+
+        self.STREAM_PREFIX = "stream:"
+        self.STREAM_ENTRIES_KEY = "stream:entries"  # task_id -> "stream|entry_id"
+        self.GROUP_NAME = "agroadb-scrapers"
+        self.CONSUMER_NAME = f"{socket.gethostname()}-{os.getpid()}"
+
+        # Entradas por XAUTOCLAIM (por stream) e inactividade mínima para recuperar entradas
+        self.BATCH_SIZE = settings.QUEUE_STREAM_BATCH_SIZE
+        self.CLAIM_IDLE_MS = int(
+            max(settings.QUEUE_STREAM_CLAIM_IDLE_SECONDS, max(SCRAPER_TIMEOUTS.values()) + 30)
+            * 1000
+        )
+
+        self._groups_ready: set = set()
+
+    def _get_stream_key(self, scraper_type: ScraperType, priority: TaskPriority) -> str:
+        """Gera chave do stream por tipo e prioridade"""
+        return f"{self.STREAM_PREFIX}{scraper_type.value}:{priority.value}"
+
+    async def _ensure_group(self, stream_key: str):
+        """Cria o consumer group (e o stream) se ainda não existir"""
+        if stream_key in self._groups_ready:
+            return
+        try:
+            await self.redis_client.xgroup_create(
+                stream_key, self.GROUP_NAME, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._groups_ready.add(stream_key)
+
+    async def _push_to_queue(self, task: Task):
+        """Adiciona a task ao stream do seu tipo/prioridade"""
+        await self._prepare_push([task])
+        await super()._push_to_queue(task)
+
+    def _queue_push(self, pipe, task: Task):
+        """XADD + registo da entrada num único script (cabe no MULTI de enqueue_many)"""
+        stream_key = self._get_stream_key(task.type, task.priority)
+        pipe.eval(_XADD_SCRIPT, 2, stream_key, self.STREAM_ENTRIES_KEY, task.id)
+
+    async def _prepare_push(self, tasks: List[Task]):
+        """Garante os consumer groups dos streams de destino"""
+        for stream_key in {self._get_stream_key(t.type, t.priority) for t in tasks}:
+            await self._ensure_group(stream_key)
+
+    async def _remove_from_queue(self, task: Task):
+        """Remove a entrada da task (pendente ou não) do stream"""
+        await self._ack(task.id)
+
+    async def _ack(self, task_id: str):
+        """Confirma e apaga a entrada do stream associada à task"""
+        ref = await self.redis_client.hget(self.STREAM_ENTRIES_KEY, task_id)
+        if not ref:
+            return
+        stream_key, entry_id = ref.split("|", 1)
+        await self._ack_entry(stream_key, entry_id, task_id)
+
+    async def _ack_entry(self, stream_key: str, entry_id: str, task_id: Optional[str]):
+        """Confirma e apaga uma entrada concreta do stream"""
+        await self.redis_client.eval(
+            _ACK_ENTRY_SCRIPT,
+            2,
+            stream_key,
+            self.STREAM_ENTRIES_KEY,
+            self.GROUP_NAME,
+            entry_id,
+            task_id or "",
+        )
+
+    async def queue_length(self, scraper_type: ScraperType, priority: TaskPriority) -> int:
+        """Entradas ainda não entregues (XLEN - pendentes)"""
+        stream_key = self._get_stream_key(scraper_type, priority)
+        length = await self.redis_client.xlen(stream_key)
+        if not length:
+            return 0
+        try:
+            pending = await self.redis_client.xpending(stream_key, self.GROUP_NAME)
+        except ResponseError:
+            return length
+        return max(0, length - int(pending.get("pending", 0)))
+
+    async def _read_entry(
+        self, scraper_type: ScraperType, block_ms: Optional[int]
+    ) -> Optional[StreamEntry]:
+        """
+        Entrega uma única entrada nova, pela ordem CRITICAL -> BACKGROUND
+
+        Sem entradas disponíveis, e com block_ms, bloqueia nos cinco streams. Se o
+        XREADGROUP bloqueante entregar mais de uma entrada, as restantes voltam ao
+        fim do seu stream em vez de ficarem retidas por este consumidor.
+        """
+        stream_keys = [self._get_stream_key(scraper_type, p) for p in TaskPriority]
+        for stream_key in stream_keys:
+            await self._ensure_group(stream_key)
+
+        result = await self.redis_client.eval(
+            _READ_FIRST_SCRIPT, len(stream_keys), *stream_keys, self.GROUP_NAME, self.CONSUMER_NAME
+        )
+        if result:
+            stream_key, entry_id, fields = result
+            return stream_key, entry_id, dict(zip(fields[::2], fields[1::2])).get("task_id")
+        if not block_ms:
+            return None
+
+        response = await self.redis_client.xreadgroup(
+            self.GROUP_NAME,
+            self.CONSUMER_NAME,
+            {stream_key: ">" for stream_key in stream_keys},
+            count=1,
+            block=block_ms,
+        )
+        entries = sorted(
+            (stream_keys.index(stream_key), stream_key, entry_id, (fields or {}).get("task_id"))
+            for stream_key, stream_entries in response or []
+            for entry_id, fields in stream_entries
+        )
+        if not entries:
+            return None
+        for _index, stream_key, entry_id, task_id in entries[1:]:
+            await self._return_entry(stream_key, entry_id, task_id)
+        _index, stream_key, entry_id, task_id = entries[0]
+        return stream_key, entry_id, task_id
+
+    async def _return_entry(
+        self, stream_key: str, entry_id: str, task_id: Optional[str], stale: bool = False
+    ) -> bool:
+        """
+        Devolve ao stream uma entrada entregue mas não iniciada
+
+        A task volta a PENDING numa entrada nova (sem dono) e a antiga é confirmada.
+        Com ``stale`` (entrada recuperada de um consumidor morto) uma task RUNNING
+        também é devolvida. Se não for possível reenfileirar (ex: circuito aberto) a
+        entrada antiga fica pendente e será recuperada mais tarde.
+        """
+        runnable = {TaskStatus.PENDING}
+        if stale:
+            runnable.add(TaskStatus.RUNNING)
+        task = await self.get_task(task_id) if task_id else None
+        if not task or task.status not in runnable:
+            # Expirada, terminada, cancelada, agendada para retry ou em execução noutro worker
+            await self._ack_entry(stream_key, entry_id, task_id)
+            return False
+        task.status = TaskStatus.PENDING
+        task.started_at = None
+        if not await self.enqueue(task):
+            return False
+        await self._ack_entry(stream_key, entry_id, task_id)
+        return True
+
+    async def release_task(self, task: Task):
+        """Devolve a task numa entrada nova e confirma a entrada entregue"""
+        ref = await self.redis_client.hget(self.STREAM_ENTRIES_KEY, task.id)
+        await super().release_task(task)
+        if ref:
+            stream_key, entry_id = ref.split("|", 1)
+            await self._ack_entry(stream_key, entry_id, task.id)
+
+    async def _next_task(
+        self, scraper_type: ScraperType, block_ms: Optional[int]
+    ) -> Optional[Task]:
+        """Lê uma entrada e inicia a task se ainda estiver por executar"""
+        while True:
+            entry = await self._read_entry(scraper_type, block_ms)
+            if entry is None:
+                return None
+            stream_key, entry_id, task_id = entry
+            task = await self.get_task(task_id) if task_id else None
+            if task and task.status in (TaskStatus.PENDING, TaskStatus.RETRYING):
+                return await self._claim_task(task_id)
+            # Expirada, cancelada, terminada ou já em execução noutro worker
+            await self._ack_entry(stream_key, entry_id, task_id)
+            block_ms = None
+
+    async def dequeue(self, scraper_type: ScraperType) -> Optional[Task]:
+        """
+        Retorna próxima task (por prioridade) sem bloquear
+
+        A entrada fica pendente no consumer group até complete_task/fail_task.
+
+        Args:
+            scraper_type: Tipo de scraper
+
+        Returns:
+            Task ou None
+        """
+        try:
+            if await self._is_circuit_open(scraper_type):
+                logger.warning(f"⚡ Circuit breaker ABERTO para {scraper_type.value}")
+                return None
+            return await self._next_task(scraper_type, block_ms=None)
+        except Exception as e:
+            logger.error(f"❌ Erro ao desenfileirar task de {scraper_type.value}: {e}")
+            return None
+
+    async def dequeue_blocking(
+        self, scraper_type: ScraperType, timeout: float = 5.0
+    ) -> Optional[Task]:
+        """
+        Aguarda a próxima task com XREADGROUP BLOCK sobre os cinco streams
+
+        Args:
+            scraper_type: Tipo de scraper
+            timeout: Segundos máximos de bloqueio
+
+        Returns:
+            Task ou None (timeout, circuito aberto ou erro)
+        """
+        try:
+            if await self._is_circuit_open(scraper_type):
+                logger.warning(f"⚡ Circuit breaker ABERTO para {scraper_type.value}")
+                await asyncio.sleep(timeout)
+                return None
+            return await self._next_task(scraper_type, block_ms=max(1, int(timeout * 1000)))
+        except Exception as e:
+            logger.error(f"❌ Erro ao desenfileirar task de {scraper_type.value}: {e}")
+            await asyncio.sleep(1)
+            return None
+
+    async def complete_task(self, task_id: str, result: dict) -> bool:
+        """Marca task como completa e confirma a entrada no stream"""
+        completed = await super().complete_task(task_id, result)
+        if completed:
+            await self._ack(task_id)
+        return completed
+
+    async def fail_task(self, task_id: str, error: str) -> bool:
+        """
+        Marca task como falha e confirma a entrada
+
+        O retry (se aplicável) já ficou agendado em queue:retry e volta a entrar
+        no stream via process_retries.
+        """
+        will_retry = await super().fail_task(task_id, error)
+        try:
+            await self._ack(task_id)
+        except Exception as e:
+            logger.error(f"❌ Erro ao confirmar entrada da task {task_id}: {e}")
+        return will_retry
+
+    async def reclaim_stale_tasks(self) -> int:
+        """
+        Recupera entradas pendentes de consumidores mortos (XAUTOCLAIM)
+
+        Entradas inactivas há mais de CLAIM_IDLE_MS (acima do maior timeout de scraper)
+        são devolvidas ao stream como entradas novas, disponíveis para qualquer worker
+        e servidas pela prioridade normal; as de tasks já terminadas são confirmadas.
+
+        Returns:
+            Número de tasks recuperadas
+        """
+        reclaimed = 0
+        try:
+            for scraper_type in ScraperType:
+                count = 0
+                for priority in TaskPriority:
+                    stream_key = self._get_stream_key(scraper_type, priority)
+                    await self._ensure_group(stream_key)
+                    result = await self.redis_client.xautoclaim(
+                        stream_key,
+                        self.GROUP_NAME,
+                        self.CONSUMER_NAME,
+                        min_idle_time=self.CLAIM_IDLE_MS,
+                        count=self.BATCH_SIZE,
+                    )
+                    for entry_id, fields in result[1] if result else []:
+                        task_id = (fields or {}).get("task_id")
+                        if await self._return_entry(stream_key, entry_id, task_id, stale=True):
+                            count += 1
+                if count:
+                    reclaimed += count
+                    logger.warning(
+                        f"♻️ {count} task(s) de {scraper_type.value} recuperadas de consumidores inactivos"
+                    )
+        except Exception as e:
+            logger.error(f"❌ Erro ao recuperar tasks pendentes: {e}")
+        return reclaimed
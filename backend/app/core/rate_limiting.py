@@ -1,30 +1,100 @@
 """
 Rate Limiting Middleware
 Implementa limitação de taxa de requisições para proteção da API
+
+Algoritmo GCRA (token bucket equivalente) num único script Lua: um round-trip
+por pedido, sem picos de 2× nas fronteiras de janela fixa.
 """
 
 import hashlib
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+import math
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
 
 import redis.asyncio as redis
 from fastapi import HTTPException, Request, status
 from fastapi.responses import JSONResponse
+from redis.commands.core import AsyncScript
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
+from app.core.redis_pool import get_redis
+from app.services.api_key_cache import get_api_key_rpm
+
 logger = logging.getLogger(__name__)
 
+# GCRA: KEYS[1] guarda o TAT (theoretical arrival time, ms no relógio do Redis).
+# Cada pedido avança o TAT um intervalo (período / limite); é recusado se o TAT
+# ultrapassar o período à frente de agora. Retorna {permitido, restantes,
+# retry_after_ms, reset_ms}.
+_GCRA_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local interval = period / limit
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - period
+if allow_at > now then
+    return {0, 0, math.ceil(allow_at - now), math.ceil(tat - now)}
+end
+redis.call('SET', KEYS[1], string.format('%.3f', new_tat), 'PX', math.ceil(new_tat - now))
+return {1, math.floor((now + period - new_tat) / interval), 0, math.ceil(new_tat - now)}
+"""
+
+
+class GCRAResult(NamedTuple):
+    """Resultado de um pedido ao bucket GCRA"""
+
+    allowed: bool
+    remaining: int
+    retry_after_ms: int  # 0 se permitido
+    reset_ms: int  # até o bucket voltar a estar cheio
+
+
+# Registado uma vez por processo (EVALSHA; o script é recarregado se o servidor não o tiver)
+_gcra_script: Optional[AsyncScript] = None
+
+
+def _get_gcra_script(client: redis.Redis) -> AsyncScript:
+    global _gcra_script
+    if _gcra_script is None:
+        _gcra_script = client.register_script(_GCRA_SCRIPT)
+    return _gcra_script
+
+
+async def acquire_gcra(client: redis.Redis, key: str, limit: int, period_ms: int) -> GCRAResult:
+    """
+    Consome uma unidade do bucket GCRA ``key`` (``limit`` por ``period_ms``)
+
+    Returns:
+        GCRAResult; ``retry_after_ms`` é o tempo até haver capacidade quando recusado
+    """
+    allowed, remaining, retry_after_ms, reset_ms = await _get_gcra_script(client)(
+        keys=[key], args=[limit, period_ms], client=client
+    )
+    return GCRAResult(
+        allowed=bool(allowed),
+        remaining=int(remaining),
+        retry_after_ms=0 if allowed else max(1, int(retry_after_ms)),
+        reset_ms=int(reset_ms),
+    )
+
 
 class RateLimiter:
     """
     Rate Limiter usando Redis
 
-    Implementa sliding window para contagem precisa de requisições
+    GCRA por identificador e âmbito (endpoint com limite próprio ou global)
     """
 
-    def __init__(self, redis_url: str = "redis://localhost:6379/0"):
+    def __init__(self, redis_url: Optional[str] = None):
+        # None = pool partilhado "rate_limit" sobre REDIS_URL (DB REDIS_RATE_LIMIT_DB)
         self.redis_url = redis_url
         self.redis_client: Optional[redis.Redis] = None
 
@@ -44,16 +114,15 @@ class RateLimiter:
         }
 
     async def connect(self):
-        """Conecta ao Redis"""
+        """Obtém o cliente do pool Redis partilhado"""
         if not self.redis_client:
-            self.redis_client = await redis.from_url(
-                self.redis_url, encoding="utf-8", decode_responses=True
-            )
+            self.redis_client = get_redis("rate_limit", self.redis_url)
 
     async def disconnect(self):
-        """Desconecta do Redis"""
+        """Liberta o cliente (o pool é fechado no shutdown)"""
         if self.redis_client:
-            await self.redis_client.close()
+            await self.redis_client.aclose()
+            self.redis_client = None
 
     def _get_identifier(self, request: Request) -> str:
         """
@@ -81,6 +150,13 @@ class RateLimiter:
 
         return f"ip:{ip}"
 
+    def _get_endpoint(self, request: Request) -> Optional[str]:
+        """Endpoint com limite próprio que abrange o path, se houver"""
+        for endpoint in self.ENDPOINT_LIMITS:
+            if request.url.path.startswith(endpoint):
+                return endpoint
+        return None
+
     def _get_limit(self, request: Request) -> int:
         """
         Determina o limite de rate para a requisição
@@ -89,9 +165,9 @@ class RateLimiter:
             Número máximo de requisições por minuto
         """
         # Verificar limite específico do endpoint
-        for endpoint, limit in self.ENDPOINT_LIMITS.items():
-            if request.url.path.startswith(endpoint):
-                return limit
+        endpoint = self._get_endpoint(request)
+        if endpoint:
+            return self.ENDPOINT_LIMITS[endpoint]
 
         # Limite por tipo de usuário
         user = getattr(request.state, "user", None)
@@ -104,7 +180,7 @@ class RateLimiter:
         return self.DEFAULT_LIMITS["anonymous"]
 
     async def _resolve_limit(self, request: Request) -> int:
-        """Limite por minuto, com override Redis por API key (RPM personalizado)."""
+        """Limite por minuto, com override por API key (RPM personalizado, cache por processo)."""
         limit = self._get_limit(request)
         api_key = request.headers.get("X-API-Key")
         if not api_key:
@@ -113,9 +189,9 @@ class RateLimiter:
             if not self.redis_client:
                 await self.connect()
             full_hash = hashlib.sha256(api_key.encode()).hexdigest()
-            custom = await self.redis_client.get(f"apikey:rpm:{full_hash}")
+            custom = await get_api_key_rpm(full_hash, self.redis_client)
             if custom is not None:
-                return max(1, int(custom))
+                return custom
         except Exception as exc:
             logger.debug("Override RPM por API key ignorado: %s", exc)
         return limit
@@ -137,36 +213,26 @@ class RateLimiter:
         limit = await self._resolve_limit(request)
         window = 60  # 1 minuto em segundos
 
-        # Chave Redis: ratelimit:{identifier}:{timestamp}
-        now = datetime.utcnow()
-        current_window = int(now.timestamp() // window)
-        key = f"ratelimit:{identifier}:{current_window}"
+        # Chave Redis: ratelimit:{identifier}:{endpoint ou "global"}
+        scope = self._get_endpoint(request) or "global"
+        key = f"ratelimit:{identifier}:{scope}"
+        now = time.time()
 
         try:
-            # Incrementar contador
-            current_count = await self.redis_client.incr(key)
-
-            # Definir expiração na primeira requisição da janela
-            if current_count == 1:
-                await self.redis_client.expire(key, window * 2)  # 2 minutos para segurança
-
-            # Calcular quando o limite reseta
-            reset_time = (current_window + 1) * window
-            remaining = max(0, limit - current_count)
+            result = await acquire_gcra(self.redis_client, key, limit, window * 1000)
+            is_allowed = result.allowed
 
             rate_limit_info = {
                 "limit": limit,
-                "remaining": remaining,
-                "reset": reset_time,
-                "retry_after": reset_time - int(now.timestamp()) if current_count > limit else 0,
+                "remaining": result.remaining,
+                # Instante em que o bucket volta a estar cheio
+                "reset": int(math.ceil(now + result.reset_ms / 1000)),
+                "retry_after": 0 if is_allowed else math.ceil(result.retry_after_ms / 1000),
             }
 
-            is_allowed = current_count <= limit
-
             if not is_allowed:
                 logger.warning(
-                    f"🚫 Rate limit exceeded: {identifier} "
-                    f"({current_count}/{limit} in {window}s window)"
+                    f"🚫 Rate limit exceeded: {identifier} ({limit}/{window}s em {scope})"
                 )
 
             return is_allowed, rate_limit_info
@@ -177,7 +243,7 @@ class RateLimiter:
             return True, {
                 "limit": limit,
                 "remaining": limit,
-                "reset": int((now + timedelta(minutes=1)).timestamp()),
+                "reset": int(now) + window,
             }
 
     async def check_and_raise(self, request: Request):
@@ -217,7 +283,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     Aplica rate limiting automaticamente a todas as requisições
     """
 
-    def __init__(self, app: ASGIApp, redis_url: str = "redis://localhost:6379/0"):
+    def __init__(self, app: ASGIApp, redis_url: Optional[str] = None):
         super().__init__(app)
         self.rate_limiter = RateLimiter(redis_url)
 
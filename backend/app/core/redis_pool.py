@@ -0,0 +1,159 @@
+"""
+Pool de ligações Redis partilhado (cache, fila, rate limiting, coordenação).
+
+Um ``redis.asyncio.BlockingConnectionPool`` por finalidade e por event loop; os
+clientes devolvidos por ``get_redis`` partilham o pool e não abrem ligações
+próprias. Cada finalidade usa o seu DB lógico:
+
+- ``default`` — DB do REDIS_URL (coordenação: debounce de MVs, etc.)
+- ``cache`` — REDIS_CACHE_DB (CacheService e cache do dashboard)
+- ``rate_limit`` — REDIS_RATE_LIMIT_DB (RateLimiter e limites RPM por API key)
+- ``queue`` — DB do REDIS_URL (fila de scrapers)
+
+Em ``cache`` e ``queue`` não há socket_timeout: o pub/sub de invalidações e o
+BZPOPMIN/XREADGROUP BLOCK ficam à espera por natureza; o health_check_interval
+detecta ligações mortas.
+
+Métricas Prometheus (com PROMETHEUS_ENABLED):
+
+- ``agroadb_redis_pool_connections{purpose,state}`` — ``in_use`` ou ``idle``
+- ``agroadb_redis_pool_max_connections{purpose}``
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import weakref
+from typing import Dict, Optional, Tuple
+
+import redis.asyncio as redis
+from prometheus_client import Gauge
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PURPOSES = ("default", "cache", "rate_limit", "queue")
+_BLOCKING_PURPOSES = ("cache", "queue")
+
+REDIS_POOL_CONNECTIONS = Gauge(
+    "agroadb_redis_pool_connections",
+    "Ligações do pool Redis por finalidade e estado (in_use/idle)",
+    ["purpose", "state"],
+)
+REDIS_POOL_MAX_CONNECTIONS = Gauge(
+    "agroadb_redis_pool_max_connections",
+    "Limite de ligações do pool Redis por finalidade",
+    ["purpose"],
+)
+
+PoolKey = Tuple[str, Optional[str]]
+
+# Ligações redis.asyncio ficam presas ao loop onde abriram (asyncio.run por task Celery)
+_loop_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[PoolKey, redis.BlockingConnectionPool]]" = (weakref.WeakKeyDictionary())
+
+
+def _purpose_db(purpose: str) -> Optional[int]:
+    if purpose == "cache":
+        return settings.REDIS_CACHE_DB
+    if purpose == "rate_limit":
+        return settings.REDIS_RATE_LIMIT_DB
+    return None
+
+
+def _build_pool(purpose: str, url: Optional[str]) -> redis.BlockingConnectionPool:
+    kwargs = {
+        "max_connections": settings.REDIS_POOL_MAX_CONNECTIONS,
+        "timeout": settings.REDIS_POOL_TIMEOUT,
+        "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+        "socket_connect_timeout": settings.REDIS_SOCKET_TIMEOUT,
+        "socket_timeout": (
+            None if purpose in _BLOCKING_PURPOSES else settings.REDIS_SOCKET_TIMEOUT
+        ),
+        "encoding": "utf-8",
+        "decode_responses": True,
+    }
+    pool = redis.BlockingConnectionPool.from_url(url or str(settings.REDIS_URL), **kwargs)
+    db = _purpose_db(purpose)
+    # O DB da finalidade substitui o do REDIS_URL; uma URL explícita (ex.: testes) prevalece
+    if url is None and db is not None:
+        pool.connection_kwargs["db"] = db
+    return pool
+
+
+def get_redis(purpose: str = "default", url: Optional[str] = None) -> redis.Redis:
+    """
+    Retorna um cliente Redis sobre o pool partilhado da finalidade
+
+    O cliente é leve (não tem ligações próprias); ``aclose()`` não fecha o pool.
+    Os pools são fechados por ``close_redis_pools`` no shutdown.
+
+    Args:
+        purpose: Finalidade (define o DB lógico e o socket_timeout)
+        url: URL explícita em vez de REDIS_URL (pool distinto)
+
+    Returns:
+        redis.asyncio.Redis com decode_responses=True
+    """
+    if purpose not in PURPOSES:
+        raise ValueError(f"Finalidade Redis desconhecida: {purpose}")
+    loop = asyncio.get_running_loop()
+    pools = _loop_pools.get(loop)
+    if pools is None:
+        pools = {}
+        _loop_pools[loop] = pools
+
+    key = (purpose, url)
+    pool = pools.get(key)
+    if pool is None:
+        pool = _build_pool(purpose, url)
+        pools[key] = pool
+        logger.debug("Pool Redis criado para %s", purpose)
+    return redis.Redis(connection_pool=pool)
+
+
+async def close_redis_pools() -> None:
+    """Fecha os pools do loop corrente (shutdown da API / fim da task Celery)"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    pools = _loop_pools.pop(loop, {})
+    for pool in pools.values():
+        try:
+            await pool.disconnect()
+        except Exception as exc:  # pragma: no cover - defensivo
+            logger.debug("Erro ao fechar pool Redis: %s", exc)
+
+
+def get_redis_pool_stats() -> Dict[str, Dict[str, int]]:
+    """Ligações em uso/livres por finalidade (loop corrente); actualiza os gauges"""
+    try:
+        pools = _loop_pools.get(asyncio.get_running_loop(), {})
+    except RuntimeError:
+        pools = {}
+    stats: Dict[str, Dict[str, int]] = {}
+    for (purpose, _url), pool in pools.items():
+        row = stats.setdefault(purpose, {"in_use": 0, "idle": 0, "max": 0})
+        row["in_use"] += len(pool._in_use_connections)
+        row["idle"] += len(pool._available_connections)
+        row["max"] += pool.max_connections
+    if settings.PROMETHEUS_ENABLED:
+        for purpose, row in stats.items():
+            REDIS_POOL_CONNECTIONS.labels(purpose=purpose, state="in_use").set(row["in_use"])
+            REDIS_POOL_CONNECTIONS.labels(purpose=purpose, state="idle").set(row["idle"])
+            REDIS_POOL_MAX_CONNECTIONS.labels(purpose=purpose).set(row["max"])
+    return stats
+
+
+async def check_redis_health() -> Dict[str, str]:
+    """PING por finalidade: ``ok`` ou a mensagem de erro"""
+    status: Dict[str, str] = {}
+    for purpose in PURPOSES:
+        try:
+            await get_redis(purpose).ping()
+            status[purpose] = "ok"
+        except Exception as exc:
+            status[purpose] = str(exc) or exc.__class__.__name__
+    return status
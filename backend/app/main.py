@@ -122,7 +122,7 @@ def create_application() -> FastAPI:
 
     app.add_middleware(SecurityHeadersMiddleware)
     app.add_middleware(GZipMiddleware, minimum_size=1000)
-    app.add_middleware(RateLimitMiddleware, redis_url=settings.REDIS_URL)
+    app.add_middleware(RateLimitMiddleware)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=_build_cors_origins(),
@@ -19,6 +19,8 @@ from collections import defaultdict, deque
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Set, Tuple
 
+import numpy as np
+from scipy import sparse
 from sqlalchemy.orm import Session
 
 from app.domain.company import Company
@@ -138,6 +140,31 @@ class NetworkGraph:
         """Retorna vizinhos de um nó"""
         return self.adjacency.get(node_id, [])
 
+    def to_sparse(self) -> Tuple[List[str], sparse.csr_matrix]:
+        """
+        Matriz de adjacência compacta (CSR, binária, simétrica, sem laços)
+
+        Arestas repetidas entre o mesmo par contam uma vez.
+
+        Returns:
+            (ids dos nós pela ordem das linhas, matriz n x n)
+        """
+        node_ids = list(self.nodes.keys())
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        rows, cols = [], []
+        for edge in self.edges:
+            i, j = index.get(edge.source), index.get(edge.target)
+            if i is None or j is None or i == j:
+                continue
+            rows += (i, j)
+            cols += (j, i)
+        n = len(node_ids)
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float64), (rows, cols)), shape=(n, n)
+        )
+        matrix.data[:] = 1.0  # duplicados somados -> 1
+        return node_ids, matrix
+
     def to_dict(self) -> Dict[str, Any]:
         """Converte para dicionário (formato D3.js compatível)"""
         return {
@@ -550,38 +577,47 @@ class NetworkAnalyzer:
 
         return graph
 
+    # Lote de origens processadas em simultâneo no Brandes (colunas das matrizes densas)
+    CENTRALITY_BATCH_SIZE = 32
+    EIGENVECTOR_MAX_ITER = 100
+    EIGENVECTOR_TOLERANCE = 1.0e-6
+
     def _calculate_centrality(self, graph: NetworkGraph) -> List[Tuple[str, CentralityMetrics]]:
         """
         Calcula métricas de centralidade para todos os nós
 
-        Identifica os atores mais importantes da rede
+        Identifica os atores mais importantes da rede. Todas as métricas saem da
+        matriz de adjacência compacta: betweenness e closeness de uma única BFS
+        por origem (Brandes), eigenvector por power iteration.
         """
-        centrality_list = []
-
-        for node_id in graph.nodes.keys():
-            # 1. Degree Centrality (número de conexões)
-            degree = len(graph.get_neighbors(node_id))
-            max_degree = len(graph.nodes) - 1
-            degree_centrality = degree / max_degree if max_degree > 0 else 0.0
-
-            # 2. Betweenness Centrality (quantos caminhos passam por este nó)
-            betweenness = self._calculate_betweenness(graph, node_id)
-
-            # 3. Closeness Centrality (quão próximo está dos outros nós)
-            closeness = self._calculate_closeness(graph, node_id)
-
-            # 4. Eigenvector Centrality (conexões com nós importantes)
-            eigenvector = self._calculate_eigenvector(graph, node_id)
-
-            metrics = CentralityMetrics(
-                node_id=node_id,
-                degree_centrality=degree_centrality,
-                betweenness_centrality=betweenness,
-                closeness_centrality=closeness,
-                eigenvector_centrality=eigenvector,
+        node_ids, adjacency = graph.to_sparse()
+        n = len(node_ids)
+        if n == 0:
+            return []
+
+        # 1. Degree Centrality (número de vizinhos distintos)
+        degree = np.asarray(adjacency.sum(axis=1)).ravel()
+        degree_centrality = degree / (n - 1) if n > 1 else np.zeros(n)
+
+        # 2-3. Betweenness e Closeness
+        betweenness, closeness = self._brandes(adjacency)
+
+        # 4. Eigenvector Centrality (conexões com nós importantes)
+        eigenvector = self._eigenvector(adjacency)
+
+        centrality_list = [
+            (
+                node_id,
+                CentralityMetrics(
+                    node_id=node_id,
+                    degree_centrality=float(degree_centrality[i]),
+                    betweenness_centrality=float(betweenness[i]),
+                    closeness_centrality=float(closeness[i]),
+                    eigenvector_centrality=float(eigenvector[i]),
+                ),
             )
-
-            centrality_list.append((node_id, metrics))
+            for i, node_id in enumerate(node_ids)
+        ]
 
         # Ordenar por centralidade média (top 10)
         centrality_list.sort(
@@ -597,92 +633,110 @@ class NetworkAnalyzer:
 
         return centrality_list[:10]
 
-    def _calculate_betweenness(self, graph: NetworkGraph, node_id: str) -> float:
-        """Calcula betweenness centrality (simplificado)"""
-        # Versão simplificada: conta quantos pares de nós têm caminho passando por este nó
-        paths_through = 0
-        total_paths = 0
-
-        all_nodes = list(graph.nodes.keys())
-        for i, source in enumerate(all_nodes):
-            if source == node_id:
-                continue
-            for target in all_nodes[i + 1 :]:
-                if target == node_id:
-                    continue
-
-                # BFS para encontrar caminho mais curto
-                path = self._bfs_shortest_path(graph, source, target)
-                if path:
-                    total_paths += 1
-                    if node_id in path[1:-1]:  # Nó está no meio do caminho
-                        paths_through += 1
-
-        return paths_through / total_paths if total_paths > 0 else 0.0
-
-    def _calculate_closeness(self, graph: NetworkGraph, node_id: str) -> float:
-        """Calcula closeness centrality"""
-        # Soma das distâncias mínimas para todos os outros nós
-        distances = []
-
-        for target_id in graph.nodes.keys():
-            if target_id == node_id:
-                continue
-
-            distance = self._bfs_distance(graph, node_id, target_id)
-            if distance > 0:
-                distances.append(distance)
-
-        if not distances:
-            return 0.0
-
-        avg_distance = sum(distances) / len(distances)
-        return 1.0 / avg_distance if avg_distance > 0 else 0.0
-
-    def _calculate_eigenvector(self, graph: NetworkGraph, node_id: str) -> float:
-        """Calcula eigenvector centrality (simplificado)"""
-        # Versão simplificada: média das centralidades dos vizinhos
-        neighbors = graph.get_neighbors(node_id)
-        if not neighbors:
-            return 0.0
+    def _brandes(self, adjacency: sparse.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Betweenness (Brandes) e closeness numa única BFS por origem
 
-        # Usar degree centrality dos vizinhos como proxy
-        neighbor_centralities = []
-        max_degree = len(graph.nodes) - 1
+        Formulação algébrica: um lote de origens é processado como colunas de
+        matrizes densas n x lote, com um produto esparso por nível da BFS para
+        contar caminhos mais curtos (sigma) e outro, no sentido inverso, para
+        acumular as dependências (delta).
 
-        for neighbor_id in neighbors:
-            neighbor_degree = len(graph.get_neighbors(neighbor_id))
-            neighbor_centralities.append(neighbor_degree / max_degree if max_degree > 0 else 0.0)
+        Returns:
+            (betweenness normalizada em [0, 1], closeness = 1 / distância média aos alcançáveis)
+        """
+        n = adjacency.shape[0]
+        betweenness = np.zeros(n)
+        closeness = np.zeros(n)
+
+        for start in range(0, n, self.CENTRALITY_BATCH_SIZE):
+            sources = np.arange(start, min(start + self.CENTRALITY_BATCH_SIZE, n))
+            cols = np.arange(len(sources))
+
+            sigma = np.zeros((n, len(sources)))
+            sigma[sources, cols] = 1.0
+            visited = sigma > 0
+
+            # BFS por níveis: sigma dos novos nós = soma do sigma dos predecessores
+            levels = [visited.copy()]
+            frontier = sigma
+            while True:
+                paths = adjacency @ frontier
+                new = paths > 0
+                new &= ~visited
+                if not new.any():
+                    break
+                visited |= new
+                frontier = paths * new
+                sigma += frontier
+                levels.append(new)
+
+            # Acumulação das dependências do nível mais fundo para a origem
+            delta = np.zeros_like(sigma)
+            coefficient = np.empty_like(sigma)
+            for depth in range(len(levels) - 1, 0, -1):
+                coefficient.fill(0.0)
+                np.divide(1.0 + delta, sigma, out=coefficient, where=levels[depth])
+                contribution = adjacency @ coefficient
+                contribution *= sigma
+                np.add(delta, contribution, out=delta, where=levels[depth - 1])
+            delta[sources, cols] = 0.0
+            betweenness += delta.sum(axis=1)
+
+            # Closeness: nº de alcançáveis / soma das distâncias (nível da BFS)
+            reached = np.zeros(len(sources))
+            total_distance = np.zeros(len(sources))
+            for depth in range(1, len(levels)):
+                count = levels[depth].sum(axis=0)
+                reached += count
+                total_distance += depth * count
+            closeness[sources] = np.divide(
+                reached, total_distance, out=np.zeros(len(sources)), where=total_distance > 0
+            )
 
-        return sum(neighbor_centralities) / len(neighbor_centralities)
+        # Grafo não-direcionado: cada par contado nos dois sentidos
+        if n > 2:
+            betweenness /= (n - 1) * (n - 2)
+        else:
+            betweenness[:] = 0.0
+        return betweenness, closeness
 
-    def _bfs_shortest_path(
-        self, graph: NetworkGraph, source: str, target: str
-    ) -> Optional[List[str]]:
-        """BFS para encontrar caminho mais curto"""
-        if source == target:
-            return [source]
+    def _eigenvector(self, adjacency: sparse.csr_matrix) -> np.ndarray:
+        """
+        Eigenvector centrality por power iteration sobre (A + I)
 
-        visited = {source}
-        queue = deque([(source, [source])])
+        O deslocamento pela identidade garante convergência em grafos bipartidos
+        (pessoa–empresa–propriedade). Vetor com norma euclidiana 1.
+        """
+        n = adjacency.shape[0]
+        if adjacency.nnz == 0:
+            return np.zeros(n)
+
+        x = np.full(n, 1.0 / n)
+        for _ in range(self.EIGENVECTOR_MAX_ITER):
+            previous = x
+            x = adjacency @ previous + previous
+            norm = np.linalg.norm(x)
+            if norm == 0:
+                return np.zeros(n)
+            x /= norm
+            if np.abs(x - previous).sum() < n * self.EIGENVECTOR_TOLERANCE:
+                break
+        return x
+
+    def _bfs_parents(self, graph: NetworkGraph, source: str) -> Dict[str, str]:
+        """BFS única a partir de source: predecessor de cada nó alcançado"""
+        parents = {source: source}
+        queue = deque([source])
 
         while queue:
-            node, path = queue.popleft()
-
+            node = queue.popleft()
             for neighbor in graph.get_neighbors(node):
-                if neighbor == target:
-                    return path + [neighbor]
-
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append((neighbor, path + [neighbor]))
-
-        return None
+                if neighbor not in parents:
+                    parents[neighbor] = node
+                    queue.append(neighbor)
 
-    def _bfs_distance(self, graph: NetworkGraph, source: str, target: str) -> int:
-        """BFS para calcular distância"""
-        path = self._bfs_shortest_path(graph, source, target)
-        return len(path) - 1 if path else -1
+        return parents
 
     def _detect_communities(self, graph: NetworkGraph) -> List[Community]:
         """
@@ -740,13 +794,17 @@ class NetworkAnalyzer:
         target_id, _ = _inv_target_id(investigation)
 
         if target_id and target_id in graph.nodes:
+            # Uma BFS a partir do alvo: caminho até cada nó pela árvore de predecessores
+            parents = self._bfs_parents(graph, target_id)
             for node_id in graph.nodes.keys():
-                if node_id == target_id:
+                if node_id == target_id or node_id not in parents:
                     continue
 
-                path = self._bfs_shortest_path(graph, target_id, node_id)
-                if path and len(path) > 4:
-                    suspicious_paths.append(path)
+                path = [node_id]
+                while path[-1] != target_id:
+                    path.append(parents[path[-1]])
+                if len(path) > 4:
+                    suspicious_paths.append(path[::-1])
 
         # 2. Encontrar ciclos (A -> B -> ... -> A)
         cycles = self._find_cycles(graph)
@@ -15,7 +15,6 @@ Funcionalidades:
 import base64
 import io
 import logging
-import re
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
@@ -30,9 +29,9 @@ except ImportError:
     TESSERACT_AVAILABLE = False
     logging.warning("Tesseract OCR not available. Install with: pip install pytesseract pillow")
 
-# PDF processing
+# PDF processing (rasterização feita nos processos do pool OCR; aqui só se confirma a instalação)
 try:
-    import pdf2image
+    import pdf2image  # noqa: F401
 
     PDF2IMAGE_AVAILABLE = True
 except ImportError:
@@ -47,6 +46,9 @@ except ImportError:
     PYPDF2_AVAILABLE = False
     logging.warning("PyPDF2 not available. Install with: pip install PyPDF2")
 
+from app.services.ocr import entities as ocr_entities
+from app.services.ocr import executor as ocr_executor
+
 logger = logging.getLogger(__name__)
 
 
@@ -144,13 +146,14 @@ class OCRProcessor:
     - Endereços
     """
 
-    # Expressões regulares para extração
-    REGEX_CPF = r"\b\d{3}\.?\d{3}\.?\d{3}-?\d{2}\b"
-    REGEX_CNPJ = r"\b\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}\b"
-    REGEX_RG = r"\b\d{1,2}\.?\d{3}\.?\d{3}-?[0-9X]\b"
-    REGEX_DATE = r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b"
-    REGEX_MONEY = r"R\$\s*\d{1,3}(?:\.\d{3})*(?:,\d{2})?"
-    REGEX_CEP = r"\b\d{5}-?\d{3}\b"
+    # Expressões regulares para extração (combinadas numa só regex em
+    # app/services/ocr/entities.py)
+    REGEX_CPF = ocr_entities.STRUCTURED_PATTERNS["cpfs"]
+    REGEX_CNPJ = ocr_entities.STRUCTURED_PATTERNS["cnpjs"]
+    REGEX_RG = ocr_entities.STRUCTURED_PATTERNS["rgs"]
+    REGEX_DATE = ocr_entities.STRUCTURED_PATTERNS["dates"]
+    REGEX_MONEY = ocr_entities.STRUCTURED_PATTERNS["money_values"]
+    REGEX_CEP = ocr_entities.STRUCTURED_PATTERNS["ceps"]
 
     def __init__(self, tesseract_path: Optional[str] = None):
         """
@@ -278,25 +281,18 @@ class OCRProcessor:
                     processing_time_seconds=processing_time,
                 )
 
-            # PDF é imagem, precisa de OCR
-            logger.info(f"Convertendo PDF para imagens: {pdf_path}")
-            images = pdf2image.convert_from_path(pdf_path)
-
-            # Limitar número de páginas
-            images = images[:max_pages]
+            # PDF é imagem, precisa de OCR: páginas rasterizadas uma a uma e em
+            # paralelo no pool de processos OCR (até max_pages)
+            logger.info(f"OCR de PDF digitalizado: {pdf_path}")
+            page_texts = ocr_executor.ocr_pdf_pages_sync(
+                pdf_path, lang=language, config="", max_pages=max_pages, preprocess=True
+            )
 
             # Processar cada página
             all_text = []
             all_structured_data = {}
 
-            for i, image in enumerate(images):
-                logger.info(f"Processando página {i+1}/{len(images)}")
-
-                # Pré-processar
-                image = self._preprocess_image(image)
-
-                # OCR
-                page_text = pytesseract.image_to_string(image, lang=language)
+            for i, page_text in enumerate(page_texts):
                 all_text.append(f"--- Página {i+1} ---\n{page_text}\n")
 
                 # Extrair dados estruturados da página
@@ -327,7 +323,7 @@ class OCRProcessor:
                 metadata={
                     "pdf_path": pdf_path,
                     "method": "ocr",
-                    "total_pages": len(images),
+                    "total_pages": len(page_texts),
                     "ocr_used": True,
                     "language": language,
                 },
@@ -337,7 +333,7 @@ class OCRProcessor:
 
             logger.info(
                 f"OCR PDF concluído: {len(combined_text)} caracteres, "
-                f"{len(images)} páginas, tipo={doc_type}"
+                f"{len(page_texts)} páginas, tipo={doc_type}"
             )
 
             return OCRResult(
@@ -402,17 +398,8 @@ class OCRProcessor:
         - Aumenta contraste
         - Remove ruído
         """
-        # Converter para escala de cinza
-        if image.mode != "L":
-            image = image.convert("L")
-
-        # Redimensionar se muito pequena
-        if image.size[0] < 1000:
-            scale = 1000 / image.size[0]
-            new_size = (int(image.size[0] * scale), int(image.size[1] * scale))
-            image = image.resize(new_size, Image.LANCZOS)
-
-        return image
+        # Mesmo pré-processamento aplicado pelas páginas de PDF no pool OCR
+        return ocr_executor.preprocess_image(image)
 
     def _extract_text_from_pdf(self, pdf_path: str) -> str:
         """Extrai texto diretamente de PDF (sem OCR)"""
@@ -441,35 +428,8 @@ class OCRProcessor:
         """
         data = {}
 
-        # CPFs
-        cpfs = re.findall(self.REGEX_CPF, text)
-        if cpfs:
-            data["cpfs"] = list(set(cpfs))
-
-        # CNPJs
-        cnpjs = re.findall(self.REGEX_CNPJ, text)
-        if cnpjs:
-            data["cnpjs"] = list(set(cnpjs))
-
-        # RGs
-        rgs = re.findall(self.REGEX_RG, text)
-        if rgs:
-            data["rgs"] = list(set(rgs))
-
-        # Datas
-        dates = re.findall(self.REGEX_DATE, text)
-        if dates:
-            data["dates"] = list(set(dates))
-
-        # Valores monetários
-        money = re.findall(self.REGEX_MONEY, text)
-        if money:
-            data["money_values"] = list(set(money))
-
-        # CEPs
-        ceps = re.findall(self.REGEX_CEP, text)
-        if ceps:
-            data["ceps"] = list(set(ceps))
+        # CPFs, CNPJs, RGs, datas, valores monetários e CEPs numa só passagem
+        data.update(ocr_entities.STRUCTURED_EXTRACTOR.grouped(text))
 
         # Palavras-chave
         keywords = self._extract_keywords(text)
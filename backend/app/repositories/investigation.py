@@ -2,13 +2,15 @@
 Investigation Repository
 """
 
-from typing import List
+from typing import List, Optional, Tuple
 
-from sqlalchemy import desc, select
+from sqlalchemy import desc, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.domain.company import Company
 from app.domain.investigation import Investigation, InvestigationStatus
+from app.domain.property import Property
 from app.repositories.base import BaseRepository
 
 
@@ -32,6 +34,22 @@ class InvestigationRepository(BaseRepository[Investigation]):
         )
         return result.scalar_one_or_none()
 
+    async def get_data_version(self, id: int) -> Optional[Tuple]:
+        """Cheap version stamp of the investigation, its properties and companies"""
+        by_prop = Property.investigation_id == Investigation.id
+        by_comp = Company.investigation_id == Investigation.id
+        result = await self.db.execute(
+            select(
+                Investigation.updated_at,
+                select(func.count(Property.id)).where(by_prop).scalar_subquery(),
+                select(func.max(Property.updated_at)).where(by_prop).scalar_subquery(),
+                select(func.count(Company.id)).where(by_comp).scalar_subquery(),
+                select(func.max(Company.updated_at)).where(by_comp).scalar_subquery(),
+            ).where(Investigation.id == id)
+        )
+        row = result.first()
+        return tuple(row) if row else None
+
     async def get_by_user(
         self, user_id: int, skip: int = 0, limit: int = 100
     ) -> List[Investigation]:
@@ -2,7 +2,7 @@
 Repository for LegalQuery
 """
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -22,6 +22,11 @@ class LegalQueryRepository:
         await self.db.refresh(db_obj)
         return db_obj
 
+    async def create_many(self, rows: List[dict]) -> None:
+        """Insere várias consultas num único flush (INSERT em lote)"""
+        self.db.add_all(LegalQuery(**row) for row in rows)
+        await self.db.flush()
+
     async def list_by_investigation(self, investigation_id: int) -> List[LegalQuery]:
         result = await self.db.execute(
             select(LegalQuery)
@@ -30,6 +35,16 @@ class LegalQueryRepository:
         )
         return list(result.scalars().all())
 
+    async def get_data_version(self, investigation_id: int) -> Tuple[int, Optional[int]]:
+        """Contagem e maior ID das consultas da investigação (registos não são editados)"""
+        result = await self.db.execute(
+            select(func.count(LegalQuery.id), func.max(LegalQuery.id)).where(
+                LegalQuery.investigation_id == investigation_id
+            )
+        )
+        count, last_id = result.one()
+        return count, last_id
+
     async def summary_by_user(self, user_id: int) -> dict:
         result = await self.db.execute(
             select(
@@ -10,6 +10,7 @@ import httpx
 from bs4 import BeautifulSoup
 
 from app.core.config import settings
+from app.core.http_client import get_http_client
 
 
 class BaseScraper(ABC):
@@ -21,30 +22,31 @@ class BaseScraper(ABC):
         self.delay = settings.SCRAPING_DELAY
 
     async def fetch(self, url: str, method: str = "GET", **kwargs) -> Optional[httpx.Response]:
-        """Fetch URL with retries"""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            for attempt in range(self.max_retries):
-                try:
-                    if method == "GET":
-                        response = await client.get(url, **kwargs)
-                    elif method == "POST":
-                        response = await client.post(url, **kwargs)
-                    else:
-                        raise ValueError(f"Unsupported method: {method}")
-
-                    response.raise_for_status()
-
-                    # Delay to respect rate limits
-                    await asyncio.sleep(self.delay)
-
-                    return response
-
-                except httpx.HTTPError as e:
-                    if attempt == self.max_retries - 1:
-                        raise
-
-                    # Exponential backoff
-                    await asyncio.sleep(self.delay * (2**attempt))
+        """Fetch URL with retries (shared per-host connection pool)"""
+        client = get_http_client(url)
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries):
+            try:
+                if method == "GET":
+                    response = await client.get(url, **kwargs)
+                elif method == "POST":
+                    response = await client.post(url, **kwargs)
+                else:
+                    raise ValueError(f"Unsupported method: {method}")
+
+                response.raise_for_status()
+
+                # Delay to respect rate limits
+                await asyncio.sleep(self.delay)
+
+                return response
+
+            except httpx.HTTPError as e:
+                if attempt == self.max_retries - 1:
+                    raise
+
+                # Exponential backoff
+                await asyncio.sleep(self.delay * (2**attempt))
 
         return None
 
@@ -1,35 +1,60 @@
-"""Publica limites RPM por API key no Redis (consumido pelo RateLimiter)."""
+"""Publica limites RPM por API key no Redis (consumido pelo RateLimiter).
+
+Os overrides lidos ficam numa cache por processo durante
+RATE_LIMIT_OVERRIDE_CACHE_TTL_SECONDS, para o RateLimiter não fazer um GET
+extra em cada pedido; alterações noutro processo propagam-se no fim do TTL.
+"""
 
 from __future__ import annotations
 
 import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
 
 from app.core.config import settings
+from app.core.redis_pool import get_redis
 
 logger = logging.getLogger(__name__)
 
+# key_hash -> (rpm ou None, expira em time.monotonic())
+_rpm_cache: "OrderedDict[str, Tuple[Optional[int], float]]" = OrderedDict()
+
+
+def _remember(key_hash: str, rpm: Optional[int]) -> None:
+    _rpm_cache[key_hash] = (rpm, time.monotonic() + settings.RATE_LIMIT_OVERRIDE_CACHE_TTL_SECONDS)
+    _rpm_cache.move_to_end(key_hash)
+    while len(_rpm_cache) > settings.RATE_LIMIT_OVERRIDE_CACHE_MAX_ENTRIES:
+        _rpm_cache.popitem(last=False)
+
+
+def clear_api_key_rpm_cache() -> None:
+    _rpm_cache.clear()
+
+
+async def get_api_key_rpm(key_hash: str, client=None) -> Optional[int]:
+    """RPM personalizado da API key (None sem override); erros Redis propagam-se."""
+    cached = _rpm_cache.get(key_hash)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+    raw = await (client or get_redis("rate_limit")).get(f"apikey:rpm:{key_hash}")
+    rpm = max(1, int(raw)) if raw is not None else None
+    _remember(key_hash, rpm)
+    return rpm
+
 
 async def set_api_key_rpm(key_hash: str, rpm: int) -> None:
+    rpm = max(1, int(rpm))
+    _remember(key_hash, rpm)
     try:
-        import redis.asyncio as redis
-
-        client = redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
-        try:
-            await client.set(f"apikey:rpm:{key_hash}", str(max(1, int(rpm))))
-        finally:
-            await client.aclose()
+        await get_redis("rate_limit").set(f"apikey:rpm:{key_hash}", str(rpm))
     except Exception as exc:
         logger.debug("Redis apikey rpm não gravado: %s", exc)
 
 
 async def delete_api_key_rpm(key_hash: str) -> None:
+    _remember(key_hash, None)
     try:
-        import redis.asyncio as redis
-
-        client = redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
-        try:
-            await client.delete(f"apikey:rpm:{key_hash}")
-        finally:
-            await client.aclose()
+        await get_redis("rate_limit").delete(f"apikey:rpm:{key_hash}")
     except Exception as exc:
         logger.debug("Redis apikey rpm não removido: %s", exc)
@@ -8,7 +8,7 @@ Sem autenticação. Gratuito.
 from datetime import date
 from typing import Any, Dict, List, Optional
 
-import httpx
+from app.core.http_client import get_http_client
 
 
 class BCBService:
@@ -20,11 +20,11 @@ class BCBService:
         self.timeout = 30.0
 
     async def _get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            resp = await client.get(url, params=params)
-            if resp.status_code >= 400:
-                raise ValueError(f"BCB erro {resp.status_code}: {resp.text[:300]}")
-            return resp.json()
+        client = get_http_client(url)
+        resp = await client.get(url, params=params, timeout=self.timeout)
+        if resp.status_code >= 400:
+            raise ValueError(f"BCB erro {resp.status_code}: {resp.text[:300]}")
+        return resp.json()
 
     async def consultar_pix_participantes(self) -> Dict[str, Any]:
         """Lista participantes do PIX"""
@@ -8,10 +8,9 @@ Sem autenticação. Sem limites declarados.
 import logging
 from typing import Any, Dict, Optional
 
-import httpx
-
 from app.core.cache import cache_service
 from app.core.circuit_breaker import circuit_protected
+from app.core.http_client import get_http_client
 from app.core.retry import retry_with_backoff
 
 logger = logging.getLogger(__name__)
@@ -27,13 +26,13 @@ class BrasilAPIService:
 
     async def _get(self, path: str) -> Dict[str, Any]:
         url = f"{self.BASE_URL}{path}"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            resp = await client.get(url)
-            if resp.status_code == 404:
-                return {"error": "Não encontrado", "status": 404}
-            if resp.status_code >= 400:
-                raise ValueError(f"BrasilAPI erro {resp.status_code}: {resp.text[:300]}")
-            return resp.json()
+        client = get_http_client(url)
+        resp = await client.get(url, timeout=self.timeout)
+        if resp.status_code == 404:
+            return {"error": "Não encontrado", "status": 404}
+        if resp.status_code >= 400:
+            raise ValueError(f"BrasilAPI erro {resp.status_code}: {resp.text[:300]}")
+        return resp.json()
 
     @retry_with_backoff(max_retries=2, base_delay=0.5)
     @circuit_protected(service_name="brasilapi", failure_threshold=5, recovery_timeout=60.0)
@@ -1,14 +1,61 @@
 """
 Conecta gov.br - Autenticação (OAuth2 ou APIKey)
+
+Os tokens OAuth2 são geridos por um ``ConectaTokenManager`` por (token_url,
+client_id), partilhado por todas as instâncias de ``ConectaAuthService`` do
+processo. Os serviços Conecta são criados a cada pedido, mas o token sobrevive:
+
+- em memória, até CONECTA_TOKEN_EXPIRY_MARGIN_SECONDS antes de expirar;
+- no Redis (``conecta:token:<hash>``), para os outros workers da API e do Celery;
+- renovação proactiva em background quando faltam menos de
+  CONECTA_TOKEN_REFRESH_MARGIN_SECONDS, sem atrasar o pedido corrente;
+- renovações simultâneas coalescidas: uma por event loop (single-flight) e uma
+  no cluster (lock Redis SET NX PX); quem não obtém o lock espera o token gravado.
+
+Sem Redis disponível o token fica apenas em memória. O POST ao token_url usa o
+pool HTTP partilhado (app.core.http_client).
+
+Métricas Prometheus (com PROMETHEUS_ENABLED):
+
+- ``agroadb_conecta_token_requests_total{source}`` — ``memory``, ``redis`` ou ``upstream``
 """
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
+import logging
+import threading
 import time
+import uuid
+import weakref
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Dict, Optional, Set, Tuple
+
+from prometheus_client import Counter
 
-import httpx
+from app.core.config import settings
+from app.core.http_client import get_http_client
+from app.core.redis_pool import get_redis
+
+logger = logging.getLogger(__name__)
+
+CONECTA_TOKEN_REQUESTS = Counter(
+    "agroadb_conecta_token_requests_total",
+    "Tokens OAuth2 Conecta entregues por origem (memory, redis, upstream)",
+    ["source"],
+)
+
+TOKEN_KEY_PREFIX = "conecta:token:"
+
+# Liberta o lock apenas se ainda for nosso (pode ter expirado e sido tomado por outro)
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
 
 
 @dataclass
@@ -19,13 +66,239 @@ class ConectaCredentials:
     api_key: str
 
 
+@dataclass(frozen=True)
+class _Token:
+    access_token: str
+    expires_at: float
+
+    def usable(self, now: float) -> bool:
+        return now < self.expires_at - settings.CONECTA_TOKEN_EXPIRY_MARGIN_SECONDS
+
+    def needs_refresh(self, now: float) -> bool:
+        return now >= self.expires_at - settings.CONECTA_TOKEN_REFRESH_MARGIN_SECONDS
+
+
+class ConectaTokenManager:
+    """Token OAuth2 client_credentials partilhado por (token_url, client_id)"""
+
+    def __init__(self, token_url: str, client_id: str, client_secret: str):
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        digest = hashlib.sha256(f"{token_url}|{client_id}".encode("utf-8")).hexdigest()[:32]
+        self.redis_key = f"{TOKEN_KEY_PREFIX}{digest}"
+        self.lock_key = f"lock:{self.redis_key}"
+        self._token: Optional[_Token] = None
+        # Renovação em curso por event loop; asyncio.Future não atravessa loops
+        self._inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Future]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._background: Set[asyncio.Task] = set()
+        self.stats = {"memory": 0, "redis": 0, "upstream": 0, "proactive_refreshes": 0}
+
+    def _count(self, source: str) -> None:
+        self.stats[source] += 1
+        if settings.PROMETHEUS_ENABLED:
+            CONECTA_TOKEN_REQUESTS.labels(source=source).inc()
+
+    async def get_token(self) -> str:
+        """Token válido; só contacta o token_url quando nenhum processo tem um"""
+        now = time.time()
+        token = self._token
+        source = "memory"
+        if token is None or not token.usable(now):
+            token = await self._load_shared()
+            source = "redis"
+            if token is not None and token.usable(now):
+                self._token = token
+
+        if token is None or not token.usable(now):
+            token = await self._refresh(force=False)
+            return token.access_token
+
+        self._count(source)
+        if token.needs_refresh(now):
+            self._schedule_refresh()
+        return token.access_token
+
+    def _schedule_refresh(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop in self._inflight:
+            return
+        self.stats["proactive_refreshes"] += 1
+        task = loop.create_task(self._refresh(force=True))
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+
+    def _background_done(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # O token actual continua válido; o próximo pedido volta a tentar
+            logger.warning(f"⚠️ Renovação proactiva do token Conecta falhou: {task.exception()}")
+
+    async def _refresh(self, force: bool) -> _Token:
+        """Uma renovação por event loop; os outros pedidos do loop esperam por ela"""
+        loop = asyncio.get_running_loop()
+        pending = self._inflight.get(loop)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future = loop.create_future()
+        self._inflight[loop] = future
+        try:
+            token = await self._refresh_shared(force)
+            self._token = token
+            future.set_result(token)
+            return token
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Evita "exception was never retrieved" quando ninguém partilhava a renovação
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(loop, None)
+
+    async def _refresh_shared(self, force: bool) -> _Token:
+        """Uma renovação no cluster: lock Redis ou espera pelo token de outro worker"""
+        current = self._token
+        token_lock = uuid.uuid4().hex
+        locked = await self._acquire_lock(token_lock)
+        try:
+            if locked is False:
+                token = await self._wait_for_shared(current)
+                if token is not None:
+                    self._count("redis")
+                    return token
+            else:
+                # Outro worker pode ter renovado entretanto
+                token = await self._load_shared()
+                now = time.time()
+                if (
+                    token is not None
+                    and token.usable(now)
+                    and not (force and token.needs_refresh(now))
+                ):
+                    self._count("redis")
+                    return token
+
+            token = await self._fetch()
+            self._count("upstream")
+            await self._store_shared(token)
+            return token
+        finally:
+            if locked:
+                await self._release_lock(token_lock)
+
+    async def _fetch(self) -> _Token:
+        client = get_http_client(self.token_url)
+        response = await client.post(
+            self.token_url,
+            data={
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+            },
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            timeout=30.0,
+        )
+        response.raise_for_status()
+        payload = response.json()
+        expires_in = int(payload.get("expires_in", 0))
+        logger.info(f"🔑 Token Conecta renovado ({self.token_url}, expira em {expires_in}s)")
+        return _Token(payload["access_token"], time.time() + expires_in)
+
+    async def _load_shared(self) -> Optional[_Token]:
+        if not settings.CONECTA_TOKEN_SHARED_CACHE:
+            return None
+        try:
+            raw = await get_redis().get(self.redis_key)
+        except Exception as e:
+            logger.debug(f"Token Conecta no Redis indisponível: {e}")
+            return None
+        if not raw:
+            return None
+        try:
+            data = json.loads(raw)
+            return _Token(data["access_token"], float(data["expires_at"]))
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    async def _store_shared(self, token: _Token) -> None:
+        if not settings.CONECTA_TOKEN_SHARED_CACHE:
+            return
+        ttl = int(token.expires_at - time.time() - settings.CONECTA_TOKEN_EXPIRY_MARGIN_SECONDS)
+        if ttl <= 0:
+            return
+        payload = json.dumps({"access_token": token.access_token, "expires_at": token.expires_at})
+        try:
+            await get_redis().set(self.redis_key, payload, ex=ttl)
+        except Exception as e:
+            logger.debug(f"Não foi possível partilhar o token Conecta no Redis: {e}")
+
+    async def _acquire_lock(self, token_lock: str) -> Optional[bool]:
+        """True/False conforme o lock; None sem Redis (renova localmente)"""
+        if not settings.CONECTA_TOKEN_SHARED_CACHE:
+            return None
+        timeout = settings.CONECTA_TOKEN_LOCK_TIMEOUT_SECONDS
+        try:
+            return bool(
+                await get_redis().set(self.lock_key, token_lock, nx=True, px=int(timeout * 1000))
+            )
+        except Exception as e:
+            logger.debug(f"Lock do token Conecta indisponível: {e}")
+            return None
+
+    async def _release_lock(self, token_lock: str) -> None:
+        try:
+            await get_redis().eval(_RELEASE_LOCK_SCRIPT, 1, self.lock_key, token_lock)
+        except Exception as e:
+            logger.debug(f"Erro ao libertar o lock do token Conecta: {e}")
+
+    async def _wait_for_shared(self, current: Optional[_Token]) -> Optional[_Token]:
+        # Outro worker está a renovar: esperar que grave o novo token (até ao timeout do lock)
+        deadline = time.monotonic() + settings.CONECTA_TOKEN_LOCK_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+            token = await self._load_shared()
+            if token is not None and token != current and token.usable(time.time()):
+                return token
+        return None
+
+
+_managers: Dict[Tuple[str, str], ConectaTokenManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_token_manager(token_url: str, client_id: str, client_secret: str) -> ConectaTokenManager:
+    """Gestor de tokens do processo para (token_url, client_id)"""
+    key = (token_url, client_id)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None or manager.client_secret != client_secret:
+            manager = ConectaTokenManager(token_url, client_id, client_secret)
+            _managers[key] = manager
+        return manager
+
+
+def get_token_stats() -> Dict[str, Dict[str, int]]:
+    """Tokens entregues por origem, por token_url (processo corrente)"""
+    stats: Dict[str, Dict[str, int]] = {}
+    for (token_url, _client_id), manager in list(_managers.items()):
+        row = stats.setdefault(token_url, {k: 0 for k in manager.stats})
+        for name, value in manager.stats.items():
+            row[name] += value
+    return stats
+
+
 class ConectaAuthService:
     """Gerencia autenticação do Conecta (OAuth2 client_credentials)"""
 
     def __init__(self, credentials: ConectaCredentials, token_url: str):
         self.credentials = credentials
         self.token_url = token_url
-        self._token_cache: Optional[Dict[str, Any]] = None
 
     def has_api_key(self) -> bool:
         return bool(self.credentials.api_key)
@@ -37,35 +310,15 @@ class ConectaAuthService:
         """Indica se há pelo menos uma forma de autenticação (APIKey ou OAuth2)."""
         return self.has_api_key() or self.has_oauth()
 
-    def _token_valid(self) -> bool:
-        if not self._token_cache:
-            return False
-        expires_in = int(self._token_cache.get("expires_in", 0))
-        created_at = float(self._token_cache.get("_created_at", 0))
-        return (time.time() - created_at) < max(0, expires_in - 30)
+    def _token_manager(self) -> ConectaTokenManager:
+        return get_token_manager(
+            self.token_url, self.credentials.client_id, self.credentials.client_secret
+        )
 
     async def get_access_token(self) -> str:
-        if self._token_valid():
-            return self._token_cache["access_token"]
-
         if not self.has_oauth():
             raise ValueError("Credenciais OAuth2 do Conecta não configuradas")
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                self.token_url,
-                data={
-                    "grant_type": "client_credentials",
-                    "client_id": self.credentials.client_id,
-                    "client_secret": self.credentials.client_secret,
-                },
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-            )
-            response.raise_for_status()
-            payload = response.json()
-            payload["_created_at"] = time.time()
-            self._token_cache = payload
-            return payload["access_token"]
+        return await self._token_manager().get_token()
 
     async def build_headers(self) -> Dict[str, str]:
         if not self.has_credentials():
@@ -0,0 +1,430 @@
+"""
+Consultas Conecta em lote (CNPJ, SNCR, SICAR, CADIN).
+
+Recebe uma lista de CPF/CNPJ e/ou códigos de imóvel e um conjunto de providers;
+cada par aplicável (documento × provider) é consultado em paralelo, até
+CONECTA_BULK_MAX_CONCURRENCY por job, e cada resultado é entregue assim que
+chega, para o endpoint o escrever em NDJSON ou SSE.
+
+- Rate limit por provider: bucket GCRA partilhado no Redis
+  (``ratelimit:conecta:<provider>``, CONECTA_BULK_RATE_PER_SECOND), pelo que
+  vários jobs e workers respeitam o mesmo limite upstream; sem Redis, um bucket
+  equivalente por processo.
+- CPF/CNPJ com dígitos verificadores inválidos não chegam ao upstream.
+- Com investigation_id, as LegalQuery das consultas bem-sucedidas são inseridas
+  em lotes de CONECTA_BULK_INSERT_BATCH_SIZE numa sessão própria (a do pedido
+  fecha antes do corpo do StreamingResponse).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, FrozenSet, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.endpoints.integrations_helpers import result_count
+from app.core.config import settings
+from app.core.rate_limiting import acquire_gcra
+from app.core.redis_pool import get_redis
+from app.repositories.legal_query import LegalQueryRepository
+from app.services.conecta_cadin import ConectaCadinService
+from app.services.conecta_cnpj import ConectaCNPJService
+from app.services.conecta_sicar import ConectaSICARService
+from app.services.conecta_sncr import ConectaSNCRService
+from app.services.ocr import entities as ocr_entities
+
+logger = logging.getLogger(__name__)
+
+RATE_KEY_PREFIX = "ratelimit:conecta:"
+
+# Bucket por processo quando o Redis não responde (TAT em ms do relógio monotónico)
+_local_tat: Dict[str, float] = {}
+
+
+@dataclass(frozen=True)
+class BulkProvider:
+    """Consulta Conecta disponível em lote"""
+
+    provider: str  # LegalQuery.provider e bucket de rate limit
+    query_type: str
+    param: str  # chave em query_params
+    kinds: FrozenSet[str]  # "cpf", "cnpj" e/ou "imovel"
+    service: Callable[[], Any]
+    call: Callable[[Any, str, Optional[str]], Awaitable[Any]]
+    requires_cpf_usuario: bool = False
+
+
+BULK_PROVIDERS: Dict[str, BulkProvider] = {
+    "cnpj_basica": BulkProvider(
+        "conecta_cnpj",
+        "basica",
+        "cnpj",
+        frozenset({"cnpj"}),
+        ConectaCNPJService,
+        lambda service, doc, cpf_usuario: service.consultar_basica(doc, cpf_usuario),
+        requires_cpf_usuario=True,
+    ),
+    "cnpj_qsa": BulkProvider(
+        "conecta_cnpj",
+        "qsa",
+        "cnpj",
+        frozenset({"cnpj"}),
+        ConectaCNPJService,
+        lambda service, doc, cpf_usuario: service.consultar_qsa(doc, cpf_usuario),
+        requires_cpf_usuario=True,
+    ),
+    "cnpj_empresa": BulkProvider(
+        "conecta_cnpj",
+        "empresa",
+        "cnpj",
+        frozenset({"cnpj"}),
+        ConectaCNPJService,
+        lambda service, doc, cpf_usuario: service.consultar_empresa(doc, cpf_usuario),
+        requires_cpf_usuario=True,
+    ),
+    "sncr_cpf_cnpj": BulkProvider(
+        "conecta_sncr",
+        "cpf_cnpj",
+        "cpf_cnpj",
+        frozenset({"cpf", "cnpj"}),
+        ConectaSNCRService,
+        lambda service, doc, _cpf_usuario: service.consultar_por_cpf_cnpj(doc),
+    ),
+    "sncr_imovel": BulkProvider(
+        "conecta_sncr",
+        "imovel",
+        "codigo_imovel",
+        frozenset({"imovel"}),
+        ConectaSNCRService,
+        lambda service, doc, _cpf_usuario: service.consultar_imovel(doc),
+    ),
+    "sicar_cpf_cnpj": BulkProvider(
+        "conecta_sicar",
+        "cpf_cnpj",
+        "cpf_cnpj",
+        frozenset({"cpf", "cnpj"}),
+        ConectaSICARService,
+        lambda service, doc, _cpf_usuario: service.consultar_por_cpf_cnpj(doc),
+    ),
+    "cadin_info_cpf": BulkProvider(
+        "conecta_cadin",
+        "info_cpf",
+        "cpf",
+        frozenset({"cpf"}),
+        ConectaCadinService,
+        lambda service, doc, _cpf_usuario: service.info_cpf(doc),
+    ),
+    "cadin_info_cnpj": BulkProvider(
+        "conecta_cadin",
+        "info_cnpj",
+        "cnpj",
+        frozenset({"cnpj"}),
+        ConectaCadinService,
+        lambda service, doc, _cpf_usuario: service.info_cnpj(doc),
+    ),
+}
+
+
+@dataclass(frozen=True)
+class BulkItem:
+    """Par documento × provider a consultar"""
+
+    provider: str  # chave de BULK_PROVIDERS
+    document: str
+    kind: str
+
+
+@dataclass
+class BulkOutcome:
+    """Resultado de uma consulta do lote (ou documento rejeitado)"""
+
+    provider: Optional[str]
+    document: str
+    result: Any = None
+    result_count: int = 0
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "type": "result",
+            "provider": self.provider,
+            "document": self.document,
+            "status": "ok" if self.ok else "error",
+            "result_count": self.result_count,
+            "elapsed_ms": round(self.elapsed * 1000),
+        }
+        if self.ok:
+            data["data"] = self.result
+        else:
+            data["error"] = self.error
+        return data
+
+
+@dataclass
+class BulkJob:
+    """Itens a consultar e documentos rejeitados antes de qualquer chamada"""
+
+    items: List[BulkItem]
+    rejected: List[BulkOutcome] = field(default_factory=list)
+
+
+def _document_kind(digits: str) -> Optional[str]:
+    if len(digits) == 11 and ocr_entities.valid_cpfs([digits])[0]:
+        return "cpf"
+    if len(digits) == 14 and ocr_entities.valid_cnpjs([digits])[0]:
+        return "cnpj"
+    return None
+
+
+def build_bulk_job(
+    providers: List[str],
+    documents: List[str],
+    codigos_imovel: List[str],
+    cpf_usuario: Optional[str] = None,
+) -> BulkJob:
+    """
+    Monta os pares documento × provider aplicáveis
+
+    Documentos e códigos são normalizados e deduplicados; cada provider só recebe
+    os tipos que aceita (ex.: CADIN info_cpf só CPFs).
+
+    Raises:
+        ValueError: Provider desconhecido, cpf_usuario em falta ou lote acima de
+            CONECTA_BULK_MAX_ITEMS
+    """
+    unknown = [name for name in providers if name not in BULK_PROVIDERS]
+    if unknown:
+        raise ValueError(
+            f"Providers desconhecidos: {', '.join(unknown)}. "
+            f"Disponíveis: {', '.join(BULK_PROVIDERS)}"
+        )
+    selected = list(dict.fromkeys(providers))
+    if not cpf_usuario and any(BULK_PROVIDERS[name].requires_cpf_usuario for name in selected):
+        raise ValueError("cpf_usuario é obrigatório para as consultas CNPJ")
+
+    rejected: List[BulkOutcome] = []
+    targets: Dict[str, str] = {}
+    for raw in documents:
+        digits = ocr_entities.only_digits(raw)
+        if digits in targets:
+            continue
+        kind = _document_kind(digits)
+        if kind is None:
+            rejected.append(BulkOutcome(provider=None, document=raw, error="CPF/CNPJ inválido"))
+            continue
+        targets[digits] = kind
+    for raw in codigos_imovel:
+        codigo = raw.strip()
+        if codigo:
+            targets.setdefault(codigo, "imovel")
+
+    items = [
+        BulkItem(provider=name, document=document, kind=kind)
+        for document, kind in targets.items()
+        for name in selected
+        if kind in BULK_PROVIDERS[name].kinds
+    ]
+    if len(items) > settings.CONECTA_BULK_MAX_ITEMS:
+        raise ValueError(
+            f"Lote com {len(items)} consultas; máximo {settings.CONECTA_BULK_MAX_ITEMS}"
+        )
+    return BulkJob(items=items, rejected=rejected)
+
+
+def _local_gcra(key: str, limit: int, period_ms: int) -> int:
+    # Mesmo algoritmo do script Lua de app.core.rate_limiting, no processo
+    now = time.monotonic() * 1000
+    interval = period_ms / limit
+    tat = max(_local_tat.get(key, now), now)
+    new_tat = tat + interval
+    allow_at = new_tat - period_ms
+    if allow_at > now:
+        return max(1, math.ceil(allow_at - now))
+    _local_tat[key] = new_tat
+    return 0
+
+
+def _provider_rate(provider: str) -> int:
+    return settings.CONECTA_BULK_RATE_PER_SECOND.get(
+        provider, settings.CONECTA_BULK_RATE_PER_SECOND_DEFAULT
+    )
+
+
+async def _take_rate_slot(provider: str) -> None:
+    """Espera até o bucket do provider ter capacidade"""
+    limit = _provider_rate(provider)
+    if limit <= 0:
+        return
+    key = f"{RATE_KEY_PREFIX}{provider}"
+    while True:
+        try:
+            wait_ms = (await acquire_gcra(get_redis("rate_limit"), key, limit, 1000)).retry_after_ms
+        except Exception as e:
+            logger.debug(f"Rate limit Conecta no Redis indisponível, bucket local: {e}")
+            wait_ms = _local_gcra(key, limit, 1000)
+        if wait_ms <= 0:
+            return
+        await asyncio.sleep(wait_ms / 1000)
+
+
+async def _run_item(
+    item: BulkItem,
+    services: Dict[str, Any],
+    semaphore: asyncio.Semaphore,
+    cpf_usuario: Optional[str],
+) -> BulkOutcome:
+    spec = BULK_PROVIDERS[item.provider]
+    async with semaphore:
+        await _take_rate_slot(spec.provider)
+        started = time.perf_counter()
+        try:
+            service = services.get(item.provider)
+            if service is None:
+                service = services[item.provider] = spec.service()
+            result = await spec.call(service, item.document, cpf_usuario)
+            return BulkOutcome(
+                provider=item.provider,
+                document=item.document,
+                result=result,
+                result_count=result_count(result),
+                elapsed=time.perf_counter() - started,
+            )
+        except Exception as exc:
+            return BulkOutcome(
+                provider=item.provider,
+                document=item.document,
+                error=str(exc) or exc.__class__.__name__,
+                elapsed=time.perf_counter() - started,
+            )
+
+
+def _legal_query_row(outcome: BulkOutcome, investigation_id: int) -> Dict[str, Any]:
+    spec = BULK_PROVIDERS[outcome.provider]
+    result = outcome.result
+    return {
+        "investigation_id": investigation_id,
+        "provider": spec.provider,
+        "query_type": spec.query_type,
+        "query_params": {spec.param: outcome.document},
+        "result_count": outcome.result_count,
+        "response": result if isinstance(result, dict) else {"result": result},
+    }
+
+
+def _open_session(session_factory: Optional[Callable[[], AsyncSession]] = None) -> AsyncSession:
+    if session_factory is None:
+        from app.core.database import AsyncSessionLocal
+
+        session_factory = AsyncSessionLocal
+    return session_factory()
+
+
+async def _insert_rows(
+    rows: List[Dict[str, Any]], session_factory: Optional[Callable[[], AsyncSession]]
+) -> None:
+    try:
+        async with _open_session(session_factory) as db:
+            await LegalQueryRepository(db).create_many(rows)
+            await db.commit()
+    except Exception as e:
+        logger.error(f"❌ Erro ao gravar {len(rows)} consultas Conecta do lote: {e}")
+
+
+async def run_bulk_lookup(
+    items: List[BulkItem],
+    *,
+    cpf_usuario: Optional[str] = None,
+    investigation_id: Optional[int] = None,
+    session_factory: Optional[Callable[[], AsyncSession]] = None,
+) -> AsyncIterator[BulkOutcome]:
+    """
+    Executa as consultas em paralelo e entrega cada resultado por ordem de conclusão
+
+    Se o consumidor parar (cliente desligou), as consultas pendentes são
+    canceladas e as LegalQuery já obtidas são gravadas.
+
+    Args:
+        items: Pares de build_bulk_job
+        cpf_usuario: CPF do utilizador (exigido pelas consultas CNPJ)
+        investigation_id: Investigação onde gravar as LegalQuery (opcional)
+        session_factory: Fábrica de sessões (default AsyncSessionLocal)
+    """
+    semaphore = asyncio.Semaphore(max(1, settings.CONECTA_BULK_MAX_CONCURRENCY))
+    services: Dict[str, Any] = {}
+    batch_size = max(1, settings.CONECTA_BULK_INSERT_BATCH_SIZE)
+    rows: List[Dict[str, Any]] = []
+    tasks = [
+        asyncio.ensure_future(_run_item(item, services, semaphore, cpf_usuario)) for item in items
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            outcome = await next_done
+            if investigation_id and outcome.ok:
+                rows.append(_legal_query_row(outcome, investigation_id))
+                if len(rows) >= batch_size:
+                    batch, rows = rows, []
+                    await _insert_rows(batch, session_factory)
+            yield outcome
+    finally:
+        for task in tasks:
+            task.cancel()
+        if rows:
+            await _insert_rows(rows, session_factory)
+
+
+def _encode(payload: Dict[str, Any], fmt: str) -> bytes:
+    data = json.dumps(payload, ensure_ascii=False, default=str)
+    if fmt == "sse":
+        return f"event: {payload['type']}\ndata: {data}\n\n".encode("utf-8")
+    return f"{data}\n".encode("utf-8")
+
+
+async def stream_bulk_lookup(
+    job: BulkJob,
+    *,
+    fmt: str = "ndjson",
+    cpf_usuario: Optional[str] = None,
+    investigation_id: Optional[int] = None,
+    session_factory: Optional[Callable[[], AsyncSession]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Corpo NDJSON (uma linha por resultado) ou SSE (``event: result``)
+
+    Os documentos rejeitados saem primeiro; a última linha/evento é o resumo
+    (``type: summary``) com totais e duração.
+    """
+    started = time.perf_counter()
+    counts = {"ok": 0, "error": 0}
+    for outcome in job.rejected:
+        counts["error"] += 1
+        yield _encode(outcome.to_dict(), fmt)
+
+    async for outcome in run_bulk_lookup(
+        job.items,
+        cpf_usuario=cpf_usuario,
+        investigation_id=investigation_id,
+        session_factory=session_factory,
+    ):
+        counts["ok" if outcome.ok else "error"] += 1
+        yield _encode(outcome.to_dict(), fmt)
+
+    yield _encode(
+        {
+            "type": "summary",
+            "total": len(job.items) + len(job.rejected),
+            **counts,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000),
+        },
+        fmt,
+    )
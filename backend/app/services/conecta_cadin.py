@@ -4,9 +4,8 @@ Conecta gov.br - Integração CADIN Consulta/Contratante
 
 from typing import Any, Dict
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import get_http_client
 from app.services.conecta_auth import ConectaAuthService, ConectaCredentials
 
 
@@ -43,11 +42,11 @@ class ConectaCadinService:
 
     async def _get_json(self, url: str) -> Dict[str, Any]:
         headers = await self.auth.build_headers()
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, headers=headers)
-            if response.status_code >= 400:
-                raise ValueError(f"CADIN erro {response.status_code}: {response.text}")
-            return response.json()
+        client = get_http_client(url)
+        response = await client.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code >= 400:
+            raise ValueError(f"CADIN erro {response.status_code}: {response.text}")
+        return response.json()
 
     async def info_cpf(self, cpf: str) -> Dict[str, Any]:
         url = self._build_url(self.path_info_cpf.format(cpf=cpf))
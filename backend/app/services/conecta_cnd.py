@@ -4,9 +4,8 @@ Conecta gov.br - Integração Consulta CND (RFB/PGFN)
 
 from typing import Any, Dict
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import get_http_client
 from app.services.conecta_auth import ConectaAuthService, ConectaCredentials
 
 
@@ -41,8 +40,8 @@ class ConectaCNDService:
         url = self._build_url(self.path_certidao)
         headers = await self.auth.build_headers()
         headers["Content-Type"] = "application/json"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(url, headers=headers, json=payload)
-            if response.status_code >= 400:
-                raise ValueError(f"CND erro {response.status_code}: {response.text}")
-            return response.json()
+        client = get_http_client(url)
+        response = await client.post(url, headers=headers, json=payload, timeout=self.timeout)
+        if response.status_code >= 400:
+            raise ValueError(f"CND erro {response.status_code}: {response.text}")
+        return response.json()
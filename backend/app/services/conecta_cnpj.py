@@ -4,9 +4,8 @@ Conecta gov.br - Integração Consulta CNPJ (RFB)
 
 from typing import Any, Dict
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import get_http_client
 from app.services.conecta_auth import ConectaAuthService, ConectaCredentials
 
 
@@ -42,11 +41,11 @@ class ConectaCNPJService:
     async def _get_json(self, url: str, cpf_usuario: str) -> Dict[str, Any]:
         headers = await self.auth.build_headers()
         headers["x-cpf-usuario"] = cpf_usuario
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, headers=headers)
-            if response.status_code >= 400:
-                raise ValueError(f"CNPJ erro {response.status_code}: {response.text}")
-            return response.json()
+        client = get_http_client(url)
+        response = await client.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code >= 400:
+            raise ValueError(f"CNPJ erro {response.status_code}: {response.text}")
+        return response.json()
 
     async def consultar_basica(self, cnpj: str, cpf_usuario: str) -> Dict[str, Any]:
         url = self._build_url(self.path_basica.format(cnpj=cnpj))
@@ -4,9 +4,8 @@ Conecta gov.br - Integração SICAR
 
 from typing import Any, Dict
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import get_http_client
 from app.services.conecta_auth import ConectaAuthService, ConectaCredentials
 
 
@@ -52,11 +51,11 @@ class ConectaSICARService:
             raise self._credential_error()
         url = self._build_url(self.path_cpf_cnpj.format(cpf_cnpj=cpf_cnpj))
         headers = await self.auth.build_headers()
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, headers=headers)
-            if response.status_code >= 400:
-                raise ValueError(f"SICAR erro {response.status_code}: {response.text}")
-            return response.json()
+        client = get_http_client(url)
+        response = await client.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code >= 400:
+            raise ValueError(f"SICAR erro {response.status_code}: {response.text}")
+        return response.json()
 
     async def consultar_imovel(self, codigo_imovel: str) -> Dict[str, Any]:
         if self._credentials_missing():
@@ -68,8 +67,8 @@ class ConectaSICARService:
         )
         url = self._build_url(path)
         headers = await self.auth.build_headers()
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, headers=headers)
-            if response.status_code >= 400:
-                raise ValueError(f"SICAR erro {response.status_code}: {response.text}")
-            return response.json()
+        client = get_http_client(url)
+        response = await client.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code >= 400:
+            raise ValueError(f"SICAR erro {response.status_code}: {response.text}")
+        return response.json()
@@ -4,9 +4,8 @@ Conecta gov.br - Integração SIGEF
 
 from typing import Any, Dict, Optional
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import get_http_client
 from app.services.conecta_auth import ConectaAuthService, ConectaCredentials
 
 
@@ -57,11 +56,11 @@ class ConectaSIGEFService:
         )
         url = self._build_url(path)
         headers = await self.auth.build_headers()
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, headers=headers)
-            if response.status_code >= 400:
-                raise ValueError(f"SIGEF erro {response.status_code}: {response.text}")
-            return response.json()
+        client = get_http_client(url)
+        response = await client.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code >= 400:
+            raise ValueError(f"SIGEF erro {response.status_code}: {response.text}")
+        return response.json()
 
     async def consultar_parcelas(self, cpf_cnpj: Optional[str] = None) -> Dict[str, Any]:
         if self._credentials_missing():
@@ -71,8 +70,8 @@ class ConectaSIGEFService:
         params: Dict[str, Any] = {}
         if cpf_cnpj:
             params["cpf_cnpj"] = cpf_cnpj
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, params=params, headers=headers)
-            if response.status_code >= 400:
-                raise ValueError(f"SIGEF erro {response.status_code}: {response.text}")
-            return response.json()
+        client = get_http_client(url)
+        response = await client.get(url, params=params, headers=headers, timeout=self.timeout)
+        if response.status_code >= 400:
+            raise ValueError(f"SIGEF erro {response.status_code}: {response.text}")
+        return response.json()
@@ -4,9 +4,8 @@ Conecta gov.br - Integração SIGEF GEO
 
 from typing import Any, Dict, Optional
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import get_http_client
 from app.services.conecta_auth import ConectaAuthService, ConectaCredentials
 
 
@@ -40,11 +39,11 @@ class ConectaSIGEFGeoService:
 
     async def _get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         headers = await self.auth.build_headers()
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, headers=headers, params=params)
-            if response.status_code >= 400:
-                raise ValueError(f"SIGEF GEO erro {response.status_code}: {response.text}")
-            return response.json()
+        client = get_http_client(url)
+        response = await client.get(url, headers=headers, params=params, timeout=self.timeout)
+        if response.status_code >= 400:
+            raise ValueError(f"SIGEF GEO erro {response.status_code}: {response.text}")
+        return response.json()
 
     async def consultar_parcelas(self, params: Dict[str, Any]) -> Dict[str, Any]:
         url = self._build_url(self.path_parcelas)
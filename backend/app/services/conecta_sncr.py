@@ -7,6 +7,7 @@ from typing import Any, Dict, Optional
 import httpx
 
 from app.core.config import settings
+from app.core.http_client import get_http_client
 from app.services.conecta_auth import ConectaAuthService, ConectaCredentials
 
 
@@ -42,17 +43,17 @@ class ConectaSNCRService:
 
     async def _get_json(self, url: str) -> Dict[str, Any]:
         headers = await self.auth.build_headers()
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, headers=headers)
-            if response.status_code >= 400:
-                raise ValueError(f"SNCR erro {response.status_code}: {response.text}")
-            return response.json()
+        client = get_http_client(url)
+        response = await client.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code >= 400:
+            raise ValueError(f"SNCR erro {response.status_code}: {response.text}")
+        return response.json()
 
     async def _get_bytes(self, url: str) -> httpx.Response:
         headers = await self.auth.build_headers()
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, headers=headers)
-            return response
+        client = get_http_client(url)
+        response = await client.get(url, headers=headers, timeout=self.timeout)
+        return response
 
     def _credentials_missing(self) -> bool:
         return not self.auth.has_credentials()
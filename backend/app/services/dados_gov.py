@@ -7,7 +7,7 @@ Sem autenticação para leitura. Gratuito.
 
 from typing import Any, Dict, Optional
 
-import httpx
+from app.core.http_client import get_http_client
 
 
 class DadosGovService:
@@ -20,11 +20,11 @@ class DadosGovService:
 
     async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         url = f"{self.BASE_URL}{path}"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            resp = await client.get(url, params=params)
-            if resp.status_code >= 400:
-                raise ValueError(f"dados.gov.br erro {resp.status_code}: {resp.text[:300]}")
-            return resp.json()
+        client = get_http_client(url)
+        resp = await client.get(url, params=params, timeout=self.timeout)
+        if resp.status_code >= 400:
+            raise ValueError(f"dados.gov.br erro {resp.status_code}: {resp.text[:300]}")
+        return resp.json()
 
     async def buscar_datasets(
         self, query: str, pagina: int = 1, tamanhoPagina: int = 10
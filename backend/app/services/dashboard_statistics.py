@@ -7,11 +7,11 @@ from __future__ import annotations
 import json
 import logging
 from calendar import month_abbr
-from collections import Counter, defaultdict
+from collections import defaultdict
 from datetime import date, datetime
-from typing import List
+from typing import Dict, List, Optional
 
-from sqlalchemy import func, select
+from sqlalchemy import extract, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
@@ -19,6 +19,11 @@ from app.domain.investigation import Investigation, InvestigationStatus
 from app.domain.legal_query import LegalQuery
 from app.domain.property import Property
 from app.repositories.legal_query import LegalQueryRepository
+from app.services.materialized_views import (
+    fetch_investigation_status_counts,
+    fetch_legal_summary,
+    fetch_properties_by_state,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -61,24 +66,19 @@ async def get_dashboard_statistics(
     """
     Devolve contagens agregadas. Superuser vê dados globais (útil para demo/admin).
     """
-    inv_stmt = select(Investigation)
-    if not is_superuser:
-        inv_stmt = inv_stmt.where(Investigation.user_id == user_id)
-
-    result = await db.execute(inv_stmt)
-    investigations: List[Investigation] = list(result.scalars().all())
-
     month_keys = _last_n_calendar_months(months_back)
+    owner = None if is_superuser else user_id
+
     by_month: dict[tuple[int, int], dict[str, int]] = defaultdict(
         lambda: {"count": 0, "completed": 0, "failed": 0}
     )
-    for inv in investigations:
-        key = (inv.created_at.year, inv.created_at.month)
-        by_month[key]["count"] += 1
-        if inv.status == InvestigationStatus.COMPLETED:
-            by_month[key]["completed"] += 1
-        elif inv.status == InvestigationStatus.FAILED:
-            by_month[key]["failed"] += 1
+    for y, m, st, cnt in await _monthly_status_counts(db, owner, month_keys[0]):
+        key = (y, m)
+        by_month[key]["count"] += cnt
+        if st == InvestigationStatus.COMPLETED:
+            by_month[key]["completed"] += cnt
+        elif st == InvestigationStatus.FAILED:
+            by_month[key]["failed"] += cnt
 
     investigations_by_month = []
     for y, m in month_keys:
@@ -93,7 +93,7 @@ async def get_dashboard_statistics(
             }
         )
 
-    status_counts = Counter(inv.status for inv in investigations)
+    status_counts = await _status_counts(db, owner)
     status_distribution = []
     for st, label in STATUS_LABELS.items():
         status_distribution.append(
@@ -104,30 +104,34 @@ async def get_dashboard_statistics(
             }
         )
 
-    if is_superuser:
-        stmt = (
-            select(Property.state, func.count(Property.id))
-            .where(Property.state.isnot(None))
-            .group_by(Property.state)
-        )
-    else:
-        stmt = (
-            select(Property.state, func.count(Property.id))
-            .join(Investigation, Property.investigation_id == Investigation.id)
-            .where(Investigation.user_id == user_id, Property.state.isnot(None))
-            .group_by(Property.state)
-        )
-    prop_result = await db.execute(stmt)
-    properties_by_state = [
-        {"state": row[0], "count": int(row[1])} for row in prop_result.all() if row[0]
-    ]
+    use_mv = settings.DASHBOARD_STATS_USE_MATERIALIZED_VIEW
+    state_counts = await fetch_properties_by_state(db, owner) if use_mv else None
+    if state_counts is None:
+        if is_superuser:
+            stmt = (
+                select(Property.state, func.count(Property.id))
+                .where(Property.state.isnot(None))
+                .group_by(Property.state)
+            )
+        else:
+            stmt = (
+                select(Property.state, func.count(Property.id))
+                .join(Investigation, Property.investigation_id == Investigation.id)
+                .where(Investigation.user_id == user_id, Property.state.isnot(None))
+                .group_by(Property.state)
+            )
+        prop_result = await db.execute(stmt)
+        state_counts = {row[0]: int(row[1]) for row in prop_result.all() if row[0]}
+    properties_by_state = [{"state": st, "count": cnt} for st, cnt in state_counts.items()]
     properties_by_state.sort(key=lambda x: x["count"], reverse=True)
     properties_by_state = properties_by_state[:12]
 
-    if is_superuser:
-        summary = await _legal_summary_global(db)
-    else:
-        summary = await LegalQueryRepository(db).summary_by_user(user_id)
+    summary = await fetch_legal_summary(db, owner) if use_mv else None
+    if summary is None:
+        if is_superuser:
+            summary = await _legal_summary_global(db)
+        else:
+            summary = await LegalQueryRepository(db).summary_by_user(user_id)
 
     scrapers_performance: list[dict] = []
     for provider, data in sorted(summary.items(), key=lambda kv: -kv[1]["queries"])[:8]:
@@ -150,6 +154,58 @@ async def get_dashboard_statistics(
     }
 
 
+def _as_status(raw) -> Optional[InvestigationStatus]:
+    """Normaliza status vindo da BD (enum, nome 'COMPLETED' ou valor 'completed')."""
+    if isinstance(raw, InvestigationStatus):
+        return raw
+    try:
+        return InvestigationStatus(str(raw).lower())
+    except ValueError:
+        return None
+
+
+async def _monthly_status_counts(
+    db: AsyncSession, user_id: Optional[int], first_month: tuple[int, int]
+) -> List[tuple[int, int, Optional[InvestigationStatus], int]]:
+    """Histograma (ano, mês, status, contagem) agregado em SQL desde first_month."""
+    year = extract("year", Investigation.created_at)
+    month = extract("month", Investigation.created_at)
+    stmt = (
+        select(year, month, Investigation.status, func.count(Investigation.id))
+        .where(Investigation.created_at >= datetime(first_month[0], first_month[1], 1))
+        .group_by(year, month, Investigation.status)
+    )
+    if user_id is not None:
+        stmt = stmt.where(Investigation.user_id == user_id)
+    result = await db.execute(stmt)
+    return [(int(y), int(m), _as_status(st), int(cnt)) for y, m, st, cnt in result.all()]
+
+
+async def _status_counts(
+    db: AsyncSession, user_id: Optional[int]
+) -> Dict[InvestigationStatus, int]:
+    """Contagens por status: MV no PostgreSQL (se activada) ou GROUP BY na tabela."""
+    rows = None
+    if settings.DASHBOARD_STATS_USE_MATERIALIZED_VIEW:
+        mv_counts = await fetch_investigation_status_counts(db, user_id)
+        if mv_counts is not None:
+            rows = mv_counts.items()
+    if rows is None:
+        stmt = select(Investigation.status, func.count(Investigation.id)).group_by(
+            Investigation.status
+        )
+        if user_id is not None:
+            stmt = stmt.where(Investigation.user_id == user_id)
+        rows = (await db.execute(stmt)).all()
+
+    counts: Dict[InvestigationStatus, int] = defaultdict(int)
+    for raw, cnt in rows:
+        st = _as_status(raw)
+        if st is not None:
+            counts[st] += int(cnt)
+    return counts
+
+
 async def _legal_summary_global(db: AsyncSession) -> dict:
     q = select(
         LegalQuery.provider,
@@ -181,15 +237,11 @@ async def get_dashboard_statistics_cached(
     cache_key = f"dashboard:stats:v1:{user_id}:{'1' if is_superuser else '0'}:{months_back}"
 
     try:
-        import redis.asyncio as redis
-
-        client = redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
-        try:
-            cached = await client.get(cache_key)
-            if cached:
-                return json.loads(cached)
-        finally:
-            await client.aclose()
+        from app.core.redis_pool import get_redis
+
+        cached = await get_redis("cache").get(cache_key)
+        if cached:
+            return json.loads(cached)
     except Exception as exc:
         logger.debug("Cache dashboard (leitura) ignorado: %s", exc)
 
@@ -198,17 +250,11 @@ async def get_dashboard_statistics_cached(
     )
 
     try:
-        import redis.asyncio as redis
-
-        client = redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
-        try:
-            await client.set(
-                cache_key,
-                json.dumps(data),
-                ex=settings.DASHBOARD_STATS_CACHE_TTL_SECONDS,
-            )
-        finally:
-            await client.aclose()
+        from app.core.redis_pool import get_redis
+
+        await get_redis("cache").set(
+            cache_key, json.dumps(data), ex=settings.DASHBOARD_STATS_CACHE_TTL_SECONDS
+        )
     except Exception as exc:
         logger.debug("Cache dashboard (escrita) ignorado: %s", exc)
 
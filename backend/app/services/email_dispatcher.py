@@ -0,0 +1,243 @@
+"""
+Envio de emails com ligações SMTP reutilizadas e em lote.
+
+``SMTPConnectionPool`` mantém ligações já autenticadas (STARTTLS + login uma vez)
+partilhadas pelo processo; o smtplib é bloqueante, por isso corre em threads
+(``asyncio.to_thread``) e nunca no event loop.
+
+``EmailDispatcher`` (um por event loop) junta numa fila os emails pedidos em
+simultâneo — tempestades de notificações — e cada worker envia um lote de até
+SMTP_BATCH_MAX_MESSAGES mensagens pela mesma ligação.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import smtplib
+import threading
+import time
+import weakref
+from email.message import Message
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnectionPool:
+    """Ligações SMTP autenticadas reutilizáveis (thread-safe)"""
+
+    def __init__(self, size: Optional[int] = None, max_idle: Optional[float] = None):
+        self.size = max(1, size or settings.SMTP_POOL_SIZE)
+        self.max_idle = settings.SMTP_POOL_MAX_IDLE_SECONDS if max_idle is None else max_idle
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self.stats = {"connections_opened": 0, "batches": 0, "messages_sent": 0}
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT)
+        try:
+            server.starttls()
+            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        except Exception:
+            self._quit(server)
+            raise
+        with self._lock:
+            self.stats["connections_opened"] += 1
+        return server
+
+    @staticmethod
+    def _quit(server: Optional[smtplib.SMTP]) -> None:
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _checkout(self) -> smtplib.SMTP:
+        """Ligação livre mais recente; as paradas há mais de max_idle são fechadas"""
+        now = time.monotonic()
+        stale = []
+        server = None
+        with self._lock:
+            while self._idle:
+                candidate, last_used = self._idle.pop()
+                if now - last_used <= self.max_idle:
+                    server = candidate
+                    break
+                stale.append(candidate)
+        for old in stale:
+            self._quit(old)
+        return server or self._connect()
+
+    def _checkin(self, server: smtplib.SMTP) -> None:
+        with self._lock:
+            self._idle.append((server, time.monotonic()))
+
+    def send_batch(self, messages: List[Message]) -> List[Optional[str]]:
+        """
+        Envia as mensagens por uma única ligação do pool
+
+        Uma ligação fechada pelo servidor é reaberta uma vez por mensagem.
+
+        Returns:
+            Erro por mensagem (None = enviada)
+        """
+        errors: List[Optional[str]] = []
+        server = None
+        self._slots.acquire()
+        try:
+            for msg in messages:
+                for attempt in range(2):
+                    try:
+                        if server is None:
+                            server = self._checkout()
+                        server.send_message(msg)
+                        errors.append(None)
+                        break
+                    except smtplib.SMTPServerDisconnected as exc:
+                        self._quit(server)
+                        server = None
+                        if attempt:
+                            errors.append(str(exc))
+                    except (
+                        smtplib.SMTPRecipientsRefused,
+                        smtplib.SMTPSenderRefused,
+                        smtplib.SMTPDataError,
+                    ) as exc:
+                        # Recusa da mensagem: a ligação continua utilizável
+                        errors.append(str(exc))
+                        break
+                    except Exception as exc:
+                        # Falha de ligação/login: o resto do lote falha com o mesmo erro
+                        self._quit(server)
+                        server = None
+                        errors.extend([str(exc)] * (len(messages) - len(errors)))
+                        return errors
+        finally:
+            if server is not None:
+                self._checkin(server)
+            with self._lock:
+                self.stats["batches"] += 1
+                self.stats["messages_sent"] += sum(1 for error in errors if error is None)
+            self._slots.release()
+        return errors
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._quit(server)
+
+
+class EmailDispatcher:
+    """Fila de envio do event loop; cada worker envia lotes por uma ligação do pool"""
+
+    def __init__(self, pool: SMTPConnectionPool):
+        self.pool = pool
+        self._queue: "asyncio.Queue[Tuple[Message, asyncio.Future]]" = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+
+    async def send(self, msg: Message) -> bool:
+        """Enfileira a mensagem e espera pelo resultado do lote"""
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.pool.size)]
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((msg, future))
+        error = await future
+        if error:
+            logger.error(f"Erro ao enviar email para {msg['To']}: {error}")
+        return error is None
+
+    async def _worker(self) -> None:
+        max_batch = max(1, settings.SMTP_BATCH_MAX_MESSAGES)
+        while True:
+            batch = [await self._queue.get()]
+            if self._queue.empty() and settings.SMTP_BATCH_LINGER_SECONDS > 0:
+                # Pequena espera para juntar pedidos quase simultâneos no mesmo lote
+                await asyncio.sleep(settings.SMTP_BATCH_LINGER_SECONDS)
+            while len(batch) < max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                errors = await asyncio.to_thread(self.pool.send_batch, [m for m, _ in batch])
+            except Exception as exc:  # pragma: no cover - defensivo
+                errors = [str(exc)] * len(batch)
+            for (_, future), error in zip(batch, errors):
+                if not future.done():
+                    future.set_result(error)
+                self._queue.task_done()
+
+    async def aclose(self) -> None:
+        """Espera pelos lotes em fila e pára os workers"""
+        if self._workers:
+            await self._queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+_smtp_pool: Optional[SMTPConnectionPool] = None
+_pool_lock = threading.Lock()
+
+# asyncio.Queue/Future ficam presos ao loop (asyncio.run por task Celery); o pool SMTP não
+_loop_dispatchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, EmailDispatcher]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """Pool SMTP do processo"""
+    global _smtp_pool
+    with _pool_lock:
+        if _smtp_pool is None:
+            _smtp_pool = SMTPConnectionPool()
+        return _smtp_pool
+
+
+def get_email_dispatcher() -> EmailDispatcher:
+    """Dispatcher do event loop corrente sobre o pool SMTP do processo"""
+    loop = asyncio.get_running_loop()
+    dispatcher = _loop_dispatchers.get(loop)
+    if dispatcher is None:
+        dispatcher = EmailDispatcher(get_smtp_pool())
+        _loop_dispatchers[loop] = dispatcher
+    return dispatcher
+
+
+async def drain_email_dispatcher() -> None:
+    """
+    Envia o que está na fila do loop corrente e descarta o seu dispatcher
+
+    Chamar antes de o loop terminar (fim de cada asyncio.run das tasks Celery): os
+    workers referenciam o loop e a entrada em _loop_dispatchers nunca seria libertada.
+    O pool SMTP do processo fica aberto para a task seguinte.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    dispatcher = _loop_dispatchers.pop(loop, None)
+    if dispatcher is not None:
+        await dispatcher.aclose()
+
+
+async def close_email_dispatcher() -> None:
+    """Esvazia o dispatcher do loop corrente e fecha as ligações SMTP livres (shutdown da API)"""
+    global _smtp_pool
+    await drain_email_dispatcher()
+    with _pool_lock:
+        pool, _smtp_pool = _smtp_pool, None
+    if pool is not None:
+        await asyncio.to_thread(pool.close)
+
+
+def get_email_stats() -> Dict[str, int]:
+    """Ligações abertas, lotes e mensagens enviadas pelo pool do processo"""
+    pool = _smtp_pool
+    return dict(pool.stats) if pool else {"connections_opened": 0, "batches": 0, "messages_sent": 0}
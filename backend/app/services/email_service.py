@@ -3,44 +3,53 @@ Email Service - Envio de emails com templates HTML
 """
 
 import logging
-import smtplib
 from datetime import datetime
+from email.message import Message
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Optional
 
-from jinja2 import Template
+from jinja2 import Environment, FileSystemLoader, Template, TemplateNotFound
 
 from app.core.config import settings
 from app.domain.notification import NotificationType
+from app.services.email_dispatcher import get_email_dispatcher
 
 logger = logging.getLogger(__name__)
 
+TEMPLATE_DIR = Path(__file__).parent.parent / "templates" / "emails"
+
+# Templates compilados uma vez por processo (sem stat do ficheiro a cada email)
+_template_env = Environment(loader=FileSystemLoader(str(TEMPLATE_DIR)), auto_reload=False)
+
+
+@lru_cache(maxsize=64)
+def _compiled_template(template_name: str) -> Optional[Template]:
+    """Template compilado, ou None se o ficheiro não existir"""
+    try:
+        return _template_env.get_template(template_name)
+    except TemplateNotFound:
+        logger.warning(f"Template {template_name} não encontrado, usando fallback")
+        return None
+
 
 class EmailService:
     """Serviço para envio de emails"""
 
     @staticmethod
-    def _get_smtp_connection():
-        """Cria conexão SMTP"""
-        try:
-            smtp_host = settings.SMTP_HOST
-            smtp_port = settings.SMTP_PORT
-            smtp_user = settings.SMTP_USER
-            smtp_password = settings.SMTP_PASSWORD
-
-            if not smtp_user or not smtp_password:
-                logger.warning("SMTP credentials not configured")
-                return None
-
-            server = smtplib.SMTP(smtp_host, smtp_port)
-            server.starttls()
-            server.login(smtp_user, smtp_password)
-            return server
-        except Exception as e:
-            logger.error(f"Erro ao conectar SMTP: {e}")
-            return None
+    async def _send(msg: Message) -> bool:
+        """
+        Envia pela fila do dispatcher (ligação SMTP do pool, em lote, fora do event loop)
+
+        Returns:
+            True se enviado; False sem credenciais SMTP ou em erro
+        """
+        if not settings.SMTP_USER or not settings.SMTP_PASSWORD:
+            logger.warning(f"SMTP não configurado, email não enviado para {msg['To']}")
+            return False
+        return await get_email_dispatcher().send(msg)
 
     @staticmethod
     def _load_template(template_name: str, context: Dict[str, Any]) -> str:
@@ -54,19 +63,11 @@ class EmailService:
         Returns:
             HTML renderizado
         """
-        template_dir = Path(__file__).parent.parent / "templates" / "emails"
-        template_path = template_dir / template_name
-
-        # Se template não existe, usar fallback inline
-        if not template_path.exists():
-            logger.warning(f"Template {template_name} não encontrado, usando fallback")
-            return EmailService._get_fallback_template(context)
-
         try:
-            with open(template_path, "r", encoding="utf-8") as f:
-                template_content = f.read()
-
-            template = Template(template_content)
+            template = _compiled_template(template_name)
+            # Se template não existe, usar fallback inline
+            if template is None:
+                return EmailService._get_fallback_template(context)
             return template.render(**context)
         except Exception as e:
             logger.error(f"Erro ao carregar template {template_name}: {e}")
@@ -142,15 +143,10 @@ class EmailService:
 
         # Enviar
         try:
-            server = EmailService._get_smtp_connection()
-            if server:
-                server.send_message(msg)
-                server.quit()
+            sent = await EmailService._send(msg)
+            if sent:
                 logger.info(f"Email enviado para {to_email}")
-                return True
-            else:
-                logger.warning(f"SMTP não configurado, email não enviado para {to_email}")
-                return False
+            return sent
         except Exception as e:
             logger.error(f"Erro ao enviar email: {e}")
             return False
@@ -318,11 +314,7 @@ class EmailService:
         msg.attach(MIMEText(html_content, "html"))
 
         try:
-            server = EmailService._get_smtp_connection()
-            if server:
-                server.send_message(msg)
-                server.quit()
-                return True
+            return await EmailService._send(msg)
         except Exception as e:
             logger.error(f"Erro ao enviar email de boas-vindas: {e}")
 
@@ -382,15 +374,10 @@ Equipe AgroADB
             msg.attach(MIMEText(text_content, "plain"))
             msg.attach(MIMEText(html_content, "html"))
 
-            server = EmailService._get_smtp_connection()
-            if server:
-                server.send_message(msg)
-                server.quit()
+            sent = await EmailService._send(msg)
+            if sent:
                 logger.info(f"✅ Email de investigação concluída enviado para {user_email}")
-                return True
-            else:
-                logger.warning(f"SMTP não configurado, email não enviado para {user_email}")
-                return False
+            return sent
 
         except Exception as e:
             logger.error(f"Erro ao enviar email de investigação concluída: {e}")
@@ -461,15 +448,10 @@ Equipe AgroADB
             msg.attach(MIMEText(text_content, "plain"))
             msg.attach(MIMEText(html_content, "html"))
 
-            server = EmailService._get_smtp_connection()
-            if server:
-                server.send_message(msg)
-                server.quit()
+            sent = await EmailService._send(msg)
+            if sent:
                 logger.info(f"✅ Email de compartilhamento enviado para {user_email}")
-                return True
-            else:
-                logger.warning(f"SMTP não configurado, email não enviado para {user_email}")
-                return False
+            return sent
 
         except Exception as e:
             logger.error(f"Erro ao enviar email de compartilhamento: {e}")
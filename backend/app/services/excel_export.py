@@ -1,21 +1,176 @@
 """
 Excel Export Service for Investigations
+
+Streaming path (used by the export endpoints): rows come from a server-side
+cursor in batches of EXPORT_STREAM_BATCH_SIZE. CSV chunks are yielded as they
+are produced; XLSX is written by an openpyxl write-only workbook into a spooled
+temporary file and then streamed, so memory stays flat for large investigations.
 """
 
+import asyncio
+import codecs
 import csv
+import tempfile
 from datetime import datetime
-from io import BytesIO, TextIOWrapper
-from typing import Any, Dict, List, Optional
+from io import BytesIO, StringIO, TextIOWrapper
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 from openpyxl.utils import get_column_letter
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.domain.company import Company
 from app.domain.investigation import Investigation
 from app.domain.legal_query import LegalQuery
 from app.domain.property import Property
 
+# Bytes acumulados antes de cada chunk enviado ao cliente
+EXPORT_STREAM_CHUNK_BYTES = 64 * 1024
+
+SUMMARY_CSV_HEADERS = [
+    "ID Investigação",
+    "Nome do Alvo",
+    "CPF/CNPJ",
+    "Status",
+    "Prioridade",
+    "Propriedades Encontradas",
+    "Empresas Encontradas",
+    "Consultas Legais",
+    "Total de Resultados",
+    "Data de Criação",
+    "Última Atualização",
+]
+PROPERTY_HEADERS = [
+    "ID",
+    "CAR",
+    "Nome da Propriedade",
+    "Área (ha)",
+    "Município",
+    "UF",
+    "Fonte",
+    "Data de Cadastro",
+]
+COMPANY_HEADERS = [
+    "ID",
+    "CNPJ",
+    "Razão Social",
+    "Nome Fantasia",
+    "Status",
+    "Natureza Jurídica",
+    "Município",
+    "UF",
+    "Data de Cadastro",
+]
+LEGAL_QUERY_HEADERS = [
+    "ID",
+    "Provedor",
+    "Tipo de Consulta",
+    "Resultados",
+    "Data da Consulta",
+    "Parâmetros",
+]
+
+
+def _property_row(prop: Any) -> List[Any]:
+    return [
+        prop.id,
+        prop.car_number or "N/A",
+        prop.property_name or "N/A",
+        prop.area_hectares or 0,
+        prop.city or "N/A",
+        prop.state or "N/A",
+        prop.data_source or "N/A",
+        prop.created_at.strftime("%d/%m/%Y") if prop.created_at else "N/A",
+    ]
+
+
+def _company_row(company: Any) -> List[Any]:
+    return [
+        company.id,
+        company.cnpj or "N/A",
+        company.corporate_name or "N/A",
+        company.trade_name or "N/A",
+        company.status or "N/A",
+        company.legal_nature or "N/A",
+        company.city or "N/A",
+        company.state or "N/A",
+        company.created_at.strftime("%d/%m/%Y") if company.created_at else "N/A",
+    ]
+
+
+def _legal_query_row(query: Any) -> List[Any]:
+    return [
+        query.id,
+        query.provider or "N/A",
+        query.query_type or "N/A",
+        query.result_count or 0,
+        query.created_at.strftime("%d/%m/%Y %H:%M") if query.created_at else "N/A",
+        str(query.query_params) if query.query_params else "N/A",
+    ]
+
+
+# section -> (sheet title, header colour, headers, column widths, row builder, columns, order)
+EXPORT_SECTIONS: Dict[str, Tuple[str, str, List[str], List[int], Callable, tuple, tuple]] = {
+    "properties": (
+        "Propriedades",
+        "70AD47",
+        PROPERTY_HEADERS,
+        [15] * len(PROPERTY_HEADERS),
+        _property_row,
+        (
+            Property.id,
+            Property.car_number,
+            Property.property_name,
+            Property.area_hectares,
+            Property.city,
+            Property.state,
+            Property.data_source,
+            Property.created_at,
+        ),
+        (Property.id,),
+    ),
+    "companies": (
+        "Empresas",
+        "FFC000",
+        COMPANY_HEADERS,
+        [18] * len(COMPANY_HEADERS),
+        _company_row,
+        (
+            Company.id,
+            Company.cnpj,
+            Company.corporate_name,
+            Company.trade_name,
+            Company.status,
+            Company.legal_nature,
+            Company.city,
+            Company.state,
+            Company.created_at,
+        ),
+        (Company.id,),
+    ),
+    "legal_queries": (
+        "Consultas Legais",
+        "C00000",
+        LEGAL_QUERY_HEADERS,
+        [10, 20, 25, 12, 18, 40],
+        _legal_query_row,
+        (
+            LegalQuery.id,
+            LegalQuery.provider,
+            LegalQuery.query_type,
+            LegalQuery.result_count,
+            LegalQuery.created_at,
+            LegalQuery.query_params,
+        ),
+        (LegalQuery.created_at.desc(), LegalQuery.id.desc()),
+    ),
+}
+CSV_SECTIONS = ("summary",) + tuple(EXPORT_SECTIONS)
+
 
 class ExcelExportService:
     """Service for exporting investigation data to Excel and CSV"""
@@ -148,16 +303,7 @@ class ExcelExportService:
         header_font = Font(color="FFFFFF", bold=True)
 
         # Headers
-        headers = [
-            "ID",
-            "CAR",
-            "Nome da Propriedade",
-            "Área (ha)",
-            "Município",
-            "UF",
-            "Fonte",
-            "Data de Cadastro",
-        ]
+        headers = PROPERTY_HEADERS
 
         for col_num, header in enumerate(headers, 1):
             cell = ws.cell(row=1, column=col_num, value=header)
@@ -166,19 +312,8 @@ class ExcelExportService:
             cell.alignment = Alignment(horizontal="center", vertical="center")
 
         # Data rows
-        for row_num, prop in enumerate(properties, 2):
-            ws.cell(row=row_num, column=1, value=prop.id)
-            ws.cell(row=row_num, column=2, value=prop.car_number or "N/A")
-            ws.cell(row=row_num, column=3, value=prop.property_name or "N/A")
-            ws.cell(row=row_num, column=4, value=prop.area_hectares or 0)
-            ws.cell(row=row_num, column=5, value=prop.city or "N/A")
-            ws.cell(row=row_num, column=6, value=prop.state or "N/A")
-            ws.cell(row=row_num, column=7, value=prop.data_source or "N/A")
-            ws.cell(
-                row=row_num,
-                column=8,
-                value=prop.created_at.strftime("%d/%m/%Y") if prop.created_at else "N/A",
-            )
+        for prop in properties:
+            ws.append(_property_row(prop))
 
         # Enable auto-filter
         ws.auto_filter.ref = ws.dimensions
@@ -197,17 +332,7 @@ class ExcelExportService:
         header_font = Font(color="FFFFFF", bold=True)
 
         # Headers
-        headers = [
-            "ID",
-            "CNPJ",
-            "Razão Social",
-            "Nome Fantasia",
-            "Status",
-            "Natureza Jurídica",
-            "Município",
-            "UF",
-            "Data de Cadastro",
-        ]
+        headers = COMPANY_HEADERS
 
         for col_num, header in enumerate(headers, 1):
             cell = ws.cell(row=1, column=col_num, value=header)
@@ -216,20 +341,8 @@ class ExcelExportService:
             cell.alignment = Alignment(horizontal="center", vertical="center")
 
         # Data rows
-        for row_num, company in enumerate(companies, 2):
-            ws.cell(row=row_num, column=1, value=company.id)
-            ws.cell(row=row_num, column=2, value=company.cnpj or "N/A")
-            ws.cell(row=row_num, column=3, value=company.corporate_name or "N/A")
-            ws.cell(row=row_num, column=4, value=company.trade_name or "N/A")
-            ws.cell(row=row_num, column=5, value=company.status or "N/A")
-            ws.cell(row=row_num, column=6, value=company.legal_nature or "N/A")
-            ws.cell(row=row_num, column=7, value=company.city or "N/A")
-            ws.cell(row=row_num, column=8, value=company.state or "N/A")
-            ws.cell(
-                row=row_num,
-                column=9,
-                value=company.created_at.strftime("%d/%m/%Y") if company.created_at else "N/A",
-            )
+        for company in companies:
+            ws.append(_company_row(company))
 
         # Enable auto-filter
         ws.auto_filter.ref = ws.dimensions
@@ -248,14 +361,7 @@ class ExcelExportService:
         header_font = Font(color="FFFFFF", bold=True)
 
         # Headers
-        headers = [
-            "ID",
-            "Provedor",
-            "Tipo de Consulta",
-            "Resultados",
-            "Data da Consulta",
-            "Parâmetros",
-        ]
+        headers = LEGAL_QUERY_HEADERS
 
         for col_num, header in enumerate(headers, 1):
             cell = ws.cell(row=1, column=col_num, value=header)
@@ -264,21 +370,8 @@ class ExcelExportService:
             cell.alignment = Alignment(horizontal="center", vertical="center")
 
         # Data rows
-        for row_num, query in enumerate(legal_queries, 2):
-            ws.cell(row=row_num, column=1, value=query.id)
-            ws.cell(row=row_num, column=2, value=query.provider or "N/A")
-            ws.cell(row=row_num, column=3, value=query.query_type or "N/A")
-            ws.cell(row=row_num, column=4, value=query.result_count or 0)
-            ws.cell(
-                row=row_num,
-                column=5,
-                value=query.created_at.strftime("%d/%m/%Y %H:%M") if query.created_at else "N/A",
-            )
-            ws.cell(
-                row=row_num,
-                column=6,
-                value=str(query.query_params) if query.query_params else "N/A",
-            )
+        for query in legal_queries:
+            ws.append(_legal_query_row(query))
 
         # Enable auto-filter
         ws.auto_filter.ref = ws.dimensions
@@ -312,38 +405,259 @@ class ExcelExportService:
         """
         output = BytesIO()
 
-        row = {
-            "ID Investigação": investigation.id,
-            "Nome do Alvo": investigation.target_name,
-            "CPF/CNPJ": investigation.target_cpf_cnpj or "N/A",
-            "Status": (
-                investigation.status.value
-                if hasattr(investigation.status, "value")
-                else str(investigation.status)
-            ),
-            "Prioridade": investigation.priority,
-            "Propriedades Encontradas": len(properties),
-            "Empresas Encontradas": len(companies),
-            "Consultas Legais": len(legal_queries),
-            "Total de Resultados": sum(q.result_count or 0 for q in legal_queries),
-            "Data de Criação": (
-                investigation.created_at.strftime("%d/%m/%Y %H:%M")
-                if investigation.created_at
-                else "N/A"
-            ),
-            "Última Atualização": (
-                investigation.updated_at.strftime("%d/%m/%Y %H:%M")
-                if investigation.updated_at
-                else "N/A"
-            ),
+        counts = {
+            "properties": len(properties),
+            "companies": len(companies),
+            "legal_queries": len(legal_queries),
+            "total_results": sum(q.result_count or 0 for q in legal_queries),
         }
+        row = _summary_csv_row(investigation_summary_fields(investigation), counts)
 
         text_output = TextIOWrapper(output, encoding="utf-8-sig", newline="")
-        writer = csv.DictWriter(text_output, fieldnames=list(row.keys()))
-        writer.writeheader()
+        writer = csv.writer(text_output)
+        writer.writerow(SUMMARY_CSV_HEADERS)
         writer.writerow(row)
         text_output.flush()
         text_output.detach()
         output.seek(0)
 
         return output
+
+    @staticmethod
+    async def stream_investigation_csv(
+        summary: Dict[str, Any],
+        section: str = "summary",
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream CSV for one section of the investigation
+
+        The BOM and header are yielded immediately; data rows are read from a
+        server-side cursor and flushed every EXPORT_STREAM_CHUNK_BYTES.
+
+        Args:
+            summary: Fields from investigation_summary_fields (read before the
+                request session closes)
+            section: "summary" or one of EXPORT_SECTIONS
+            session_factory: Session factory (defaults to AsyncSessionLocal)
+        """
+        if section not in CSV_SECTIONS:
+            raise ValueError(f"Unknown export section: {section}")
+        headers = SUMMARY_CSV_HEADERS if section == "summary" else EXPORT_SECTIONS[section][2]
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(headers)
+        yield codecs.BOM_UTF8 + _drain(buffer)
+
+        async with _open_session(session_factory) as db:
+            if section == "summary":
+                counts = await count_investigation_rows(db, summary["id"])
+                writer.writerow(_summary_csv_row(summary, counts))
+            else:
+                async for row in iter_section_rows(db, section, summary["id"]):
+                    writer.writerow(row)
+                    if buffer.tell() >= EXPORT_STREAM_CHUNK_BYTES:
+                        yield _drain(buffer)
+        if buffer.tell():
+            yield _drain(buffer)
+
+    @staticmethod
+    async def stream_investigation_excel(
+        summary: Dict[str, Any],
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream XLSX built with an openpyxl write-only workbook
+
+        Rows go straight from the cursor to the workbook's temporary sheet files;
+        the finished archive is written to a SpooledTemporaryFile (in memory up
+        to EXPORT_SPOOL_MAX_BYTES, then on disk) and streamed in chunks.
+
+        Args:
+            summary: Fields from investigation_summary_fields
+            session_factory: Session factory (defaults to AsyncSessionLocal)
+        """
+        wb = Workbook(write_only=True)
+        async with _open_session(session_factory) as db:
+            counts = await count_investigation_rows(db, summary["id"])
+            _write_summary_sheet(wb, summary, counts)
+            for section, (title, color, headers, widths, *_rest) in EXPORT_SECTIONS.items():
+                ws = wb.create_sheet(title)
+                for col_num, width in enumerate(widths, 1):
+                    ws.column_dimensions[get_column_letter(col_num)].width = width
+                ws.append(_header_cells(ws, headers, color))
+                total = 0
+                async for row in iter_section_rows(db, section, summary["id"]):
+                    ws.append(row)
+                    total += 1
+                ws.auto_filter.ref = f"A1:{get_column_letter(len(headers))}{total + 1}"
+
+        spool = tempfile.SpooledTemporaryFile(max_size=settings.EXPORT_SPOOL_MAX_BYTES)
+        try:
+            await asyncio.to_thread(wb.save, spool)
+            spool.seek(0)
+            while True:
+                chunk = await asyncio.to_thread(spool.read, EXPORT_STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            spool.close()
+
+
+def investigation_summary_fields(investigation: Investigation) -> Dict[str, Any]:
+    """Plain fields of the investigation used by the summary sheet/row"""
+    return {
+        "id": investigation.id,
+        "target_name": investigation.target_name,
+        "target_cpf_cnpj": investigation.target_cpf_cnpj or "N/A",
+        "status": (
+            investigation.status.value
+            if hasattr(investigation.status, "value")
+            else str(investigation.status)
+        ),
+        "priority": investigation.priority,
+        "created_at": (
+            investigation.created_at.strftime("%d/%m/%Y %H:%M")
+            if investigation.created_at
+            else "N/A"
+        ),
+        "updated_at": (
+            investigation.updated_at.strftime("%d/%m/%Y %H:%M")
+            if investigation.updated_at
+            else "N/A"
+        ),
+        "target_description": investigation.target_description,
+    }
+
+
+def _summary_csv_row(summary: Dict[str, Any], counts: Dict[str, int]) -> List[Any]:
+    return [
+        summary["id"],
+        summary["target_name"],
+        summary["target_cpf_cnpj"],
+        summary["status"],
+        summary["priority"],
+        counts["properties"],
+        counts["companies"],
+        counts["legal_queries"],
+        counts["total_results"],
+        summary["created_at"],
+        summary["updated_at"],
+    ]
+
+
+async def count_investigation_rows(db: AsyncSession, investigation_id: int) -> Dict[str, int]:
+    """Row counts per section and total legal results, in a single query"""
+
+    def _count(model) -> Any:
+        return (
+            select(func.count())
+            .select_from(model)
+            .where(model.investigation_id == investigation_id)
+            .scalar_subquery()
+        )
+
+    total_results = (
+        select(func.coalesce(func.sum(LegalQuery.result_count), 0))
+        .where(LegalQuery.investigation_id == investigation_id)
+        .scalar_subquery()
+    )
+    row = (
+        await db.execute(
+            select(_count(Property), _count(Company), _count(LegalQuery), total_results)
+        )
+    ).one()
+    return {
+        "properties": row[0],
+        "companies": row[1],
+        "legal_queries": row[2],
+        "total_results": int(row[3] or 0),
+    }
+
+
+async def iter_section_rows(
+    db: AsyncSession, section: str, investigation_id: int
+) -> AsyncIterator[List[Any]]:
+    """Export rows of a section, fetched from a server-side cursor in batches"""
+    _title, _color, _headers, _widths, build_row, columns, order_by = EXPORT_SECTIONS[section]
+    model = columns[0].class_
+    stmt = (
+        select(*columns)
+        .where(model.investigation_id == investigation_id)
+        .order_by(*order_by)
+        .execution_options(yield_per=settings.EXPORT_STREAM_BATCH_SIZE)
+    )
+    result = await db.stream(stmt)
+    try:
+        async for row in result:
+            yield build_row(row)
+    finally:
+        await result.close()
+
+
+def _drain(buffer: StringIO) -> bytes:
+    data = buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+def _open_session(session_factory: Optional[Callable[[], AsyncSession]] = None) -> AsyncSession:
+    # A sessão do pedido (get_db) fecha antes de o corpo do StreamingResponse ser enviado
+    if session_factory is None:
+        from app.core.database import AsyncSessionLocal
+
+        session_factory = AsyncSessionLocal
+    return session_factory()
+
+
+def _header_cells(ws: Any, headers: List[str], color: str) -> List[WriteOnlyCell]:
+    fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+    font = Font(color="FFFFFF", bold=True)
+    cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.fill = fill
+        cell.font = font
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+        cells.append(cell)
+    return cells
+
+
+def _write_summary_sheet(wb: Workbook, summary: Dict[str, Any], counts: Dict[str, int]) -> None:
+    """Summary sheet for the write-only workbook (no merged cells in this mode)"""
+    ws = wb.create_sheet("Resumo")
+    ws.column_dimensions["A"].width = 25
+    ws.column_dimensions["B"].width = 50
+
+    def _bold(value: Any, **font: Any) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = Font(bold=True, **font)
+        return cell
+
+    ws.append([_bold("Relatório de Investigação - AgroADB", size=16, color="4472C4")])
+    ws.append([])
+    data = [
+        ("ID da Investigação:", summary["id"]),
+        ("Nome do Alvo:", summary["target_name"]),
+        ("CPF/CNPJ:", summary["target_cpf_cnpj"]),
+        ("Status:", summary["status"]),
+        ("Prioridade:", summary["priority"]),
+        ("Data de Criação:", summary["created_at"]),
+        ("Última Atualização:", summary["updated_at"]),
+        ("", ""),
+        ("Resultados Encontrados:", ""),
+        ("Propriedades:", counts["properties"]),
+        ("Empresas:", counts["companies"]),
+        ("Consultas Legais:", counts["legal_queries"]),
+    ]
+    for label, value in data:
+        ws.append([_bold(label) if label else label, value])
+
+    if summary["target_description"]:
+        ws.append([])
+        ws.append([_bold("Descrição:")])
+        description = WriteOnlyCell(ws, value=summary["target_description"])
+        description.alignment = Alignment(wrap_text=True, vertical="top")
+        ws.append([description])
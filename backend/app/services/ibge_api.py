@@ -8,10 +8,9 @@ Sem autenticação. Gratuito.
 import logging
 from typing import Any, Dict, List
 
-import httpx
-
 from app.core.cache import cache_service
 from app.core.circuit_breaker import circuit_protected
+from app.core.http_client import get_http_client
 from app.core.retry import retry_with_backoff
 
 logger = logging.getLogger(__name__)
@@ -27,11 +26,11 @@ class IBGEService:
 
     async def _get(self, path: str) -> Any:
         url = f"{self.BASE_URL}{path}"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            resp = await client.get(url)
-            if resp.status_code >= 400:
-                raise ValueError(f"IBGE erro {resp.status_code}: {resp.text[:300]}")
-            return resp.json()
+        client = get_http_client(url)
+        resp = await client.get(url, timeout=self.timeout)
+        if resp.status_code >= 400:
+            raise ValueError(f"IBGE erro {resp.status_code}: {resp.text[:300]}")
+        return resp.json()
 
     @retry_with_backoff(max_retries=2, base_delay=0.5)
     @circuit_protected(service_name="ibge", failure_threshold=5, recovery_timeout=60.0)
@@ -128,8 +127,8 @@ class IBGEService:
     async def consultar_malha_municipio(self, codigo_ibge: str) -> Dict[str, Any]:
         """Malha geográfica do município (GeoJSON)"""
         url = f"{self.BASE_URL}/v3/malhas/municipios/{codigo_ibge}?formato=application/vnd.geo+json"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            resp = await client.get(url)
-            if resp.status_code >= 400:
-                raise ValueError(f"IBGE malha erro {resp.status_code}")
-            return resp.json()
+        client = get_http_client(url)
+        resp = await client.get(url, timeout=self.timeout)
+        if resp.status_code >= 400:
+            raise ValueError(f"IBGE malha erro {resp.status_code}")
+        return resp.json()
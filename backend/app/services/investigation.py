@@ -83,9 +83,7 @@ class InvestigationService:
         Fallback síncrono: executa scrapers diretamente quando Celery/Redis
         não estão disponíveis. Atualiza a investigação com os resultados.
         """
-        from app.scrapers.car_scraper import CARScraper
-        from app.scrapers.incra_scraper import INCRAScraper
-        from app.scrapers.receita_scraper import ReceitaScraper
+        from app.workers.scraper_fanout import build_investigation_jobs, run_scraper_fanout
 
         # Marca como em andamento
         await self.investigation_repo.update(
@@ -96,42 +94,18 @@ class InvestigationService:
         target_doc = self.plaintext_target_document(investigation.target_cpf_cnpj)
 
         try:
-            # CAR
-            try:
-                logger.info(f"[sync-fallback] Executando CAR para investigação {investigation.id}")
-                car = CARScraper()
-                car_res = await car.search(investigation.target_name, target_doc)
-                results["properties"].extend(car_res)
-            except Exception as exc:
-                logger.warning(
-                    f"[sync-fallback] CAR falhou para investigação {investigation.id}: {exc}"
-                )
-
-            # INCRA
-            try:
-                logger.info(
-                    f"[sync-fallback] Executando INCRA para investigação {investigation.id}"
-                )
-                incra = INCRAScraper()
-                incra_res = await incra.search(investigation.target_name, target_doc)
-                results["properties"].extend(incra_res)
-            except Exception as exc:
-                logger.warning(
-                    f"[sync-fallback] INCRA falhou para investigação {investigation.id}: {exc}"
-                )
-
-            # Receita Federal
-            if target_doc:
-                try:
-                    logger.info(
-                        f"[sync-fallback] Executando Receita para investigação {investigation.id}"
-                    )
-                    receita = ReceitaScraper()
-                    company_res = await receita.search(target_doc)
-                    results["companies"].extend(company_res)
-                except Exception as exc:
+            # CAR, INCRA e Receita em paralelo; falhas por fonte não interrompem as restantes
+            logger.info(f"[sync-fallback] Executando scrapers para investigação {investigation.id}")
+            outcomes = await run_scraper_fanout(
+                build_investigation_jobs(investigation.target_name, target_doc)
+            )
+            for outcome in outcomes:
+                if outcome.ok:
+                    results[outcome.category].extend(outcome.results)
+                else:
                     logger.warning(
-                        f"[sync-fallback] Receita falhou para investigação {investigation.id}: {exc}"
+                        f"[sync-fallback] {outcome.source.value.upper()} falhou para "
+                        f"investigação {investigation.id}: {outcome.error}"
                     )
 
             # Marca como concluída
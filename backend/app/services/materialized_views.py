@@ -1,32 +1,282 @@
 """
 Materialized views PostgreSQL para agregações de dashboard.
 Em SQLite / testes, as operações são ignoradas com segurança.
+
+Refresh agendado com debounce: request_refresh() marca as views como pendentes
+em Redis (SET NX) e só o primeiro pedido de cada janela agenda um refresh
+atrasado (MV_REFRESH_DEBOUNCE_SECONDS); os restantes juntam-se a ele. O refresh
+usa REFRESH ... CONCURRENTLY (índice único em cada view), pelo que os dashboards
+continuam a ler durante a reconstrução.
 """
 
 from __future__ import annotations
 
 import logging
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional
 
+from prometheus_client import Counter, Gauge, Histogram
 from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.redis_pool import get_redis
+
 logger = logging.getLogger(__name__)
 
-MV_NAME = "mv_dashboard_investigation_summary"
+MV_NAME = "mv_dashboard_investigation_summary"  # (user_id, status)
+MV_PROPERTIES_BY_STATE = "mv_dashboard_properties_by_state"  # (user_id, state)
+MV_LEGAL_BY_PROVIDER = "mv_dashboard_legal_queries_by_provider"  # (user_id, provider)
+DASHBOARD_VIEWS = (MV_NAME, MV_PROPERTIES_BY_STATE, MV_LEGAL_BY_PROVIDER)
+
+PENDING_KEY = "mv:refresh:pending:{view}"
+LOCK_KEY = "mv:refresh:lock:{view}"
+LAST_REFRESH_KEY = "mv:refresh:last"  # hash view -> epoch do último refresh
+
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+MV_REFRESH_DURATION = Histogram(
+    "agroadb_materialized_view_refresh_seconds",
+    "Duração do REFRESH MATERIALIZED VIEW",
+    ["view"],
+    buckets=(0.1, 0.5, 1, 2, 5, 15, 30, 60, 120, 300, float("inf")),
+)
+MV_REFRESH_TOTAL = Counter(
+    "agroadb_materialized_view_refreshes_total",
+    "Refreshes de materialized views por resultado",
+    ["view", "result"],
+)
+MV_STALENESS = Gauge(
+    "agroadb_materialized_view_staleness_seconds",
+    "Segundos desde o último refresh bem-sucedido da materialized view",
+    ["view"],
+)
+MV_PENDING = Gauge(
+    "agroadb_materialized_view_refresh_pending",
+    "1 se houver um refresh pedido e ainda não executado",
+    ["view"],
+)
 
 
-async def try_refresh_investigation_summary(db: AsyncSession) -> bool:
+def _observe_refresh(view: str, result: str, duration: float) -> None:
+    if not settings.PROMETHEUS_ENABLED:
+        return
+    MV_REFRESH_TOTAL.labels(view=view, result=result).inc()
+    if result != "skipped":
+        MV_REFRESH_DURATION.labels(view=view).observe(duration)
+    if result == "ok":
+        MV_STALENESS.labels(view=view).set(0)
+
+
+async def refresh_view(db: AsyncSession, view: str) -> bool:
     """
-    REFRESH MATERIALIZED VIEW no PostgreSQL.
+    REFRESH MATERIALIZED VIEW CONCURRENTLY no PostgreSQL (leituras não bloqueiam).
+    Numa view ainda não populada recorre ao REFRESH normal.
     Retorna True se o refresh foi executado.
     """
+    if view not in DASHBOARD_VIEWS:
+        raise ValueError(f"Materialized view desconhecida: {view}")
     bind = db.get_bind()
     if bind.dialect.name != "postgresql":
         return False
+
+    started = time.perf_counter()
     try:
-        await db.execute(text(f"REFRESH MATERIALIZED VIEW {MV_NAME}"))
-        logger.info("Materialized view %s atualizada", MV_NAME)
-        return True
+        try:
+            async with db.begin_nested():
+                await db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+        except DBAPIError as exc:
+            if "not been populated" not in str(exc):
+                raise
+            await db.execute(text(f"REFRESH MATERIALIZED VIEW {view}"))
     except Exception as exc:
-        logger.warning("Refresh MV ignorado ou falhou: %s", exc)
+        _observe_refresh(view, "error", time.perf_counter() - started)
+        logger.warning("Refresh MV %s ignorado ou falhou: %s", view, exc)
         return False
+
+    duration = time.perf_counter() - started
+    _observe_refresh(view, "ok", duration)
+    logger.info("Materialized view %s atualizada em %.2fs", view, duration)
+    return True
+
+
+async def request_refresh(views: Iterable[str] = DASHBOARD_VIEWS, redis_client=None) -> List[str]:
+    """
+    Pede o refresh das views com debounce.
+
+    Só as views sem pedido pendente agendam um novo refresh (um único, após
+    MV_REFRESH_DEBOUNCE_SECONDS); as outras já estão cobertas pelo agendado.
+
+    Returns:
+        Views para as quais foi agendado um refresh
+    """
+    views = list(views)
+    debounce = settings.MV_REFRESH_DEBOUNCE_SECONDS
+    # O pendente expira sozinho se o refresh agendado se perder
+    pending_ttl = int(debounce + settings.MV_REFRESH_LOCK_TIMEOUT_SECONDS) + 1
+    client = redis_client or get_redis()
+    try:
+        pipe = client.pipeline(transaction=False)
+        for view in views:
+            pipe.set(PENDING_KEY.format(view=view), time.time(), nx=True, ex=pending_ttl)
+        created = await pipe.execute()
+        scheduled = [view for view, ok in zip(views, created) if ok]
+    except Exception as exc:
+        # Sem Redis não há coalescência, mas o refresh não se perde
+        logger.warning("Debounce de refresh de MV indisponível: %s", exc)
+        scheduled = views
+
+    if scheduled:
+        from app.workers.tasks import refresh_materialized_views_task
+
+        refresh_materialized_views_task.apply_async(args=[scheduled], countdown=debounce)
+        if settings.PROMETHEUS_ENABLED:
+            for view in scheduled:
+                MV_PENDING.labels(view=view).set(1)
+    return scheduled
+
+
+async def refresh_materialized_views(
+    views: Iterable[str] = DASHBOARD_VIEWS, redis_client=None
+) -> Dict[str, bool]:
+    """
+    Executa os refreshes pedidos (task agendada por request_refresh).
+
+    O pedido pendente é limpo antes do refresh, para que alterações feitas
+    durante a reconstrução agendem outro. Um lock Redis por view evita refreshes
+    simultâneos; se outro processo o tiver, o pedido é reagendado.
+    """
+    from app.core.database import AsyncSessionLocal
+
+    client = redis_client or get_redis()
+    lock_ms = int(settings.MV_REFRESH_LOCK_TIMEOUT_SECONDS * 1000)
+    results: Dict[str, bool] = {}
+    for view in views:
+        token = uuid.uuid4().hex
+        lock_key = LOCK_KEY.format(view=view)
+        try:
+            await client.delete(PENDING_KEY.format(view=view))
+            locked = await client.set(lock_key, token, nx=True, px=lock_ms)
+        except Exception as exc:
+            logger.warning("Lock de refresh de MV indisponível (%s): %s", view, exc)
+            locked, token = True, None
+
+        if not locked:
+            await request_refresh([view], redis_client=client)
+            _observe_refresh(view, "skipped", 0.0)
+            results[view] = False
+            continue
+
+        try:
+            async with AsyncSessionLocal() as db:
+                results[view] = await refresh_view(db, view)
+                await db.commit()
+        finally:
+            if token is not None:
+                try:
+                    await client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                    if results.get(view):
+                        await client.hset(LAST_REFRESH_KEY, view, time.time())
+                except Exception as exc:
+                    logger.warning("Estado de refresh de MV não registado (%s): %s", view, exc)
+        if settings.PROMETHEUS_ENABLED:
+            MV_PENDING.labels(view=view).set(0)
+    return results
+
+
+async def get_refresh_status(redis_client) -> Dict[str, dict]:
+    """Último refresh, staleness e pedido pendente por view."""
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hgetall(LAST_REFRESH_KEY)
+    for view in DASHBOARD_VIEWS:
+        pipe.exists(PENDING_KEY.format(view=view))
+    last, *pending = await pipe.execute()
+    now = time.time()
+    status = {}
+    for view, is_pending in zip(DASHBOARD_VIEWS, pending):
+        last_refresh = float(last[view]) if view in last else None
+        status[view] = {
+            "last_refresh": last_refresh,
+            "staleness_seconds": round(now - last_refresh, 1) if last_refresh else None,
+            "pending": bool(is_pending),
+        }
+    return status
+
+
+async def refresh_staleness_gauges(redis_client) -> None:
+    """Actualiza os gauges de staleness/pendente a partir do estado em Redis."""
+    if not settings.PROMETHEUS_ENABLED:
+        return
+    for view, state in (await get_refresh_status(redis_client)).items():
+        if state["staleness_seconds"] is not None:
+            MV_STALENESS.labels(view=view).set(state["staleness_seconds"])
+        MV_PENDING.labels(view=view).set(1 if state["pending"] else 0)
+
+
+async def _fetch_view_rows(
+    db: AsyncSession, view: str, key: str, aggregates: str, user_id: Optional[int]
+) -> Optional[list]:
+    """Linhas (key, agregados...) de uma MV (PostgreSQL); None se indisponível."""
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    sql = f"SELECT {key}, {aggregates} FROM {view}"
+    params = {}
+    if user_id is not None:
+        sql += " WHERE user_id = :user_id"
+        params["user_id"] = user_id
+    sql += f" GROUP BY {key}"
+    try:
+        # SAVEPOINT: uma falha aqui não pode abortar a transacção do pedido
+        async with db.begin_nested():
+            result = await db.execute(text(sql), params)
+            return list(result.all())
+    except Exception as exc:
+        logger.warning("Leitura da MV %s ignorada: %s", view, exc)
+        return None
+
+
+async def fetch_investigation_status_counts(
+    db: AsyncSession, user_id: Optional[int] = None
+) -> Optional[Dict[str, int]]:
+    """
+    Contagens de investigações por status lidas da MV (PostgreSQL).
+    user_id=None agrega todos os utilizadores. Retorna None fora do PostgreSQL
+    ou se a MV não estiver disponível (o chamador agrega na tabela).
+    """
+    rows = await _fetch_view_rows(db, MV_NAME, "status", "SUM(cnt)", user_id)
+    if rows is None:
+        return None
+    return {str(status): int(cnt or 0) for status, cnt in rows}
+
+
+async def fetch_properties_by_state(
+    db: AsyncSession, user_id: Optional[int] = None
+) -> Optional[Dict[str, int]]:
+    """Imóveis por UF lidos da MV (mesmas regras de fetch_investigation_status_counts)."""
+    rows = await _fetch_view_rows(db, MV_PROPERTIES_BY_STATE, "state", "SUM(cnt)", user_id)
+    if rows is None:
+        return None
+    return {str(state): int(cnt or 0) for state, cnt in rows if state}
+
+
+async def fetch_legal_summary(
+    db: AsyncSession, user_id: Optional[int] = None
+) -> Optional[Dict[str, dict]]:
+    """Consultas legais por provider lidas da MV, no formato de summary_by_user."""
+    rows = await _fetch_view_rows(
+        db, MV_LEGAL_BY_PROVIDER, "provider", "SUM(total), SUM(queries)", user_id
+    )
+    if rows is None:
+        return None
+    return {
+        str(provider): {"total": int(total or 0), "queries": int(queries or 0)}
+        for provider, total, queries in rows
+    }
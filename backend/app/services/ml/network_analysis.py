@@ -5,6 +5,7 @@ Análise de rede para investigações (NetworkX + dados reais da base).
 from __future__ import annotations
 
 import re
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -52,6 +53,30 @@ class NetworkAnalysis:
     graph_data: Dict[str, Any] = field(default_factory=lambda: {"nodes": [], "links": []})
 
 
+@dataclass
+class _GraphSnapshot:
+    """Grafo construído de uma investigação, válido enquanto o stamp de versão não mudar."""
+
+    version: Tuple
+    graph: nx.Graph
+    analysis: Optional[NetworkAnalysis] = None
+
+
+# Grafos memoizados por investigação (LRU por processo); a validade é confirmada
+# a cada chamada pelo stamp de versão da BD, pelo que escritas noutros processos
+# (API, workers Celery) invalidam a entrada sem mensagens adicionais.
+GRAPH_CACHE_MAX_INVESTIGATIONS = 64
+_graph_cache: "OrderedDict[int, _GraphSnapshot]" = OrderedDict()
+
+
+def invalidate_network_cache(investigation_id: Optional[int] = None) -> None:
+    """Descarta o grafo memoizado de uma investigação (ou de todas)."""
+    if investigation_id is None:
+        _graph_cache.clear()
+    else:
+        _graph_cache.pop(investigation_id, None)
+
+
 class NetworkAnalysisEngine:
     @staticmethod
     def _build_graph(inv: Investigation) -> nx.Graph:
@@ -108,8 +133,10 @@ class NetworkAnalysisEngine:
 
     @staticmethod
     def _analyze_investigation(inv: Investigation) -> NetworkAnalysis:
-        G = NetworkAnalysisEngine._build_graph(inv)
+        return NetworkAnalysisEngine._analyze_graph(NetworkAnalysisEngine._build_graph(inv))
 
+    @staticmethod
+    def _analyze_graph(G: nx.Graph) -> NetworkAnalysis:
         if G.number_of_nodes() == 0:
             return NetworkAnalysis(suspicious_patterns=["Sem dados para grafo"])
 
@@ -165,12 +192,43 @@ class NetworkAnalysisEngine:
         )
 
     @staticmethod
-    async def analyze_network(db: AsyncSession, investigation_id: int) -> NetworkAnalysis:
+    async def _get_snapshot(db: AsyncSession, investigation_id: int) -> Optional[_GraphSnapshot]:
+        """
+        Grafo memoizado da investigação
+
+        Uma consulta leve ao stamp de versão (updated_at e contagens de imóveis e
+        empresas) decide se o grafo em cache ainda serve; só quando mudou se
+        recarregam as relações e se reconstrói o grafo.
+        """
         repo = InvestigationRepository(db)
+        version = await repo.get_data_version(investigation_id)
+        if version is None:
+            _graph_cache.pop(investigation_id, None)
+            return None
+
+        snapshot = _graph_cache.get(investigation_id)
+        if snapshot is not None and snapshot.version == version:
+            _graph_cache.move_to_end(investigation_id)
+            return snapshot
+
         inv = await repo.get_with_relations(investigation_id)
         if not inv:
+            return None
+        snapshot = _GraphSnapshot(version=version, graph=NetworkAnalysisEngine._build_graph(inv))
+        _graph_cache[investigation_id] = snapshot
+        _graph_cache.move_to_end(investigation_id)
+        while len(_graph_cache) > GRAPH_CACHE_MAX_INVESTIGATIONS:
+            _graph_cache.popitem(last=False)
+        return snapshot
+
+    @staticmethod
+    async def analyze_network(db: AsyncSession, investigation_id: int) -> NetworkAnalysis:
+        snapshot = await NetworkAnalysisEngine._get_snapshot(db, investigation_id)
+        if snapshot is None:
             raise ValueError(f"Investigação {investigation_id} não encontrada")
-        return NetworkAnalysisEngine._analyze_investigation(inv)
+        if snapshot.analysis is None:
+            snapshot.analysis = NetworkAnalysisEngine._analyze_graph(snapshot.graph)
+        return snapshot.analysis
 
     @staticmethod
     async def find_shortest_path(
@@ -179,20 +237,12 @@ class NetworkAnalysisEngine:
         source: str,
         target: str,
     ) -> Optional[List[str]]:
-        repo = InvestigationRepository(db)
-        inv = await repo.get_with_relations(investigation_id)
-        if not inv:
+        snapshot = await NetworkAnalysisEngine._get_snapshot(db, investigation_id)
+        if snapshot is None:
             return None
-        analysis = NetworkAnalysisEngine._analyze_investigation(inv)
-        links = analysis.graph_data.get("links", [])
-        nodes = {n["id"] for n in analysis.graph_data.get("nodes", [])}
-        if source not in nodes or target not in nodes:
+        G = snapshot.graph
+        if source not in G or target not in G:
             return None
-        G = nx.Graph()
-        for n in analysis.graph_data.get("nodes", []):
-            G.add_node(n["id"])
-        for e in links:
-            G.add_edge(e["source"], e["target"])
         try:
             return nx.shortest_path(G, source, target)
         except Exception:
@@ -205,16 +255,10 @@ class NetworkAnalysisEngine:
         entity_id: str,
         max_depth: int = 2,
     ) -> List[Dict[str, Any]]:
-        repo = InvestigationRepository(db)
-        inv = await repo.get_with_relations(investigation_id)
-        if not inv:
+        snapshot = await NetworkAnalysisEngine._get_snapshot(db, investigation_id)
+        if snapshot is None:
             return []
-        analysis = NetworkAnalysisEngine._analyze_investigation(inv)
-        G = nx.Graph()
-        for n in analysis.graph_data.get("nodes", []):
-            G.add_node(n["id"], **{k: v for k, v in n.items() if k != "id"})
-        for e in analysis.graph_data.get("links", []):
-            G.add_edge(e["source"], e["target"])
+        G = snapshot.graph
         if entity_id not in G:
             return []
         lengths = nx.single_source_shortest_path_length(G, entity_id, cutoff=max_depth)
@@ -222,5 +266,5 @@ class NetworkAnalysisEngine:
         for nid, dist in sorted(lengths.items(), key=lambda x: x[1]):
             if nid == entity_id:
                 continue
-            out.append({"id": nid, "depth": dist, "label": G.nodes[nid].get("name", nid)})
+            out.append({"id": nid, "depth": dist, "label": G.nodes[nid].get("label", nid)})
         return out[:50]
@@ -0,0 +1,223 @@
+"""
+Extração de entidades do texto OCR numa única passagem.
+
+Os padrões de cada tipo (CPF, CNPJ, CAR, datas, ...) são combinados numa só
+regex compilada com um grupo nomeado por tipo, pela ordem do dicionário. O
+texto é percorrido uma vez, e não uma vez por padrão. As ocorrências não se
+sobrepõem: numa mesma posição ganha o primeiro tipo declarado, pelo que um CPF
+sem formatação já não aparece também como telefone. Quando o padrão tem um grupo
+de captura (ex.: ``CCIR: (...)``), o valor é o grupo, como no ``re.findall``.
+
+Cada ocorrência traz a página (1-based) e o offset dentro da página. A validação
+dos dígitos verificadores de CPF/CNPJ é feita em lote com numpy.
+
+Extratores partilhados por OCRService, OCREngine e ml.OCRProcessor:
+SERVICE_EXTRACTOR, ENGINE_EXTRACTOR, STRUCTURED_EXTRACTOR e DOCUMENT_EXTRACTOR.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+# Parêntese de abertura de um grupo de captura (não escapado, não "(?...")
+_CAPTURE_OPEN = re.compile(r"(?<!\\)\((?!\?)")
+_NON_DIGITS = re.compile(r"\D", re.ASCII)
+
+_CPF_WEIGHTS_1 = np.arange(10, 1, -1)
+_CPF_WEIGHTS_2 = np.arange(11, 1, -1)
+_CNPJ_WEIGHTS_1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+_CNPJ_WEIGHTS_2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
+
+@dataclass(frozen=True)
+class EntityMatch:
+    """Ocorrência de uma entidade no documento"""
+
+    type: str
+    value: str
+    page: int
+    start: int
+    end: int
+
+
+def _value_group(name: str) -> str:
+    return f"{name}__value"
+
+
+def _rewrite_groups(name: str, pattern: str) -> str:
+    # O 1.º grupo de captura passa a nomeado (valor devolvido); os restantes deixam de capturar
+    seen = []
+
+    def repl(match: re.Match) -> str:
+        seen.append(match)
+        return f"(?P<{_value_group(name)}>" if len(seen) == 1 else "(?:"
+
+    return _CAPTURE_OPEN.sub(repl, pattern)
+
+
+class EntityExtractor:
+    """Regex única para vários tipos de entidade"""
+
+    def __init__(self, patterns: Mapping[str, str], flags: int = 0):
+        self.types = tuple(patterns)
+        self._has_value_group = {}
+        parts = []
+        for name, pattern in patterns.items():
+            self._has_value_group[name] = re.compile(pattern).groups > 0
+            if self._has_value_group[name]:
+                pattern = _rewrite_groups(name, pattern)
+            parts.append(f"(?P<{name}>{pattern})")
+        # re.ASCII: \d não aceita dígitos Unicode (ex.: árabe-índicos) que o numpy não converte
+        self.regex = re.compile("|".join(parts), flags | re.ASCII)
+
+    def finditer(
+        self, text_or_pages: Union[str, Sequence[str]], *, first_page: int = 1
+    ) -> Iterator[EntityMatch]:
+        """
+        Ocorrências pela ordem do texto
+
+        Args:
+            text_or_pages: Texto completo ou lista com o texto de cada página
+            first_page: Número da primeira página
+        """
+        pages = [text_or_pages] if isinstance(text_or_pages, str) else text_or_pages
+        for page_number, page in enumerate(pages, first_page):
+            if not page:
+                continue
+            for match in self.regex.finditer(page):
+                name = match.lastgroup
+                if self._has_value_group[name]:
+                    group = _value_group(name)
+                    value = match.group(group) or ""
+                    start, end = match.span(group)
+                else:
+                    value = match.group(name)
+                    start, end = match.span(name)
+                yield EntityMatch(name, value, page_number, start, end)
+
+    def extract(self, text_or_pages: Union[str, Sequence[str]]) -> List[EntityMatch]:
+        """Todas as ocorrências (com página e offset)"""
+        return list(self.finditer(text_or_pages))
+
+    def grouped(
+        self,
+        text_or_pages: Union[str, Sequence[str]],
+        clean: Optional[Callable[[str], str]] = None,
+    ) -> Dict[str, List[str]]:
+        """Valores únicos por tipo (só tipos encontrados), pela ordem de ocorrência"""
+        found: Dict[str, Dict[str, None]] = {}
+        for entity in self.finditer(text_or_pages):
+            value = clean(entity.value) if clean else entity.value
+            found.setdefault(entity.type, {})[value] = None
+        return {name: list(values) for name, values in found.items()}
+
+
+def only_digits(value: str) -> str:
+    """Remove a formatação de CPF/CNPJ"""
+    return _NON_DIGITS.sub("", value)
+
+
+def _digit_matrix(documents: Sequence[str], length: int) -> np.ndarray:
+    raw = "".join(documents).encode("ascii")
+    return (np.frombuffer(raw, dtype=np.uint8) - ord("0")).astype(np.int64).reshape(-1, length)
+
+
+def _valid_mask(documents: Sequence[str], length: int, check) -> np.ndarray:
+    mask = np.zeros(len(documents), dtype=bool)
+    index = [
+        i
+        for i, doc in enumerate(documents)
+        if len(doc) == length and doc.isascii() and doc.isdigit()
+    ]
+    if index:
+        digits = _digit_matrix([documents[i] for i in index], length)
+        repeated = (digits == digits[:, :1]).all(axis=1)
+        mask[index] = check(digits) & ~repeated
+    return mask
+
+
+def _cpf_check(digits: np.ndarray) -> np.ndarray:
+    d1 = (digits[:, :9] @ _CPF_WEIGHTS_1 * 10) % 11 % 10
+    d2 = (digits[:, :10] @ _CPF_WEIGHTS_2 * 10) % 11 % 10
+    return (d1 == digits[:, 9]) & (d2 == digits[:, 10])
+
+
+def _cnpj_digit(remainder: np.ndarray) -> np.ndarray:
+    return np.where(remainder < 2, 0, 11 - remainder)
+
+
+def _cnpj_check(digits: np.ndarray) -> np.ndarray:
+    d1 = _cnpj_digit((digits[:, :12] @ _CNPJ_WEIGHTS_1) % 11)
+    d2 = _cnpj_digit((digits[:, :13] @ _CNPJ_WEIGHTS_2) % 11)
+    return (d1 == digits[:, 12]) & (d2 == digits[:, 13])
+
+
+def valid_cpfs(documents: Sequence[str]) -> np.ndarray:
+    """Máscara de CPFs (só dígitos) com dígitos verificadores correctos"""
+    return _valid_mask(documents, 11, _cpf_check)
+
+
+def valid_cnpjs(documents: Sequence[str]) -> np.ndarray:
+    """Máscara de CNPJs (só dígitos) com dígitos verificadores correctos"""
+    return _valid_mask(documents, 14, _cnpj_check)
+
+
+def filter_valid(documents: Iterable[str], kind: str) -> List[str]:
+    """Documentos ``cpf``/``cnpj`` válidos, sem formatação e sem duplicados"""
+    unique = list(dict.fromkeys(only_digits(doc) for doc in documents))
+    mask = valid_cpfs(unique) if kind == "cpf" else valid_cnpjs(unique)
+    return [doc for doc, ok in zip(unique, mask) if ok]
+
+
+# Padrões de OCRService (CNPJ antes de CPF para ganhar em caso de sobreposição)
+SERVICE_PATTERNS: Dict[str, str] = {
+    "cnpj": r"\b\d{2}\.?\d{3}\.?\d{3}/?0001-?\d{2}\b",
+    "cpf": r"\b\d{3}\.?\d{3}\.?\d{3}-?\d{2}\b",
+    "car": r"\b[A-Z]{2}-\d{7}-[A-F0-9]{32}\b",
+    "ccir": r"\bCCIR[:\s]*(\d{3}\.\d{3}\.\d{3}\.?\d{3}-?\d)\b",
+    "nirf": r"\bNIRF[:\s]*(\d{3}\.\d{3}\.\d{3}\.?\d{3}-?\d)\b",
+    "email": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
+    "date": r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b",
+    "currency": r"R\$\s?\d{1,3}(?:\.\d{3})*(?:,\d{2})?",
+    "hectare": r"\d+(?:,\d+)?\s?(?:ha|hectares?)",
+    "matricula": r"\bMatr[íÍ]cula[:\s]*(\d{4,8})\b",
+    "protocolo": r"\bProtocolo[:\s]*([A-Z0-9-]+)\b",
+    "phone": r"\b(?:\+55\s?)?(?:\(?\d{2}\)?\s?)?\d{4,5}-?\d{4}\b",
+}
+
+# Padrões de OCREngine
+ENGINE_PATTERNS: Dict[str, str] = {
+    name: SERVICE_PATTERNS[name]
+    for name in (
+        "cnpj",
+        "cpf",
+        "car",
+        "ccir",
+        "email",
+        "date",
+        "currency",
+        "hectare",
+        "phone",
+    )
+}
+
+# Padrões de ml.OCRProcessor._extract_structured_data (chaves = campos devolvidos)
+STRUCTURED_PATTERNS: Dict[str, str] = {
+    "cnpjs": r"\b\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}\b",
+    "cpfs": r"\b\d{3}\.?\d{3}\.?\d{3}-?\d{2}\b",
+    "rgs": r"\b\d{1,2}\.?\d{3}\.?\d{3}-?[0-9X]\b",
+    "dates": r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b",
+    "money_values": r"R\$\s*\d{1,3}(?:\.\d{3})*(?:,\d{2})?",
+    "ceps": r"\b\d{5}-?\d{3}\b",
+}
+
+SERVICE_EXTRACTOR = EntityExtractor(SERVICE_PATTERNS, re.IGNORECASE)
+ENGINE_EXTRACTOR = EntityExtractor(ENGINE_PATTERNS, re.IGNORECASE)
+STRUCTURED_EXTRACTOR = EntityExtractor(STRUCTURED_PATTERNS)
+DOCUMENT_EXTRACTOR = EntityExtractor(
+    {"cnpj": SERVICE_PATTERNS["cnpj"], "cpf": SERVICE_PATTERNS["cpf"]}
+)
@@ -0,0 +1,307 @@
+"""
+Executor de OCR partilhado (OCRService, OCREngine e ml.OCRProcessor).
+
+As páginas de um PDF são rasterizadas e passadas ao Tesseract dentro de um
+``ProcessPoolExecutor``: cada tarefa converte uma única página
+(``first_page``/``last_page``) a partir de um ficheiro temporário e devolve só o
+texto, pelo que nenhuma lista de imagens a 300 DPI fica em memória e o event loop
+nunca bloqueia.
+
+Limites por job:
+
+- OCR_MAX_PAGES — páginas processadas por documento
+- OCR_JOB_MAX_PARALLEL_PAGES — páginas do mesmo job em curso ao mesmo tempo
+  (0 = OCR_WORKERS); limita a memória do job e evita que um PDF de 100 páginas
+  monopolize o pool
+- OCR_JOB_TIMEOUT_SECONDS — ao expirar, ou se o pedido for cancelado, as páginas
+  ainda em fila são canceladas
+- OCR_WORKER_MAX_MEMORY_MB / OCR_WORKER_MAX_TASKS — RLIMIT_AS de cada processo e
+  reciclagem após N páginas
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANG = "por"
+DEFAULT_CONFIG = "--psm 6 --oem 3"
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+class OCRJobCancelled(Exception):
+    """Job de OCR cancelado ou expirado antes de terminar todas as páginas"""
+
+
+def preprocess_image(image):
+    """Escala de cinza e largura mínima de 1000px (melhora o OCR de digitalizações pequenas)"""
+    from PIL import Image
+
+    if image.mode != "L":
+        image = image.convert("L")
+    if image.size[0] < 1000:
+        scale = 1000 / image.size[0]
+        new_size = (int(image.size[0] * scale), int(image.size[1] * scale))
+        image = image.resize(new_size, Image.LANCZOS)
+    return image
+
+
+def _init_worker(max_memory_mb: int) -> None:
+    if max_memory_mb <= 0:
+        return
+    try:
+        import resource
+
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"⚠️ Não foi possível limitar a memória do worker OCR: {e}")
+
+
+def _ocr_pdf_page(
+    pdf_path: str, page_number: int, dpi: int, lang: str, config: str, preprocess: bool
+) -> str:
+    # Corre no processo do pool: só esta página é rasterizada e a imagem não sai daqui
+    import pytesseract
+    from pdf2image import convert_from_path
+
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)
+    if not images:
+        return ""
+    image = images[0]
+    try:
+        if preprocess:
+            image = preprocess_image(image)
+        return pytesseract.image_to_string(image, lang=lang, config=config)
+    finally:
+        image.close()
+
+
+def _ocr_image_bytes(image_bytes: bytes, lang: str, config: str, preprocess: bool) -> str:
+    import io
+
+    import pytesseract
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image = preprocess_image(image) if preprocess else image.convert("RGB")
+        return pytesseract.image_to_string(image, lang=lang, config=config)
+
+
+def pdf_page_count(pdf_path: str) -> int:
+    """Número de páginas (pdfinfo, sem rasterizar)"""
+    from pdf2image import pdfinfo_from_path
+
+    return int(pdfinfo_from_path(pdf_path)["Pages"])
+
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    """Pool de processos OCR do processo (criado no primeiro uso)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: não herdar threads nem ligações; max_tasks_per_child recicla workers
+            _executor = ProcessPoolExecutor(
+                max_workers=ocr_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(settings.OCR_WORKER_MAX_MEMORY_MB,),
+                max_tasks_per_child=settings.OCR_WORKER_MAX_TASKS or None,
+            )
+        return _executor
+
+
+def _discard_broken_pool(pool: ProcessPoolExecutor) -> None:
+    """Descarta o pool com um worker morto (OOM, RLIMIT_AS): o próximo uso cria outro"""
+    global _executor
+    with _executor_lock:
+        if _executor is pool:
+            _executor = None
+    logger.warning("⚠️ Worker OCR terminou abruptamente; pool de processos recriado no próximo uso")
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def ocr_workers() -> int:
+    return settings.OCR_WORKERS or os.cpu_count() or 1
+
+
+def _job_parallelism() -> int:
+    return max(1, settings.OCR_JOB_MAX_PARALLEL_PAGES or ocr_workers())
+
+
+def _write_temp_pdf(pdf_bytes: bytes) -> str:
+    # Os workers lêem do disco em vez de receberem o PDF inteiro por página
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(pdf_bytes)
+    return path
+
+
+def _remove_temp_pdf(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _page_numbers(pdf_path: str, max_pages: Optional[int]) -> List[int]:
+    total = pdf_page_count(pdf_path)
+    limit = min(total, max_pages or settings.OCR_MAX_PAGES)
+    if limit < total:
+        logger.warning(f"⚠️ OCR limitado a {limit} de {total} páginas")
+    return list(range(1, limit + 1))
+
+
+async def ocr_pdf_pages(
+    pdf_path: str,
+    *,
+    lang: str = DEFAULT_LANG,
+    config: str = DEFAULT_CONFIG,
+    dpi: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    preprocess: bool = False,
+    timeout: Optional[float] = None,
+) -> List[str]:
+    """
+    OCR das páginas de um PDF em paralelo no pool de processos
+
+    Args:
+        pdf_path: Caminho do PDF
+        lang: Idioma do Tesseract
+        config: Opções do Tesseract
+        dpi: Resolução da rasterização (default OCR_DPI)
+        max_pages: Limite de páginas (default OCR_MAX_PAGES)
+        preprocess: Aplicar preprocess_image antes do OCR
+        timeout: Segundos até cancelar o job (default OCR_JOB_TIMEOUT_SECONDS)
+
+    Returns:
+        Texto de cada página, pela ordem do documento
+
+    Raises:
+        OCRJobCancelled: Se o job expirar
+    """
+    loop = asyncio.get_running_loop()
+    pages = await asyncio.to_thread(_page_numbers, pdf_path, max_pages)
+    pool = get_ocr_pool()
+    semaphore = asyncio.Semaphore(_job_parallelism())
+    dpi = dpi or settings.OCR_DPI
+
+    async def run_page(page_number: int) -> str:
+        async with semaphore:
+            logger.debug(f"OCR página {page_number}/{len(pages)}...")
+            return await loop.run_in_executor(
+                pool, _ocr_pdf_page, pdf_path, page_number, dpi, lang, config, preprocess
+            )
+
+    tasks = [asyncio.ensure_future(run_page(n)) for n in pages]
+    try:
+        return await asyncio.wait_for(
+            asyncio.gather(*tasks), timeout or settings.OCR_JOB_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError as e:
+        raise OCRJobCancelled(f"OCR excedeu o tempo limite ({len(pages)} páginas)") from e
+    except BrokenProcessPool:
+        _discard_broken_pool(pool)
+        raise
+    finally:
+        # Cancelamento do pedido ou timeout: páginas em fila não chegam ao pool
+        for task in tasks:
+            task.cancel()
+
+
+async def ocr_pdf_bytes(pdf_bytes: bytes, **kwargs) -> List[str]:
+    """Como ocr_pdf_pages, a partir dos bytes do PDF"""
+    path = await asyncio.to_thread(_write_temp_pdf, pdf_bytes)
+    try:
+        return await ocr_pdf_pages(path, **kwargs)
+    finally:
+        await asyncio.to_thread(_remove_temp_pdf, path)
+
+
+async def ocr_image(
+    image_bytes: bytes,
+    *,
+    lang: str = DEFAULT_LANG,
+    config: str = DEFAULT_CONFIG,
+    preprocess: bool = False,
+) -> str:
+    """OCR de uma imagem no pool de processos"""
+    loop = asyncio.get_running_loop()
+    pool = get_ocr_pool()
+    try:
+        return await loop.run_in_executor(
+            pool, _ocr_image_bytes, image_bytes, lang, config, preprocess
+        )
+    except BrokenProcessPool:
+        _discard_broken_pool(pool)
+        raise
+
+
+def ocr_pdf_pages_sync(
+    pdf_path: str,
+    *,
+    lang: str = DEFAULT_LANG,
+    config: str = DEFAULT_CONFIG,
+    dpi: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    preprocess: bool = False,
+    timeout: Optional[float] = None,
+) -> List[str]:
+    """Versão síncrona de ocr_pdf_pages (código síncrono como ml.OCRProcessor)"""
+    pages = _page_numbers(pdf_path, max_pages)
+    pool = get_ocr_pool()
+    window = _job_parallelism()
+    dpi = dpi or settings.OCR_DPI
+    deadline = time.monotonic() + (timeout or settings.OCR_JOB_TIMEOUT_SECONDS)
+
+    results: List[Optional[str]] = [None] * len(pages)
+    pending: Dict[Future, int] = {}
+    queue = iter(enumerate(pages))
+    try:
+        while True:
+            while len(pending) < window:
+                item = next(queue, None)
+                if item is None:
+                    break
+                index, page_number = item
+                future = pool.submit(
+                    _ocr_pdf_page, pdf_path, page_number, dpi, lang, config, preprocess
+                )
+                pending[future] = index
+            if not pending:
+                return [text or "" for text in results]
+            remaining = deadline - time.monotonic()
+            done, _ = wait(pending, timeout=max(remaining, 0), return_when=FIRST_COMPLETED)
+            if not done:
+                raise OCRJobCancelled(f"OCR excedeu o tempo limite ({len(pages)} páginas)")
+            for future in done:
+                results[pending.pop(future)] = future.result()
+    except BrokenProcessPool:
+        _discard_broken_pool(pool)
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def close_ocr_pool() -> None:
+    """Termina os processos OCR (shutdown da API)"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -3,13 +3,18 @@ Sistema de OCR (Optical Character Recognition) para Documentos
 Extrai texto de PDFs, imagens e documentos escaneados
 """
 
+import asyncio
 import logging
 import os
 import re
 from dataclasses import dataclass
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+from app.services.ocr import entities as ocr_entities
+from app.services.ocr import executor as ocr_executor
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,18 +59,8 @@ class OCREngine:
     - Endereços
     """
 
-    # Padrões regex para extração de entidades
-    PATTERNS = {
-        "cpf": r"\b\d{3}\.?\d{3}\.?\d{3}-?\d{2}\b",
-        "cnpj": r"\b\d{2}\.?\d{3}\.?\d{3}/?0001-?\d{2}\b",
-        "car": r"\b[A-Z]{2}-\d{7}-[A-F0-9]{32}\b",
-        "ccir": r"\bCCIR[:\s]*(\d{3}\.\d{3}\.\d{3}\.?\d{3}-?\d)\b",
-        "email": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
-        "phone": r"\b(?:\+55\s?)?(?:\(?\d{2}\)?\s?)?\d{4,5}-?\d{4}\b",
-        "date": r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b",
-        "currency": r"R\$\s?\d{1,3}(?:\.\d{3})*(?:,\d{2})?",
-        "hectare": r"\d+(?:,\d+)?\s?(?:ha|hectares?)",
-    }
+    # Padrões regex para extração de entidades (combinados numa só regex em entities.py)
+    PATTERNS = ocr_entities.ENGINE_PATTERNS
 
     @classmethod
     async def extract_text_from_pdf(cls, file_path: str, use_ocr: bool = True) -> OCRResult:
@@ -139,29 +134,13 @@ class OCREngine:
     async def _extract_pdf_with_ocr(cls, file_path: str) -> Tuple[str, int]:
         """Extrai texto de PDF usando OCR (para PDFs escaneados)"""
         try:
-            import pytesseract
-            from pdf2image import convert_from_path
-            from PIL import Image
-
-            # Converter PDF em imagens
-            images = convert_from_path(file_path, dpi=300)
-            page_count = len(images)
-
-            text_parts = []
-            for i, image in enumerate(images):
-                logger.info(f"Processando página {i+1}/{page_count} com OCR...")
-
-                # OCR na imagem
-                text = pytesseract.image_to_string(
-                    image,
-                    lang="por",  # Português
-                    config="--psm 6",  # Assume um único bloco uniforme de texto
-                )
-                text_parts.append(text)
-
-            full_text = "\n\n".join(text_parts)
-            return full_text, page_count
+            # Uma página rasterizada por tarefa, em paralelo no pool de processos
+            pages = await ocr_executor.ocr_pdf_pages(file_path, config="--psm 6")
+            full_text = "\n\n".join(pages)
+            return full_text, len(pages)
 
+        except ocr_executor.OCRJobCancelled:
+            raise
         except Exception as e:
             logger.error(f"Erro no OCR: {e}")
             return "", 0
@@ -174,14 +153,14 @@ class OCREngine:
         start_time = time.time()
 
         try:
-            import pytesseract
             from PIL import Image
 
-            # Carregar imagem
+            # Carregar imagem (só o cabeçalho; o OCR corre no pool de processos)
             image = Image.open(file_path)
+            image_bytes = await asyncio.to_thread(Path(file_path).read_bytes)
 
             # OCR
-            text = pytesseract.image_to_string(image, lang="por", config="--psm 6")
+            text = await ocr_executor.ocr_image(image_bytes, config="--psm 6")
 
             # Extrair entidades
             entities_found = cls._extract_entities(text)
@@ -215,19 +194,8 @@ class OCREngine:
 
     @classmethod
     def _extract_entities(cls, text: str) -> Dict[str, List[str]]:
-        """Extrai entidades (CPF, CNPJ, etc) do texto"""
-        entities = {}
-
-        for entity_type, pattern in cls.PATTERNS.items():
-            matches = re.findall(pattern, text, re.IGNORECASE)
-
-            if matches:
-                # Limpar e deduplicar
-                cleaned_matches = list(set([cls._clean_entity(match) for match in matches]))
-
-                entities[entity_type] = cleaned_matches
-
-        return entities
+        """Extrai entidades (CPF, CNPJ, etc) do texto, numa só passagem"""
+        return ocr_entities.ENGINE_EXTRACTOR.grouped(text, clean=cls._clean_entity)
 
     @staticmethod
     def _clean_entity(value: str) -> str:
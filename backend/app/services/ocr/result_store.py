@@ -0,0 +1,163 @@
+"""
+Cache de resultados OCR por conteúdo (certidões e matrículas reenviadas).
+
+A chave é o SHA-256 dos bytes do ficheiro combinado com a versão do
+Tesseract, o idioma, as opções, o DPI, OCR_MAX_PAGES e OCR_RESULT_VERSION.
+Cada entrada é um JSON em OCR_CACHE_DIR (``<k[:2]>/<k>.json``) com o texto, o
+texto por página e as entidades. É consultada antes de qualquer rasterização,
+de modo que o mesmo documento em investigações diferentes só é processado uma
+vez.
+
+Eviction LRU: um hit actualiza o mtime do ficheiro; quando o total passa de
+OCR_CACHE_MAX_BYTES são removidas as entradas menos usadas até 90% do limite.
+Hits, misses e evictions deste processo aparecem em ``/ocr/health``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Incrementar quando a extração de texto/entidades muda (invalida o cache)
+OCR_RESULT_VERSION = "2"
+
+_lock = threading.Lock()
+_tesseract_version: Optional[str] = None
+_approx_bytes: Optional[int] = None
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+
+def tesseract_version() -> str:
+    """Versão do Tesseract instalado (lida uma vez por processo)"""
+    global _tesseract_version
+    if _tesseract_version is None:
+        try:
+            import pytesseract
+
+            _tesseract_version = str(pytesseract.get_tesseract_version())
+        except Exception:
+            _tesseract_version = "unknown"
+    return _tesseract_version
+
+
+def ocr_cache_key(file_bytes: bytes, *, lang: str, config: str, dpi: Optional[int] = None) -> str:
+    """SHA-256 do documento + versão do motor/idioma/opções"""
+    engine = "|".join(
+        [
+            OCR_RESULT_VERSION,
+            tesseract_version(),
+            lang,
+            config,
+            str(dpi or settings.OCR_DPI),
+            str(settings.OCR_MAX_PAGES),
+        ]
+    )
+    digest = hashlib.sha256(file_bytes)
+    digest.update(b"\0" + engine.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _cache_dir() -> Path:
+    return Path(settings.OCR_CACHE_DIR or os.path.join(tempfile.gettempdir(), "agroadb-ocr"))
+
+
+def _entry_path(key: str) -> Path:
+    return _cache_dir() / key[:2] / f"{key}.json"
+
+
+def get(key: str) -> Optional[Dict[str, Any]]:
+    """Resultado guardado ou None (conta hit/miss)"""
+    if not settings.OCR_CACHE_ENABLED:
+        return None
+    path = _entry_path(key)
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        # LRU: mtime marca o último uso
+        os.utime(path)
+    except FileNotFoundError:
+        _stats["misses"] += 1
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Entrada de cache OCR ilegível ({key[:12]}): {e}")
+        path.unlink(missing_ok=True)
+        _stats["misses"] += 1
+        return None
+    _stats["hits"] += 1
+    return payload
+
+
+def put(key: str, result: Dict[str, Any]) -> None:
+    """Guarda o resultado (texto, páginas, entidades) e aplica o limite de bytes"""
+    global _approx_bytes
+    if not settings.OCR_CACHE_ENABLED:
+        return
+    path = _entry_path(key)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    data = json.dumps(result, ensure_ascii=False, default=str).encode("utf-8")
+    # Escrita atómica: outros processos nunca lêem um JSON parcial
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    _stats["stores"] += 1
+
+    with _lock:
+        if _approx_bytes is None:
+            _approx_bytes = _disk_usage()
+        else:
+            _approx_bytes += len(data)
+        if _approx_bytes > settings.OCR_CACHE_MAX_BYTES:
+            _approx_bytes = _evict(int(settings.OCR_CACHE_MAX_BYTES * 0.9))
+
+
+def _entries() -> list:
+    entries = []
+    for path in _cache_dir().glob("*/*.json"):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    return entries
+
+
+def _disk_usage() -> int:
+    return sum(size for _mtime, size, _path in _entries())
+
+
+def _evict(target_bytes: int) -> int:
+    entries = sorted(_entries(), key=lambda e: e[0])
+    total = sum(size for _mtime, size, _path in entries)
+    for _mtime, size, path in entries:
+        if total <= target_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        _stats["evictions"] += 1
+    return total
+
+
+def get_stats() -> Dict[str, Any]:
+    """Hits/misses/evictions deste processo e ocupação do cache"""
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+        "bytes": _approx_bytes if _approx_bytes is not None else _disk_usage(),
+        "max_bytes": settings.OCR_CACHE_MAX_BYTES,
+        "enabled": settings.OCR_CACHE_ENABLED,
+    }
@@ -3,13 +3,17 @@ Serviço OCR para Documentos
 Processa PDFs e imagens, extrai texto e entidades (CPF, CNPJ, CAR, etc)
 """
 
+import asyncio
 import logging
 import os
-import re
 import tempfile
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from typing import BinaryIO, Dict, List, Optional
+from typing import BinaryIO, Dict, List, Optional, Union
+
+from app.services.ocr import entities as ocr_entities
+from app.services.ocr import executor as ocr_executor
+from app.services.ocr import result_store as ocr_result_store
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +28,7 @@ class OCRResult:
     page_count: int
     processing_time: float
     metadata: Dict
+    pages: List[str] = field(default_factory=list)
 
 
 class OCRService:
@@ -37,21 +42,12 @@ class OCRService:
     - Suporte a múltiplas páginas
     """
 
-    # Padrões regex para entidades
-    PATTERNS = {
-        "cpf": r"\b\d{3}\.?\d{3}\.?\d{3}-?\d{2}\b",
-        "cnpj": r"\b\d{2}\.?\d{3}\.?\d{3}/?0001-?\d{2}\b",
-        "car": r"\b[A-Z]{2}-\d{7}-[A-F0-9]{32}\b",
-        "ccir": r"\bCCIR[:\s]*(\d{3}\.\d{3}\.\d{3}\.?\d{3}-?\d)\b",
-        "nirf": r"\bNIRF[:\s]*(\d{3}\.\d{3}\.\d{3}\.?\d{3}-?\d)\b",
-        "email": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
-        "phone": r"\b(?:\+55\s?)?(?:\(?\d{2}\)?\s?)?\d{4,5}-?\d{4}\b",
-        "date": r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b",
-        "currency": r"R\$\s?\d{1,3}(?:\.\d{3})*(?:,\d{2})?",
-        "hectare": r"\d+(?:,\d+)?\s?(?:ha|hectares?)",
-        "matricula": r"\bMatrícula[:\s]*(\d{4,8})\b",
-        "protocolo": r"\bProtocolo[:\s]*([A-Z0-9-]+)\b",
-    }
+    # Idioma e opções do Tesseract (fazem parte da chave do cache de resultados)
+    OCR_LANG = "por"
+    OCR_CONFIG = "--psm 6 --oem 3"
+
+    # Padrões regex para entidades (combinados numa só regex em ocr/entities.py)
+    PATTERNS = ocr_entities.SERVICE_PATTERNS
 
     @classmethod
     async def extract_text_from_image(cls, image_bytes: bytes) -> str:
@@ -65,20 +61,10 @@ class OCRService:
             Texto extraído
         """
         try:
-            import io
-
-            import pytesseract
-            from PIL import Image
-
-            # Carregar imagem dos bytes
-            image = Image.open(io.BytesIO(image_bytes))
-
-            # Converter para RGB se necessário
-            if image.mode != "RGB":
-                image = image.convert("RGB")
-
-            # Realizar OCR em português
-            text = pytesseract.image_to_string(image, lang="por", config="--psm 6 --oem 3")
+            # Tesseract no pool de processos OCR (não bloqueia o event loop)
+            text = await ocr_executor.ocr_image(
+                image_bytes, lang=cls.OCR_LANG, config=cls.OCR_CONFIG
+            )
 
             logger.info(f"✅ OCR: Extraídos {len(text)} caracteres da imagem")
             return text
@@ -107,25 +93,16 @@ class OCRService:
         start_time = time.time()
 
         try:
-            import io
-
-            import PyPDF2
-
-            # Tentar extração nativa primeiro
-            pdf_file = io.BytesIO(pdf_bytes)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            page_count = len(pdf_reader.pages)
-
-            text_parts = []
-            for page in pdf_reader.pages:
-                text_parts.append(page.extract_text())
-
-            text = "\n\n".join(text_parts)
+            # Tentar extração nativa primeiro (fora do event loop)
+            pages = await asyncio.to_thread(cls._extract_native_pdf_pages, pdf_bytes)
+            text = "\n\n".join(pages)
 
             # Se não tem texto e OCR está habilitado, usar OCR
             if not text.strip() and use_ocr:
                 logger.info("PDF sem texto nativo, usando OCR...")
-                text, page_count = await cls._extract_pdf_with_ocr(pdf_bytes)
+                pages = await cls._extract_pdf_with_ocr(pdf_bytes)
+                text = "\n\n".join(pages)
+            page_count = len(pages)
 
             processing_time = time.time() - start_time
 
@@ -136,6 +113,7 @@ class OCRService:
 
             return {
                 "text": text,
+                "pages": pages,
                 "page_count": page_count,
                 "processing_time": processing_time,
                 "method": "native" if text.strip() else "ocr",
@@ -145,33 +123,32 @@ class OCRService:
             logger.error(f"Erro ao processar PDF: {e}")
             raise
 
-    @classmethod
-    async def _extract_pdf_with_ocr(cls, pdf_bytes: bytes) -> tuple:
-        """Converte PDF em imagens e aplica OCR"""
-        try:
-            import pytesseract
-            from pdf2image import convert_from_bytes
-
-            # Converter PDF para imagens (300 DPI para boa qualidade)
-            images = convert_from_bytes(pdf_bytes, dpi=300)
-            page_count = len(images)
+    @staticmethod
+    def _extract_native_pdf_pages(pdf_bytes: bytes) -> List[str]:
+        """Texto nativo de cada página do PDF (PyPDF2)"""
+        import io
 
-            text_parts = []
-            for i, image in enumerate(images):
-                logger.info(f"OCR página {i+1}/{page_count}...")
+        import PyPDF2
 
-                page_text = pytesseract.image_to_string(image, lang="por", config="--psm 6 --oem 3")
-                text_parts.append(page_text)
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+        return [page.extract_text() for page in pdf_reader.pages]
 
-            full_text = "\n\n".join(text_parts)
-            return full_text, page_count
+    @classmethod
+    async def _extract_pdf_with_ocr(cls, pdf_bytes: bytes) -> List[str]:
+        """OCR das páginas do PDF em paralelo no pool de processos"""
+        try:
+            return await ocr_executor.ocr_pdf_bytes(
+                pdf_bytes, lang=cls.OCR_LANG, config=cls.OCR_CONFIG
+            )
 
         except ImportError:
             logger.error("pdf2image não instalado. Instale: pip install pdf2image")
             raise Exception("pdf2image não disponível")
+        except ocr_executor.OCRJobCancelled:
+            raise
         except Exception as e:
             logger.error(f"Erro no OCR do PDF: {e}")
-            return "", 0
+            return []
 
     @classmethod
     def extract_cpf_cnpj(cls, text: str) -> Dict[str, List[str]]:
@@ -184,35 +161,21 @@ class OCRService:
         Returns:
             Dict com listas de CPFs e CNPJs encontrados
         """
-        cpfs = re.findall(cls.PATTERNS["cpf"], text)
-        cnpjs = re.findall(cls.PATTERNS["cnpj"], text)
-
-        # Limpar e deduplicar
-        cpfs_clean = list(set([cls._clean_document(cpf) for cpf in cpfs]))
-        cnpjs_clean = list(set([cls._clean_document(cnpj) for cnpj in cnpjs]))
+        # Uma passagem pelo texto para CPF e CNPJ
+        found = ocr_entities.DOCUMENT_EXTRACTOR.grouped(text)
 
-        # Validar CPFs/CNPJs básicos
-        cpfs_valid = [cpf for cpf in cpfs_clean if cls._validate_cpf(cpf)]
-        cnpjs_valid = [cnpj for cnpj in cnpjs_clean if cls._validate_cnpj(cnpj)]
+        # Limpar, deduplicar e validar dígitos verificadores (em lote)
+        cpfs_valid = ocr_entities.filter_valid(found.get("cpf", []), "cpf")
+        cnpjs_valid = ocr_entities.filter_valid(found.get("cnpj", []), "cnpj")
 
         logger.info(f"Encontrados: {len(cpfs_valid)} CPFs, {len(cnpjs_valid)} CNPJs")
 
         return {"cpf": cpfs_valid, "cnpj": cnpjs_valid}
 
     @classmethod
-    def _extract_all_entities(cls, text: str) -> Dict[str, List[str]]:
-        """Extrai todas as entidades conhecidas do texto"""
-        entities = {}
-
-        for entity_type, pattern in cls.PATTERNS.items():
-            matches = re.findall(pattern, text, re.IGNORECASE)
-
-            if matches:
-                # Limpar e deduplicar
-                cleaned = list(set([cls._clean_value(m) for m in matches]))
-                entities[entity_type] = cleaned
-
-        return entities
+    def _extract_all_entities(cls, text: Union[str, List[str]]) -> Dict[str, List[str]]:
+        """Extrai todas as entidades conhecidas do texto (ou das páginas), numa só passagem"""
+        return ocr_entities.SERVICE_EXTRACTOR.grouped(text, clean=cls._clean_value)
 
     @classmethod
     async def process_document(cls, file: BinaryIO, filename: str) -> OCRResult:
@@ -236,24 +199,50 @@ class OCRService:
         ext = os.path.splitext(filename)[1].lower()
 
         try:
-            if ext == ".pdf":
-                # Processar PDF
-                result = await cls.extract_text_from_pdf(file_bytes, use_ocr=True)
-                text = result["text"]
-                page_count = result["page_count"]
-                method = result["method"]
-
-            elif ext in [".jpg", ".jpeg", ".png", ".tiff", ".bmp"]:
-                # Processar imagem
-                text = await cls.extract_text_from_image(file_bytes)
-                page_count = 1
-                method = "ocr"
-
-            else:
+            if ext not in [".pdf", ".jpg", ".jpeg", ".png", ".tiff", ".bmp"]:
                 raise ValueError(f"Formato não suportado: {ext}")
 
-            # Extrair entidades
-            entities = cls._extract_all_entities(text)
+            # Mesmo documento já processado (noutra investigação): sem rasterizar de novo
+            cache_key = await asyncio.to_thread(
+                ocr_result_store.ocr_cache_key,
+                file_bytes,
+                lang=cls.OCR_LANG,
+                config=cls.OCR_CONFIG,
+            )
+            cached = await asyncio.to_thread(ocr_result_store.get, cache_key)
+
+            if cached is not None:
+                text = cached["text"]
+                pages = cached["pages"]
+                entities = cached["entities"]
+                method = cached["method"]
+
+            else:
+                if ext == ".pdf":
+                    # Processar PDF
+                    result = await cls.extract_text_from_pdf(file_bytes, use_ocr=True)
+                    text = result["text"]
+                    pages = result["pages"]
+                    method = result["method"]
+
+                else:
+                    # Processar imagem
+                    text = await cls.extract_text_from_image(file_bytes)
+                    pages = [text]
+                    method = "ocr"
+
+                # Extrair entidades
+                entities = cls._extract_all_entities(pages)
+
+                # Falhas de OCR (texto vazio) não ficam em cache
+                if text.strip():
+                    await asyncio.to_thread(
+                        ocr_result_store.put,
+                        cache_key,
+                        {"text": text, "pages": pages, "entities": entities, "method": method},
+                    )
+
+            page_count = len(pages)
 
             # Calcular confiança
             confidence = cls._calculate_confidence(text, entities)
@@ -263,6 +252,7 @@ class OCRService:
             logger.info(
                 f"✅ Documento processado: {filename}, "
                 f"{len(text)} chars, {len(entities)} tipos de entidades"
+                f"{' (cache)' if cached is not None else ''}"
             )
 
             return OCRResult(
@@ -275,8 +265,10 @@ class OCRService:
                     "filename": filename,
                     "file_size": len(file_bytes),
                     "method": method,
+                    "cache": "hit" if cached is not None else "miss",
                     "timestamp": datetime.utcnow().isoformat(),
                 },
+                pages=pages,
             )
 
         except Exception as e:
@@ -286,7 +278,7 @@ class OCRService:
     @staticmethod
     def _clean_document(doc: str) -> str:
         """Remove formatação de CPF/CNPJ"""
-        return re.sub(r"[^\d]", "", doc)
+        return ocr_entities.only_digits(doc)
 
     @staticmethod
     def _clean_value(value: str) -> str:
@@ -295,31 +287,13 @@ class OCRService:
 
     @staticmethod
     def _validate_cpf(cpf: str) -> bool:
-        """Validação básica de CPF (apenas formato e dígitos)"""
-        cpf_clean = re.sub(r"[^\d]", "", cpf)
-
-        if len(cpf_clean) != 11:
-            return False
-
-        # Rejeitar CPFs com todos dígitos iguais
-        if len(set(cpf_clean)) == 1:
-            return False
-
-        return True
+        """Validação de CPF (formato e dígitos verificadores)"""
+        return bool(ocr_entities.valid_cpfs([ocr_entities.only_digits(cpf)])[0])
 
     @staticmethod
     def _validate_cnpj(cnpj: str) -> bool:
-        """Validação básica de CNPJ (apenas formato e dígitos)"""
-        cnpj_clean = re.sub(r"[^\d]", "", cnpj)
-
-        if len(cnpj_clean) != 14:
-            return False
-
-        # Rejeitar CNPJs com todos dígitos iguais
-        if len(set(cnpj_clean)) == 1:
-            return False
-
-        return True
+        """Validação de CNPJ (formato e dígitos verificadores)"""
+        return bool(ocr_entities.valid_cnpjs([ocr_entities.only_digits(cnpj)])[0])
 
     @staticmethod
     def _calculate_confidence(text: str, entities: Dict) -> float:
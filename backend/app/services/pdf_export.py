@@ -7,7 +7,7 @@ import io
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Type
+from typing import Any, Dict, List, Optional, Tuple, Type
 
 from reportlab.graphics.charts.barcharts import VerticalBarChart
 from reportlab.graphics.charts.piecharts import Pie
@@ -729,3 +729,76 @@ class PDFExportService:
             return dt.strftime("%d/%m/%Y %H:%M")
         except Exception:
             return date_str
+
+
+async def investigation_pdf_version(db: Any, investigation_id: int) -> Optional[Tuple]:
+    """
+    Stamp de versão dos dados do relatório, sem carregar as relações
+
+    Junta o stamp da investigação (updated_at, contagens e últimas alterações de
+    imóveis e empresas) ao das consultas legais. None se a investigação não existir.
+    """
+    from app.repositories.investigation import InvestigationRepository
+    from app.repositories.legal_query import LegalQueryRepository
+
+    version = await InvestigationRepository(db).get_data_version(investigation_id)
+    if version is None:
+        return None
+    return version + await LegalQueryRepository(db).get_data_version(investigation_id)
+
+
+def investigation_pdf_payloads(
+    investigation: Any, legal_queries: List[Any]
+) -> Tuple[dict, list, list, list]:
+    """
+    Dados do relatório a partir da investigação (com properties/companies carregadas)
+
+    Returns:
+        (investigation, properties, companies, legal_queries) em dicionários simples,
+        prontos para generate_investigation_pdf ou para o pool de renderização
+    """
+    properties = investigation.properties or []
+    companies = investigation.companies or []
+    investigation_dict = {
+        "id": investigation.id,
+        "target_name": investigation.target_name,
+        "target_cpf_cnpj": investigation.target_cpf_cnpj,
+        "target_description": investigation.target_description,
+        "status": investigation.status,
+        "created_at": investigation.created_at.isoformat() if investigation.created_at else None,
+        "updated_at": investigation.updated_at.isoformat() if investigation.updated_at else None,
+        "properties_found": len(properties),
+        "companies_found": len(companies),
+        "lease_contracts_found": investigation.lease_contracts_found or 0,
+    }
+    properties_list = [
+        {
+            "name": p.property_name or "N/A",
+            "area_ha": p.area_hectares or 0,
+            "location": f"{p.city or ''}, {p.state or ''}".strip(", "),
+            "source": p.data_source,
+            "registration_code": p.car_number or p.ccir_number or p.matricula or "N/A",
+        }
+        for p in properties
+    ]
+    companies_list = [
+        {
+            "name": c.trade_name or c.corporate_name or "N/A",
+            "cnpj": c.cnpj,
+            "registration_status": c.status or "N/A",
+            "activity": c.main_activity or "N/A",
+            "address": c.address or "N/A",
+        }
+        for c in companies
+    ]
+    legal_queries_list = [
+        {
+            "id": q.id,
+            "provider": q.provider,
+            "query_type": q.query_type,
+            "result_count": q.result_count,
+            "created_at": q.created_at.isoformat() if q.created_at else None,
+        }
+        for q in legal_queries
+    ]
+    return investigation_dict, properties_list, companies_list, legal_queries_list
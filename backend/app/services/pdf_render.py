@@ -0,0 +1,237 @@
+"""
+Renderização de relatórios PDF fora do event loop, com cache por conteúdo.
+
+O ReportLab (incluindo os gráficos) corre num ``ProcessPoolExecutor`` com
+PDF_RENDER_WORKERS processos (0 = thread do executor por omissão). O resultado é
+guardado em PDF_CACHE_DIR com o nome ``<sha256>.pdf``, em que o hash cobre o ID
+da investigação, o stamp de versão dos dados (``updated_at`` e contagens da
+investigação, imóveis, empresas e consultas legais), a marca d'água e
+PDF_TEMPLATE_VERSION — num hit a investigação nem chega a ser carregada.
+Downloads repetidos, o pacote de evidência e o PDF de convidado reutilizam os
+mesmos bytes; pedidos simultâneos para a mesma chave partilham uma única
+renderização.
+
+O rodapé "Gerado em" reflecte a primeira renderização da versão em cache.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Incrementar sempre que o layout do relatório muda (invalida o cache em disco)
+PDF_TEMPLATE_VERSION = "1"
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Renderizações em curso por event loop (single-flight)
+_loop_inflight: (
+    "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]"
+) = weakref.WeakKeyDictionary()
+
+# (investigation, properties, companies, legal_queries) de investigation_pdf_payloads
+PdfPayloads = Tuple[
+    Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]
+]
+
+_stats = {"hits": 0, "misses": 0, "renders": 0, "shared": 0}
+
+
+def pdf_cache_key(
+    investigation_id: int,
+    data_version: Sequence[Any],
+    watermark_lines: Optional[List[str]] = None,
+) -> str:
+    """
+    SHA-256 da investigação, do stamp de versão dos dados e da versão do template
+
+    ``data_version`` é o stamp barato de investigation_pdf_version: a chave é
+    calculada sem carregar as relações da investigação.
+    """
+    canonical = json.dumps(
+        {
+            "template": PDF_TEMPLATE_VERSION,
+            "investigation_id": investigation_id,
+            "data_version": list(data_version),
+            "watermark": watermark_lines or [],
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _render_pdf_bytes(
+    investigation: Dict[str, Any],
+    properties: List[Dict[str, Any]],
+    companies: List[Dict[str, Any]],
+    legal_queries: List[Dict[str, Any]],
+    watermark_lines: Optional[List[str]],
+) -> bytes:
+    # Corre no processo do pool: importa o ReportLab lá e devolve só bytes
+    from app.services.pdf_export import PDFExportService
+
+    buffer = PDFExportService().generate_investigation_pdf(
+        investigation, properties, companies, legal_queries, watermark_lines=watermark_lines
+    )
+    return buffer.getvalue()
+
+
+def _get_executor() -> Optional[Executor]:
+    global _executor
+    if settings.PDF_RENDER_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            # spawn: não herdar threads nem ligações do processo da API
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PDF_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _cache_dir() -> Path:
+    return Path(settings.PDF_CACHE_DIR or os.path.join(tempfile.gettempdir(), "agroadb-pdf"))
+
+
+def _read_cached(key: str) -> Optional[bytes]:
+    path = _cache_dir() / f"{key}.pdf"
+    try:
+        if time.time() - path.stat().st_mtime > settings.PDF_CACHE_TTL_SECONDS:
+            path.unlink(missing_ok=True)
+            return None
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def _write_cached(key: str, data: bytes) -> None:
+    directory = _cache_dir()
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    # Escrita atómica: outros processos só vêem o ficheiro completo
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, directory / f"{key}.pdf")
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    _prune_expired(directory)
+
+
+def _prune_expired(directory: Path) -> None:
+    cutoff = time.time() - settings.PDF_CACHE_TTL_SECONDS
+    for path in directory.glob("*.pdf"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+        except FileNotFoundError:
+            continue
+
+
+async def render_investigation_pdf(
+    investigation_id: int,
+    data_version: Sequence[Any],
+    load_payloads: Callable[[], Awaitable[PdfPayloads]],
+    *,
+    watermark_lines: Optional[List[str]] = None,
+) -> bytes:
+    """
+    Bytes do relatório PDF, do cache ou renderizados no pool de processos
+
+    Args:
+        investigation_id: ID da investigação
+        data_version: Stamp de versão dos dados (ver investigation_pdf_version)
+        load_payloads: Carrega os dados do relatório (ver investigation_pdf_payloads);
+            só é chamado quando o PDF não está em cache
+        watermark_lines: Marca d'água opcional (PDF de convidado)
+
+    Returns:
+        Conteúdo do PDF
+    """
+    key = pdf_cache_key(investigation_id, data_version, watermark_lines)
+
+    loop = asyncio.get_running_loop()
+    inflight = _loop_inflight.setdefault(loop, {})
+    while True:
+        pending = inflight.get(key)
+        if pending is None:
+            break
+        _stats["shared"] += 1
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise  # este pedido foi cancelado
+            # Pedido que renderizava cancelado: um dos que esperavam assume a renderização
+
+    future: asyncio.Future = loop.create_future()
+    inflight[key] = future
+    try:
+        data = await asyncio.to_thread(_read_cached, key)
+        if data is not None:
+            _stats["hits"] += 1
+        else:
+            _stats["misses"] += 1
+            investigation, properties, companies, legal_queries = await load_payloads()
+            data = await loop.run_in_executor(
+                _get_executor(),
+                _render_pdf_bytes,
+                investigation,
+                properties,
+                companies,
+                legal_queries,
+                watermark_lines,
+            )
+            _stats["renders"] += 1
+            try:
+                await asyncio.to_thread(_write_cached, key, data)
+            except OSError as e:
+                logger.warning(f"⚠️ Não foi possível gravar o PDF em cache: {e}")
+        future.set_result(data)
+        return data
+    except Exception as e:
+        future.set_exception(e)
+        # Evita "exception was never retrieved" quando ninguém partilhava o pedido
+        future.exception()
+        raise
+    except BaseException:
+        # Cancelamento do pedido, não falha da renderização: não passa aos outros
+        future.cancel()
+        raise
+    finally:
+        inflight.pop(key, None)
+
+
+def get_pdf_render_stats() -> Dict[str, int]:
+    """Hits/misses do cache e renderizações efectuadas neste processo"""
+    return dict(_stats)
+
+
+def close_pdf_render_pool() -> None:
+    """Termina os processos de renderização (shutdown da API)"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -4,9 +4,8 @@ Portal gov.br - API de Serviços
 
 from typing import Any, Dict, Optional
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import get_http_client
 
 
 class PortalServicosService:
@@ -28,11 +27,11 @@ class PortalServicosService:
         headers: Dict[str, str] = {}
         if token:
             headers["Authorization"] = token
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, headers=headers)
-            if response.status_code >= 400:
-                raise ValueError(f"Portal Serviços erro {response.status_code}: {response.text}")
-            return response.json()
+        client = get_http_client(url)
+        response = await client.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code >= 400:
+            raise ValueError(f"Portal Serviços erro {response.status_code}: {response.text}")
+        return response.json()
 
     async def consultar_orgao(self, cod_siorg: str) -> Dict[str, Any]:
         return await self._get_json(f"/orgao/{cod_siorg}")
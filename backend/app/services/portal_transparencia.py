@@ -8,11 +8,10 @@ Auth: API Key gratuita (registrar no portal)
 import logging
 from typing import Any, Dict, Optional
 
-import httpx
-
 from app.core.cache import cache_service
 from app.core.circuit_breaker import circuit_protected
 from app.core.config import settings
+from app.core.http_client import get_http_client
 from app.core.retry import retry_with_backoff
 
 logger = logging.getLogger(__name__)
@@ -35,14 +34,14 @@ class PortalTransparenciaService:
 
     async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         url = f"{self.BASE_URL}{path}"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            resp = await client.get(url, headers=self._headers(), params=params)
-            if resp.status_code >= 400:
-                raise ValueError(f"Portal Transparência erro {resp.status_code}: {resp.text[:300]}")
-            data = resp.json()
-            if isinstance(data, list):
-                return {"items": data, "total": len(data)}
-            return data
+        client = get_http_client(url)
+        resp = await client.get(url, headers=self._headers(), params=params, timeout=self.timeout)
+        if resp.status_code >= 400:
+            raise ValueError(f"Portal Transparência erro {resp.status_code}: {resp.text[:300]}")
+        data = resp.json()
+        if isinstance(data, list):
+            return {"items": data, "total": len(data)}
+        return data
 
     async def _cached_get(
         self, method: str, doc: str, path: str, params: Optional[Dict[str, Any]] = None
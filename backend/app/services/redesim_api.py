@@ -8,7 +8,7 @@ Sem autenticação. Gratuito (limitado).
 
 from typing import Any, Dict
 
-import httpx
+from app.core.http_client import get_http_client
 
 
 class RedesimService:
@@ -26,23 +26,23 @@ class RedesimService:
         """Consulta CNPJ via ReceitaWS (3 consultas/minuto grátis)"""
         cleaned = cnpj.replace(".", "").replace("/", "").replace("-", "")
         url = f"{self.RECEITAWS_URL}/{cleaned}"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            resp = await client.get(url)
-            if resp.status_code == 429:
-                return {"error": "Rate limit atingido. Aguarde 1 minuto.", "status": 429}
-            if resp.status_code >= 400:
-                raise ValueError(f"ReceitaWS erro {resp.status_code}: {resp.text[:300]}")
-            return resp.json()
+        client = get_http_client(url)
+        resp = await client.get(url, timeout=self.timeout)
+        if resp.status_code == 429:
+            return {"error": "Rate limit atingido. Aguarde 1 minuto.", "status": 429}
+        if resp.status_code >= 400:
+            raise ValueError(f"ReceitaWS erro {resp.status_code}: {resp.text[:300]}")
+        return resp.json()
 
     async def consultar_cnpj_minhareceita(self, cnpj: str) -> Dict[str, Any]:
         """Consulta CNPJ via Minha Receita (open source)"""
         cleaned = cnpj.replace(".", "").replace("/", "").replace("-", "")
         url = f"{self.MINHA_RECEITA_URL}/{cleaned}"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            resp = await client.get(url)
-            if resp.status_code >= 400:
-                raise ValueError(f"MinhaReceita erro {resp.status_code}: {resp.text[:300]}")
-            return resp.json()
+        client = get_http_client(url)
+        resp = await client.get(url, timeout=self.timeout)
+        if resp.status_code >= 400:
+            raise ValueError(f"MinhaReceita erro {resp.status_code}: {resp.text[:300]}")
+        return resp.json()
 
     async def consultar_cnpj(self, cnpj: str) -> Dict[str, Any]:
         """Tenta ReceitaWS, fallback para MinhaReceita"""
@@ -4,9 +4,8 @@ Portal gov.br - API de Serviços Estaduais
 
 from typing import Any, Dict, Optional
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import get_http_client
 
 
 class ServicosEstaduaisService:
@@ -34,11 +33,13 @@ class ServicosEstaduaisService:
         headers: Dict[str, str] = {}
         if token:
             headers["Authorization"] = token
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.request(method.upper(), url, headers=headers, json=payload)
-            if response.status_code >= 400:
-                raise ValueError(f"Serviços Estaduais erro {response.status_code}: {response.text}")
-            return response.json()
+        client = get_http_client(url)
+        response = await client.request(
+            method.upper(), url, headers=headers, json=payload, timeout=self.timeout
+        )
+        if response.status_code >= 400:
+            raise ValueError(f"Serviços Estaduais erro {response.status_code}: {response.text}")
+        return response.json()
 
     async def autenticar(self, email: str, senha: str) -> Dict[str, Any]:
         return await self._request(
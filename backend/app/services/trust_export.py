@@ -13,14 +13,15 @@ import json
 import zipfile
 from datetime import datetime, timezone
 from io import BytesIO
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.audit import AuditLog, AuditLogger
 from app.core.config import settings
 from app.repositories.legal_query import LegalQueryRepository
-from app.services.pdf_export import PDFExportService
+from app.services.pdf_export import investigation_pdf_payloads, investigation_pdf_version
+from app.services.pdf_render import render_investigation_pdf
 
 
 def _sha256_bytes(data: bytes) -> str:
@@ -90,56 +91,6 @@ privacidade; os fingerprints das consultas legais permitem correlacionar com os
 """
 
 
-def _build_pdf_payloads(
-    investigation: Any, legal_queries: List[Any]
-) -> Tuple[dict, list, list, list]:
-    properties = investigation.properties or []
-    companies = investigation.companies or []
-    investigation_dict = {
-        "id": investigation.id,
-        "target_name": investigation.target_name,
-        "target_cpf_cnpj": investigation.target_cpf_cnpj,
-        "target_description": investigation.target_description,
-        "status": investigation.status,
-        "created_at": investigation.created_at.isoformat() if investigation.created_at else None,
-        "updated_at": investigation.updated_at.isoformat() if investigation.updated_at else None,
-        "properties_found": len(properties),
-        "companies_found": len(companies),
-        "lease_contracts_found": investigation.lease_contracts_found or 0,
-    }
-    properties_list = [
-        {
-            "name": p.property_name or "N/A",
-            "area_ha": p.area_hectares or 0,
-            "location": f"{p.city or ''}, {p.state or ''}".strip(", "),
-            "source": p.data_source,
-            "registration_code": p.car_number or p.ccir_number or p.matricula or "N/A",
-        }
-        for p in properties
-    ]
-    companies_list = [
-        {
-            "name": c.trade_name or c.corporate_name or "N/A",
-            "cnpj": c.cnpj,
-            "registration_status": c.status or "N/A",
-            "activity": c.main_activity or "N/A",
-            "address": c.address or "N/A",
-        }
-        for c in companies
-    ]
-    legal_queries_list = [
-        {
-            "id": q.id,
-            "provider": q.provider,
-            "query_type": q.query_type,
-            "result_count": q.result_count,
-            "created_at": q.created_at.isoformat() if q.created_at else None,
-        }
-        for q in legal_queries
-    ]
-    return investigation_dict, properties_list, companies_list, legal_queries_list
-
-
 async def build_trust_bundle_zip(
     db: AsyncSession,
     *,
@@ -155,10 +106,16 @@ async def build_trust_bundle_zip(
     legal_query_repo = LegalQueryRepository(db)
     legal_queries = await legal_query_repo.list_by_investigation(investigation_id)
 
-    inv_dict, props, comps, lq_pdf = _build_pdf_payloads(investigation, legal_queries)
-    pdf_service = PDFExportService()
-    pdf_buffer = pdf_service.generate_investigation_pdf(inv_dict, props, comps, lq_pdf)
-    pdf_bytes = pdf_buffer.getvalue()
+    payloads = investigation_pdf_payloads(investigation, legal_queries)
+    inv_dict = payloads[0]
+
+    async def load_payloads():
+        return payloads
+
+    # Mesmos bytes que a exportação PDF quando os dados não mudaram (mesma chave de cache)
+    pdf_bytes = await render_investigation_pdf(
+        investigation_id, await investigation_pdf_version(db, investigation_id), load_payloads
+    )
     pdf_sha256 = _sha256_bytes(pdf_bytes)
 
     cap = max(1, int(settings.TRUST_BUNDLE_AUDIT_LOG_CAP))
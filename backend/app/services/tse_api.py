@@ -7,9 +7,8 @@ Sem autenticação. Gratuito.
 
 from typing import Any, Dict, List, Optional
 
-import httpx
-
 from app.core.circuit_breaker import circuit_protected
+from app.core.http_client import get_http_client
 from app.core.retry import retry_with_backoff
 
 
@@ -23,11 +22,11 @@ class TSEService:
 
     async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         url = f"{self.BASE_URL}{path}"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            resp = await client.get(url, params=params)
-            if resp.status_code >= 400:
-                raise ValueError(f"TSE erro {resp.status_code}: {resp.text[:300]}")
-            return resp.json()
+        client = get_http_client(url)
+        resp = await client.get(url, params=params, timeout=self.timeout)
+        if resp.status_code >= 400:
+            raise ValueError(f"TSE erro {resp.status_code}: {resp.text[:300]}")
+        return resp.json()
 
     @retry_with_backoff(max_retries=2, base_delay=0.5)
     @circuit_protected(service_name="tse", failure_threshold=5, recovery_timeout=60.0)
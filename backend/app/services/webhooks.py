@@ -1,20 +1,28 @@
 """
 Sistema de Webhooks para Integrações
 Permite que sistemas externos recebam notificações de eventos
+
+Os eventos são gravados numa outbox (webhook_outbox) no mesmo commit e entregues
+em background pelo dispatcher: entregas concorrentes sobre o pool HTTP partilhado,
+limite de concorrência por endpoint, retry exponencial e um commit por lote.
 """
 
+import asyncio
 import hashlib
 import hmac
 import json
 import logging
-from datetime import datetime
+import math
+from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
-from sqlalchemy import JSON, Boolean, Column, DateTime, Integer, String, Text
+from sqlalchemy import JSON, Boolean, Column, DateTime, Index, Integer, String, Text, func, select
 
+from app.core.config import settings
 from app.core.database import Base
+from app.core.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -101,6 +109,38 @@ class WebhookDelivery(Base):
         }
 
 
+class WebhookOutbox(Base):
+    """
+    Outbox de entregas de webhook
+
+    Uma linha por (evento, webhook); o dispatcher entrega e reagenda as falhas
+    """
+
+    __tablename__ = "webhook_outbox"
+    __table_args__ = (Index("ix_webhook_outbox_status_next", "status", "next_attempt_at"),)
+
+    STATUS_PENDING = "pending"
+    STATUS_DELIVERED = "delivered"
+    STATUS_FAILED = "failed"
+
+    id = Column(Integer, primary_key=True, index=True)
+    webhook_id = Column(Integer, nullable=False, index=True)
+    event = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(20), default=STATUS_PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# Resultado de um POST: (status_code, response_body, error_message)
+DeliveryResult = Tuple[Optional[int], Optional[str], Optional[str]]
+
+DISPATCH_SCHEDULED_KEY = "webhooks:dispatch:scheduled"
+RETRY_SCHEDULED_KEY = "webhooks:dispatch:retry"
+
+
 class WebhookService:
     """
     Serviço de Webhooks
@@ -108,8 +148,7 @@ class WebhookService:
     Gerencia envio de webhooks para integrações externas
     """
 
-    MAX_FAILURES = 5  # Desabilita webhook após 5 falhas consecutivas
-    TIMEOUT = 10  # Timeout de 10 segundos
+    TIMEOUT = 10  # Timeout de 10 segundos (total do POST)
 
     @staticmethod
     def generate_signature(payload: dict, secret: str) -> str:
@@ -127,12 +166,99 @@ class WebhookService:
         signature = hmac.new(secret.encode("utf-8"), payload_bytes, hashlib.sha256).hexdigest()
         return f"sha256={signature}"
 
+    @staticmethod
+    def _build_payload(event: WebhookEvent, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "event": event.value,
+            "timestamp": datetime.utcnow().isoformat(),
+            "data": payload,
+        }
+
+    @staticmethod
+    async def _post(
+        webhook: Webhook, event: str, webhook_payload: Dict[str, Any]
+    ) -> DeliveryResult:
+        """
+        POST do payload assinado pelo cliente HTTP partilhado do host (sem I/O de DB)
+
+        O corpo enviado é exactamente o JSON assinado em X-Webhook-Signature.
+        """
+        body = json.dumps(webhook_payload, sort_keys=True).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": "AgroADB-Webhook/1.0",
+            "X-Webhook-Signature": WebhookService.generate_signature(
+                webhook_payload, webhook.secret
+            ),
+            "X-Webhook-Event": event,
+            "X-Webhook-ID": str(webhook.id),
+        }
+        try:
+            client = get_http_client(webhook.url)
+            # O timeout do httpx é por fase; wait_for limita o POST inteiro (ver lease_seconds)
+            response = await asyncio.wait_for(
+                client.post(
+                    webhook.url, content=body, headers=headers, timeout=WebhookService.TIMEOUT
+                ),
+                timeout=WebhookService.TIMEOUT,
+            )
+        except (httpx.TimeoutException, asyncio.TimeoutError):
+            return None, None, f"Timeout: Servidor não respondeu em {WebhookService.TIMEOUT}s"
+        except Exception as e:
+            return None, None, str(e)[:500]
+
+        if 200 <= response.status_code < 300:
+            return response.status_code, response.text[:1000], None
+        return (
+            response.status_code,
+            response.text[:1000],
+            f"HTTP {response.status_code}: {response.text[:200]}",
+        )
+
+    @staticmethod
+    def _record_result(
+        webhook: Webhook, event: str, webhook_payload: Dict[str, Any], result: DeliveryResult
+    ) -> WebhookDelivery:
+        """Cria o WebhookDelivery e actualiza o contador de falhas do webhook"""
+        status_code, response_body, error = result
+        delivery = WebhookDelivery(
+            webhook_id=webhook.id,
+            event=event,
+            payload=webhook_payload,
+            status_code=status_code,
+            response_body=response_body,
+            error_message=error,
+            success=error is None,
+        )
+
+        if delivery.success:
+            # Resetar contador de falhas
+            webhook.failure_count = 0
+            webhook.last_triggered_at = datetime.utcnow()
+            logger.info(f"✅ Webhook {webhook.id} entregue: {event} (status: {status_code})")
+            return delivery
+
+        # Incrementar contador de falhas
+        webhook.failure_count = (webhook.failure_count or 0) + 1
+        logger.warning(
+            f"⚠️ Webhook {webhook.id} falhou: {event} " f"({error}, falhas: {webhook.failure_count})"
+        )
+
+        # Desabilitar após tantas falhas consecutivas quantas as tentativas de uma entrega:
+        # um evento esgota os retries da outbox antes de o webhook ser desabilitado
+        if webhook.failure_count >= settings.WEBHOOK_MAX_ATTEMPTS:
+            webhook.is_active = False
+            logger.error(
+                f"🚫 Webhook {webhook.id} desabilitado após {webhook.failure_count} falhas"
+            )
+        return delivery
+
     @staticmethod
     async def trigger_webhook(
         db, webhook: Webhook, event: WebhookEvent, payload: Dict[str, Any]
     ) -> bool:
         """
-        Dispara um webhook
+        Dispara um webhook de imediato (sem outbox; ex.: teste de configuração)
 
         Args:
             db: Sessão do banco
@@ -151,79 +277,9 @@ class WebhookService:
         if event.value not in webhook.events:
             return False
 
-        # Preparar payload
-        webhook_payload = {
-            "event": event.value,
-            "timestamp": datetime.utcnow().isoformat(),
-            "data": payload,
-        }
-
-        # Gerar assinatura
-        signature = WebhookService.generate_signature(webhook_payload, webhook.secret)
-
-        # Headers
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": "AgroADB-Webhook/1.0",
-            "X-Webhook-Signature": signature,
-            "X-Webhook-Event": event.value,
-            "X-Webhook-ID": str(webhook.id),
-        }
-
-        # Criar registro de entrega
-        delivery = WebhookDelivery(
-            webhook_id=webhook.id, event=event.value, payload=webhook_payload, success=False
-        )
-
-        try:
-            # Enviar webhook
-            async with httpx.AsyncClient(timeout=WebhookService.TIMEOUT) as client:
-                response = await client.post(webhook.url, json=webhook_payload, headers=headers)
-
-            # Registrar resposta
-            delivery.status_code = response.status_code
-            delivery.response_body = response.text[:1000]  # Primeiros 1000 chars
-            delivery.success = 200 <= response.status_code < 300
-
-            if delivery.success:
-                # Resetar contador de falhas
-                webhook.failure_count = 0
-                webhook.last_triggered_at = datetime.utcnow()
-
-                logger.info(
-                    f"✅ Webhook {webhook.id} entregue: {event.value} "
-                    f"(status: {response.status_code})"
-                )
-            else:
-                # Incrementar contador de falhas
-                webhook.failure_count += 1
-                delivery.error_message = f"HTTP {response.status_code}: {response.text[:200]}"
-
-                logger.warning(
-                    f"⚠️ Webhook {webhook.id} falhou: {event.value} "
-                    f"(status: {response.status_code}, falhas: {webhook.failure_count})"
-                )
-
-                # Desabilitar se exceder máximo de falhas
-                if webhook.failure_count >= WebhookService.MAX_FAILURES:
-                    webhook.is_active = False
-                    logger.error(
-                        f"🚫 Webhook {webhook.id} desabilitado após {webhook.failure_count} falhas"
-                    )
-
-        except httpx.TimeoutException:
-            delivery.error_message = "Timeout: Servidor não respondeu em 10s"
-            delivery.success = False
-            webhook.failure_count += 1
-
-            logger.error(f"⏰ Webhook {webhook.id} timeout: {event.value}")
-
-        except Exception as e:
-            delivery.error_message = str(e)[:500]
-            delivery.success = False
-            webhook.failure_count += 1
-
-            logger.error(f"❌ Erro ao enviar webhook {webhook.id}: {e}")
+        webhook_payload = WebhookService._build_payload(event, payload)
+        result = await WebhookService._post(webhook, event.value, webhook_payload)
+        delivery = WebhookService._record_result(webhook, event.value, webhook_payload, result)
 
         # Salvar registro de entrega
         db.add(delivery)
@@ -232,26 +288,154 @@ class WebhookService:
         return delivery.success
 
     @staticmethod
-    async def trigger_event(db, user_id: int, event: WebhookEvent, payload: Dict[str, Any]):
+    async def trigger_event(db, user_id: int, event: WebhookEvent, payload: Dict[str, Any]) -> int:
         """
-        Dispara evento para todos os webhooks do usuário
+        Grava o evento na outbox para todos os webhooks do usuário inscritos nele
+
+        A entrega é feita em background (dispatch_webhook_outbox); o pedido que
+        origina o evento não espera pelos receptores.
 
         Args:
             db: Sessão do banco
             user_id: ID do usuário
             event: Tipo de evento
             payload: Dados do evento
-        """
-        from sqlalchemy import select
 
+        Returns:
+            Número de entregas enfileiradas
+        """
         # Buscar webhooks ativos do usuário
         query = select(Webhook).where(Webhook.user_id == user_id, Webhook.is_active == True)
         result = await db.execute(query)
-        webhooks = result.scalars().all()
+        webhooks = [w for w in result.scalars().all() if event.value in (w.events or [])]
+        if not webhooks:
+            return 0
+
+        webhook_payload = WebhookService._build_payload(event, payload)
+        db.add_all(
+            WebhookOutbox(webhook_id=webhook.id, event=event.value, payload=webhook_payload)
+            for webhook in webhooks
+        )
+        await db.commit()
+
+        await schedule_webhook_dispatch()
+        return len(webhooks)
 
-        # Disparar cada webhook
-        for webhook in webhooks:
-            await WebhookService.trigger_webhook(db, webhook, event, payload)
+    @staticmethod
+    def retry_delay(attempts: int) -> float:
+        """Atraso até à próxima tentativa após ``attempts`` falhas (exponencial, limitado)"""
+        delay = settings.WEBHOOK_RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1))
+        return min(delay, settings.WEBHOOK_RETRY_MAX_SECONDS)
+
+    @staticmethod
+    def lease_seconds(rows: int) -> float:
+        """
+        Reserva de um lote de ``rows`` linhas
+
+        Enquanto houver entregas por fazer estão sempre pelo menos
+        min(WEBHOOK_ENDPOINT_CONCURRENCY, WEBHOOK_DISPATCH_CONCURRENCY) em curso, e
+        cada POST dura no máximo TIMEOUT: o lote termina em ceil(rows / min) rondas.
+        WEBHOOK_DISPATCH_LEASE_SECONDS é a margem para os commits.
+        """
+        parallel = max(
+            1, min(settings.WEBHOOK_ENDPOINT_CONCURRENCY, settings.WEBHOOK_DISPATCH_CONCURRENCY)
+        )
+        rounds = math.ceil(rows / parallel)
+        return rounds * WebhookService.TIMEOUT + settings.WEBHOOK_DISPATCH_LEASE_SECONDS
+
+    @staticmethod
+    async def dispatch_outbox(db, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Entrega um lote de linhas pendentes da outbox
+
+        As linhas são reclamadas (FOR UPDATE SKIP LOCKED no PostgreSQL) e
+        reservadas pelo pior caso do lote (lease_seconds); as entregas correm em
+        paralelo (WEBHOOK_DISPATCH_CONCURRENCY no total, WEBHOOK_ENDPOINT_CONCURRENCY
+        por URL) e os resultados são gravados num único commit.
+
+        Returns:
+            Contagens claimed / delivered / retrying / failed
+        """
+        batch_size = batch_size or settings.WEBHOOK_DISPATCH_BATCH_SIZE
+        now = datetime.utcnow()
+        query = (
+            select(WebhookOutbox)
+            .where(
+                WebhookOutbox.status == WebhookOutbox.STATUS_PENDING,
+                WebhookOutbox.next_attempt_at <= now,
+            )
+            .order_by(WebhookOutbox.next_attempt_at, WebhookOutbox.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = list((await db.execute(query)).scalars().all())
+        stats = {"claimed": len(rows), "delivered": 0, "retrying": 0, "failed": 0}
+        if not rows:
+            return stats
+
+        lease = now + timedelta(seconds=WebhookService.lease_seconds(len(rows)))
+        for row in rows:
+            row.next_attempt_at = lease
+        await db.commit()
+
+        webhook_ids = {row.webhook_id for row in rows}
+        result = await db.execute(select(Webhook).where(Webhook.id.in_(webhook_ids)))
+        webhooks = {webhook.id: webhook for webhook in result.scalars().all()}
+
+        global_limit = asyncio.Semaphore(max(1, settings.WEBHOOK_DISPATCH_CONCURRENCY))
+        endpoint_limits: Dict[str, asyncio.Semaphore] = {}
+
+        async def deliver(row: WebhookOutbox) -> Optional[DeliveryResult]:
+            webhook = webhooks.get(row.webhook_id)
+            if webhook is None or not webhook.is_active:
+                return None
+            endpoint_limit = endpoint_limits.setdefault(
+                webhook.url, asyncio.Semaphore(max(1, settings.WEBHOOK_ENDPOINT_CONCURRENCY))
+            )
+            async with endpoint_limit, global_limit:
+                return await WebhookService._post(webhook, row.event, row.payload)
+
+        results = await asyncio.gather(*(deliver(row) for row in rows))
+
+        finished = datetime.utcnow()
+        for row, delivery_result in zip(rows, results):
+            webhook = webhooks.get(row.webhook_id)
+            if delivery_result is None:
+                row.status = WebhookOutbox.STATUS_FAILED
+                row.last_error = "Webhook removido ou desabilitado"
+                stats["failed"] += 1
+                continue
+
+            db.add(WebhookService._record_result(webhook, row.event, row.payload, delivery_result))
+            row.attempts += 1
+            error = delivery_result[2]
+            if error is None:
+                row.status = WebhookOutbox.STATUS_DELIVERED
+                row.last_error = None
+                stats["delivered"] += 1
+            elif row.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+                row.status = WebhookOutbox.STATUS_FAILED
+                row.last_error = error
+                stats["failed"] += 1
+            else:
+                row.last_error = error
+                row.next_attempt_at = finished + timedelta(
+                    seconds=WebhookService.retry_delay(row.attempts)
+                )
+                stats["retrying"] += 1
+
+        await db.commit()
+        return stats
+
+    @staticmethod
+    async def next_attempt_at(db) -> Optional[datetime]:
+        """Próxima tentativa agendada na outbox (None se não houver pendentes)"""
+        result = await db.execute(
+            select(func.min(WebhookOutbox.next_attempt_at)).where(
+                WebhookOutbox.status == WebhookOutbox.STATUS_PENDING
+            )
+        )
+        return result.scalar()
 
     @staticmethod
     async def create_webhook(
@@ -318,5 +502,71 @@ class WebhookService:
         return result.scalars().all()
 
 
+async def schedule_webhook_dispatch(countdown: float = 0.0) -> bool:
+    """
+    Agenda a task dispatch_webhooks
+
+    Um flag Redis (SET NX) junta rajadas de eventos num único dispatch imediato;
+    os retries usam um flag próprio para não atrasarem eventos novos. Sem Redis
+    ou broker as linhas ficam na outbox para o próximo dispatch.
+
+    Returns:
+        True se foi agendada uma task
+    """
+    from app.core.redis_pool import get_redis
+
+    key = RETRY_SCHEDULED_KEY if countdown > 0 else DISPATCH_SCHEDULED_KEY
+    try:
+        first = await get_redis().set(
+            key, "1", nx=True, ex=int(countdown + settings.WEBHOOK_DISPATCH_LEASE_SECONDS)
+        )
+    except Exception as exc:
+        logger.debug("Flag de dispatch de webhooks indisponível: %s", exc)
+        first = True
+    if not first:
+        return False
+
+    try:
+        from app.workers.tasks import dispatch_webhooks_task
+
+        dispatch_webhooks_task.apply_async(countdown=countdown)
+        return True
+    except Exception as exc:
+        logger.warning("Dispatch de webhooks não agendado: %s", exc)
+        return False
+
+
+async def dispatch_webhook_outbox() -> Dict[str, int]:
+    """
+    Esvazia a outbox (lotes até não haver linhas devidas) e agenda o próximo retry
+
+    Executado pela task Celery dispatch_webhooks.
+    """
+    from app.core.database import AsyncSessionLocal
+    from app.core.redis_pool import get_redis
+
+    try:
+        # Eventos gravados a partir daqui agendam outro dispatch
+        await get_redis().delete(DISPATCH_SCHEDULED_KEY, RETRY_SCHEDULED_KEY)
+    except Exception as exc:
+        logger.debug("Flag de dispatch de webhooks não removido: %s", exc)
+
+    totals = {"claimed": 0, "delivered": 0, "retrying": 0, "failed": 0}
+    batch_size = settings.WEBHOOK_DISPATCH_BATCH_SIZE
+    async with AsyncSessionLocal() as db:
+        while True:
+            stats = await WebhookService.dispatch_outbox(db, batch_size)
+            for name, value in stats.items():
+                totals[name] += value
+            if stats["claimed"] < batch_size:
+                break
+        next_at = await WebhookService.next_attempt_at(db)
+
+    if next_at is not None:
+        countdown = max(1.0, (next_at - datetime.utcnow()).total_seconds())
+        await schedule_webhook_dispatch(countdown)
+    return totals
+
+
 # Instância global
 webhook_service = WebhookService()
@@ -0,0 +1,191 @@
+"""
+Fan-out concorrente de scrapers por investigação.
+
+Executa em simultâneo todas as fontes aplicáveis a uma investigação, cada uma com
+o seu timeout, e entrega o resultado de cada fonte assim que termina — o chamador
+pode persistir resultados parciais sem esperar pela fonte mais lenta.
+
+O número de scrapers em execução simultânea é limitado por processo worker
+(``SCRAPER_FANOUT_MAX_CONCURRENCY``), para não saturar portais governamentais.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.queue import SCRAPER_TIMEOUTS, ScraperType
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _LoopLimit:
+    """Semáforo partilhado pelos fan-outs em curso num event loop"""
+
+    semaphore: asyncio.Semaphore
+    fanouts: int = 0
+
+
+# Um semáforo por event loop: a task Celery usa asyncio.run() (loop novo por execução),
+# e um asyncio.Semaphore não pode ser partilhado entre loops. Depois de disputado o
+# semáforo referencia o loop, por isso a entrada sai quando termina o último fan-out.
+_loop_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopLimit]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+@dataclass
+class ScraperJob:
+    """Fonte a consultar no fan-out"""
+
+    source: ScraperType
+    category: str  # chave em results: "properties", "companies" ou "lease_contracts"
+    run: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    timeout: float
+
+
+@dataclass
+class ScraperOutcome:
+    """Resultado de uma fonte (sucesso, erro ou timeout)"""
+
+    source: ScraperType
+    category: str
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@asynccontextmanager
+async def _fanout_semaphore() -> AsyncIterator[asyncio.Semaphore]:
+    """Semáforo do processo para o loop corrente, libertado com o último fan-out"""
+    loop = asyncio.get_running_loop()
+    limit = _loop_limits.get(loop)
+    if limit is None:
+        limit = _LoopLimit(asyncio.Semaphore(max(1, settings.SCRAPER_FANOUT_MAX_CONCURRENCY)))
+        _loop_limits[loop] = limit
+    limit.fanouts += 1
+    try:
+        yield limit.semaphore
+    finally:
+        limit.fanouts -= 1
+        if not limit.fanouts:
+            _loop_limits.pop(loop, None)
+
+
+def build_investigation_jobs(
+    target_name: Optional[str], target_cpf_cnpj: Optional[str]
+) -> List[ScraperJob]:
+    """
+    Monta as fontes aplicáveis ao alvo da investigação
+
+    Args:
+        target_name: Nome do alvo
+        target_cpf_cnpj: CPF/CNPJ do alvo (texto claro)
+
+    Returns:
+        Lista de jobs (CAR e INCRA sempre; Receita apenas com documento)
+    """
+    from app.scrapers.car_scraper import CARScraper
+    from app.scrapers.incra_scraper import INCRAScraper
+    from app.scrapers.receita_scraper import ReceitaScraper
+
+    jobs = [
+        ScraperJob(
+            source=ScraperType.CAR,
+            category="properties",
+            run=lambda: CARScraper().search(target_name, target_cpf_cnpj),
+            timeout=SCRAPER_TIMEOUTS[ScraperType.CAR],
+        ),
+        ScraperJob(
+            source=ScraperType.INCRA,
+            category="properties",
+            run=lambda: INCRAScraper().search(target_name, target_cpf_cnpj),
+            timeout=SCRAPER_TIMEOUTS[ScraperType.INCRA],
+        ),
+    ]
+    if target_cpf_cnpj:
+        jobs.append(
+            ScraperJob(
+                source=ScraperType.RECEITA,
+                category="companies",
+                run=lambda: ReceitaScraper().search(target_cpf_cnpj),
+                timeout=SCRAPER_TIMEOUTS[ScraperType.RECEITA],
+            )
+        )
+    return jobs
+
+
+async def _run_job(job: ScraperJob, semaphore: asyncio.Semaphore) -> ScraperOutcome:
+    """Executa um job sob o semáforo do processo, com timeout próprio"""
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            results = await asyncio.wait_for(job.run(), timeout=job.timeout)
+            return ScraperOutcome(
+                source=job.source,
+                category=job.category,
+                results=list(results or []),
+                elapsed=time.perf_counter() - started,
+            )
+        except asyncio.TimeoutError:
+            error = f"Timeout após {job.timeout}s"
+        except Exception as exc:
+            error = str(exc) or exc.__class__.__name__
+        return ScraperOutcome(
+            source=job.source,
+            category=job.category,
+            error=error,
+            elapsed=time.perf_counter() - started,
+        )
+
+
+async def run_scraper_fanout(
+    jobs: List[ScraperJob],
+    on_result: Optional[Callable[[ScraperOutcome], Awaitable[None]]] = None,
+) -> List[ScraperOutcome]:
+    """
+    Executa os jobs em paralelo e chama ``on_result`` à medida que cada fonte termina
+
+    ``on_result`` é invocado sequencialmente (nunca em paralelo consigo próprio),
+    pelo que pode usar uma única sessão de BD para persistência parcial.
+
+    Args:
+        jobs: Fontes a consultar
+        on_result: Callback opcional por fonte concluída
+
+    Returns:
+        Resultados por ordem de conclusão
+    """
+    outcomes: List[ScraperOutcome] = []
+    async with _fanout_semaphore() as semaphore:
+        for next_done in asyncio.as_completed([_run_job(job, semaphore) for job in jobs]):
+            outcome = await next_done
+            if outcome.ok:
+                logger.info(
+                    "Fan-out %s: %d resultado(s) em %.2fs",
+                    outcome.source.value,
+                    len(outcome.results),
+                    outcome.elapsed,
+                )
+            else:
+                logger.warning(
+                    "Fan-out %s falhou em %.2fs: %s",
+                    outcome.source.value,
+                    outcome.elapsed,
+                    outcome.error,
+                )
+            outcomes.append(outcome)
+            if on_result is not None:
+                await on_result(outcome)
+    return outcomes
@@ -5,11 +5,22 @@ Com suporte a filas, retry, circuit breaker e notificações em tempo real
 
 import asyncio
 import logging
+import math
+import time
 import uuid
 from datetime import datetime
-from typing import Any, Dict, Optional
-
-from app.core.queue import ScraperType, Task, TaskPriority, TaskStatus, queue_manager
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.core.queue import (
+    SCRAPER_TIMEOUTS,
+    ScraperType,
+    Task,
+    TaskPriority,
+    TaskStatus,
+    queue_manager,
+)
+from app.core.queue_prometheus import scraper_worker_utilisation
 from app.core.websocket import (
     notify_investigation_progress,
     notify_task_completed,
@@ -32,24 +43,34 @@ class ScraperWorker:
 
     Features:
     - Processa uma fila específica de scraper
+    - N slots concorrentes por tipo (SCRAPER_WORKER_SLOTS), reduzidos com o
+      circuit breaker em falha e pelo rate limit do portal (SCRAPER_UPSTREAM_RPM)
     - Timeout configurável por scraper
     - Integração com circuit breaker
     - Notificações WebSocket em tempo real
     """
 
-    def __init__(self, scraper_type: ScraperType):
+    def __init__(self, scraper_type: ScraperType, slots: Optional[int] = None):
         self.scraper_type = scraper_type
         self.is_running = False
+        self._stopped = False
+
+        # Pool de slots: tasks deste tipo executadas em paralelo
+        if slots is None:
+            slots = settings.SCRAPER_WORKER_SLOTS.get(
+                scraper_type.value, settings.SCRAPER_WORKER_SLOTS_DEFAULT
+            )
+        self.slots = max(1, slots)
+        self.active_slots = self.slots
+        self.busy_slots = 0
+        self.SLOT_RECHECK_SECONDS = 5.0
+        self._avg_task_seconds: Optional[float] = None
+        self._slots_checked_at = 0.0
+        self._slot_tasks: List[asyncio.Task] = []
+        self._busy_tasks: Set[asyncio.Task] = set()
 
         # Timeouts por tipo de scraper (segundos)
-        self.TIMEOUTS = {
-            ScraperType.CAR: 120,
-            ScraperType.INCRA: 120,
-            ScraperType.RECEITA: 60,
-            ScraperType.DIARIO_OFICIAL: 180,
-            ScraperType.CARTORIOS: 150,
-            ScraperType.SIGEF_SICAR: 180,
-        }
+        self.TIMEOUTS = dict(SCRAPER_TIMEOUTS)
 
         # Instância do scraper
         self.scraper = self._get_scraper_instance()
@@ -67,90 +88,216 @@ class ScraperWorker:
         return scrapers[self.scraper_type]()
 
     async def start(self):
-        """Inicia worker (loop infinito)"""
+        """Inicia worker (um loop por slot)"""
         self.is_running = True
-        logger.info(f"🚀 Worker {self.scraper_type.value} iniciado")
+        self._stopped = False
+        logger.info(f"🚀 Worker {self.scraper_type.value} iniciado ({self.slots} slots)")
 
+        # O queue_manager é partilhado (orquestrador, API): a ligação fecha no shutdown
         await queue_manager.connect()
-
+        self._slot_tasks = [
+            asyncio.create_task(self._slot_loop(slot)) for slot in range(self.slots)
+        ]
         try:
-            while self.is_running:
-                await self._process_next_task()
-                await asyncio.sleep(1)  # Evitar loop muito rápido
+            # Slots cancelados pelo stop() não interrompem os restantes
+            await asyncio.gather(*self._slot_tasks, return_exceptions=True)
         finally:
-            await queue_manager.disconnect()
+            for slot_task in self._slot_tasks:
+                slot_task.cancel()
+            self._slot_tasks = []
+
+    async def _slot_loop(self, slot: int):
+        """Loop de um slot: só consome a fila enquanto o slot estiver activo"""
+        while self.is_running:
+            if slot >= await self._get_active_slots():
+                # Slot estacionado (circuito em falha ou rate limit upstream)
+                await asyncio.sleep(self.SLOT_RECHECK_SECONDS)
+                continue
+            # Dequeue bloqueante: sem polling, acorda assim que há task
+            await self._process_next_task()
+
+    async def _get_active_slots(self) -> int:
+        """Número de slots activos, recalculado no máximo a cada SLOT_RECHECK_SECONDS"""
+        now = time.monotonic()
+        if now - self._slots_checked_at >= self.SLOT_RECHECK_SECONDS:
+            self._slots_checked_at = now
+            try:
+                circuit = await queue_manager.get_circuit_status(self.scraper_type)
+            except Exception:
+                circuit = None
+            self.active_slots = self._compute_active_slots(circuit)
+            self._report_utilisation()
+        return self.active_slots
+
+    def _compute_active_slots(self, circuit: Optional[dict]) -> int:
+        """
+        Limite adaptativo de slots
+
+        - Circuito aberto: 1 slot (aguarda o fecho sem consumir a fila)
+        - Falhas consecutivas: slots reduzidos proporcionalmente até ao threshold
+        - Rate limit upstream: slots úteis = pedidos/minuto × duração média da task / 60
+        """
+        limit = self.slots
+
+        rpm = settings.SCRAPER_UPSTREAM_RPM.get(self.scraper_type.value)
+        if rpm and self._avg_task_seconds:
+            limit = min(limit, max(1, math.ceil(rpm * self._avg_task_seconds / 60)))
+
+        if circuit:
+            if circuit["is_open"]:
+                return 1
+            threshold = max(1, circuit["threshold"])
+            if circuit["failures"] > 0:
+                remaining = max(0, threshold - circuit["failures"])
+                limit = min(limit, max(1, math.ceil(self.slots * remaining / threshold)))
+
+        return limit
+
+    def _task_started(self):
+        self.busy_slots += 1
+        self._report_utilisation()
+
+    def _task_finished(self, elapsed: float):
+        self.busy_slots -= 1
+        # Média móvel exponencial da duração (usada no limite por rate limit)
+        if self._avg_task_seconds is None:
+            self._avg_task_seconds = elapsed
+        else:
+            self._avg_task_seconds = 0.8 * self._avg_task_seconds + 0.2 * elapsed
+        self._report_utilisation()
+
+    def _report_utilisation(self):
+        scraper_worker_utilisation(
+            self.scraper_type.value, self.busy_slots, self.active_slots, self.slots
+        )
 
     async def stop(self):
-        """Para worker"""
+        """
+        Para worker
+
+        Slots à espera de task (dequeue ou estacionados) são cancelados — um dequeue
+        em curso termina primeiro e devolve a task que tenha retirado; os que estão
+        a executar uma task terminam-na e saem do loop.
+        """
         self.is_running = False
+        self._stopped = True
+        slot_tasks = list(self._slot_tasks)
+        for slot_task in slot_tasks:
+            if slot_task not in self._busy_tasks:
+                slot_task.cancel()
+        if slot_tasks:
+            await asyncio.gather(*slot_tasks, return_exceptions=True)
         logger.info(f"🛑 Worker {self.scraper_type.value} parado")
 
+    async def _dequeue(self) -> Optional[Task]:
+        """
+        Dequeue bloqueante que não perde a task se o slot for cancelado
+
+        O pop em curso nunca é cancelado (o servidor pode já ter retirado a task):
+        o cancelamento espera pelo seu fim, no máximo QUEUE_DEQUEUE_BLOCK_TIMEOUT,
+        e devolve à fila a task que tenha saído em vez de a deixar RUNNING sem
+        ninguém a executar.
+        """
+        pending = asyncio.ensure_future(
+            queue_manager.dequeue_blocking(
+                self.scraper_type, timeout=settings.QUEUE_DEQUEUE_BLOCK_TIMEOUT
+            )
+        )
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            while not pending.done():
+                try:
+                    await asyncio.wait({pending})
+                except asyncio.CancelledError:
+                    continue
+            if not pending.cancelled() and pending.exception() is None and pending.result():
+                await queue_manager.release_task(pending.result())
+            raise
+
     async def _process_next_task(self):
         """Processa próxima task da fila"""
         try:
-            # Desenfileirar próxima task
-            task = await queue_manager.dequeue(self.scraper_type)
+            # Desenfileirar próxima task (bloqueia até haver task ou expirar o timeout)
+            task = await self._dequeue()
 
             if not task:
                 return  # Sem tasks na fila
 
-            # Notificar início
-            await notify_task_started(task.investigation_id, task.id, task.type)
-
-            # Executar com timeout
-            timeout = self.TIMEOUTS.get(self.scraper_type, 120)
+            if self._stopped:
+                # Worker parado durante o dequeue: a task fica para outro worker
+                await queue_manager.release_task(task)
+                return
 
+            current = asyncio.current_task()
+            self._busy_tasks.add(current)
+            self._task_started()
+            started = time.monotonic()
             try:
-                result = await asyncio.wait_for(self._execute_scraper(task), timeout=timeout)
-
-                # Marcar como completa
-                await queue_manager.complete_task(task.id, result)
-
-                # Notificar conclusão
-                await notify_task_completed(task.investigation_id, task.id, task.type, result)
-
-                # Atualizar progresso geral
-                progress = await queue_manager.get_investigation_progress(task.investigation_id)
-                if progress:
-                    await notify_investigation_progress(task.investigation_id, progress)
-
-            except asyncio.TimeoutError:
-                error_msg = f"Timeout após {timeout}s"
-                logger.error(f"⏰ Task {task.id} excedeu timeout de {timeout}s")
-
-                # Marcar como falha e tentar retry
-                await queue_manager.fail_task(task.id, error_msg)
-
-                # Notificar falha
-                await notify_task_failed(
-                    task.investigation_id,
-                    task.id,
-                    task.type,
-                    error_msg,
-                    task.retry_count + 1,
-                    task.max_retries,
-                )
-
-            except Exception as e:
-                error_msg = str(e)
-                logger.error(f"❌ Erro na task {task.id}: {error_msg}")
-
-                # Marcar como falha e tentar retry
-                await queue_manager.fail_task(task.id, error_msg)
-
-                # Notificar falha
-                await notify_task_failed(
-                    task.investigation_id,
-                    task.id,
-                    task.type,
-                    error_msg,
-                    task.retry_count + 1,
-                    task.max_retries,
-                )
+                await self._run_task(task)
+            finally:
+                self._task_finished(time.monotonic() - started)
+                self._busy_tasks.discard(current)
 
         except Exception as e:
             logger.error(f"❌ Erro crítico no worker {self.scraper_type.value}: {e}")
 
+    async def _run_task(self, task: Task):
+        """Executa uma task já retirada da fila (notificações, timeout e retry)"""
+        # Notificar início
+        await notify_task_started(task.investigation_id, task.id, task.type)
+
+        # Executar com timeout
+        timeout = self.TIMEOUTS.get(self.scraper_type, 120)
+
+        try:
+            result = await asyncio.wait_for(self._execute_scraper(task), timeout=timeout)
+
+            # Marcar como completa
+            await queue_manager.complete_task(task.id, result)
+
+            # Notificar conclusão
+            await notify_task_completed(task.investigation_id, task.id, task.type, result)
+
+            # Atualizar progresso geral
+            progress = await queue_manager.get_investigation_progress(task.investigation_id)
+            if progress:
+                await notify_investigation_progress(task.investigation_id, progress)
+
+        except asyncio.TimeoutError:
+            error_msg = f"Timeout após {timeout}s"
+            logger.error(f"⏰ Task {task.id} excedeu timeout de {timeout}s")
+
+            # Marcar como falha e tentar retry
+            await queue_manager.fail_task(task.id, error_msg)
+
+            # Notificar falha
+            await notify_task_failed(
+                task.investigation_id,
+                task.id,
+                task.type,
+                error_msg,
+                task.retry_count + 1,
+                task.max_retries,
+            )
+
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"❌ Erro na task {task.id}: {error_msg}")
+
+            # Marcar como falha e tentar retry
+            await queue_manager.fail_task(task.id, error_msg)
+
+            # Notificar falha
+            await notify_task_failed(
+                task.investigation_id,
+                task.id,
+                task.type,
+                error_msg,
+                task.retry_count + 1,
+                task.max_retries,
+            )
+
     async def _execute_scraper(self, task: Task) -> Dict[str, Any]:
         """
         Executa scraper com os parâmetros da task
@@ -188,32 +335,35 @@ class WorkerOrchestrator:
     """
     Orquestrador de Workers
 
-    Gerencia múltiplos workers (um por tipo de scraper) e o processador de retries
+    Gerencia múltiplos workers (um pool de slots por tipo de scraper) e o processador de retries
     """
 
     def __init__(self):
         self.workers: Dict[ScraperType, ScraperWorker] = {}
         self.retry_processor_running = False
+        self._tasks: List[asyncio.Task] = []
+        self._retry_task: Optional[asyncio.Task] = None
 
     async def start_all_workers(self):
         """Inicia todos os workers"""
         logger.info("🚀 Iniciando orquestrador de workers...")
 
         # Criar e iniciar um worker para cada tipo de scraper
-        tasks = []
+        self._tasks = []
         for scraper_type in ScraperType:
             worker = ScraperWorker(scraper_type)
             self.workers[scraper_type] = worker
-            tasks.append(asyncio.create_task(worker.start()))
+            self._tasks.append(asyncio.create_task(worker.start()))
 
         # Iniciar processador de retries
         self.retry_processor_running = True
-        tasks.append(asyncio.create_task(self._retry_processor()))
+        self._retry_task = asyncio.create_task(self._retry_processor())
+        self._tasks.append(self._retry_task)
 
         logger.info(f"✅ {len(self.workers)} workers iniciados + retry processor")
 
         # Aguardar todos os workers
-        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
 
     async def stop_all_workers(self):
         """Para todos os workers"""
@@ -221,8 +371,15 @@ class WorkerOrchestrator:
 
         self.retry_processor_running = False
 
-        for worker in self.workers.values():
-            await worker.stop()
+        # Em paralelo: cada stop() pode esperar pelo fim de um dequeue bloqueante
+        await asyncio.gather(*(worker.stop() for worker in self.workers.values()))
+
+        # Aguardar o fim dos workers; o retry processor pode estar no sleep de 10s
+        if self._retry_task is not None:
+            self._retry_task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._retry_task = None
 
         logger.info("✅ Todos os workers parados")
 
@@ -230,16 +387,15 @@ class WorkerOrchestrator:
         """
         Processador de retries
 
-        Verifica a cada 10s se há tasks prontas para retry
+        Verifica a cada 10s se há tasks prontas para retry e recupera
+        tasks pendentes de workers mortos (backend streams)
         """
         await queue_manager.connect()
 
-        try:
-            while self.retry_processor_running:
-                await queue_manager.process_retries()
-                await asyncio.sleep(10)  # Verificar a cada 10s
-        finally:
-            await queue_manager.disconnect()
+        while self.retry_processor_running:
+            await queue_manager.process_retries()
+            await queue_manager.reclaim_stale_tasks()
+            await asyncio.sleep(10)  # Verificar a cada 10s
 
 
 # Instância global do orquestrador
@@ -273,7 +429,7 @@ async def enqueue_investigation_scrapers(
     """
     await queue_manager.connect()
 
-    task_ids = {}
+    tasks = []
 
     # Parâmetros comuns
     params = {"name": target_name, "cpf_cnpj": target_cpf_cnpj, "state": state, "city": city}
@@ -299,10 +455,11 @@ async def enqueue_investigation_scrapers(
             params=params,
             max_retries=3,
         )
+        tasks.append(task)
 
-        success = await queue_manager.enqueue(task)
-        if success:
-            task_ids[scraper_type.value] = task_id
+    # Um único round-trip de escrita para todas as tasks e o progresso
+    enqueued = set(await queue_manager.enqueue_many(tasks))
+    task_ids = {task.type.value: task.id for task in tasks if task.id in enqueued}
 
     logger.info(f"📝 Enfileirados {len(task_ids)} scrapers para investigação {investigation_id}")
 
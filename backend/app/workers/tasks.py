@@ -9,20 +9,21 @@ from typing import List
 logger = logging.getLogger(__name__)
 
 from app.core.database import AsyncSessionLocal
+from app.core.http_client import close_http_clients
+from app.core.redis_pool import close_redis_pools
 from app.domain.investigation import InvestigationStatus
 from app.repositories.investigation import InvestigationRepository
 from app.repositories.user import UserRepository
-from app.scrapers.car_scraper import CARScraper
-from app.scrapers.incra_scraper import INCRAScraper
-from app.scrapers.receita_scraper import ReceitaScraper
+from app.services.email_dispatcher import drain_email_dispatcher
 from app.services.email_service import EmailService
 from app.workers.celery_app import celery_app
+from app.workers.scraper_fanout import ScraperOutcome, build_investigation_jobs, run_scraper_fanout
 
 
 @celery_app.task(name="start_investigation")
 def start_investigation_task(investigation_id: int) -> dict:
     """Start investigation process"""
-    return asyncio.run(_start_investigation(investigation_id))
+    return asyncio.run(_run_with_pools(_start_investigation(investigation_id)))
 
 
 @celery_app.task(name="heavy_investigation")
@@ -31,21 +32,50 @@ def heavy_investigation_task(investigation_id: int) -> dict:
     Pipeline pós-investigação (agregações pesadas, refresh de MV no PostgreSQL, etc.).
     Executado em fila separada quando ENABLE_HEAVY_INVESTIGATION_QUEUE está activo.
     """
-    return asyncio.run(_heavy_investigation_pipeline(investigation_id))
+    return asyncio.run(_run_with_pools(_heavy_investigation_pipeline(investigation_id)))
+
+
+async def _run_with_pools(coro):
+    """
+    Fecha os recursos do loop no fim da task (asyncio.run cria um loop por execução)
+
+    Os emails ainda em fila são enviados antes de o loop fechar.
+    """
+    try:
+        return await coro
+    finally:
+        await drain_email_dispatcher()
+        await close_http_clients()
+        await close_redis_pools()
 
 
 async def _heavy_investigation_pipeline(investigation_id: int) -> dict:
-    from app.services.materialized_views import try_refresh_investigation_summary
+    from app.services.materialized_views import request_refresh
 
-    async with AsyncSessionLocal() as db:
-        refreshed = await try_refresh_investigation_summary(db)
-        await db.commit()
-        logger.info(
-            "heavy_investigation_task concluída id=%s mv_refresh=%s",
-            investigation_id,
-            refreshed,
-        )
-        return {"investigation_id": investigation_id, "mv_refreshed": refreshed}
+    # Refresh das MVs com debounce: rajadas de investigações geram um só refresh
+    scheduled = await request_refresh()
+    logger.info(
+        "heavy_investigation_task concluída id=%s mv_refresh_agendado=%s",
+        investigation_id,
+        scheduled,
+    )
+    return {"investigation_id": investigation_id, "mv_refresh_scheduled": scheduled}
+
+
+@celery_app.task(name="refresh_materialized_views")
+def refresh_materialized_views_task(views: List[str]) -> dict:
+    """REFRESH ... CONCURRENTLY das materialized views pedidas (após o debounce)"""
+    from app.services.materialized_views import refresh_materialized_views
+
+    return asyncio.run(_run_with_pools(refresh_materialized_views(views)))
+
+
+@celery_app.task(name="dispatch_webhooks")
+def dispatch_webhooks_task() -> dict:
+    """Entrega as linhas pendentes da outbox de webhooks (concorrente, com retry)"""
+    from app.services.webhooks import dispatch_webhook_outbox
+
+    return asyncio.run(_run_with_pools(dispatch_webhook_outbox()))
 
 
 async def _start_investigation(investigation_id: int) -> dict:
@@ -69,37 +99,39 @@ async def _start_investigation(investigation_id: int) -> dict:
         logger.info(f"Investigação {investigation_id} em andamento")
 
         try:
-            # Run scrapers
             results = {
                 "properties": [],
                 "lease_contracts": [],
                 "companies": [],
             }
 
-            # CAR Scraper
-            logger.info(f"Executando scraper CAR para investigação {investigation_id}")
-            car_scraper = CARScraper()
-            car_results = await car_scraper.search(
-                investigation.target_name,
-                investigation.target_cpf_cnpj,
+            async def persist_partial(outcome: ScraperOutcome) -> None:
+                # Contadores actualizados assim que cada fonte termina (UI vê resultados parciais)
+                if not outcome.ok:
+                    return
+                results[outcome.category].extend(outcome.results)
+                await investigation_repo.update(
+                    investigation_id,
+                    {
+                        "properties_found": len(results["properties"]),
+                        "lease_contracts_found": len(results["lease_contracts"]),
+                        "companies_found": len(results["companies"]),
+                    },
+                )
+                await db.commit()
+
+            # Fan-out: CAR, INCRA e Receita em paralelo, com timeout por fonte
+            logger.info(f"Executando scrapers em paralelo para investigação {investigation_id}")
+            jobs = build_investigation_jobs(
+                investigation.target_name, investigation.target_cpf_cnpj
             )
-            results["properties"].extend(car_results)
-
-            # INCRA Scraper
-            logger.info(f"Executando scraper INCRA para investigação {investigation_id}")
-            incra_scraper = INCRAScraper()
-            incra_results = await incra_scraper.search(
-                investigation.target_name,
-                investigation.target_cpf_cnpj,
-            )
-            results["properties"].extend(incra_results)
-
-            # Receita Federal Scraper
-            if investigation.target_cpf_cnpj:
-                logger.info(f"Executando scraper Receita para investigação {investigation_id}")
-                receita_scraper = ReceitaScraper()
-                company_results = await receita_scraper.search(investigation.target_cpf_cnpj)
-                results["companies"].extend(company_results)
+            outcomes = await run_scraper_fanout(jobs, on_result=persist_partial)
+
+            if outcomes and not any(outcome.ok for outcome in outcomes):
+                raise RuntimeError(
+                    "Todas as fontes falharam: "
+                    + "; ".join(f"{o.source.value}: {o.error}" for o in outcomes)
+                )
 
             # Update investigation with results
             await investigation_repo.update(
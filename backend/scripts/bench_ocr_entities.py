@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark da extração de entidades OCR: um ``re.findall`` por padrão (como antes)
+contra a regex única de ``app/services/ocr/entities.py``, em texto sintético de
+vários MB, e validação de CPF/CNPJ em Python puro contra a versão em lote (numpy).
+
+Uso:
+    python scripts/bench_ocr_entities.py --mb 8 --repeat 3
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.ocr import entities  # noqa: E402
+
+FILLER = (
+    "Certidão de inteiro teor do imóvel rural denominado Fazenda Boa Vista, "
+    "situado no município de Sorriso, registrado neste cartório. "
+)
+
+
+def _cpf(rng: random.Random) -> str:
+    base = [rng.randint(0, 9) for _ in range(9)]
+    for weights in (range(10, 1, -1), range(11, 1, -1)):
+        base.append(sum(d * w for d, w in zip(base, weights)) * 10 % 11 % 10)
+    s = "".join(map(str, base))
+    return f"{s[:3]}.{s[3:6]}.{s[6:9]}-{s[9:]}"
+
+
+def synthetic_text(megabytes: float, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    parts, size = [], 0
+    while size < megabytes * 1024 * 1024:
+        line = (
+            f"{FILLER}Proprietário CPF {_cpf(rng)}, CNPJ 11.222.333/0001-81, "
+            f"área {rng.randint(10, 9000)},{rng.randint(0, 99)} ha, "
+            f"valor R$ {rng.randint(1, 999)}.{rng.randint(100, 999)},00 em "
+            f"{rng.randint(1, 28)}/{rng.randint(1, 12)}/20{rng.randint(10, 24)}. "
+            f"CCIR: 950.{rng.randint(100, 999)}.456.789-0 tel (65) 99999-{rng.randint(1000, 9999)}\n"
+        )
+        parts.append(line)
+        size += len(line)
+    return "".join(parts)
+
+
+def legacy_extract(text: str) -> dict:
+    found = {}
+    for name, pattern in entities.SERVICE_PATTERNS.items():
+        matches = re.findall(pattern, text, re.IGNORECASE)
+        if matches:
+            found[name] = list(set(" ".join(m.split()).strip() for m in matches))
+    return found
+
+
+def legacy_valid_cpf(doc: str) -> bool:
+    digits = [int(c) for c in doc]
+    if len(digits) != 11 or len(set(digits)) == 1:
+        return False
+    for n in (9, 10):
+        total = sum(d * w for d, w in zip(digits[:n], range(n + 1, 1, -1)))
+        if total * 10 % 11 % 10 != digits[n]:
+            return False
+    return True
+
+
+def _best(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--mb", type=float, default=8.0, help="Tamanho do texto sintético (MB)")
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    text = synthetic_text(args.mb)
+    print(f"Texto: {len(text) / 1024 / 1024:.1f} MB")
+
+    legacy = _best(lambda: legacy_extract(text), args.repeat)
+    single = _best(
+        lambda: entities.SERVICE_EXTRACTOR.grouped(text, clean=lambda v: " ".join(v.split())),
+        args.repeat,
+    )
+    print(f"Entidades — findall por padrão: {legacy:.3f}s | regex única: {single:.3f}s")
+
+    cpfs = [entities.only_digits(v) for v in re.findall(entities.SERVICE_PATTERNS["cpf"], text)]
+    py = _best(lambda: [legacy_valid_cpf(c) for c in cpfs], args.repeat)
+    vec = _best(lambda: entities.valid_cpfs(cpfs), args.repeat)
+    print(f"Validação de {len(cpfs)} CPFs — Python: {py:.3f}s | numpy: {vec:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
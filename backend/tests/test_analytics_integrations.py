@@ -51,9 +51,40 @@ def mock_db():
 
 
 @pytest.fixture
-def admin_dashboard(mock_db):
-    """Fixture do AdminDashboard"""
-    return AdminDashboard(mock_db)
+def admin_dashboard(db_session):
+    """Fixture do AdminDashboard (AsyncSession real, SQLite em memória)"""
+    return AdminDashboard(db_session)
+
+
+async def _seed_investigations(db_session):
+    """Utilizador com 3 investigações: duas concluídas (2h e 4h) e uma pendente"""
+    from app.core.security import get_password_hash
+    from app.domain.investigation import Investigation, InvestigationStatus
+    from app.domain.user import User
+
+    now = datetime.utcnow()
+    user = User(
+        email="admin-dash@test.com",
+        username="admindash",
+        full_name="Admin Dash",
+        hashed_password=get_password_hash("fakehash1"),
+        last_login=now,
+    )
+    db_session.add(user)
+    await db_session.flush()
+    for hours, status in ((2, "COMPLETED"), (4, "COMPLETED"), (None, "PENDING")):
+        created = now - timedelta(days=1)
+        db_session.add(
+            Investigation(
+                user_id=user.id,
+                target_name="Alvo",
+                status=InvestigationStatus[status],
+                created_at=created,
+                completed_at=created + timedelta(hours=hours) if hours else None,
+            )
+        )
+    await db_session.flush()
+    return user
 
 
 @pytest.fixture
@@ -80,69 +111,101 @@ def data_warehouse_exporter(mock_db):
 
 
 @pytest.mark.asyncio
-async def test_get_platform_metrics(admin_dashboard, mock_db):
+async def test_get_platform_metrics(admin_dashboard, db_session):
     """Testa obtenção de métricas da plataforma"""
-    # Mock das queries
-    mock_db.query.return_value.scalar.return_value = 100
-    mock_db.query.return_value.filter.return_value.scalar.return_value = 50
+    await _seed_investigations(db_session)
 
     result = await admin_dashboard.get_platform_metrics()
 
-    assert "users" in result
-    assert "investigations" in result
     assert "period" in result
-    assert isinstance(result["users"]["total"], int)
+    assert result["users"]["total"] == 1
+    assert result["users"]["active"] == 1
+    assert result["investigations"]["total"] == 3
+    assert result["investigations"]["completed"] == 2
+    assert result["investigations"]["active"] == 1
 
 
 @pytest.mark.asyncio
-async def test_get_investigations_by_period(admin_dashboard, mock_db):
+async def test_get_investigations_by_period(admin_dashboard, db_session):
     """Testa investigações por período"""
-    mock_db.query.return_value.filter.return_value.group_by.return_value.order_by.return_value.all.return_value = (
-        []
-    )
+    await _seed_investigations(db_session)
 
     result = await admin_dashboard.get_investigations_by_period(group_by="month")
 
-    assert "data" in result
-    assert "totals" in result
     assert result["period"]["group_by"] == "month"
+    assert len(result["data"]) == 1
+    assert result["totals"]["total"] == 3
+    assert result["totals"]["completed"] == 2
 
 
 @pytest.mark.asyncio
-async def test_get_average_completion_time(admin_dashboard, mock_db):
-    """Testa tempo médio de conclusão"""
-    mock_db.query.return_value.filter.return_value.all.return_value = []
+async def test_get_average_completion_time(admin_dashboard, db_session):
+    """Testa tempo médio de conclusão (agregado em SQL)"""
+    empty = await admin_dashboard.get_average_completion_time()
+    assert empty["total_completed"] == 0
+    assert "days" in empty["average_time"]
 
-    result = await admin_dashboard.get_average_completion_time()
+    user = await _seed_investigations(db_session)
+    result = await admin_dashboard.get_average_completion_time(group_by="user")
 
-    assert "average_time" in result
-    assert "total_completed" in result
-    assert "days" in result["average_time"]
+    assert result["total_completed"] == 2
+    assert result["average_time"]["hours"] == 3
+    assert result["min_time_seconds"] == 7200
+    assert result["max_time_seconds"] == 14400
+    assert result["groups"][f"user_{user.id}"]["count"] == 2
 
 
 @pytest.mark.asyncio
-async def test_get_conversion_rate(admin_dashboard, mock_db):
+async def test_get_conversion_rate(admin_dashboard, db_session):
     """Testa taxa de conversão"""
-    mock_db.query.return_value.filter.return_value.scalar.return_value = 100
+    await _seed_investigations(db_session)
 
     result = await admin_dashboard.get_conversion_rate()
 
-    assert "conversion_rates" in result
+    assert result["investigations"]["created"] == 3
+    assert result["investigations"]["completed"] == 2
+    assert result["investigations"]["pending"] == 1
+    assert result["conversion_rates"]["completion"] == pytest.approx(66.67)
     assert "funnel" in result
     assert "health_score" in result
 
 
 @pytest.mark.asyncio
-async def test_get_most_active_users(admin_dashboard, mock_db):
+async def test_get_most_active_users(admin_dashboard, db_session):
     """Testa usuários mais ativos"""
-    mock_db.query.return_value.join.return_value.filter.return_value.group_by.return_value.order_by.return_value.limit.return_value.all.return_value = (
-        []
-    )
+    user = await _seed_investigations(db_session)
 
     result = await admin_dashboard.get_most_active_users(limit=5)
 
-    assert "active_users" in result
-    assert "total_investigations" in result
+    assert result["total_investigations"] == 3
+    assert result["active_users"][0]["user_id"] == user.id
+    assert result["active_users"][0]["investigations_created"] == 3
+
+
+@pytest.mark.asyncio
+async def test_complete_dashboard_concurrent_sessions(tmp_path):
+    """Com session_factory, as métricas correm em paralelo em sessões próprias"""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app.core.database import Base
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dashboard.db'}")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with factory() as session:
+            await _seed_investigations(session)
+            await session.commit()
+
+            result = await AdminDashboard(session, session_factory=factory).get_complete_dashboard()
+
+        assert result["platform_metrics"]["investigations"]["total"] == 3
+        assert result["average_completion_time"]["total_completed"] == 2
+        assert result["conversion_rate"]["investigations"]["completed"] == 2
+        assert result["scrapers"]["scrapers"]
+    finally:
+        await engine.dispose()
 
 
 # ============================================================================
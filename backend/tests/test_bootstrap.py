@@ -168,6 +168,7 @@ async def test_shutdown_application_stops_started_services(monkeypatch: pytest.M
     engine_dispose = AsyncMock()
     stop_workers = AsyncMock()
     disconnect_queue = AsyncMock()
+    close_redis_pools = AsyncMock()
     shutdown_trace_provider = Mock()
 
     class DummyEngine:
@@ -179,6 +180,7 @@ async def test_shutdown_application_stops_started_services(monkeypatch: pytest.M
     task = asyncio.create_task(sleepy())
     monkeypatch.setattr(bootstrap.orchestrator, "stop_all_workers", stop_workers)
     monkeypatch.setattr(bootstrap.queue_manager, "disconnect", disconnect_queue)
+    monkeypatch.setattr(bootstrap, "close_redis_pools", close_redis_pools)
     monkeypatch.setattr(
         "app.core.telemetry.shutdown_trace_provider",
         shutdown_trace_provider,
@@ -196,6 +198,7 @@ async def test_shutdown_application_stops_started_services(monkeypatch: pytest.M
 
     stop_workers.assert_awaited_once()
     disconnect_queue.assert_awaited_once()
+    close_redis_pools.assert_awaited_once()
     engine_dispose.assert_awaited_once()
     shutdown_trace_provider.assert_called_once()
     assert task.cancelled()
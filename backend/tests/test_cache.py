@@ -91,6 +91,62 @@ class TestCacheService:
         # Other key should still exist
         assert await cache_service.get("other:key") is not None
 
+    @pytest.mark.asyncio
+    async def test_tag_invalidation_removes_only_tagged_keys(self, cache_service: CacheService):
+        """Invalidating a tag removes its members without touching other keys"""
+        await cache_service.set_investigation("42", {"name": "Fazenda"})
+        await cache_service.set("cache:search:abc", [1, 2], tags=["investigation:42", "user:7"])
+        await cache_service.set("cache:search:other", [3], tags=["investigation:43"])
+
+        removed = await cache_service.invalidate_tags("investigation:42")
+
+        assert removed == 2
+        assert await cache_service.get_investigation("42") is None
+        assert await cache_service.get("cache:search:abc") is None
+        assert await cache_service.get("cache:search:other") == [3]
+        assert not await cache_service.redis_client.exists("cache:tag:investigation:42")
+
+    @pytest.mark.asyncio
+    async def test_invalidation_is_tag_only_without_scan(self, cache_service: CacheService):
+        """Keys of the investigation/user families are tagged on write; no SCAN on invalidate"""
+        await cache_service.set("cache:investigation:42:summary", {"v": 1})
+        await cache_service.set("cache:user:7", {"v": 1})
+        await cache_service.set("cache:investigation:420", {"v": 1})
+
+        def no_scan(*args, **kwargs):
+            raise AssertionError("SCAN issued during invalidation")
+
+        cache_service.redis_client.scan_iter = no_scan
+        cache_service.redis_client.scan = no_scan
+        await cache_service.invalidate_investigation("42")
+        await cache_service.invalidate_user(7)
+
+        assert await cache_service.get("cache:investigation:42:summary") is None
+        assert await cache_service.get("cache:user:7") is None
+        assert await cache_service.get("cache:investigation:420") == {"v": 1}
+
+    @pytest.mark.asyncio
+    async def test_invalidate_user_and_tagged_decorator(self, cache_service: CacheService):
+        """Decorated results registered under user tags are evicted by invalidate_user"""
+        calls = 0
+
+        @cache_service.cached(ttl=60, tags=lambda user_id: [f"user:{user_id}"])
+        async def profile(user_id: int) -> dict:
+            nonlocal calls
+            calls += 1
+            return {"id": user_id}
+
+        await cache_service.set_user(5, {"id": 5})
+        await profile(5)
+        await profile(5)
+        assert calls == 1
+
+        await cache_service.invalidate_user(5)
+
+        assert await cache_service.get_user(5) is None
+        await profile(5)
+        assert calls == 2
+
     @pytest.mark.asyncio
     async def test_increment(self, cache_service: CacheService):
         """Test incrementing numeric values"""
@@ -183,6 +239,228 @@ class TestCacheService:
         assert call_count == 2
 
 
+class TestTwoTierCache:
+    """Test in-process L1 in front of Redis"""
+
+    @pytest.fixture
+    async def services(self):
+        first = CacheService(l1_enabled=True)
+        second = CacheService(l1_enabled=True)
+        await first.connect()
+        await second.connect()
+        await first.redis_client.flushdb()
+        yield first, second
+        await first.disconnect()
+        await second.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_hot_key_served_from_l1(self, services):
+        """Second read is an L1 hit, without going to Redis"""
+        cache, _ = services
+        await cache.set("cache:user:1", {"name": "User 1"})
+
+        assert await cache.get("cache:user:1") == {"name": "User 1"}
+        await cache.redis_client.delete("cache:user:1")  # bypass: L1 still holds it
+        assert await cache.get("cache:user:1") == {"name": "User 1"}
+
+        tiers = cache.get_tier_stats()
+        assert tiers["l1"]["hits"] == 1
+        assert tiers["l2"]["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_l1_hits_are_independent_copies(self, services):
+        """Mutating a returned value does not change what the next reader gets"""
+        cache, _ = services
+        await cache.set("cache:cnpj:1", {"name": "Empresa", "tags": ["a"]})
+
+        first = await cache.get("cache:cnpj:1")  # L2 hit, fills L1
+        first["_from_cache"] = True
+        second = await cache.get("cache:cnpj:1")  # L1 hit
+        second["tags"].append("b")
+
+        assert await cache.get("cache:cnpj:1") == {"name": "Empresa", "tags": ["a"]}
+        assert cache.get_tier_stats()["l1"]["hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_delete_invalidates_other_process_l1(self, services):
+        """delete/invalidate_* in one process evicts L1 copies elsewhere"""
+        reader, writer = services
+        await writer.set("cache:user:7", {"v": 1})
+        await writer.set("cache:investigation:42", {"v": 1})
+        await reader.get("cache:user:7")
+        await reader.get("cache:investigation:42")
+        assert len(reader._l1) == 2
+
+        await writer.delete("cache:user:7")
+        await writer.invalidate_investigation("42")
+        for _ in range(50):
+            if len(reader._l1) == 0:
+                break
+            await asyncio.sleep(0.02)
+
+        assert len(reader._l1) == 0
+        assert await reader.get("cache:user:7") is None
+
+    @pytest.mark.asyncio
+    async def test_increment_invalidates_other_process_l1(self, services):
+        """increment in one process evicts the stale L1 counter elsewhere"""
+        reader, writer = services
+        await writer.set("cache:counter:1", 1)
+        assert await reader.get("cache:counter:1") == 1
+
+        assert await writer.increment("cache:counter:1", 2) == 3
+        for _ in range(50):
+            if len(reader._l1) == 0:
+                break
+            await asyncio.sleep(0.02)
+
+        assert await reader.get("cache:counter:1") == 3
+
+    def test_l1_is_bounded(self):
+        """LRU evicts oldest entries past the entry and byte limits"""
+        from app.core.cache import _LocalCache
+
+        local = _LocalCache(max_entries=2, max_bytes=100)
+        local.set("a", 1, 10, ttl=60)
+        local.set("b", 2, 10, ttl=60)
+        local.get("a")
+        local.set("c", 3, 10, ttl=60)
+        assert local.get("b") == (False, None)
+        assert local.get("a") == (True, 1)
+
+        local.set("big", "x", 95, ttl=60)
+        assert len(local) == 1
+        assert local.bytes_used == 95
+
+
+class TestStampedeProtection:
+    """Test single-flight, distributed lock, stale-while-revalidate and early expiration"""
+
+    @pytest.fixture
+    async def cache_service(self):
+        service = CacheService()
+        await service.connect()
+        await service.redis_client.flushdb()
+        yield service
+        await service.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_compute_once(self, cache_service: CacheService):
+        """Concurrent callers on a cold key share one computation"""
+        calls = 0
+
+        @cache_service.cached(ttl=60)
+        async def dashboard(user_id: int) -> dict:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.1)
+            return {"user": user_id}
+
+        results = await asyncio.gather(*[dashboard(1) for _ in range(10)])
+
+        assert calls == 1
+        assert all(r == {"user": 1} for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_waiters(self, cache_service: CacheService):
+        """A waiter takes over the computation when the leading request is cancelled"""
+        calls = 0
+        started = asyncio.Event()
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            started.set()
+            await asyncio.sleep(0.1)
+            return {"call": calls}
+
+        key = "cache:dashboard:cancelled"
+        leader = asyncio.create_task(cache_service.get_or_compute(key, compute, ttl=60))
+        await started.wait()
+        waiters = [
+            asyncio.create_task(cache_service.get_or_compute(key, compute, ttl=60))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.02)
+        leader.cancel()
+
+        results = await asyncio.gather(*waiters)
+
+        assert leader.cancelled()
+        assert results == [{"call": 2}] * 3
+        assert calls == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_value_served_while_one_caller_refreshes(self, cache_service: CacheService):
+        """Expired value keeps being served while a single refresh runs"""
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.2)
+            return {"version": calls}
+
+        key = "cache:dashboard:swr"
+        await cache_service.get_or_compute(key, compute, ttl=1, stale_ttl=30, beta=0)
+        await asyncio.sleep(1.1)
+
+        refresher = asyncio.create_task(
+            cache_service.get_or_compute(key, compute, ttl=1, stale_ttl=30, beta=0)
+        )
+        await asyncio.sleep(0.05)
+        stale = await cache_service.get_or_compute(key, compute, ttl=1, stale_ttl=30, beta=0)
+
+        assert stale == {"version": 1}
+        assert await refresher == {"version": 2}
+        assert calls == 2
+
+    @pytest.mark.asyncio
+    async def test_lock_holder_elsewhere_fills_value(self, cache_service: CacheService):
+        """Without the Redis lock, the caller waits for the other process's value"""
+        key = "cache:dashboard:locked"
+        await cache_service.redis_client.set(f"lock:{key}", "other-process", px=5000)
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            return {"from": "here"}
+
+        async def other_value():
+            return {"from": "other"}
+
+        async def other_process_fills():
+            await asyncio.sleep(0.1)
+            await cache_service._compute_and_store(key, other_value, 60, 0)
+
+        filler = asyncio.create_task(other_process_fills())
+        result = await cache_service.get_or_compute(key, compute, ttl=60, lock=True)
+        await filler
+
+        assert result == {"from": "other"}
+        assert calls == 0
+
+    @pytest.mark.asyncio
+    async def test_probabilistic_early_expiration(self, cache_service: CacheService):
+        """A slow computation near expiry is refreshed before the TTL ends"""
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return calls
+
+        await cache_service.get_or_compute("cache:early:off", compute, ttl=60, beta=0)
+        await cache_service.get_or_compute("cache:early:off", compute, ttl=60, beta=0)
+        assert calls == 1
+
+        await cache_service.get_or_compute("cache:early:on", compute, ttl=60, beta=1e9)
+        await cache_service.get_or_compute("cache:early:on", compute, ttl=60, beta=1e9)
+        assert calls == 3
+
+
 class TestCachePerformance:
     """Test cache performance"""
 
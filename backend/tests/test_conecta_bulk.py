@@ -0,0 +1,162 @@
+"""
+Testes das consultas Conecta em lote (app.services.conecta_bulk)
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.services import conecta_bulk
+from app.services.conecta_bulk import BulkProvider, build_bulk_job, stream_bulk_lookup
+
+CPF = "529.982.247-25"
+CNPJ = "11.222.333/0001-81"
+
+
+class _FakeService:
+    calls = []
+
+    async def lookup(self, document):
+        await asyncio.sleep(0.05)
+        if document == "boom":
+            raise ValueError("SNCR erro 500: indisponível")
+        self.calls.append(document)
+        return {"items": [{"documento": document}]}
+
+
+class _FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def commit(self):
+        pass
+
+
+class _FakeRepository:
+    batches = []
+
+    def __init__(self, db):
+        self.db = db
+
+    async def create_many(self, rows):
+        self.batches.append(rows)
+
+
+@pytest.fixture
+def fake_providers(monkeypatch):
+    """Providers falsos (sem Redis: bucket local)"""
+    _FakeService.calls = []
+    providers = {
+        "fake_docs": BulkProvider(
+            "conecta_fake",
+            "cpf_cnpj",
+            "cpf_cnpj",
+            frozenset({"cpf", "cnpj"}),
+            _FakeService,
+            lambda service, doc, _u: service.lookup(doc),
+        ),
+        "fake_imovel": BulkProvider(
+            "conecta_fake_imovel",
+            "imovel",
+            "codigo_imovel",
+            frozenset({"imovel"}),
+            _FakeService,
+            lambda service, doc, _u: service.lookup(doc),
+        ),
+    }
+
+    def no_redis(*_args, **_kwargs):
+        raise ConnectionError("sem Redis")
+
+    _FakeRepository.batches = []
+    monkeypatch.setattr(conecta_bulk, "BULK_PROVIDERS", providers)
+    monkeypatch.setattr(conecta_bulk, "LegalQueryRepository", _FakeRepository)
+    monkeypatch.setattr(conecta_bulk, "get_redis", no_redis)
+    monkeypatch.setattr(conecta_bulk, "_local_tat", {})
+    monkeypatch.setattr(conecta_bulk.settings, "CONECTA_BULK_RATE_PER_SECOND", {})
+    monkeypatch.setattr(conecta_bulk.settings, "CONECTA_BULK_RATE_PER_SECOND_DEFAULT", 100)
+    monkeypatch.setattr(conecta_bulk.settings, "CONECTA_BULK_MAX_CONCURRENCY", 16)
+    monkeypatch.setattr(conecta_bulk.settings, "CONECTA_BULK_INSERT_BATCH_SIZE", 2)
+    return providers
+
+
+def test_build_bulk_job_validates_and_dedups(fake_providers):
+    job = build_bulk_job(
+        ["fake_docs", "fake_imovel"],
+        [CPF, "52998224725", "123.456.789-00", CNPJ],
+        ["950.123.456.789-0"],
+    )
+
+    assert [(i.provider, i.document) for i in job.items] == [
+        ("fake_docs", "52998224725"),
+        ("fake_docs", "11222333000181"),
+        ("fake_imovel", "950.123.456.789-0"),
+    ]
+    assert [r.document for r in job.rejected] == ["123.456.789-00"]
+
+    with pytest.raises(ValueError):
+        build_bulk_job(["desconhecido"], [CPF], [])
+
+
+def test_cnpj_providers_require_cpf_usuario():
+    with pytest.raises(ValueError):
+        build_bulk_job(["cnpj_basica"], [CNPJ], [])
+
+
+@pytest.mark.asyncio
+async def test_bulk_stream_runs_concurrently_and_batches_inserts(fake_providers):
+    documents = [CPF, CNPJ, "123.456.789-00"]
+    job = build_bulk_job(["fake_docs", "fake_imovel"], documents, ["A1", "boom", "C3"])
+
+    started = time.perf_counter()
+    lines = [
+        json.loads(chunk)
+        async for chunk in stream_bulk_lookup(job, investigation_id=7, session_factory=_FakeSession)
+    ]
+    elapsed = time.perf_counter() - started
+
+    # 5 consultas de 50ms em paralelo, não em série
+    assert elapsed < 0.2
+    results = [line for line in lines if line["type"] == "result"]
+    assert lines[0]["status"] == "error"  # documento rejeitado sai primeiro
+    assert {r["document"] for r in results if r["status"] == "ok"} == {
+        "52998224725",
+        "11222333000181",
+        "A1",
+        "C3",
+    }
+    assert lines[-1] == {**lines[-1], "type": "summary", "total": 6, "ok": 4, "error": 2}
+    # 4 LegalQuery em lotes de 2; falhas não são gravadas
+    assert [len(batch) for batch in _FakeRepository.batches] == [2, 2]
+    row = _FakeRepository.batches[0][0]
+    assert row["investigation_id"] == 7 and row["result_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_rate_limit_spaces_calls_per_provider(fake_providers, monkeypatch):
+    monkeypatch.setattr(conecta_bulk.settings, "CONECTA_BULK_RATE_PER_SECOND_DEFAULT", 20)
+    job = build_bulk_job(["fake_imovel"], [], [f"IM{i}" for i in range(30)])
+
+    started = time.perf_counter()
+    outcomes = [o async for o in conecta_bulk.run_bulk_lookup(job.items)]
+    elapsed = time.perf_counter() - started
+
+    assert len(outcomes) == 30
+    # 20/s com rajada de 20: as 10 restantes esperam ~0.5s
+    assert elapsed >= 0.4
+
+
+@pytest.mark.asyncio
+async def test_bulk_stream_sse_format(fake_providers):
+    job = build_bulk_job(["fake_imovel"], [], ["A1"])
+
+    chunks = [chunk.decode() async for chunk in stream_bulk_lookup(job, fmt="sse")]
+
+    assert chunks[0].startswith("event: result\ndata: ")
+    assert chunks[-1].startswith("event: summary\ndata: ")
+    assert all(chunk.endswith("\n\n") for chunk in chunks)
@@ -2,6 +2,9 @@
 Tests for Conecta auth helpers
 """
 
+import asyncio
+import time
+
 import pytest
 
 from app.services.conecta_auth import ConectaAuthService, ConectaCredentials
@@ -71,3 +74,99 @@ async def test_conecta_auth_build_headers_raises_when_no_credentials():
     with pytest.raises(ValueError) as exc_info:
         await auth.build_headers()
     assert "Credenciais Conecta não configuradas" in str(exc_info.value)
+
+
+class _FakeRedis:
+    """Redis mínimo partilhado entre 'workers' (GET/SET NX PX/EVAL do unlock)"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, _script, _numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+
+def _oauth_auth():
+    credentials = ConectaCredentials(
+        base_url="https://conecta.gov.br",
+        client_id="client",
+        client_secret="secret",
+        api_key="",
+    )
+    return ConectaAuthService(credentials, token_url="https://conecta.gov.br/oauth/token")
+
+
+@pytest.fixture
+def token_upstream(monkeypatch):
+    """Token endpoint falso; devolve a lista de tokens emitidos"""
+    from app.services import conecta_auth
+
+    issued = []
+    expires_in = {"value": 3600}
+
+    async def fake_fetch(self):
+        await asyncio.sleep(0.01)
+        issued.append(f"token-{len(issued) + 1}")
+        return conecta_auth._Token(issued[-1], time.time() + expires_in["value"])
+
+    redis = _FakeRedis()
+    monkeypatch.setattr(conecta_auth.ConectaTokenManager, "_fetch", fake_fetch)
+    monkeypatch.setattr(conecta_auth, "get_redis", lambda *a, **k: redis)
+    monkeypatch.setattr(conecta_auth, "_managers", {})
+    monkeypatch.setattr(conecta_auth.settings, "CONECTA_TOKEN_SHARED_CACHE", True)
+    return issued, expires_in
+
+
+@pytest.mark.asyncio
+async def test_conecta_token_shared_between_service_instances(token_upstream):
+    issued, _ = token_upstream
+
+    tokens = await asyncio.gather(*(_oauth_auth().get_access_token() for _ in range(20)))
+
+    assert set(tokens) == {"token-1"}
+    assert issued == ["token-1"]
+
+
+@pytest.mark.asyncio
+async def test_conecta_token_shared_across_workers_via_redis(token_upstream):
+    from app.services import conecta_auth
+
+    issued, _ = token_upstream
+    worker_a = conecta_auth.ConectaTokenManager("https://conecta.gov.br/oauth/token", "c", "s")
+    worker_b = conecta_auth.ConectaTokenManager("https://conecta.gov.br/oauth/token", "c", "s")
+
+    assert await worker_a.get_token() == "token-1"
+    assert await worker_b.get_token() == "token-1"
+    assert issued == ["token-1"]
+    assert worker_b.stats["redis"] == 1
+
+
+@pytest.mark.asyncio
+async def test_conecta_token_refreshed_proactively_before_expiry(token_upstream):
+    from app.services import conecta_auth
+
+    issued, expires_in = token_upstream
+    # Dentro da margem de renovação, mas ainda utilizável
+    expires_in["value"] = conecta_auth.settings.CONECTA_TOKEN_REFRESH_MARGIN_SECONDS - 1
+    auth = _oauth_auth()
+
+    assert await auth.get_access_token() == "token-1"
+    expires_in["value"] = 3600
+    # Devolve o token actual de imediato e renova em background
+    assert await auth.get_access_token() == "token-1"
+    await asyncio.sleep(0.05)
+
+    assert await auth.get_access_token() == "token-2"
+    assert issued == ["token-1", "token-2"]
@@ -0,0 +1,65 @@
+"""
+Testes das agregações do dashboard (GROUP BY em SQL)
+"""
+
+from datetime import datetime
+
+from app.core.security import get_password_hash
+from app.domain.investigation import Investigation, InvestigationStatus
+from app.domain.user import User
+from app.services.dashboard_statistics import get_dashboard_statistics
+
+
+async def _user(db_session, name: str) -> User:
+    user = User(
+        email=f"{name}@test.com",
+        username=name,
+        full_name=name,
+        hashed_password=get_password_hash("fakehash1"),
+    )
+    db_session.add(user)
+    await db_session.flush()
+    return user
+
+
+async def test_dashboard_statistics_aggregates_in_sql(db_session):
+    """Histograma mensal e distribuição por status por utilizador e globais"""
+    owner = await _user(db_session, "dashowner")
+    other = await _user(db_session, "dashother")
+    now = datetime.utcnow()
+    statuses = [
+        InvestigationStatus.COMPLETED,
+        InvestigationStatus.COMPLETED,
+        InvestigationStatus.FAILED,
+        InvestigationStatus.PENDING,
+    ]
+    for st in statuses:
+        db_session.add(Investigation(user_id=owner.id, target_name="Alvo", status=st))
+    # fora da janela de meses: só conta na distribuição por status
+    db_session.add(
+        Investigation(
+            user_id=owner.id,
+            target_name="Antiga",
+            status=InvestigationStatus.COMPLETED,
+            created_at=datetime(now.year - 3, 1, 15),
+        )
+    )
+    db_session.add(
+        Investigation(user_id=other.id, target_name="Outro", status=InvestigationStatus.FAILED)
+    )
+    await db_session.flush()
+
+    data = await get_dashboard_statistics(db_session, owner.id, months_back=3)
+
+    assert len(data["investigations_by_month"]) == 3
+    current = data["investigations_by_month"][-1]
+    assert (current["count"], current["completed"], current["failed"]) == (4, 2, 1)
+    assert sum(m["count"] for m in data["investigations_by_month"][:-1]) == 0
+    distribution = {d["name"]: d["value"] for d in data["status_distribution"]}
+    assert distribution == {"Concluídas": 3, "Em andamento": 0, "Pendentes": 1, "Falhas": 1}
+
+    data = await get_dashboard_statistics(db_session, owner.id, is_superuser=True, months_back=3)
+
+    current = data["investigations_by_month"][-1]
+    assert (current["count"], current["failed"]) == (5, 2)
+    assert sum(d["value"] for d in data["status_distribution"]) == 6
@@ -0,0 +1,129 @@
+"""
+Testes do pool SMTP e do envio em lote (app.services.email_dispatcher)
+"""
+
+import asyncio
+import gc
+import smtplib
+
+import pytest
+
+from app.services import email_dispatcher
+from app.services.email_service import EmailService, _compiled_template
+
+
+class FakeSMTP:
+    """Servidor SMTP falso: conta ligações/logins e regista as mensagens"""
+
+    instances: list = []
+    disconnect_next = False
+
+    def __init__(self, host, port, timeout=None):
+        self.logins = 0
+        self.sent = []
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        self.logins += 1
+
+    def send_message(self, msg):
+        if FakeSMTP.disconnect_next:
+            FakeSMTP.disconnect_next = False
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.sent.append(msg["To"])
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+async def fake_smtp(monkeypatch):
+    FakeSMTP.instances = []
+    FakeSMTP.disconnect_next = False
+    monkeypatch.setattr(email_dispatcher.smtplib, "SMTP", FakeSMTP)
+    monkeypatch.setattr(email_dispatcher.settings, "SMTP_USER", "user")
+    monkeypatch.setattr(email_dispatcher.settings, "SMTP_PASSWORD", "secret")
+    monkeypatch.setattr(email_dispatcher.settings, "SMTP_POOL_SIZE", 2)
+    yield FakeSMTP
+    await email_dispatcher.close_email_dispatcher()
+
+
+async def _send_completed(n: int) -> bool:
+    return await EmailService.send_investigation_completed(
+        f"user{n}@test.com", f"User {n}", {"id": n, "target_name": f"Alvo {n}"}
+    )
+
+
+async def test_concurrent_emails_share_authenticated_connections(fake_smtp):
+    """Uma rajada de emails usa no máximo SMTP_POOL_SIZE ligações, em lotes"""
+    results = await asyncio.gather(*(_send_completed(n) for n in range(20)))
+
+    assert all(results)
+    stats = email_dispatcher.get_email_stats()
+    assert stats["messages_sent"] == 20
+    assert stats["connections_opened"] <= 2
+    assert stats["batches"] < 20
+    assert sum(server.logins for server in fake_smtp.instances) == stats["connections_opened"]
+
+    # Ligações ficam no pool: novo email sem novo handshake
+    assert await _send_completed(99)
+    assert email_dispatcher.get_email_stats()["connections_opened"] == stats["connections_opened"]
+
+
+async def test_reconnects_once_when_server_closed_connection(fake_smtp):
+    """Ligação fechada pelo servidor é reaberta e a mensagem enviada"""
+    assert await _send_completed(1)
+    fake_smtp.disconnect_next = True
+
+    assert await _send_completed(2)
+    assert len(fake_smtp.instances) == 2
+    assert fake_smtp.instances[-1].sent == ["user2@test.com"]
+
+
+def test_each_event_loop_drains_and_drops_its_dispatcher(monkeypatch):
+    """Emails ainda em fila no fim de um asyncio.run são enviados e o loop é libertado"""
+    FakeSMTP.instances = []
+    FakeSMTP.disconnect_next = False
+    monkeypatch.setattr(email_dispatcher.smtplib, "SMTP", FakeSMTP)
+    monkeypatch.setattr(email_dispatcher.settings, "SMTP_USER", "user")
+    monkeypatch.setattr(email_dispatcher.settings, "SMTP_PASSWORD", "secret")
+
+    async def task_run(n: int) -> None:
+        # Envio sem await, como numa task que termina logo a seguir
+        asyncio.create_task(_send_completed(n))
+        await asyncio.sleep(0)
+        await email_dispatcher.drain_email_dispatcher()
+
+    try:
+        for n in range(3):
+            asyncio.run(task_run(n))
+        gc.collect()
+
+        assert len(email_dispatcher._loop_dispatchers) == 0
+        assert email_dispatcher.get_email_stats()["messages_sent"] == 3
+        assert email_dispatcher.get_email_stats()["connections_opened"] == 1
+    finally:
+        asyncio.run(email_dispatcher.close_email_dispatcher())
+
+
+async def test_missing_credentials_skip_smtp(monkeypatch):
+    """Sem credenciais não há ligação nem fila"""
+    monkeypatch.setattr(email_dispatcher.settings, "SMTP_USER", "")
+    assert await _send_completed(1) is False
+
+
+def test_templates_are_compiled_once():
+    """_load_template reutiliza o template compilado; ausente usa o fallback"""
+    _compiled_template.cache_clear()
+    first = EmailService._load_template("investigation_shared.html", {"user_name": "Ana"})
+    second = EmailService._load_template("investigation_shared.html", {"user_name": "Rui"})
+
+    assert "Ana" in first and "Rui" in second
+    assert _compiled_template.cache_info().hits == 1
+    assert "Bia" in EmailService._load_template("inexistente.html", {"user_name": "Bia"})
@@ -0,0 +1,119 @@
+"""
+Testes da exportação CSV/XLSX em streaming (app.services.excel_export)
+"""
+
+import csv
+from io import BytesIO, StringIO
+
+import pytest
+from openpyxl import load_workbook
+
+from app.core.database import AsyncSessionLocal
+from app.core.security import get_password_hash
+from app.domain.company import Company
+from app.domain.investigation import Investigation, InvestigationStatus
+from app.domain.legal_query import LegalQuery
+from app.domain.property import Property
+from app.domain.user import User
+from app.services import excel_export
+from app.services.excel_export import ExcelExportService, investigation_summary_fields
+
+
+async def _seed(db_session, n_properties: int = 5) -> dict:
+    user = User(
+        email="export@example.com",
+        username="exportuser",
+        full_name="Export User",
+        hashed_password=get_password_hash("testpass123"),
+    )
+    db_session.add(user)
+    await db_session.flush()
+    inv = Investigation(
+        user_id=user.id,
+        target_name="Fazenda Export",
+        target_cpf_cnpj="12345678901",
+        target_description="Descrição longa",
+        status=InvestigationStatus.COMPLETED,
+    )
+    db_session.add(inv)
+    await db_session.flush()
+    for i in range(n_properties):
+        db_session.add(
+            Property(
+                investigation_id=inv.id,
+                car_number=f"CAR-{i}",
+                property_name=f"Propriedade {i}",
+                area_hectares=10.0 + i,
+                state="MT",
+                data_source="car",
+            )
+        )
+    db_session.add(Company(investigation_id=inv.id, cnpj="00000000000191", data_source="receita"))
+    db_session.add(
+        LegalQuery(
+            investigation_id=inv.id,
+            provider="datajud",
+            query_type="processos",
+            query_params={"cpf": "123"},
+            result_count=7,
+        )
+    )
+    await db_session.commit()
+    return investigation_summary_fields(inv)
+
+
+async def _collect(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+@pytest.mark.asyncio
+async def test_stream_csv_summary_counts_in_sql(db_session):
+    summary = await _seed(db_session, n_properties=3)
+
+    data = await _collect(ExcelExportService.stream_investigation_csv(summary))
+
+    assert data.startswith(b"\xef\xbb\xbf")
+    rows = list(csv.reader(StringIO(data.decode("utf-8-sig"))))
+    assert rows[0] == excel_export.SUMMARY_CSV_HEADERS
+    assert rows[1][1] == "Fazenda Export"
+    assert rows[1][5:9] == ["3", "1", "1", "7"]
+
+
+@pytest.mark.asyncio
+async def test_stream_csv_section_yields_header_first_and_chunks(db_session, monkeypatch):
+    summary = await _seed(db_session, n_properties=50)
+    monkeypatch.setattr(excel_export, "EXPORT_STREAM_CHUNK_BYTES", 256)
+
+    stream = ExcelExportService.stream_investigation_csv(summary, "properties")
+    first = await stream.__anext__()
+    rest = [chunk async for chunk in stream]
+
+    # Cabeçalho enviado antes de qualquer consulta à BD
+    assert first.decode("utf-8-sig").strip() == ",".join(excel_export.PROPERTY_HEADERS)
+    assert len(rest) > 1
+    rows = list(csv.reader(StringIO(b"".join(rest).decode("utf-8"))))
+    assert len(rows) == 50
+    assert rows[0][1] == "CAR-0"
+
+
+@pytest.mark.asyncio
+async def test_stream_csv_rejects_unknown_section():
+    with pytest.raises(ValueError):
+        await _collect(ExcelExportService.stream_investigation_csv({"id": 1}, "users"))
+
+
+@pytest.mark.asyncio
+async def test_stream_excel_write_only_workbook(db_session):
+    summary = await _seed(db_session, n_properties=4)
+
+    data = await _collect(
+        ExcelExportService.stream_investigation_excel(summary, session_factory=AsyncSessionLocal)
+    )
+
+    wb = load_workbook(BytesIO(data))
+    assert wb.sheetnames == ["Resumo", "Propriedades", "Empresas", "Consultas Legais"]
+    props = list(wb["Propriedades"].iter_rows(values_only=True))
+    assert list(props[0]) == excel_export.PROPERTY_HEADERS
+    assert len(props) == 5
+    assert wb["Propriedades"].auto_filter.ref == "A1:H5"
+    assert wb["Consultas Legais"]["D2"].value == 7
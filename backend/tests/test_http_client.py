@@ -0,0 +1,68 @@
+"""
+Testes do pool HTTP partilhado (app.core.http_client)
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.http_client import close_http_clients, get_http_client, get_http_pool_stats
+
+
+async def _keepalive_server():
+    """Servidor HTTP/1.1 mínimo com keep-alive que define um cookie"""
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                if not head:
+                    break
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n" b"Set-Cookie: session=abc\r\n\r\nok"
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}"
+
+
+@pytest.mark.asyncio
+async def test_same_host_shares_client_and_other_host_does_not():
+    """Um cliente por host"""
+    a1 = get_http_client("https://servicos.car.gov.br/api/publico/imovel")
+    a2 = get_http_client("https://servicos.car.gov.br/outra/rota")
+    b = get_http_client("https://brasilapi.com.br/api/cnpj/v1/123")
+    insecure = get_http_client("https://servicos.car.gov.br/", verify=False)
+
+    assert a1 is a2
+    assert a1 is not b
+    assert a1 is not insecure
+    await close_http_clients()
+    assert a1.is_closed
+
+
+@pytest.mark.asyncio
+async def test_connection_is_reused_across_requests():
+    """Segundo pedido ao mesmo host reutiliza a ligação keep-alive"""
+    server, base_url = await _keepalive_server()
+    try:
+        client = get_http_client(base_url)
+        first = await client.get(f"{base_url}/a")
+        second = await client.get(f"{base_url}/b")
+
+        assert first.text == second.text == "ok"
+        stats = get_http_pool_stats()["127.0.0.1"]
+        assert stats["new"] >= 1
+        assert stats["reused"] >= 1
+        # Cliente partilhado não guarda cookies entre pedidos não relacionados
+        assert len(client.cookies) == 0
+    finally:
+        await close_http_clients()
+        server.close()
+        await server.wait_closed()
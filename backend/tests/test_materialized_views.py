@@ -0,0 +1,56 @@
+"""
+Testes do agendamento de refresh das materialized views (debounce + lock)
+"""
+
+from unittest.mock import patch
+
+import pytest
+import redis.asyncio as redis
+
+from app.services import materialized_views as mv
+
+
+@pytest.fixture
+async def mv_redis():
+    client = redis.from_url("redis://localhost:6379/3", decode_responses=True)
+    await client.flushdb()
+    yield client
+    await client.aclose()
+
+
+async def test_request_refresh_coalesces_burst(mv_redis):
+    """Rajada de pedidos agenda um único refresh por view"""
+    with patch("app.workers.tasks.refresh_materialized_views_task.apply_async") as apply_async:
+        first = await mv.request_refresh(redis_client=mv_redis)
+        for _ in range(5):
+            assert await mv.request_refresh(redis_client=mv_redis) == []
+        # Depois do refresh (pendente consumido) um novo pedido volta a agendar
+        await mv_redis.delete(mv.PENDING_KEY.format(view=mv.MV_NAME))
+        again = await mv.request_refresh(
+            [mv.MV_NAME, mv.MV_PROPERTIES_BY_STATE], redis_client=mv_redis
+        )
+
+    assert first == list(mv.DASHBOARD_VIEWS)
+    assert again == [mv.MV_NAME]
+    assert apply_async.call_count == 2
+    assert (
+        apply_async.call_args_list[0].kwargs["countdown"] == mv.settings.MV_REFRESH_DEBOUNCE_SECONDS
+    )
+    status = await mv.get_refresh_status(mv_redis)
+    assert all(state["pending"] for state in status.values())
+
+
+async def test_refresh_clears_pending_and_reschedules_when_locked(mv_redis):
+    """O refresh limpa o pendente; view com lock de outro processo é reagendada"""
+    await mv_redis.set(mv.LOCK_KEY.format(view=mv.MV_LEGAL_BY_PROVIDER), "outro-processo")
+    with patch("app.workers.tasks.refresh_materialized_views_task.apply_async") as apply_async:
+        await mv.request_refresh(redis_client=mv_redis)
+        results = await mv.refresh_materialized_views(redis_client=mv_redis)
+
+    # SQLite: refresh ignorado, mas o pedido foi consumido e o lock libertado
+    assert results == {view: False for view in mv.DASHBOARD_VIEWS}
+    status = await mv.get_refresh_status(mv_redis)
+    assert not status[mv.MV_NAME]["pending"]
+    assert status[mv.MV_LEGAL_BY_PROVIDER]["pending"]
+    assert await mv_redis.get(mv.LOCK_KEY.format(view=mv.MV_NAME)) is None
+    assert apply_async.call_args_list[-1].kwargs["args"] == [[mv.MV_LEGAL_BY_PROVIDER]]
@@ -308,6 +308,42 @@ def test_network_analyzer_centrality(db: Session, sample_investigation):
     assert 0.0 <= metrics.eigenvector_centrality <= 1.0
 
 
+def test_network_analyzer_centrality_matches_networkx():
+    """Brandes/closeness/eigenvector iguais às referências do networkx"""
+    import networkx as nx
+
+    from app.ml.models.network_analyzer import NetworkGraph
+
+    reference = nx.gnm_random_graph(40, 70, seed=7)
+    graph = NetworkGraph()
+    for node in reference.nodes:
+        graph.add_node(Node(node_id=str(node), node_type="person", name=str(node)))
+    for source, target in reference.edges:
+        graph.add_edge(Edge(source=str(source), target=str(target), relationship_type="partner"))
+    # Aresta repetida entre o mesmo par não altera as métricas
+    first_source, first_target = next(iter(reference.edges))
+    graph.add_edge(
+        Edge(source=str(first_source), target=str(first_target), relationship_type="related")
+    )
+
+    analyzer = NetworkAnalyzer(None)
+    node_ids, adjacency = graph.to_sparse()
+    betweenness, closeness = analyzer._brandes(adjacency)
+    eigenvector = analyzer._eigenvector(adjacency)
+
+    expected_betweenness = nx.betweenness_centrality(reference)
+    expected_eigenvector = nx.eigenvector_centrality(reference, max_iter=1000)
+    for i, node_id in enumerate(node_ids):
+        node = int(node_id)
+        distances = nx.single_source_shortest_path_length(reference, node)
+        distances.pop(node)
+        expected_closeness = len(distances) / sum(distances.values()) if distances else 0.0
+
+        assert betweenness[i] == pytest.approx(expected_betweenness[node], abs=1e-9)
+        assert closeness[i] == pytest.approx(expected_closeness, abs=1e-9)
+        assert eigenvector[i] == pytest.approx(expected_eigenvector[node], abs=1e-4)
+
+
 def test_network_analyzer_communities(db: Session, sample_investigation):
     """Teste da detecção de comunidades"""
     analyzer = NetworkAnalyzer(db)
@@ -539,6 +575,63 @@ def test_network_analysis_endpoint(
     assert "communities" in data
 
 
+async def test_network_engine_memoises_graph_until_data_changes(db_session):
+    """Consultas de caminho reutilizam o grafo; nova empresa invalida pelo stamp"""
+    from app.services.ml import network_analysis
+    from app.services.ml.network_analysis import NetworkAnalysisEngine
+
+    network_analysis.invalidate_network_cache()
+    user = User(
+        email="graph@test.com",
+        username="graphuser",
+        full_name="Graph User",
+        hashed_password=get_password_hash("fakehash1"),
+    )
+    db_session.add(user)
+    await db_session.flush()
+    inv = Investigation(user_id=user.id, target_name="Grafo", status=InvestigationStatus.PENDING)
+    db_session.add(inv)
+    await db_session.flush()
+    for i in range(2):
+        db_session.add(
+            Property(
+                investigation_id=inv.id,
+                property_name=f"Imóvel {i}",
+                owner_cpf_cnpj="52998224725",
+                data_source="TEST_ML",
+            )
+        )
+    await db_session.flush()
+
+    analysis = await NetworkAnalysisEngine.analyze_network(db_session, inv.id)
+    snapshot = network_analysis._graph_cache[inv.id]
+    path = await NetworkAnalysisEngine.find_shortest_path(
+        db_session, inv.id, f"inv:{inv.id}", "doc:52998224725"
+    )
+    connections = await NetworkAnalysisEngine.find_all_connections(
+        db_session, inv.id, "doc:52998224725", max_depth=1
+    )
+
+    assert analysis.num_nodes == 4
+    assert len(path) == 3
+    assert {c["label"] for c in connections} == {"Imóvel 0", "Imóvel 1"}
+    assert network_analysis._graph_cache[inv.id] is snapshot
+
+    inv_id = inv.id
+    company = Company(investigation_id=inv_id, cnpj="11222333000181", data_source="TEST_ML")
+    db_session.add(company)
+    await db_session.flush()
+    company_node = f"comp:{company.id}"
+    db_session.expire_all()  # cada pedido HTTP usa uma sessão nova
+
+    path = await NetworkAnalysisEngine.find_shortest_path(
+        db_session, inv_id, company_node, "doc:11222333000181"
+    )
+    assert path == [company_node, "doc:11222333000181"]
+    assert network_analysis._graph_cache[inv_id] is not snapshot
+    assert await NetworkAnalysisEngine.find_shortest_path(db_session, 999, "a", "b") is None
+
+
 def test_ocr_extract_from_image_endpoint(client: TestClient, auth_headers, sample_image):
     """Teste do endpoint OCR que recebe upload de imagem"""
     buffer = io.BytesIO()
@@ -0,0 +1,76 @@
+"""
+Testes do extrator de entidades numa só passagem (app.services.ocr.entities)
+"""
+
+import re
+
+from app.services.ocr import entities
+from app.services.ocr.ocr_engine import OCREngine
+from app.services.ocr_service import OCRService
+
+TEXT = """
+Matrícula: 12345 — CCIR: 950.123.456.789-0
+Proprietário CPF 529.982.247-25, CNPJ 11.222.333/0001-81
+Área de 150,5 ha avaliada em R$ 1.200.000,00 em 05/03/2024
+Contato: fulano@example.com
+"""
+
+
+def test_single_regex_matches_per_pattern_findall():
+    legacy = {}
+    for name, pattern in entities.SERVICE_PATTERNS.items():
+        found = re.findall(pattern, TEXT, re.IGNORECASE)
+        if found:
+            legacy[name] = set(found)
+
+    grouped = entities.SERVICE_EXTRACTOR.grouped(TEXT)
+
+    assert {name: set(values) for name, values in grouped.items()} == legacy
+    # Grupo de captura: devolve só o número, como re.findall
+    assert grouped["ccir"] == ["950.123.456.789-0"]
+    assert grouped["matricula"] == ["12345"]
+
+
+def test_unformatted_cpf_is_not_also_a_phone():
+    grouped = entities.SERVICE_EXTRACTOR.grouped("CPF 52998224725")
+
+    assert grouped == {"cpf": ["52998224725"]}
+
+
+def test_matches_carry_page_and_offset():
+    pages = ["sem documentos", "titular 529.982.247-25", "CNPJ 11222333000181"]
+
+    matches = entities.DOCUMENT_EXTRACTOR.extract(pages)
+
+    assert [(m.type, m.page) for m in matches] == [("cpf", 2), ("cnpj", 3)]
+    assert pages[1][matches[0].start : matches[0].end] == "529.982.247-25"
+
+
+def test_vectorised_check_digits():
+    docs = ["52998224725", "12345678900", "11111111111", "5299822472"]
+    assert entities.valid_cpfs(docs).tolist() == [True, False, False, False]
+
+    docs = ["11222333000181", "12345678000190", "00000000000000", "11444777000161"]
+    assert entities.valid_cnpjs(docs).tolist() == [True, False, False, True]
+
+
+def test_non_ascii_digits_are_not_documents():
+    arabic_indic = "١٢٣٤٥٦٧٨٩٠٩"
+
+    assert entities.filter_valid([arabic_indic], "cpf") == []
+    assert OCRService.extract_cpf_cnpj(f"CPF {arabic_indic}") == {"cpf": [], "cnpj": []}
+    assert entities.SERVICE_EXTRACTOR.grouped("MATRÍCULA: 12345") == {"matricula": ["12345"]}
+
+
+def test_extract_cpf_cnpj_keeps_only_valid_documents():
+    text = "CPF 529.982.247-25 e 123.456.789-00; CNPJ 11.222.333/0001-81 e 12.345.678/0001-90"
+
+    result = OCRService.extract_cpf_cnpj(text)
+
+    assert result == {"cpf": ["52998224725"], "cnpj": ["11222333000181"]}
+
+
+def test_engine_uses_shared_extractor_and_cleaning():
+    found = OCREngine._extract_entities("Área total: 35 hectares. Data 1/2/2020.")
+
+    assert found == {"hectare": ["35 hectares"], "date": ["1/2/2020"]}
@@ -0,0 +1,112 @@
+"""
+Testes do executor OCR por página (app.services.ocr.executor)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.core.config import settings
+from app.services.ocr import executor as ocr_executor
+
+
+class FakePages:
+    """Substitui rasterização + Tesseract: regista páginas e concorrência máxima"""
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.started = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, pdf_path, page_number, dpi, lang, config, preprocess):
+        with self._lock:
+            self.started.append(page_number)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return f"pagina {page_number} ({dpi} dpi, {lang})"
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    fake = FakePages()
+    pool = ThreadPoolExecutor(max_workers=8)
+    monkeypatch.setattr(ocr_executor, "get_ocr_pool", lambda: pool)
+    monkeypatch.setattr(ocr_executor, "_ocr_pdf_page", fake)
+    monkeypatch.setattr(ocr_executor, "pdf_page_count", lambda path: 12)
+    monkeypatch.setattr(settings, "OCR_JOB_MAX_PARALLEL_PAGES", 3)
+    yield fake
+    pool.shutdown(wait=True, cancel_futures=True)
+
+
+@pytest.mark.asyncio
+async def test_pages_in_document_order_with_bounded_parallelism(pages):
+    texts = await ocr_executor.ocr_pdf_pages("/tmp/doc.pdf", dpi=150)
+
+    assert texts == [f"pagina {n} (150 dpi, por)" for n in range(1, 13)]
+    assert 1 < pages.max_running <= 3
+
+
+@pytest.mark.asyncio
+async def test_max_pages_caps_the_job(pages):
+    texts = await ocr_executor.ocr_pdf_pages("/tmp/doc.pdf", max_pages=4)
+
+    assert len(texts) == 4
+    assert sorted(pages.started) == [1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_timeout_cancels_queued_pages(pages):
+    pages.delay = 0.2
+
+    with pytest.raises(ocr_executor.OCRJobCancelled):
+        await ocr_executor.ocr_pdf_pages("/tmp/doc.pdf", timeout=0.05)
+
+    time.sleep(0.3)
+    # Só as páginas já em curso chegaram ao pool
+    assert len(pages.started) == 3
+
+
+def test_sync_variant_keeps_order_and_window(pages):
+    texts = ocr_executor.ocr_pdf_pages_sync("/tmp/doc.pdf", lang="eng", max_pages=7)
+
+    assert texts == [f"pagina {n} (300 dpi, eng)" for n in range(1, 8)]
+    assert pages.max_running <= 3
+
+
+def test_sync_variant_timeout(pages):
+    pages.delay = 0.2
+
+    with pytest.raises(ocr_executor.OCRJobCancelled):
+        ocr_executor.ocr_pdf_pages_sync("/tmp/doc.pdf", timeout=0.05)
+
+
+def _exit_or_echo(image_bytes, lang, config, preprocess):
+    # Corre no processo do pool (importado por nome): b"die" mata o worker
+    if image_bytes == b"die":
+        os._exit(1)
+    return lang
+
+
+def test_broken_pool_is_replaced_on_next_call(monkeypatch):
+    """Worker morto (OOM) falha o job em curso; a chamada seguinte usa um pool novo"""
+    monkeypatch.setattr(settings, "OCR_WORKERS", 1)
+    monkeypatch.setattr(settings, "OCR_WORKER_MAX_MEMORY_MB", 0)
+    monkeypatch.setattr(ocr_executor, "_ocr_image_bytes", _exit_or_echo)
+    ocr_executor.close_ocr_pool()
+    try:
+        with pytest.raises(BrokenProcessPool):
+            asyncio.run(ocr_executor.ocr_image(b"die"))
+
+        assert asyncio.run(ocr_executor.ocr_image(b"ok", lang="eng")) == "eng"
+    finally:
+        ocr_executor.close_ocr_pool()
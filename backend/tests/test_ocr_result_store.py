@@ -0,0 +1,99 @@
+"""
+Testes do cache de resultados OCR por conteúdo (app.services.ocr.result_store)
+"""
+
+import os
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.ocr import result_store
+from app.services.ocr_service import OCRService
+
+
+class FakeUpload:
+    def __init__(self, data: bytes):
+        self._data = data
+
+    async def read(self) -> bytes:
+        return self._data
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "OCR_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "OCR_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "OCR_CACHE_MAX_BYTES", 10 * 1024 * 1024)
+    monkeypatch.setattr(result_store, "_tesseract_version", "5.3.0")
+    monkeypatch.setattr(result_store, "_approx_bytes", None)
+    monkeypatch.setattr(
+        result_store, "_stats", {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+    )
+    return tmp_path
+
+
+def test_key_covers_content_and_engine_settings(store, monkeypatch):
+    key = result_store.ocr_cache_key(b"matricula", lang="por", config="--psm 6")
+
+    assert key == result_store.ocr_cache_key(b"matricula", lang="por", config="--psm 6")
+    assert key != result_store.ocr_cache_key(b"matricula2", lang="por", config="--psm 6")
+    assert key != result_store.ocr_cache_key(b"matricula", lang="eng", config="--psm 6")
+    assert key != result_store.ocr_cache_key(b"matricula", lang="por", config="--psm 3")
+    monkeypatch.setattr(result_store, "_tesseract_version", "4.1.1")
+    assert key != result_store.ocr_cache_key(b"matricula", lang="por", config="--psm 6")
+
+
+def test_put_get_and_hit_rate(store):
+    payload = {"text": "a\n\nb", "pages": ["a", "b"], "entities": {"cpf": []}, "method": "ocr"}
+    result_store.put("ab" * 32, payload)
+
+    assert result_store.get("ab" * 32) == payload
+    assert result_store.get("cd" * 32) is None
+    stats = result_store.get_stats()
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_lru_eviction_keeps_recently_used(store, monkeypatch):
+    page = "x" * 2000
+    for i, key in enumerate(("aa" * 32, "bb" * 32, "cc" * 32)):
+        result_store.put(key, {"text": page, "pages": [page], "entities": {}, "method": "ocr"})
+        path = store / key[:2] / f"{key}.json"
+        os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+    # "aa" passa a ser o mais recente
+    assert result_store.get("aa" * 32) is not None
+
+    monkeypatch.setattr(settings, "OCR_CACHE_MAX_BYTES", 9000)
+    result_store.put("dd" * 32, {"text": "", "pages": [], "entities": {}, "method": "ocr"})
+
+    assert result_store.get("bb" * 32) is None
+    assert result_store.get("aa" * 32) is not None
+    assert result_store.get_stats()["evictions"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_process_document_reuses_result_for_same_bytes(store, monkeypatch):
+    calls = []
+
+    async def fake_extract(pdf_bytes, use_ocr=True):
+        calls.append(len(pdf_bytes))
+        return {
+            "text": "CPF 529.982.247-25\n\nfim",
+            "pages": ["CPF 529.982.247-25", "fim"],
+            "page_count": 2,
+            "processing_time": 0.0,
+            "method": "ocr",
+        }
+
+    monkeypatch.setattr(OCRService, "extract_text_from_pdf", staticmethod(fake_extract))
+
+    first = await OCRService.process_document(FakeUpload(b"%PDF-certidao"), "a.pdf")
+    second = await OCRService.process_document(FakeUpload(b"%PDF-certidao"), "outra.pdf")
+
+    assert calls == [len(b"%PDF-certidao")]
+    assert first.metadata["cache"] == "miss"
+    assert second.metadata["cache"] == "hit"
+    assert second.text == first.text
+    assert second.pages == ["CPF 529.982.247-25", "fim"]
+    assert second.entities == first.entities
@@ -0,0 +1,121 @@
+"""
+Testes da renderização de PDF com cache por conteúdo (app.services.pdf_render)
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services import pdf_render
+
+INVESTIGATION = {
+    "id": 1,
+    "target_name": "Fazenda Teste",
+    "status": "completed",
+    "updated_at": "2026-01-01T10:00:00",
+    "properties_found": 1,
+}
+PROPERTIES = [{"name": "Sítio", "area_ha": 12.5, "source": "car"}]
+# Stamp de investigation_pdf_version: (updated_at, imóveis, ..., consultas legais)
+VERSION = ("2026-01-01T10:00:00", 1, "2026-01-01T09:00:00", 0, None, 0, None)
+
+
+@pytest.fixture
+def renders(monkeypatch, tmp_path):
+    """Renderização falsa em thread (sem pool de processos) com cache em tmp_path"""
+    calls = []
+
+    def fake_render(investigation, properties, companies, legal_queries, watermark_lines):
+        calls.append(investigation["id"])
+        time.sleep(0.05)
+        return f"%PDF-{investigation['updated_at']}-{watermark_lines}".encode()
+
+    monkeypatch.setattr(settings, "PDF_RENDER_WORKERS", 0)
+    monkeypatch.setattr(settings, "PDF_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(pdf_render, "_render_pdf_bytes", fake_render)
+    return calls
+
+
+def _loader(investigation=INVESTIGATION, loads=None):
+    """load_payloads que regista cada carregamento dos dados"""
+
+    async def load():
+        if loads is not None:
+            loads.append(investigation["id"])
+        return investigation, PROPERTIES, [], []
+
+    return load
+
+
+@pytest.mark.asyncio
+async def test_repeat_render_reuses_cached_bytes(renders, tmp_path):
+    loads = []
+    first = await pdf_render.render_investigation_pdf(1, VERSION, _loader(loads=loads))
+    second = await pdf_render.render_investigation_pdf(1, VERSION, _loader(loads=loads))
+
+    assert first == second
+    assert renders == [1]
+    # Hit pela chave barata: os dados da investigação não voltam a ser carregados
+    assert loads == [1]
+    key = pdf_render.pdf_cache_key(1, VERSION)
+    assert (tmp_path / f"{key}.pdf").read_bytes() == first
+
+
+@pytest.mark.asyncio
+async def test_data_template_or_watermark_change_renders_again(renders, monkeypatch):
+    await pdf_render.render_investigation_pdf(1, VERSION, _loader())
+    updated = {**INVESTIGATION, "updated_at": "2026-01-02T10:00:00"}
+    await pdf_render.render_investigation_pdf(
+        1, ("2026-01-02T10:00:00",) + VERSION[1:], _loader(updated)
+    )
+    await pdf_render.render_investigation_pdf(1, VERSION, _loader(), watermark_lines=["convidado"])
+    monkeypatch.setattr(pdf_render, "PDF_TEMPLATE_VERSION", "test-2")
+    await pdf_render.render_investigation_pdf(1, VERSION, _loader())
+
+    assert len(renders) == 4
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_render(renders):
+    results = await asyncio.gather(
+        *(pdf_render.render_investigation_pdf(1, VERSION, _loader()) for _ in range(5))
+    )
+
+    assert len(set(results)) == 1
+    assert renders == [1]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_request_does_not_cancel_waiters(renders):
+    started = asyncio.Event()
+    load = _loader()
+
+    async def leader_load():
+        started.set()
+        return await load()
+
+    leader = asyncio.create_task(pdf_render.render_investigation_pdf(1, VERSION, leader_load))
+    await started.wait()
+    waiters = [
+        asyncio.create_task(pdf_render.render_investigation_pdf(1, VERSION, _loader()))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    results = await asyncio.gather(*waiters)
+
+    assert leader.cancelled()
+    assert len(set(results)) == 1
+    assert len(renders) == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_rendered_again(renders, monkeypatch):
+    await pdf_render.render_investigation_pdf(1, VERSION, _loader())
+    monkeypatch.setattr(settings, "PDF_CACHE_TTL_SECONDS", -1)
+    await pdf_render.render_investigation_pdf(1, VERSION, _loader())
+
+    assert len(renders) == 2
@@ -0,0 +1,147 @@
+"""
+Testes do backend de filas com Redis Streams (QUEUE_BACKEND=streams)
+"""
+
+import pytest
+
+from app.core.queue import ScraperType, Task, TaskPriority, TaskStatus
+from app.core.queue_streams import StreamQueueManager
+
+
+@pytest.fixture
+async def stream_queue():
+    """Fixture do gerenciador de filas com streams"""
+    qm = StreamQueueManager("redis://localhost:6379/2")  # DB 2 para testes de streams
+    await qm.connect()
+    await qm.redis_client.flushdb()
+
+    yield qm
+
+    await qm.disconnect()
+
+
+def _task(task_id: str, priority: TaskPriority = TaskPriority.NORMAL) -> Task:
+    return Task(
+        id=task_id,
+        type=ScraperType.CAR,
+        priority=priority,
+        investigation_id="inv_streams",
+        params={"name": "Fazenda Teste"},
+    )
+
+
+@pytest.mark.asyncio
+async def test_stream_dequeue_respects_priority(stream_queue):
+    """Um XREADGROUP serve as tasks por prioridade"""
+    await stream_queue.enqueue(_task("low", TaskPriority.LOW))
+    await stream_queue.enqueue(_task("critical", TaskPriority.CRITICAL))
+    await stream_queue.enqueue(_task("normal", TaskPriority.NORMAL))
+
+    order = [(await stream_queue.dequeue_blocking(ScraperType.CAR, timeout=1)).id for _ in range(3)]
+
+    assert order == ["critical", "normal", "low"]
+    assert await stream_queue.dequeue(ScraperType.CAR) is None
+
+
+@pytest.mark.asyncio
+async def test_stream_enqueue_many(stream_queue):
+    """Lote entra nos streams e fica disponível para o consumer group"""
+    tasks = [_task("b1", TaskPriority.LOW), _task("b2", TaskPriority.HIGH)]
+
+    assert await stream_queue.enqueue_many(tasks) == ["b1", "b2"]
+    assert (await stream_queue.dequeue(ScraperType.CAR)).id == "b2"
+    assert (await stream_queue.dequeue(ScraperType.CAR)).id == "b1"
+
+
+@pytest.mark.asyncio
+async def test_stream_entry_pending_until_complete(stream_queue):
+    """Entrada fica pendente até complete_task e é confirmada depois"""
+    await stream_queue.enqueue(_task("t1"))
+    task = await stream_queue.dequeue(ScraperType.CAR)
+    stream_key = stream_queue._get_stream_key(ScraperType.CAR, TaskPriority.NORMAL)
+
+    pending = await stream_queue.redis_client.xpending(stream_key, stream_queue.GROUP_NAME)
+    assert task.status == TaskStatus.RUNNING
+    assert pending["pending"] == 1
+    assert await stream_queue.queue_length(ScraperType.CAR, TaskPriority.NORMAL) == 0
+
+    await stream_queue.complete_task("t1", {"ok": True})
+
+    pending = await stream_queue.redis_client.xpending(stream_key, stream_queue.GROUP_NAME)
+    assert pending["pending"] == 0
+    assert await stream_queue.redis_client.xlen(stream_key) == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_reclaims_tasks_from_dead_consumer(stream_queue):
+    """Task entregue a um worker que morreu volta a ser servida (XAUTOCLAIM)"""
+    await stream_queue.enqueue(_task("orphan"))
+    await stream_queue.dequeue(ScraperType.CAR)
+
+    # Outro processo, sem buffer local, recupera a entrada pendente
+    survivor = StreamQueueManager("redis://localhost:6379/2")
+    survivor.CONSUMER_NAME = "survivor"
+    survivor.CLAIM_IDLE_MS = 0
+    await survivor.connect()
+    try:
+        assert await survivor.reclaim_stale_tasks() == 1
+        task = await survivor.dequeue(ScraperType.CAR)
+        assert task.id == "orphan"
+        await survivor.complete_task("orphan", {})
+    finally:
+        await survivor.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_stream_cancelled_task_is_skipped(stream_queue):
+    """Task cancelada sai do stream e não é entregue"""
+    await stream_queue.enqueue(_task("cancel_me"))
+    await stream_queue.enqueue(_task("keep"))
+
+    assert await stream_queue.cancel_task("cancel_me")
+    task = await stream_queue.dequeue(ScraperType.CAR)
+
+    assert task.id == "keep"
+    stats = await stream_queue.get_queue_stats(ScraperType.CAR)
+    assert stats[ScraperType.CAR.value]["total"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_later_critical_task_is_served_first(stream_queue):
+    """Nada fica retido localmente: uma task CRITICAL posterior passa à frente"""
+    await stream_queue.enqueue(_task("low1", TaskPriority.LOW))
+    await stream_queue.enqueue(_task("low2", TaskPriority.LOW))
+    assert (await stream_queue.dequeue(ScraperType.CAR)).id == "low1"
+
+    await stream_queue.enqueue(_task("urgent", TaskPriority.CRITICAL))
+
+    assert await stream_queue.queue_length(ScraperType.CAR, TaskPriority.LOW) == 1
+    assert (await stream_queue.dequeue(ScraperType.CAR)).id == "urgent"
+    assert (await stream_queue.dequeue(ScraperType.CAR)).id == "low2"
+
+
+@pytest.mark.asyncio
+async def test_stream_started_task_is_not_rerun(stream_queue):
+    """Entrada duplicada de uma task em execução ou terminada é confirmada, não executada"""
+    await stream_queue.enqueue(_task("once"))
+    assert (await stream_queue.dequeue(ScraperType.CAR)).id == "once"
+    stream_key = stream_queue._get_stream_key(ScraperType.CAR, TaskPriority.NORMAL)
+    await stream_queue.redis_client.xadd(stream_key, {"task_id": "once"})
+
+    assert await stream_queue.dequeue(ScraperType.CAR) is None
+    await stream_queue.complete_task("once", {})
+    assert await stream_queue.redis_client.xlen(stream_key) == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_reclaim_skips_finished_tasks(stream_queue):
+    """XAUTOCLAIM só devolve ao stream tasks por terminar"""
+    await stream_queue.enqueue(_task("done"))
+    await stream_queue.dequeue(ScraperType.CAR)
+    task = await stream_queue.get_task("done")
+    task.status = TaskStatus.COMPLETED
+    await stream_queue._save_task(task)
+
+    stream_queue.CLAIM_IDLE_MS = 0
+    assert await stream_queue.reclaim_stale_tasks() == 0
+    assert await stream_queue.dequeue(ScraperType.CAR) is None
@@ -97,6 +97,96 @@ async def test_enqueue_task(queue_manager, sample_task):
     assert queue_size == 1
 
 
+@pytest.mark.asyncio
+async def test_enqueue_many_single_progress_write(queue_manager):
+    """Lote enfileira todas as tasks e grava o progresso uma vez por investigação"""
+    tasks = [
+        Task(
+            id=f"batch_{st.value}",
+            type=st,
+            priority=TaskPriority.HIGH,
+            investigation_id="inv_batch",
+            params={},
+        )
+        for st in ScraperType
+    ]
+
+    enqueued = await queue_manager.enqueue_many(tasks)
+
+    assert enqueued == [t.id for t in tasks]
+    stats = await queue_manager.get_queue_stats()
+    assert all(stats[st.value]["by_priority"]["HIGH"] == 1 for st in ScraperType)
+    progress = await queue_manager.get_investigation_progress("inv_batch")
+    assert progress["total_tasks"] == len(ScraperType)
+    assert set(progress["tasks"].values()) == {TaskStatus.PENDING.value}
+
+
+@pytest.mark.asyncio
+async def test_enqueue_many_skips_open_circuit(queue_manager):
+    """Tipos com circuit breaker aberto ficam fora do lote"""
+    for _ in range(5):
+        await queue_manager._record_failure(ScraperType.CAR)
+    tasks = [
+        Task(
+            id="b_car",
+            type=ScraperType.CAR,
+            priority=TaskPriority.NORMAL,
+            investigation_id="inv_b",
+            params={},
+        ),
+        Task(
+            id="b_incra",
+            type=ScraperType.INCRA,
+            priority=TaskPriority.NORMAL,
+            investigation_id="inv_b",
+            params={},
+        ),
+    ]
+
+    assert await queue_manager.enqueue_many(tasks) == ["b_incra"]
+    assert await queue_manager.get_task("b_car") is None
+    progress = await queue_manager.get_investigation_progress("inv_b")
+    assert list(progress["tasks"]) == ["b_incra"]
+
+
+@pytest.mark.asyncio
+async def test_enqueue_many_keeps_concurrent_progress_updates(queue_manager):
+    """Progresso gravado por outro escritor durante o lote não é sobrescrito"""
+    await queue_manager._update_investigation_progress("inv_race", "outra", TaskStatus.RUNNING)
+    prepare_push = queue_manager._prepare_push
+
+    async def concurrent_writer(tasks):
+        # Entre a verificação dos circuit breakers e a escrita do lote
+        await queue_manager._update_investigation_progress(
+            "inv_race", "outra", TaskStatus.COMPLETED
+        )
+        await prepare_push(tasks)
+
+    queue_manager._prepare_push = concurrent_writer
+    tasks = [
+        Task(
+            id=f"race_{i}",
+            type=ScraperType.CAR,
+            priority=TaskPriority.NORMAL,
+            investigation_id="inv_race",
+            params={},
+        )
+        for i in range(2)
+    ]
+
+    assert await queue_manager.enqueue_many(tasks) == ["race_0", "race_1"]
+
+    progress = await queue_manager.get_investigation_progress("inv_race")
+    assert progress["tasks"] == {
+        "outra": TaskStatus.COMPLETED.value,
+        "race_0": TaskStatus.PENDING.value,
+        "race_1": TaskStatus.PENDING.value,
+    }
+    assert progress["total_tasks"] == 3
+    assert progress["completed_tasks"] == 1
+    assert progress["running_tasks"] == 0
+
+
 @pytest.mark.asyncio
 async def test_enqueue_multiple_priorities(queue_manager):
     """Testa enfileiramento com diferentes prioridades"""
@@ -164,6 +254,59 @@ async def test_dequeue_empty_queue(queue_manager):
     assert task is None
 
 
+@pytest.mark.asyncio
+async def test_dequeue_blocking_respects_priority(queue_manager):
+    """Dequeue bloqueante devolve a fila de maior prioridade primeiro"""
+    for task_id, priority in [
+        ("task_bg", TaskPriority.BACKGROUND),
+        ("task_crit", TaskPriority.CRITICAL),
+    ]:
+        await queue_manager.enqueue(
+            Task(
+                id=task_id,
+                type=ScraperType.CAR,
+                priority=priority,
+                investigation_id="inv_1",
+                params={},
+            )
+        )
+
+    task = await queue_manager.dequeue_blocking(ScraperType.CAR, timeout=1)
+
+    assert task is not None
+    assert task.id == "task_crit"
+    assert task.status == TaskStatus.RUNNING
+
+
+@pytest.mark.asyncio
+async def test_dequeue_blocking_wakes_on_enqueue(queue_manager):
+    """Worker bloqueado acorda assim que uma task é enfileirada"""
+    waiter = asyncio.create_task(queue_manager.dequeue_blocking(ScraperType.CAR, timeout=5))
+    await asyncio.sleep(0.1)
+
+    await queue_manager.enqueue(
+        Task(
+            id="task_late",
+            type=ScraperType.CAR,
+            priority=TaskPriority.NORMAL,
+            investigation_id="inv_1",
+            params={},
+        )
+    )
+    task = await asyncio.wait_for(waiter, timeout=2)
+
+    assert task is not None
+    assert task.id == "task_late"
+
+
+@pytest.mark.asyncio
+async def test_dequeue_blocking_empty_queue_times_out(queue_manager):
+    """Fila vazia: devolve None após o timeout"""
+    task = await queue_manager.dequeue_blocking(ScraperType.CAR, timeout=0.2)
+
+    assert task is None
+
+
 # ==================== Testes de Conclusão e Falha ====================
 
 
@@ -0,0 +1,99 @@
+"""
+Testes do rate limiter GCRA (script Lua) e da cache de RPM por API key
+"""
+
+import hashlib
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.rate_limiting import RateLimiter, acquire_gcra
+from app.core.redis_pool import close_redis_pools
+from app.services import api_key_cache
+
+
+def _request(path: str, api_key: str = None) -> SimpleNamespace:
+    headers = {"X-API-Key": api_key} if api_key else {}
+    return SimpleNamespace(
+        headers=headers,
+        state=SimpleNamespace(),
+        url=SimpleNamespace(path=path),
+        client=SimpleNamespace(host="10.0.0.1"),
+    )
+
+
+@pytest.fixture
+async def limiter():
+    api_key_cache.clear_api_key_rpm_cache()
+    rl = RateLimiter("redis://localhost:6379/4")  # DB 4 para testes de rate limiting
+    await rl.connect()
+    await rl.redis_client.flushdb()
+    yield rl
+    await rl.disconnect()
+    await close_redis_pools()
+    api_key_cache.clear_api_key_rpm_cache()
+
+
+async def test_gcra_allows_limit_then_rejects(limiter):
+    """Limite do endpoint esgota-se; recusas não consomem e o âmbito global é separado"""
+    login = _request("/api/v1/auth/login")
+    results = [await limiter.is_allowed(login) for _ in range(5)]
+
+    assert all(allowed for allowed, _ in results)
+    assert [info["remaining"] for _, info in results] == [4, 3, 2, 1, 0]
+
+    key = "ratelimit:ip:10.0.0.1:/api/v1/auth/login"
+    tat = await limiter.redis_client.get(key)
+    allowed, info = await limiter.is_allowed(login)
+    assert not allowed
+    # Intervalo de emissão 60s/5 = 12s até haver de novo um pedido disponível
+    assert 1 <= info["retry_after"] <= 12
+    assert await limiter.redis_client.get(key) == tat
+
+    allowed, info = await limiter.is_allowed(_request("/api/v1/properties"))
+    assert allowed
+    assert info["limit"] == limiter.DEFAULT_LIMITS["anonymous"]
+
+
+async def test_gcra_script_runs_by_sha(limiter, monkeypatch):
+    """is_allowed e acquire_gcra partilham o script registado: EVALSHA, sem reenviar o corpo"""
+    client = limiter.redis_client
+    shas = []
+    evalsha = client.evalsha
+
+    async def spy_evalsha(sha, numkeys, *args):
+        shas.append(sha)
+        return await evalsha(sha, numkeys, *args)
+
+    monkeypatch.setattr(client, "evalsha", spy_evalsha)
+    eval_mock = AsyncMock()
+    monkeypatch.setattr(client, "eval", eval_mock)
+
+    for _ in range(3):
+        allowed, _ = await limiter.is_allowed(_request("/api/v1/properties"))
+        assert allowed
+    result = await acquire_gcra(client, "ratelimit:bulk:teste", 10, 1000)
+
+    assert result.allowed and result.remaining == 9
+    # Só um NOSCRIPT (servidor sem o script) repete o EVALSHA após SCRIPT LOAD
+    assert len(shas) >= 4 and len(set(shas)) == 1
+    eval_mock.assert_not_awaited()
+
+
+async def test_api_key_override_is_cached_per_process(limiter):
+    """O override RPM é lido uma vez e reutilizado; set_api_key_rpm actualiza a cache local"""
+    key_hash = hashlib.sha256(b"chave-cache").hexdigest()
+    client = SimpleNamespace(get=AsyncMock(return_value="7"))
+
+    assert await api_key_cache.get_api_key_rpm(key_hash, client) == 7
+    assert await api_key_cache.get_api_key_rpm(key_hash, client) == 7
+    assert client.get.await_count == 1
+
+    request = _request("/api/v1/properties", api_key="chave-cache")
+    assert await limiter._resolve_limit(request) == 7
+    await api_key_cache.set_api_key_rpm(key_hash, 9)
+    assert await limiter._resolve_limit(request) == 9
+    await api_key_cache.delete_api_key_rpm(key_hash)
+    assert await limiter._resolve_limit(request) == limiter.DEFAULT_LIMITS["anonymous"]
+    assert client.get.await_count == 1
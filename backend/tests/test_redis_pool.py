@@ -0,0 +1,79 @@
+"""
+Testes do pool Redis partilhado (app.core.redis_pool)
+"""
+
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import redis_pool
+from app.core.cache import CacheService
+from app.core.config import settings
+from app.core.rate_limiting import RateLimiter
+from app.services.api_key_cache import delete_api_key_rpm, set_api_key_rpm
+
+
+@pytest.fixture(autouse=True)
+async def _close_pools():
+    yield
+    await redis_pool.close_redis_pools()
+
+
+async def test_clients_share_one_pool_per_purpose(monkeypatch):
+    """Clientes da mesma finalidade partilham o pool; o DB lógico vem da finalidade"""
+    monkeypatch.setattr(settings, "REDIS_CACHE_DB", 1)
+    a = redis_pool.get_redis("rate_limit")
+    b = redis_pool.get_redis("rate_limit")
+    cache = redis_pool.get_redis("cache")
+
+    assert a.connection_pool is b.connection_pool
+    assert cache.connection_pool is not a.connection_pool
+    assert cache.connection_pool.connection_kwargs["db"] == 1
+    assert cache.connection_pool.connection_kwargs["socket_timeout"] is None
+    assert a.connection_pool.connection_kwargs["socket_timeout"] == settings.REDIS_SOCKET_TIMEOUT
+
+    service = CacheService(l1_enabled=False)
+    await service.connect()
+    assert service.redis_client.connection_pool is cache.connection_pool
+    await service.disconnect()
+
+    with pytest.raises(ValueError):
+        redis_pool.get_redis("desconhecida")
+
+
+async def test_api_key_rpm_reuses_pooled_connection():
+    """Gravações repetidas reutilizam a mesma ligação e o RateLimiter lê o override"""
+    for rpm in (10, 20, 30):
+        await set_api_key_rpm("pool-test", rpm)
+
+    stats = redis_pool.get_redis_pool_stats()
+    assert stats["rate_limit"]["in_use"] == 0
+    assert stats["rate_limit"]["idle"] == 1
+
+    limiter = RateLimiter()
+    request = SimpleNamespace(
+        headers={"X-API-Key": "chave"},
+        state=SimpleNamespace(),
+        url=SimpleNamespace(path="/api/v1/properties"),
+    )
+    await set_api_key_rpm(hashlib.sha256(b"chave").hexdigest(), 42)
+    assert await limiter._resolve_limit(request) == 42
+    await delete_api_key_rpm("pool-test")
+    assert await redis_pool.get_redis("rate_limit").get("apikey:rpm:pool-test") is None
+    await limiter.disconnect()
+
+    assert redis_pool.get_redis_pool_stats()["rate_limit"]["idle"] == 1
+
+
+async def test_close_redis_pools_drops_loop_pools():
+    """Após close_redis_pools o loop recebe pools novos; health check por finalidade"""
+    health = await redis_pool.check_redis_health()
+    assert set(health) == set(redis_pool.PURPOSES)
+    assert all(state == "ok" for state in health.values())
+
+    before = redis_pool.get_redis("default").connection_pool
+    await redis_pool.close_redis_pools()
+
+    assert redis_pool.get_redis_pool_stats() == {}
+    assert redis_pool.get_redis("default").connection_pool is not before
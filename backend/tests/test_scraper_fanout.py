@@ -0,0 +1,128 @@
+"""
+Testes do fan-out concorrente de scrapers (task start_investigation)
+"""
+
+import asyncio
+import gc
+import weakref
+
+import pytest
+
+from app.core.config import settings
+from app.core.queue import ScraperType
+from app.workers import scraper_fanout
+from app.workers.scraper_fanout import ScraperJob, build_investigation_jobs, run_scraper_fanout
+
+
+def _job(source: ScraperType, delay: float, results=None, timeout: float = 5.0, error=None):
+    async def run():
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return results or []
+
+    return ScraperJob(source=source, category="properties", run=run, timeout=timeout)
+
+
+@pytest.mark.asyncio
+async def test_fanout_runs_sources_concurrently():
+    """Tempo total ≈ fonte mais lenta, não a soma"""
+    jobs = [
+        _job(ScraperType.CAR, 0.2, [{"id": 1}]),
+        _job(ScraperType.INCRA, 0.2, [{"id": 2}]),
+        _job(ScraperType.RECEITA, 0.2, [{"id": 3}]),
+    ]
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    outcomes = await run_scraper_fanout(jobs)
+    elapsed = loop.time() - started
+
+    assert len(outcomes) == 3
+    assert all(o.ok for o in outcomes)
+    assert elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_fanout_reports_results_as_each_source_finishes():
+    """Callback recebe as fontes por ordem de conclusão"""
+    jobs = [
+        _job(ScraperType.CAR, 0.15, [{"id": 1}]),
+        _job(ScraperType.RECEITA, 0.01, [{"id": 2}]),
+    ]
+    seen = []
+
+    async def on_result(outcome):
+        seen.append(outcome.source)
+
+    await run_scraper_fanout(jobs, on_result=on_result)
+
+    assert seen == [ScraperType.RECEITA, ScraperType.CAR]
+
+
+@pytest.mark.asyncio
+async def test_fanout_per_source_timeout_and_error_isolated():
+    """Timeout ou erro numa fonte não afeta as restantes"""
+    jobs = [
+        _job(ScraperType.CAR, 1.0, timeout=0.05),
+        _job(ScraperType.INCRA, 0.0, error=RuntimeError("portal fora do ar")),
+        _job(ScraperType.RECEITA, 0.0, [{"cnpj": "x"}]),
+    ]
+
+    outcomes = {o.source: o for o in await run_scraper_fanout(jobs)}
+
+    assert "Timeout" in outcomes[ScraperType.CAR].error
+    assert outcomes[ScraperType.INCRA].error == "portal fora do ar"
+    assert outcomes[ScraperType.RECEITA].ok
+    assert outcomes[ScraperType.RECEITA].results == [{"cnpj": "x"}]
+
+
+@pytest.mark.asyncio
+async def test_fanout_respects_concurrency_ceiling(monkeypatch):
+    """Nunca mais fontes em execução do que SCRAPER_FANOUT_MAX_CONCURRENCY"""
+    monkeypatch.setattr(settings, "SCRAPER_FANOUT_MAX_CONCURRENCY", 2)
+    running = 0
+    peak = 0
+
+    async def run():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return []
+
+    jobs = [
+        ScraperJob(source=st, category="properties", run=run, timeout=5.0) for st in ScraperType
+    ]
+    await run_scraper_fanout(jobs)
+
+    assert peak == 2
+
+
+def test_fanout_releases_event_loop_after_contention(monkeypatch):
+    """Semáforo disputado não prende o loop de cada asyncio.run (task Celery)"""
+    monkeypatch.setattr(settings, "SCRAPER_FANOUT_MAX_CONCURRENCY", 1)
+    loops = []
+
+    async def task_run():
+        loops.append(weakref.ref(asyncio.get_running_loop()))
+        jobs = [_job(ScraperType.CAR, 0.01), _job(ScraperType.INCRA, 0.01)]
+        await run_scraper_fanout(jobs)
+
+    for _ in range(3):
+        asyncio.run(task_run())
+    gc.collect()
+
+    assert len(scraper_fanout._loop_limits) == 0
+    assert all(ref() is None for ref in loops)
+
+
+def test_build_investigation_jobs_skips_receita_without_document():
+    """Receita só entra no fan-out quando há CPF/CNPJ"""
+    without_doc = build_investigation_jobs("Fazenda Teste", None)
+    with_doc = build_investigation_jobs("Fazenda Teste", "12.345.678/0001-90")
+
+    assert [j.source for j in without_doc] == [ScraperType.CAR, ScraperType.INCRA]
+    assert ScraperType.RECEITA in [j.source for j in with_doc]
+    assert next(j for j in with_doc if j.source == ScraperType.RECEITA).category == "companies"
@@ -52,8 +52,11 @@ async def test_admin_dashboard_platform_metrics(mock_db):
     """Testa métricas da plataforma"""
     from app.analytics.admin_dashboard import AdminDashboard
 
-    mock_db.query.return_value.scalar.return_value = 100
-    mock_db.query.return_value.filter.return_value.scalar.return_value = 75
+    users = Mock()
+    users.one.return_value = (100, 75, 10, 5)
+    investigations = Mock()
+    investigations.one.return_value = (50, 20, 10, 5, 15)
+    mock_db.execute = AsyncMock(side_effect=[users, investigations])
 
     dashboard = AdminDashboard(mock_db)
     result = await dashboard.get_platform_metrics()
@@ -68,7 +71,9 @@ async def test_admin_dashboard_conversion_rate(mock_db):
     """Testa taxa de conversão"""
     from app.analytics.admin_dashboard import AdminDashboard
 
-    mock_db.query.return_value.filter.return_value.scalar.side_effect = [100, 80, 10, 5, 5]
+    row = Mock()
+    row.one.return_value = (100, 80, 10, 5, 5)
+    mock_db.execute = AsyncMock(return_value=row)
 
     dashboard = AdminDashboard(mock_db)
     result = await dashboard.get_conversion_rate()
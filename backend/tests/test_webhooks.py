@@ -0,0 +1,136 @@
+"""
+Testes da outbox de webhooks e do dispatcher concorrente
+"""
+
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock
+
+import httpx
+from sqlalchemy import select
+
+from app.services import webhooks as webhooks_module
+from app.services.webhooks import (
+    Webhook,
+    WebhookDelivery,
+    WebhookEvent,
+    WebhookOutbox,
+    WebhookService,
+)
+
+
+def _mock_client(monkeypatch, received: list):
+    """Cliente HTTP partilhado substituído: /slow demora, /fail responde 500"""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        received.append(request)
+        if "slow" in request.url.path:
+            await asyncio.sleep(0.3)
+        if "fail" in request.url.path:
+            return httpx.Response(500, text="erro")
+        return httpx.Response(200, text="ok")
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(webhooks_module, "get_http_client", lambda url: client)
+    return client
+
+
+async def _webhook(db_session, url: str, user_id: int = 1) -> Webhook:
+    return await WebhookService.create_webhook(
+        db_session, user_id, url, [WebhookEvent.INVESTIGATION_COMPLETED.value], secret="s3cret"
+    )
+
+
+async def test_trigger_event_enqueues_and_dispatches_concurrently(db_session, monkeypatch):
+    """Eventos vão para a outbox; o dispatcher entrega em paralelo e reagenda falhas"""
+    received: list = []
+    client = _mock_client(monkeypatch, received)
+    schedule = AsyncMock(return_value=True)
+    monkeypatch.setattr(webhooks_module, "schedule_webhook_dispatch", schedule)
+
+    slow_a = await _webhook(db_session, "https://a.example.com/slow")
+    slow_b = await _webhook(db_session, "https://b.example.com/slow")
+    failing = await _webhook(db_session, "https://c.example.com/fail")
+    await WebhookService.create_webhook(
+        db_session, 1, "https://d.example.com/", [WebhookEvent.USER_CREATED.value]
+    )
+
+    queued = await WebhookService.trigger_event(
+        db_session, 1, WebhookEvent.INVESTIGATION_COMPLETED, {"investigation_id": 7}
+    )
+    assert queued == 3
+    assert received == []
+    schedule.assert_awaited_once()
+
+    started = time.perf_counter()
+    stats = await WebhookService.dispatch_outbox(db_session)
+    elapsed = time.perf_counter() - started
+
+    assert stats == {"claimed": 3, "delivered": 2, "retrying": 1, "failed": 0}
+    assert elapsed < 0.55  # dois receptores lentos (0.3s) em paralelo
+    body = received[0].content
+    assert received[0].headers["X-Webhook-Signature"] == WebhookService.generate_signature(
+        json.loads(body), "s3cret"
+    )
+
+    rows = {
+        row.webhook_id: row for row in (await db_session.execute(select(WebhookOutbox))).scalars()
+    }
+    assert rows[slow_a.id].status == rows[slow_b.id].status == WebhookOutbox.STATUS_DELIVERED
+    retry = rows[failing.id]
+    assert (retry.status, retry.attempts) == (WebhookOutbox.STATUS_PENDING, 1)
+    assert retry.last_error.startswith("HTTP 500")
+    deliveries = (await db_session.execute(select(WebhookDelivery))).scalars().all()
+    assert sorted(d.success for d in deliveries) == [False, True, True]
+    await db_session.refresh(failing)
+    assert failing.failure_count == 1
+
+    # Ainda não é devido: nada a reclamar
+    assert (await WebhookService.dispatch_outbox(db_session))["claimed"] == 0
+    assert await WebhookService.next_attempt_at(db_session) == retry.next_attempt_at
+    await client.aclose()
+
+
+async def test_dispatch_marks_failed_after_max_attempts(db_session, monkeypatch):
+    """Esgotadas as tentativas a linha fica failed; atraso de retry exponencial e limitado"""
+    received: list = []
+    client = _mock_client(monkeypatch, received)
+    monkeypatch.setattr(webhooks_module, "schedule_webhook_dispatch", AsyncMock())
+    monkeypatch.setattr(webhooks_module.settings, "WEBHOOK_MAX_ATTEMPTS", 1)
+
+    await _webhook(db_session, "https://c.example.com/fail")
+    await WebhookService.trigger_event(db_session, 1, WebhookEvent.INVESTIGATION_COMPLETED, {})
+    stats = await WebhookService.dispatch_outbox(db_session)
+
+    assert stats["failed"] == 1
+    assert await WebhookService.next_attempt_at(db_session) is None
+    base = webhooks_module.settings.WEBHOOK_RETRY_BASE_SECONDS
+    assert [WebhookService.retry_delay(n) for n in (1, 2, 3)] == [base, base * 2, base * 4]
+    assert WebhookService.retry_delay(50) == webhooks_module.settings.WEBHOOK_RETRY_MAX_SECONDS
+    await client.aclose()
+
+
+def test_lease_covers_worst_case_batch(monkeypatch):
+    """A reserva cobre o lote inteiro com a concorrência mínima e POSTs até ao timeout"""
+    monkeypatch.setattr(webhooks_module.settings, "WEBHOOK_ENDPOINT_CONCURRENCY", 2)
+    monkeypatch.setattr(webhooks_module.settings, "WEBHOOK_DISPATCH_CONCURRENCY", 20)
+    monkeypatch.setattr(webhooks_module.settings, "WEBHOOK_DISPATCH_LEASE_SECONDS", 120.0)
+
+    assert WebhookService.lease_seconds(1) == WebhookService.TIMEOUT + 120.0
+    assert WebhookService.lease_seconds(100) == 50 * WebhookService.TIMEOUT + 120.0
+
+
+def test_webhook_disabled_only_after_max_attempts(monkeypatch):
+    """O webhook só é desabilitado quando uma entrega esgota WEBHOOK_MAX_ATTEMPTS"""
+    monkeypatch.setattr(webhooks_module.settings, "WEBHOOK_MAX_ATTEMPTS", 6)
+    webhook = Webhook(id=1, url="https://c.example.com/fail", secret="s", failure_count=0)
+    webhook.is_active = True
+    failure = (500, "erro", "HTTP 500: erro")
+
+    for _ in range(5):
+        WebhookService._record_result(webhook, "investigation.completed", {}, failure)
+    assert webhook.is_active
+
+    WebhookService._record_result(webhook, "investigation.completed", {}, failure)
+    assert not webhook.is_active
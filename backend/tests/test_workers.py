@@ -63,6 +63,45 @@ async def test_worker_timeout_configuration():
     assert worker.TIMEOUTS[ScraperType.DIARIO_OFICIAL] == 180
 
 
+def test_worker_slots_from_config(monkeypatch):
+    """Slots por tipo vêm de SCRAPER_WORKER_SLOTS, com default global"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "SCRAPER_WORKER_SLOTS", {"cartorios": 4})
+    monkeypatch.setattr(settings, "SCRAPER_WORKER_SLOTS_DEFAULT", 2)
+
+    assert ScraperWorker(ScraperType.CARTORIOS).slots == 4
+    assert ScraperWorker(ScraperType.CAR).slots == 2
+    assert ScraperWorker(ScraperType.CAR, slots=6).slots == 6
+
+
+def test_worker_active_slots_follow_circuit_breaker():
+    """Falhas consecutivas reduzem slots; circuito aberto deixa um único slot"""
+    worker = ScraperWorker(ScraperType.CARTORIOS, slots=4)
+    circuit = {"is_open": False, "failures": 0, "threshold": 5}
+
+    assert worker._compute_active_slots(circuit) == 4
+    assert worker._compute_active_slots({**circuit, "failures": 3}) == 2
+    assert worker._compute_active_slots({**circuit, "failures": 5}) == 1
+    assert worker._compute_active_slots({**circuit, "is_open": True}) == 1
+
+
+def test_worker_active_slots_follow_upstream_rate_limit(monkeypatch):
+    """Com RPM upstream, slots úteis = rpm × duração média / 60"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "SCRAPER_UPSTREAM_RPM", {"receita": 6})
+    worker = ScraperWorker(ScraperType.RECEITA, slots=5)
+
+    assert worker._compute_active_slots(None) == 5  # sem histórico de duração
+
+    worker._task_started()
+    worker._task_finished(20.0)
+
+    assert worker.busy_slots == 0
+    assert worker._compute_active_slots(None) == 2
+
+
 @pytest.mark.asyncio
 @patch("app.workers.scraper_workers.notify_task_started")
 @patch("app.workers.scraper_workers.notify_task_completed")
@@ -131,6 +170,91 @@ async def test_worker_handles_task_failure(mock_notify_failed, clean_redis):
     assert updated_task.retry_count == 1
 
 
+@pytest.mark.asyncio
+async def test_worker_releases_task_dequeued_after_stop(clean_redis):
+    """Task retirada da fila depois do stop volta à fila em vez de ser executada"""
+    worker = ScraperWorker(ScraperType.CAR)
+    worker.scraper.search = AsyncMock(return_value=[])
+
+    task = Task(
+        id="test_task_stopped",
+        type=ScraperType.CAR,
+        priority=TaskPriority.NORMAL,
+        investigation_id="inv_stop",
+        params={"name": "Test"},
+    )
+    await queue_manager.enqueue(task)
+
+    await worker.stop()
+    await worker._process_next_task()
+
+    worker.scraper.search.assert_not_called()
+    released = await queue_manager.get_task("test_task_stopped")
+    assert released.status == TaskStatus.PENDING
+    assert await queue_manager.queue_length(ScraperType.CAR, TaskPriority.NORMAL) == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_stop_cancels_idle_slots(clean_redis, monkeypatch):
+    """stop() cancela os slots à espera de task e aguarda o fim de todos"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "QUEUE_DEQUEUE_BLOCK_TIMEOUT", 0.5)
+    worker = ScraperWorker(ScraperType.CAR, slots=2)
+    worker.scraper.search = AsyncMock(return_value=[])
+
+    start_task = asyncio.create_task(worker.start())
+    await asyncio.sleep(0.2)
+
+    # No máximo o timeout do dequeue bloqueante em curso
+    await asyncio.wait_for(worker.stop(), timeout=2)
+    await asyncio.wait_for(start_task, timeout=1)
+
+    task = Task(
+        id="test_task_after_stop",
+        type=ScraperType.CAR,
+        priority=TaskPriority.NORMAL,
+        investigation_id="inv_stop",
+        params={"name": "Test"},
+    )
+    await queue_manager.enqueue(task)
+    await asyncio.sleep(0.2)
+
+    worker.scraper.search.assert_not_called()
+    assert await queue_manager.queue_length(ScraperType.CAR, TaskPriority.NORMAL) == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_stop_returns_task_popped_by_inflight_dequeue(clean_redis, monkeypatch):
+    """Task entregue ao dequeue já cancelado pelo stop() volta à fila"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "QUEUE_DEQUEUE_BLOCK_TIMEOUT", 1.0)
+    worker = ScraperWorker(ScraperType.CAR, slots=1)
+    worker.scraper.search = AsyncMock(return_value=[])
+
+    start_task = asyncio.create_task(worker.start())
+    await asyncio.sleep(0.2)
+    stop_task = asyncio.create_task(worker.stop())
+    await asyncio.sleep(0)
+
+    task = Task(
+        id="test_task_inflight",
+        type=ScraperType.CAR,
+        priority=TaskPriority.NORMAL,
+        investigation_id="inv_stop",
+        params={"name": "Test"},
+    )
+    await queue_manager.enqueue(task)
+    await asyncio.wait_for(stop_task, timeout=3)
+    await asyncio.wait_for(start_task, timeout=1)
+
+    worker.scraper.search.assert_not_called()
+    released = await queue_manager.get_task("test_task_inflight")
+    assert released.status == TaskStatus.PENDING
+    assert await queue_manager.queue_length(ScraperType.CAR, TaskPriority.NORMAL) == 1
+
+
 @pytest.mark.asyncio
 async def test_worker_timeout(clean_redis):
     """Testa timeout de task"""